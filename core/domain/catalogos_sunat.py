@@ -1,26 +1,38 @@
 """
 Catálogos oficiales SUNAT para PLAME (Tabla 21 y Tabla 22).
 
-Los datos se leen desde archivos CSV en la raíz del proyecto:
+Fuente de verdad: archivos CSV en la raíz del proyecto
   - tabla_ingresos_plame.csv  → CATALOGO_T22_INGRESOS
   - suspensiones_plame.csv    → CATALOGO_T21_SUSPENSIONES
 
-Si los archivos no existen, se usan tablas de fallback con los conceptos
-más frecuentes.  Para actualizar el catálogo, edita el CSV y reinicia.
+En ejecución normal no se leen: se cargan desde el artefacto precompilado
+`catalogos_sunat_compilado.py` (python scripts/compilar_catalogos.py), que guarda
+el SHA-256 de cada CSV y de los datos. Si el artefacto falta, está alterado o algún
+CSV cambió después de compilarlo, se vuelve a parsear el CSV con pandas; y si los
+CSV tampoco existen, se usan tablas de fallback con los conceptos más frecuentes.
+
+Los catálogos son de solo lectura (MappingProxyType).
 """
+import hashlib
+import json
 from pathlib import Path
-import pandas as pd
+from types import MappingProxyType
 
 # Directorio raíz del proyecto (2 niveles arriba de core/domain/)
 _BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
+_CSV_T22 = "tabla_ingresos_plame.csv"
+_CSV_T21 = "suspensiones_plame.csv"
+_ARTEFACTO = Path(__file__).with_name("catalogos_sunat_compilado.py")
+
 
-def _leer_csv(filename: str) -> pd.DataFrame | None:
+def _leer_csv(filename: str):
     """Lee un CSV con encoding UTF-8; intenta latin-1 como fallback para
     preservar tildes y eñes escritas con otros editores."""
     path = _BASE_DIR / filename
     if not path.exists():
         return None
+    import pandas as pd  # solo en el camino de fallback: el artefacto no lo necesita
     for enc in ("utf-8", "utf-8-sig", "latin-1"):
         try:
             df = pd.read_csv(path, dtype=str, encoding=enc, sep=",")
@@ -33,7 +45,7 @@ def _leer_csv(filename: str) -> pd.DataFrame | None:
 
 def _cargar_t22() -> dict:
     """Tabla 22 PLAME — Conceptos Remunerativos."""
-    df = _leer_csv("tabla_ingresos_plame.csv")
+    df = _leer_csv(_CSV_T22)
     if df is not None and not df.empty:
         result: dict = {}
         for _, row in df.iterrows():
@@ -178,7 +190,7 @@ def _cargar_t22() -> dict:
 
 def _cargar_t21() -> dict:
     """Tabla 21 PLAME — Tipos de suspensión / inasistencia."""
-    df = _leer_csv("suspensiones_plame.csv")
+    df = _leer_csv(_CSV_T21)
     if df is not None and not df.empty:
         result: dict = {}
         for _, row in df.iterrows():
@@ -222,6 +234,74 @@ def _cargar_t21() -> dict:
     }
 
 
+# ── Artefacto precompilado ───────────────────────────────────────────────────
+def _hash_archivo(filename: str):
+    """SHA-256 del CSV fuente, o None si no existe."""
+    path = _BASE_DIR / filename
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _digest_datos(t22: dict, t21: dict) -> str:
+    contenido = json.dumps({"t21": t21, "t22": t22}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _cargar_artefacto():
+    """(t22, t21) desde el artefacto si está íntegro y al día con los CSV; si no, None."""
+    try:
+        from core.domain import catalogos_sunat_compilado as art
+    except ImportError:
+        return None
+    try:
+        if art.DIGEST_DATOS != _digest_datos(art.T22, art.T21):
+            return None
+        for filename, hash_compilado in art.HASH_FUENTES.items():
+            if _hash_archivo(filename) != hash_compilado:
+                return None
+    except AttributeError:
+        return None
+    return art.T22, art.T21
+
+
+def compilar_artefacto(destino: Path = _ARTEFACTO) -> dict:
+    """
+    Parsea los CSV (o el fallback) y escribe el artefacto como módulo Python con
+    literales. Retorna {"t22": n, "t21": n, "digest": sha256}.
+    """
+    t22, t21 = _cargar_t22(), _cargar_t21()
+    digest = _digest_datos(t22, t21)
+    fuentes = {_CSV_T22: _hash_archivo(_CSV_T22), _CSV_T21: _hash_archivo(_CSV_T21)}
+    lineas = [
+        '"""Catálogos SUNAT precompilados. GENERADO por scripts/compilar_catalogos.py — no editar."""',
+        "",
+        f"HASH_FUENTES = {fuentes!r}",
+        f"DIGEST_DATOS = {digest!r}",
+        "",
+        "T22 = {",
+        *(f"    {cod!r}: {info!r}," for cod, info in sorted(t22.items())),
+        "}",
+        "",
+        "T21 = {",
+        *(f"    {cod!r}: {desc!r}," for cod, desc in sorted(t21.items())),
+        "}",
+        "",
+    ]
+    Path(destino).write_text("\n".join(lineas), encoding="utf-8")
+    return {"t22": len(t22), "t21": len(t21), "digest": digest}
+
+
+def _cargar_catalogos() -> tuple:
+    catalogos = _cargar_artefacto()
+    if catalogos is None:
+        catalogos = _cargar_t22(), _cargar_t21()
+    t22, t21 = catalogos
+    return (
+        MappingProxyType({cod: MappingProxyType(dict(info)) for cod, info in t22.items()}),
+        MappingProxyType(dict(t21)),
+    )
+
+
 # ── Módulo-level constants ────────────────────────────────────────────────────
-CATALOGO_T22_INGRESOS: dict     = _cargar_t22()
-CATALOGO_T21_SUSPENSIONES: dict = _cargar_t21()
+CATALOGO_T22_INGRESOS, CATALOGO_T21_SUSPENSIONES = _cargar_catalogos()
@@ -0,0 +1,174 @@
+"""Catálogos SUNAT precompilados. GENERADO por scripts/compilar_catalogos.py — no editar."""
+
+HASH_FUENTES = {'tabla_ingresos_plame.csv': 'd68900bd01ee0ca3fea94a279ce93fcbd741de64b756298c9ef4f3fb481bd02d', 'suspensiones_plame.csv': '33711ca06b332b9f3d9b3c46047f7a2ddb366383d8e08dd8344d9ec162d3ba57'}
+DIGEST_DATOS = 'f357d637cee69bd4ea8a27057ef15755f910ee02017a217707d79289c86fc389'
+
+T22 = {
+    '0101': {'desc': 'ALIMENTACION PRINCIPAL EN DINERO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0102': {'desc': 'ALIMENTACION PRINCIPAL EN ESPECIE', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0103': {'desc': 'COMISIONES O DESTAJO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0104': {'desc': 'COMISIONES EVENTUALES A TRABAJADORES', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0105': {'desc': 'TRABAJO EN SOBRETIEMPO (HORAS EXTRAS) 25%', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0106': {'desc': 'TRABAJO EN SOBRETIEMPO (HORAS EXTRAS) 35%', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0107': {'desc': 'TRABAJO EN DIA FERIADO O DIA DE DESCANSO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0108': {'desc': 'INCREMENTO EN SNP 3.3%', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0109': {'desc': 'INCREMENTO POR AFILIACION A AFP 10.23%', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0110': {'desc': 'INCREMENTO POR AFILIACION A AFP 3.00%', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': True},
+    '0111': {'desc': 'PREMIOS POR VENTAS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0112': {'desc': 'PRESTACIONES ALIMENTARIAS - SUMINISTROS DIRECTOS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0113': {'desc': 'PRESTACIONES ALIMENTARIAS - SUMINISTROS INDIRECTOS', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0114': {'desc': 'VACACIONES TRUNCAS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0115': {'desc': 'REMUNERACION DIA DE DESCANSO Y FERIADOS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0116': {'desc': 'REMUNERACION EN ESPECIE', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0117': {'desc': 'COMPENSACION VACACIONAL', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0118': {'desc': 'REMUNERACION VACACIONAL', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0119': {'desc': 'REMUNERACIONES DEVENGADAS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0120': {'desc': 'SUBVENCION ECONOMICA MENSUAL (PRACTICANTE SENATI)', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': True},
+    '0121': {'desc': 'REMUNERACION O JORNAL BASICO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0122': {'desc': 'REMUNERACION PERMANENTE', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0123': {'desc': 'REMUNERACION DE LOS SOCIOS DE COOPERATIVAS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0124': {'desc': 'REMUNERACION POR LA HORA DE PERMISO POR LACTANCIA', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': True},
+    '0125': {'desc': 'REMUNERACION INTEGRAL ANUAL - CUOTA', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0126': {'desc': 'INGRESOS DEL CONDUCTOR DE LA MICROEMPRESA AFILIADO AL SIS', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': False},
+    '0127': {'desc': 'INGRESOS DEL CONDUCTOR DE LA MICROEMPRESA - SEGURO REGULAR', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': True},
+    '0128': {'desc': 'REMUNERACION QUE EXCEDE EL VALOR DE MERCADO (DIVIDENDOS)', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': True},
+    '0129': {'desc': 'ESTIPENDIO MENSUAL INTERNO CIENCIAS DE LA SALUD', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': True},
+    '0201': {'desc': 'ASIGNACION FAMILIAR', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0202': {'desc': 'ASIGNACION O BONIFICACION POR EDUCACION', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0203': {'desc': 'ASIGNACION POR CUMPLEANOS', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0204': {'desc': 'ASIGNACION POR MATRIMONIO', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0205': {'desc': 'ASIGNACION POR NACIMIENTO DE HIJOS', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0206': {'desc': 'ASIGNACION POR FALLECIMIENTO DE FAMILIARES', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0207': {'desc': 'ASIGNACION POR OTROS MOTIVOS PERSONALES', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0208': {'desc': 'ASIGNACION POR FESTIVIDAD', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0209': {'desc': 'ASIGNACION PROVISIONAL DEMANDA TRABAJADOR DESPEDIDO', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0210': {'desc': 'ASIGNACION VACACIONAL', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0211': {'desc': 'ASIGNACION POR ESCOLARIDAD 30 JORNALES BASICOS/ANO', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0212': {'desc': 'ASIGNACIONES OTORGADAS POR UNICA VEZ POR CONTINGENCIAS', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0213': {'desc': 'ASIGNACIONES OTORGADAS REGULARMENTE', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0214': {'desc': 'ASIGNACION POR FALLECIMIENTO 1 UIT', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0301': {'desc': 'BONIFICACION POR 25 Y 30 ANOS DE SERVICIOS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0302': {'desc': 'BONIFICACION POR CIERRE DE PLIEGO', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0303': {'desc': 'BONIFICACION POR PRODUCCION ALTURA TURNO ETC', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0304': {'desc': 'BONIFICACION POR RIESGO DE CAJA', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0305': {'desc': 'BONIFICACIONES POR TIEMPO DE SERVICIOS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0306': {'desc': 'BONIFICACIONES REGULARES', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0307': {'desc': 'BONIFICACIONES CAFAE', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0308': {'desc': 'COMPENSACION POR TRABAJOS EN DIAS DE DESCANSO Y FERIADOS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0309': {'desc': 'BONIFICACION POR TURNO NOCTURNO 20% JORNAL BASICO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0310': {'desc': 'BONIFICACION CONTACTO DIRECTO CON AGUA 20% JORNAL BASICO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0311': {'desc': 'BONIFICACION UNIFICADA DE CONSTRUCCION', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0312': {'desc': 'BONIFICACION EXTRAORDINARIA TEMPORAL - LEY 29351 Y 30334', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0313': {'desc': 'BONIFICACION EXTRAORDINARIA PROPORCIONAL - LEY 29351 Y 30334', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0314': {'desc': 'BONIFICACION ESPECIAL POR TRABAJO AGRARIO LEY 31110', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0401': {'desc': 'GRATIFICACIONES DE FIESTAS PATRIAS Y NAVIDAD', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0402': {'desc': 'OTRAS GRATIFICACIONES ORDINARIAS', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0403': {'desc': 'GRATIFICACIONES EXTRAORDINARIAS', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0404': {'desc': 'AGUINALDOS DE JULIO Y DICIEMBRE', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0405': {'desc': 'GRATIFICACIONES PROPORCIONAL', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0406': {'desc': 'GRATIFICACIONES FIESTAS PATRIAS Y NAVIDAD - LEY 29351 Y 30334', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0407': {'desc': 'GRATIFICACIONES PROPORCIONAL - LEY 29351 Y 30334', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0408': {'desc': 'GRATIF FIESTAS PATRIAS NAVIDAD TRAB PESQ LEY 30334', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0409': {'desc': 'GRATIFICACIONES PROPORCIONAL/TRUNCA TRAB PESQUEROS LEY 30334', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0410': {'desc': 'GRATIF FORMA PARTE REMUNER EXCEDE VALOR DE MERCADO (DIVIDENDO)', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0411': {'desc': 'GRATIF PAGADAS INTERNOS SALUD DU 090-2020 NO GRAVADOS ESSALUD', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0501': {'desc': 'INDEMNIZACION POR DESPIDO INJUSTIFICADO U HOSTILIDAD', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0502': {'desc': 'INDEMNIZACION POR MUERTE O INCAPACIDAD', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0503': {'desc': 'INDEMNIZACION POR RESOLUCION DE CONTRATO SUJETO A MODALIDAD', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0504': {'desc': 'INDEMNIZACION POR VACACIONES NO GOZADAS', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0505': {'desc': 'INDEMNIZACION POR RETENCION INDEBIDA DE CTS ART 52', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0506': {'desc': 'INDEMNIZACION POR NO REINCORPORAR TRABAJADOR CESADO', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0507': {'desc': 'INDEMNIZACION POR HORAS EXTRAS IMPUESTAS POR EMPLEADOR', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0601': {'desc': 'SISTEMA PRIVADO DE PENSIONES - COMISIÓN PORCENTUAL', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0602': {'desc': 'CONAFOVICER', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0603': {'desc': 'CONTRIBUCIÓN SOLIDARIA PARA LA ASISTENCIA PREVISIONAL', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0604': {'desc': 'ESSALUD +VIDA', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0605': {'desc': 'RENTA QUINTA CATEGORÍA RETENCIONES', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0606': {'desc': 'SISTEMA PRIVADO DE PENSIONES - PRIMA DE SEGURO', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0607': {'desc': 'SISTEMA NACIONAL DE PENSIONES - D.L.19990', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0608': {'desc': 'SISTEMA PRIVADO DE PENSIONES - APORTACIÓN OBLIGATORIA', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0609': {'desc': 'SISTEMA PRIVADO DE PENSIONES - APORTACIÓN VOLUNTARIA', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0610': {'desc': 'ESSALUD - SEGURO REGULAR - PENSIONISTA', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0611': {'desc': 'OTROS APORTACIONES DEL TRABAJADOR / PENSIONISTA', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0612': {'desc': 'SISTEMA NACIONAL DE PENSIONES - ASEGURA TU PENSIÓN', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0613': {'desc': 'RÉGIMEN PENSIONARIO - D.L. 20530', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0614': {'desc': 'RÉGIMEN PENSIONARIO DEL SERV. DIPLOMÁTICO', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0615': {'desc': 'RÉGIMEN DE PENSIONES MILITAR-POLICIAL', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0616': {'desc': 'APORTE MENSUAL AL FCJMMS  -  LEY 29741 (1)', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0617': {'desc': 'CUOTA- FRACCIONAMIENTO- FONDO CJMMS - LEY 29741  (2)', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0618': {'desc': 'RENTA CUARTA CATEGORÍA RETENCIONES \x96CAS', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0619': {'desc': 'SNP \x96 TRABAJADOR INDEPENDIENTE - LEY 29903', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0620': {'desc': 'REP - TRAB. PESQUERO LEY 30003 \x96 RETENCIÓN', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0621': {'desc': 'RENTA QUINTA CATEGORÍA REGUL EJERC ANTERIOR', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0700': {'desc': 'DESCUENTOS AL TRABAJADOR', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0701': {'desc': 'ADELANTO SUELDO', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0702': {'desc': 'CUOTA SINDICAL', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0703': {'desc': 'DESCUENTO AUTORIZADO U ORDENADO POR MANDATO JUDICIAL', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0704': {'desc': 'TARDANZAS', 'tipo': 'DESCUENTO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0705': {'desc': 'INASISTENCIAS', 'tipo': 'DESCUENTO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0706': {'desc': 'OTROS DESCUENTOS NO DEDUCIBLES DE LA BASE IMPONIBLE', 'tipo': 'DESCUENTO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0707': {'desc': 'OTROS DESCUENTOS DEDUCIBLES DE LA BASE IMPONIBLE', 'tipo': 'DESCUENTO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0901': {'desc': 'BIENES DE LA EMPRESA OTORGADOS PARA CONSUMO DEL TRABAJADOR', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0902': {'desc': 'BONO DE PRODUCTIVIDAD', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0903': {'desc': 'CANASTA DE NAVIDAD O SIMILARES', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0904': {'desc': 'COMPENSACION POR TIEMPO DE SERVICIOS', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0905': {'desc': 'GASTOS DE REPRESENTACION - LIBRE DISPONIBILIDAD', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0906': {'desc': 'INCENTIVO POR CESE DEL TRABAJADOR', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0907': {'desc': 'LICENCIA CON GOCE DE HABER', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0908': {'desc': 'MOVILIDAD DE LIBRE DISPOSICION', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0909': {'desc': 'MOVILIDAD SUPEDITADA A ASISTENCIA Y QUE CUBRE SOLO EL TRASLADO', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0910': {'desc': 'PARTICIPACION EN UTILIDADES PAGADAS ANTES DE DECLARACION IR', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0911': {'desc': 'PARTICIPACION EN UTILIDADES PAGADAS DESPUES DE DECLARACION IR', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0912': {'desc': 'PENSIONES DE JUBILACION O CESANTIA MONTEPIO O INVALIDEZ', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0913': {'desc': 'RECARGO AL CONSUMO', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0914': {'desc': 'REFRIGERIO QUE NO ES ALIMENTACION PRINCIPAL', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0915': {'desc': 'SUBSIDIOS POR MATERNIDAD', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': False},
+    '0916': {'desc': 'SUBSIDIOS DE INCAPACIDAD POR ENFERMEDAD', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': False},
+    '0917': {'desc': 'CONDICIONES DE TRABAJO', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0918': {'desc': 'IMPUESTO A LA RENTA DE QUINTA CATEGORIA ASUMIDO', 'tipo': 'INGRESO', 'afp': True, 'quinta': False, 'essalud': True},
+    '0919': {'desc': 'SISTEMA NACIONAL DE PENSIONES ASUMIDO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0920': {'desc': 'SISTEMA PRIVADO DE PENSIONES ASUMIDO', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0921': {'desc': 'PENSIONES DE JUBILACION PENDIENTES POR LIQUIDAR', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0922': {'desc': 'SUMAS O BIENES QUE NO SON DE LIBRE DISPOSICION', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0923': {'desc': 'INGRESOS DE CUARTA CATEGORIA CONSIDERADOS DE QUINTA CATEGORIA', 'tipo': 'INGRESO', 'afp': False, 'quinta': True, 'essalud': False},
+    '0924': {'desc': 'INGRESOS CUARTA-QUINTA SIN RELACION DE DEPENDENCIA', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0925': {'desc': 'INGRESO DEL PESCADOR ARTESANAL INDEPENDIENTE - BASE ESSALUD', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': True},
+    '0926': {'desc': 'TRANSFERENCIA DIRECTA AL EXPESCADOR - LEY 30003', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0927': {'desc': 'BONIFICACION PRIMA TEXTIL', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0928': {'desc': 'DEVOLUCION RETENCION EXCESO IMP RENTA 5TA CAT', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0929': {'desc': 'OTRAS ASIGNACIONES QUE EXCEDEN VALOR DE MERCADO (DIVIDENDOS)', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0930': {'desc': 'REMUNERACION QUE EXCEDE VALOR DE MERCADO DE PERIODOS ANTERIORES', 'tipo': 'INGRESO', 'afp': False, 'quinta': False, 'essalud': False},
+    '0931': {'desc': 'PARTICIPACION PESCA CAPTURADA', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+    '0932': {'desc': 'REMUNERACION TRAB PESQUEROS GRAVADA CON REP ARM Y REP TRAB', 'tipo': 'INGRESO', 'afp': True, 'quinta': True, 'essalud': True},
+}
+
+T21 = {
+    '01': 'S.P. SANCIÓN DISCIPLINARIA',
+    '02': 'S.P. EJERCICIO DERECHO HUELGA',
+    '03': 'S.P. DETENCIÓN DEL TRABAJADOR',
+    '04': 'S.P. INHAB. ADMINIST., JUDICIAL O PENA PRIVATIVA',
+    '05': 'S.P. PERMISO, LICENCIA U OTROS SIN GOCE DE HABER',
+    '06': 'S.P. CASO FORTUITO O FUERZA MAYOR',
+    '07': 'S.P. FALTA NO JUSTIFICADA',
+    '08': 'S.P. POR TEMPORADA O INTERMITENTE',
+    '09': 'S.P. MATERNIDAD - PRE Y POST NATAL',
+    '10': 'S.P. SENTENCIA TERR, NARC,CORRUP Y VIOLAC.',
+    '11': 'S.P. IMPOSICIÓN MEDIDA CAUTELAR',
+    '12': 'S.P. ENFERM. PADRE, CÓNYUGE O CONVIVIENTE',
+    '20': 'S.I. ENFERM/ACCIDENTE (20 PRIMEROS DÍAS)',
+    '21': 'S.I. INCAP TEMPORAL (SUBSIDIADO))',
+    '22': 'S.I. MATERNIDAD - PRE Y POST NATAL',
+    '23': 'S.I. DESCANSO VACACIONAL',
+    '24': 'S.I. LIC  DESEMP CARGO CÍVICO Y PARA SMO',
+    '25': 'S.I. LIC DESEMPEÑO CARGOS SINDICALES',
+    '26': 'S.I. LICENCIA U OTROS MOTIVOS CON GOCE DE HABER',
+    '27': 'S.I. DÍAS COMPENS POR HORAS DE SOBRETIEMPO',
+    '28': 'S.I. DÍAS LICENCIA POR PATERNIDAD',
+    '29': 'S.I. DIAS LICENCIA POR ADOPCIÓN',
+    '30': 'S.I. IMPOSICS.I. IMPOSICIÓN MEDIDA CAUTELAR',
+    '31': 'S.I. CITAC. JUDICIAL, MILITAR, POLICIAL O ADMINIST.',
+    '32': 'S.I. FALLECIMIENTO PADRES,  HERMANOS, CÓNYUGE O HIJOS',
+    '33': 'S.I. REPRESENT. DEL ESTADO EN EVENTOS',
+    '34': 'S.I. DESC VACAC LIC POR ASISTE MÉDICA O TERAP REHAB',
+    '35': 'S.I. ENFERM. GRAVE O TERMINAL O ACCIDENTE GRAVE DE FAM DIRECTO',
+}
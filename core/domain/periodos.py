@@ -0,0 +1,7 @@
+def periodo_ordenable(periodo_key: str) -> int:
+    """'07-2026' -> 202607, para poder comparar periodos cronológicamente (0 si no es válido)."""
+    try:
+        mes, anio = periodo_key.split("-")
+        return int(anio) * 100 + int(mes)
+    except Exception:
+        return 0
@@ -0,0 +1,142 @@
+"""
+Consolidado multiempresa (vista holding).
+
+Arma una fila por empresa — dotación, costo laboral, cierres y boletas pendientes —
+solo con datos pre-agregados: ResumenPlanilla (escrito al guardar/cerrar) y los
+metadatos de PlanillaMensual. Nunca se abre el snapshot JSON de ninguna empresa, así
+que el costo es un número fijo de consultas agrupadas, sin importar cuántas empresas
+tenga el usuario.
+"""
+import pandas as pd
+from sqlalchemy import func, select
+
+from core.domain.periodos import periodo_ordenable
+from infrastructure.database.models import (
+    Empresa, Usuario, UsuarioEmpresa, PlanillaMensual, ResumenPlanilla,
+)
+
+COLUMNAS_CONSOLIDADO = [
+    "empresa_id", "Empresa", "RUC", "Último Cierre", "Trabajadores", "Locadores",
+    "Masa Salarial", "EsSalud", "Costo Laboral", "Neto Pagado",
+    "Cierres Pendientes", "Boletas Pendientes", "Sin Resumen",
+]
+
+
+def empresas_del_usuario(db, username: str) -> list:
+    """(id, razon_social, ruc) de las empresas visibles para el usuario (acceso_total → todas)."""
+    usuario = db.query(Usuario.id, Usuario.acceso_total).filter_by(username=username).first()
+    if usuario is None:
+        return []
+    q = db.query(Empresa.id, Empresa.razon_social, Empresa.ruc)
+    if not usuario.acceso_total:
+        q = q.filter(Empresa.id.in_(
+            select(UsuarioEmpresa.empresa_id).where(UsuarioEmpresa.usuario_id == usuario.id)
+        ))
+    return q.order_by(Empresa.razon_social).all()
+
+
+def _ultimos_resumenes_cerrados(db, empresa_ids) -> dict:
+    """empresa_id → ResumenPlanilla del último periodo CERRADO (una sola consulta con ventana)."""
+    orden = func.row_number().over(
+        partition_by=ResumenPlanilla.empresa_id,
+        order_by=ResumenPlanilla.fecha_calculo.desc(),
+    ).label("orden")
+    sub = (
+        select(ResumenPlanilla.id, orden)
+        .where(ResumenPlanilla.empresa_id.in_(empresa_ids), ResumenPlanilla.estado == 'CERRADA')
+        .subquery()
+    )
+    filas = (
+        db.query(ResumenPlanilla)
+        .join(sub, sub.c.id == ResumenPlanilla.id)
+        .filter(sub.c.orden == 1)
+        .all()
+    )
+    return {r.empresa_id: r for r in filas}
+
+
+def consolidar_holding(db, empresas, umbral_boletas: int = 0) -> pd.DataFrame:
+    """
+    Una fila por empresa de `empresas` (tuplas id, razon_social, ruc) con los KPIs del
+    último cierre y los pendientes. Boletas pendientes: periodos CERRADOS sin
+    autorizar cuyo periodo es >= `umbral_boletas` (AAAAMM).
+    """
+    if not empresas:
+        return pd.DataFrame(columns=COLUMNAS_CONSOLIDADO)
+    ids = [e.id for e in empresas]
+
+    resumenes = _ultimos_resumenes_cerrados(db, ids)
+
+    # Metadatos de planillas (sin snapshot): abiertas, cerradas sin autorizar y sin resumen
+    abiertas = dict(
+        db.query(PlanillaMensual.empresa_id, func.count(PlanillaMensual.id))
+        .filter(PlanillaMensual.empresa_id.in_(ids), PlanillaMensual.estado != 'CERRADA')
+        .group_by(PlanillaMensual.empresa_id)
+        .all()
+    )
+    sin_autorizar = (
+        db.query(PlanillaMensual.empresa_id, PlanillaMensual.periodo_key)
+        .filter(
+            PlanillaMensual.empresa_id.in_(ids),
+            PlanillaMensual.estado == 'CERRADA',
+            PlanillaMensual.boletas_autorizado.isnot(True),
+        )
+        .all()
+    )
+    boletas_pend = {}
+    for empresa_id, periodo_key in sin_autorizar:
+        if periodo_ordenable(periodo_key) >= umbral_boletas:
+            boletas_pend[empresa_id] = boletas_pend.get(empresa_id, 0) + 1
+
+    sin_resumen = dict(
+        db.query(PlanillaMensual.empresa_id, func.count(PlanillaMensual.id))
+        .outerjoin(ResumenPlanilla, (ResumenPlanilla.empresa_id == PlanillaMensual.empresa_id)
+                   & (ResumenPlanilla.periodo_key == PlanillaMensual.periodo_key))
+        .filter(PlanillaMensual.empresa_id.in_(ids), ResumenPlanilla.id.is_(None))
+        .group_by(PlanillaMensual.empresa_id)
+        .all()
+    )
+
+    filas = []
+    for e in empresas:
+        r = resumenes.get(e.id)
+        bruto = (r.total_bruto or 0.0) if r else 0.0
+        essalud = (r.total_essalud or 0.0) if r else 0.0
+        filas.append({
+            "empresa_id": e.id,
+            "Empresa": e.razon_social,
+            "RUC": e.ruc,
+            "Último Cierre": r.periodo_key if r else "—",
+            "Trabajadores": (r.n_trabajadores or 0) if r else 0,
+            "Locadores": (r.n_locadores or 0) if r else 0,
+            "Masa Salarial": bruto,
+            "EsSalud": essalud,
+            "Costo Laboral": round(bruto + essalud, 2),   # mismo criterio que dashboard.py
+            "Neto Pagado": (r.total_neto or 0.0) if r else 0.0,
+            "Cierres Pendientes": abiertas.get(e.id, 0),
+            "Boletas Pendientes": boletas_pend.get(e.id, 0),
+            "Sin Resumen": sin_resumen.get(e.id, 0),
+        })
+    return pd.DataFrame(filas, columns=COLUMNAS_CONSOLIDADO)
+
+
+def generar_resumenes_faltantes(db, empresa_ids) -> int:
+    """
+    Crea el ResumenPlanilla de las planillas que aún no lo tienen (anteriores a la
+    tabla), decodificando su snapshot de a una. Retorna cuántos se generaron.
+    """
+    from infrastructure.repositories.repo_planilla import actualizar_resumen_planilla, obtener_planilla
+
+    faltantes = (
+        db.query(PlanillaMensual.empresa_id, PlanillaMensual.periodo_key)
+        .outerjoin(ResumenPlanilla, (ResumenPlanilla.empresa_id == PlanillaMensual.empresa_id)
+                   & (ResumenPlanilla.periodo_key == PlanillaMensual.periodo_key))
+        .filter(PlanillaMensual.empresa_id.in_(empresa_ids), ResumenPlanilla.id.is_(None))
+        .all()
+    )
+    for empresa_id, periodo_key in faltantes:
+        planilla = obtener_planilla(db, empresa_id, periodo_key)
+        actualizar_resumen_planilla(db, planilla)
+        db.commit()
+        db.expunge(planilla)  # libera el snapshot antes de la siguiente
+    return len(faltantes)
@@ -4,10 +4,15 @@ import io
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from PyPDF2 import PdfReader, PdfWriter
 
 def encriptar_pdf_en_memoria(buffer_pdf_original, password):
-    """Encripta un PDF en memoria usando el DNI como contraseña."""
+    """
+    Encripta un PDF en memoria usando el DNI como contraseña.
+    Solo para PDFs ya generados: las boletas se encriptan al renderizar
+    (`generar_pdf_boletas_masivas(..., password=dni)`), sin este re-parseo.
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
     reader = PdfReader(buffer_pdf_original)
     writer = PdfWriter()
 
@@ -0,0 +1,130 @@
+"""
+Tablas Excel en modo streaming, compartidas por los reportes de cálculo (sábana,
+locadores) y los de beneficios sociales (gratificaciones, CTS).
+
+Los Excel se escriben con openpyxl write_only: las filas se emiten en orden y no
+se mantiene la hoja completa en memoria para luego recorrerla celda por celda.
+Los estilos se registran una vez por libro como NamedStyle y cada celda solo
+referencia el nombre.
+"""
+import io
+from copy import copy
+from datetime import datetime, date
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Font, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+
+_BORDE_FINO = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+# Mismo formato que pandas.to_excel aplica a fechas
+_FMT_FECHA = "YYYY-MM-DD"
+_FMT_FECHA_HORA = "YYYY-MM-DD HH:MM:SS"
+
+
+def estilos_tabla_corporativa():
+    """Cabecera azul corporativa, celdas con borde fino y fila de totales gris."""
+    return {
+        "cabecera": NamedStyle(
+            name="corp_cabecera", font=Font(color="FFFFFF", bold=True), border=_BORDE_FINO,
+            fill=PatternFill(start_color="1A365D", end_color="1A365D", fill_type="solid"),
+            alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+        ),
+        "dato": NamedStyle(name="corp_dato", font=copy(DEFAULT_FONT), border=_BORDE_FINO),
+        "total": NamedStyle(
+            name="corp_total", font=Font(bold=True), border=_BORDE_FINO,
+            fill=PatternFill(start_color="E2E8F0", end_color="E2E8F0", fill_type="solid"),
+        ),
+    }
+
+
+def estilos_tabla_simple():
+    """Estilo de cabecera por defecto de pandas.to_excel; datos sin formato."""
+    return {
+        "cabecera": NamedStyle(
+            name="simple_cabecera", font=Font(bold=True), border=_BORDE_FINO,
+            alignment=Alignment(horizontal="center", vertical="top"),
+        ),
+        "dato": None,
+        "total": None,
+    }
+
+
+def _valor_excel(v):
+    """Convierte un valor de DataFrame al tipo que openpyxl escribe (NaN → celda vacía)."""
+    if v is None:
+        return None
+    try:
+        if pd.isna(v):
+            return None
+    except (TypeError, ValueError):
+        pass
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime()
+    return v.item() if hasattr(v, "item") else v
+
+
+def _celda(ws, valor, estilo=None, font=None):
+    cell = WriteOnlyCell(ws, value=valor)
+    if estilo is not None:
+        cell.style = estilo
+    if font is not None:
+        cell.font = font
+    if isinstance(valor, datetime):
+        cell.number_format = _FMT_FECHA_HORA
+    elif isinstance(valor, date):
+        cell.number_format = _FMT_FECHA
+    return cell
+
+
+def excel_tabla_streaming(df, sheet_name, titulos, fila_cabecera, estilos, fila_totales=False, ajustar_anchos=False):
+    """
+    Escribe `df` en un .xlsx con openpyxl write_only y retorna el BytesIO.
+
+    titulos:       lista de (texto, Font | None) para las filas 1..n de la columna A.
+    fila_cabecera: fila (1-based) donde van los nombres de columna; se deja en blanco
+                   lo que haya entre los títulos y la cabecera.
+    fila_totales:  la última fila de datos se pinta con el estilo "total".
+    ajustar_anchos: ancho = min(caracteres más largo + 2, 25), contando las celdas
+                   vacías de la columna como 'None' (4), igual que el ajuste anterior.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    for estilo in estilos.values():
+        if estilo is not None:
+            wb.add_named_style(estilo)
+
+    columnas = [str(c) for c in df.columns]
+    filas = [[_valor_excel(v) for v in fila] for fila in df.itertuples(index=False, name=None)]
+
+    # En write_only los anchos deben fijarse antes de la primera fila
+    if ajustar_anchos and columnas:
+        for idx, col in enumerate(columnas):
+            max_len = max(len(col), 4 if (fila_cabecera > 1 or not filas) else 0)
+            for fila in filas:
+                n = len(str(fila[idx]))
+                if n > max_len:
+                    max_len = n
+            if idx == 0:
+                for texto, _ in titulos:
+                    max_len = max(max_len, len(str(texto)))
+            ws.column_dimensions[get_column_letter(idx + 1)].width = min(max_len + 2, 25)
+
+    for texto, font in titulos:
+        ws.append([_celda(ws, texto, font=font)])
+    for _ in range(fila_cabecera - 1 - len(titulos)):
+        ws.append([])
+
+    ws.append([_celda(ws, c, estilos["cabecera"]) for c in columnas])
+    ultima = len(filas) - 1
+    for i, fila in enumerate(filas):
+        estilo = estilos["total"] if (fila_totales and i == ultima) else estilos["dato"]
+        ws.append([_celda(ws, v, estilo) for v in fila])
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
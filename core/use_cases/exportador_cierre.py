@@ -0,0 +1,256 @@
+"""
+Exportador de cierre — todas las interfaces oficiales de un periodo CERRADO en una
+sola pasada.
+
+Antes, PLAME (T-Registro y .jor/.rem), AFPnet, Telecrédito BCP y el asiento contable
+se generaban por separado: cada uno volvía a leer la planilla, a decodificar
+`resultado_json`/`auditoria_json` y a consultar trabajadores y conceptos. Aquí el
+snapshot se carga y decodifica UNA vez, se arma la vista compartida por trabajador y
+se reparte a los exportadores pedidos. El resultado es un único paquete con los
+bytes de cada archivo, los errores por exportador (uno que falla no tumba al resto) y
+el tiempo de cada etapa.
+"""
+import io
+import json
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+from infrastructure.database.models import (
+    Empresa, Trabajador, VariablesMes, Concepto, ConfiguracionContable,
+)
+from infrastructure.repositories.repo_planilla import obtener_planilla
+
+# ── Exportadores disponibles ──────────────────────────────────────────────────
+EXPORTADOR_PLAME       = "PLAME"            # .jor/.sub/.not/.rem/.snl (exportador_plame)
+EXPORTADOR_PLAME_TREG  = "PLAME_TREGISTRO"  # .REM/.JOR/.SNL (generador_interfaces)
+EXPORTADOR_AFPNET      = "AFPNET"
+EXPORTADOR_BCP         = "BCP"
+EXPORTADOR_ASIENTO     = "ASIENTO"
+
+EXPORTADORES = (
+    EXPORTADOR_PLAME, EXPORTADOR_PLAME_TREG, EXPORTADOR_AFPNET, EXPORTADOR_BCP, EXPORTADOR_ASIENTO,
+)
+
+
+class ExportacionCierreError(Exception):
+    """El periodo no se puede exportar (no existe o no está cerrado)."""
+
+
+@contextmanager
+def _etapa(tiempos: dict, nombre: str):
+    """Registra en `tiempos` la duración (segundos) de la etapa."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        tiempos[nombre] = round(time.perf_counter() - t0, 4)
+
+
+# ── 1. Carga y decodificación única del snapshot ──────────────────────────────
+
+def _cargar_snapshot(db, empresa_id, periodo_key) -> dict:
+    """Lee de la BD todo lo que necesitan los exportadores, con un número fijo de consultas."""
+    from core.use_cases.exportador_plame import _cargar_depositos_cts
+
+    planilla = obtener_planilla(db, empresa_id, periodo_key)
+    if not planilla or planilla.estado != 'CERRADA':
+        raise ExportacionCierreError(f"La planilla del periodo {periodo_key} no está cerrada todavía.")
+
+    return {
+        "resultado_json": planilla.resultado_json,
+        "auditoria_json": planilla.auditoria_json,
+        "honorarios_json": getattr(planilla, 'honorarios_json', None) or '[]',
+        "empresa": db.query(Empresa).filter_by(id=empresa_id).first(),
+        "trabajadores": db.query(Trabajador).filter_by(empresa_id=empresa_id).all(),
+        "variables": db.query(VariablesMes).filter_by(empresa_id=empresa_id, periodo_key=periodo_key).all(),
+        "conceptos": db.query(Concepto).filter_by(empresa_id=empresa_id).all(),
+        "cfg_contable": db.query(ConfiguracionContable).filter_by(empresa_id=empresa_id).first(),
+        "depositos_cts": _cargar_depositos_cts(db, empresa_id, periodo_key),
+    }
+
+
+def _dnis_cesados_antes(trabajadores, periodo_key) -> set:
+    """Cesados antes del periodo: no se declaran ni se les paga aunque estén en el JSON."""
+    mes_p, anio_p = int(periodo_key[:2]), int(periodo_key[3:])
+    return {
+        t.num_doc for t in trabajadores
+        if t.fecha_cese is not None and (
+            t.fecha_cese.year < anio_p or (t.fecha_cese.year == anio_p and t.fecha_cese.month < mes_p)
+        )
+    }
+
+
+def _vista_compartida(snap: dict, periodo_key: str) -> dict:
+    """
+    Decodifica el snapshot y arma la vista por trabajador que consumen todos los
+    exportadores: sábana, auditoría, maestro de trabajadores y conceptos como
+    DataFrames, locadores para el BCP y el contexto del PLAME.
+    """
+    from core.use_cases.exportador_plame import _contexto_plame
+    from core.use_cases.generador_interfaces import locadores_desde_snapshot
+
+    df_planilla = pd.read_json(io.StringIO(snap["resultado_json"]), orient='records')
+    auditoria = json.loads(snap["auditoria_json"] or '{}')
+
+    # Mismo filtro que Reportería aplica antes de AFPnet/BCP
+    cesados = _dnis_cesados_antes(snap["trabajadores"], periodo_key)
+    df_vigentes, auditoria_vigentes = df_planilla, auditoria
+    if cesados and not df_planilla.empty:
+        df_vigentes = df_planilla[~df_planilla['DNI'].astype(str).isin(cesados)]
+        auditoria_vigentes = {dni: info for dni, info in auditoria.items() if dni not in cesados}
+
+    df_trabajadores = pd.DataFrame([{
+        "Num. Doc.":        t.num_doc,
+        "Apellido Paterno": getattr(t, 'apellido_paterno', '') or '',
+        "Apellido Materno": getattr(t, 'apellido_materno', '') or '',
+        "Nombres y Apellidos": t.nombres,
+        "Tipo Doc.":        t.tipo_doc or "DNI",
+        "Fecha Ingreso":    t.fecha_ingreso,
+        "CUSPP":            t.cuspp or '',
+        "Sistema Pensión":  t.sistema_pension or '',
+    } for t in snap["trabajadores"]])
+    df_conceptos = pd.DataFrame([{
+        "Nombre del Concepto": c.nombre,
+        "Cód. SUNAT": getattr(c, 'codigo_sunat', '') or '',
+    } for c in snap["conceptos"]])
+
+    return {
+        "df_planilla": df_planilla,
+        "auditoria": auditoria,
+        "df_vigentes": df_vigentes,
+        "auditoria_vigentes": auditoria_vigentes,
+        "df_trabajadores": df_trabajadores,
+        "df_conceptos": df_conceptos,
+        "df_loc": locadores_desde_snapshot(snap["honorarios_json"]),
+        "ctx_plame": _contexto_plame(
+            snap["empresa"], periodo_key, snap["trabajadores"], snap["variables"],
+            snap["conceptos"], auditoria, snap["depositos_cts"],
+        ),
+    }
+
+
+# ── 2. Exportadores (solo consumen la vista, no tocan la BD) ──────────────────
+
+def _exportar_plame(vista, snap, mes, anio, **_):
+    from core.use_cases.exportador_plame import _zip_plame_desde_contexto
+    ruc = (snap["empresa"].ruc or '')
+    return f"0601{anio}{str(mes).zfill(2)}{ruc.zfill(11)}.zip", _zip_plame_desde_contexto(vista["ctx_plame"], mes, anio)
+
+
+def _exportar_plame_tregistro(vista, snap, mes, anio, **_):
+    from core.use_cases.generador_interfaces import generar_archivos_plame
+    ruc = (snap["empresa"].ruc or '')
+    buf = generar_archivos_plame(
+        ruc, anio, mes, vista["df_planilla"], vista["auditoria"],
+        vista["df_trabajadores"], vista["df_conceptos"],
+    )
+    return f"TREGISTRO_0601{anio}{str(mes).zfill(2)}{ruc.zfill(11)}.zip", buf
+
+
+def _exportar_afpnet(vista, snap, mes, anio, periodo_key, **_):
+    from core.use_cases.generador_interfaces import generar_excel_afpnet
+    buf = generar_excel_afpnet(
+        anio=anio, mes=mes, df_planilla=vista["df_vigentes"],
+        auditoria_data=vista["auditoria_vigentes"], df_trabajadores=vista["df_trabajadores"],
+    )
+    return f"AFPnet_{periodo_key.replace('-', '_')}.xlsx", buf
+
+
+def _exportar_bcp(vista, snap, cuenta_cargo, fecha_pago, solo_bcp, **_):
+    from core.use_cases.generador_interfaces import generar_txt_bcp
+    cuenta_cargo = cuenta_cargo or getattr(snap["empresa"], 'cuenta_cargo_bcp', '') or ''
+    if not cuenta_cargo:
+        raise ValueError("La empresa no tiene cuenta de cargo BCP configurada.")
+    buf = generar_txt_bcp(vista["df_vigentes"], cuenta_cargo, fecha_pago, df_loc=vista["df_loc"], solo_bcp=solo_bcp)
+    return f"BCP_HABERES_{fecha_pago.strftime('%Y%m%d')}.txt", buf
+
+
+def _exportar_asiento(vista, snap, periodo_key, **_):
+    from core.use_cases.generador_asiento_contable import generar_asiento_desde_snapshot
+    buf = generar_asiento_desde_snapshot(
+        periodo_key, vista["df_planilla"], vista["auditoria"], snap["conceptos"], snap["cfg_contable"],
+    )
+    return f"ASIENTO_PLANILLA_{periodo_key}.xlsx", buf
+
+
+_FUNCIONES_EXPORTADOR = {
+    EXPORTADOR_PLAME: _exportar_plame,
+    EXPORTADOR_PLAME_TREG: _exportar_plame_tregistro,
+    EXPORTADOR_AFPNET: _exportar_afpnet,
+    EXPORTADOR_BCP: _exportar_bcp,
+    EXPORTADOR_ASIENTO: _exportar_asiento,
+}
+
+
+# ── 3. Orquestador ────────────────────────────────────────────────────────────
+
+def exportar_cierre(empresa_id, periodo_key, exportadores=None, cuenta_cargo=None,
+                    fecha_pago=None, solo_bcp=False, db=None) -> dict:
+    """
+    Genera las interfaces pedidas del periodo cerrado en una sola pasada.
+
+    Retorna el paquete:
+        {
+            "archivos": {nombre_archivo: bytes},
+            "errores":  {exportador: mensaje},
+            "tiempos":  {etapa: segundos},   # carga, decodificación, cada exportador, total
+        }
+
+    Lanza ExportacionCierreError si el periodo no existe o no está CERRADO.
+    """
+    exportadores = list(exportadores or EXPORTADORES)
+    desconocidos = [e for e in exportadores if e not in _FUNCIONES_EXPORTADOR]
+    if desconocidos:
+        raise ValueError(f"Exportador(es) desconocido(s): {', '.join(desconocidos)}")
+
+    tiempos = {}
+    t_total = time.perf_counter()
+
+    propia = db is None
+    if propia:
+        from infrastructure.database.connection import SessionLocal
+        db = SessionLocal()
+    try:
+        with _etapa(tiempos, "carga"):
+            snap = _cargar_snapshot(db, empresa_id, periodo_key)
+    finally:
+        if propia:
+            db.close()
+
+    with _etapa(tiempos, "decodificacion"):
+        vista = _vista_compartida(snap, periodo_key)
+
+    parametros = {
+        "mes": int(periodo_key[:2]),
+        "anio": int(periodo_key[3:]),
+        "periodo_key": periodo_key,
+        "cuenta_cargo": cuenta_cargo,
+        "fecha_pago": fecha_pago or date.today(),
+        "solo_bcp": solo_bcp,
+    }
+
+    archivos, errores = {}, {}
+    for exportador in exportadores:
+        with _etapa(tiempos, exportador):
+            try:
+                nombre, buf = _FUNCIONES_EXPORTADOR[exportador](vista, snap, **parametros)
+                archivos[nombre] = buf.getvalue()
+            except Exception as e:
+                errores[exportador] = getattr(e, 'mensaje', None) or str(e)
+
+    tiempos["total"] = round(time.perf_counter() - t_total, 4)
+    return {"archivos": archivos, "errores": errores, "tiempos": tiempos}
+
+
+def empaquetar_zip(paquete: dict) -> io.BytesIO:
+    """Un solo ZIP con todos los archivos del paquete (para una única descarga)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nombre, data in paquete["archivos"].items():
+            zf.writestr(nombre, data)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,164 @@
+"""
+Exportación histórica de sábanas para BI.
+
+Recorre todas las PlanillaMensual de una empresa (o de todas) en un rango de
+periodos y escribe cada snapshot como un archivo particionado:
+
+    sabana/empresa_id=<id>/periodo=<YYYY-MM>/part-0.csv.gz      (o .parquet)
+    locadores/empresa_id=<id>/periodo=<YYYY-MM>/part-0.csv.gz
+
+Las columnas de la sábana cambian entre periodos (conceptos dinámicos), por eso
+cada periodo es su propio archivo; las herramientas de BI los unen por nombre de
+columna (p. ej. DuckDB `read_parquet(..., union_by_name=true, hive_partitioning=true)`).
+
+La memoria queda acotada: primero se listan solo los metadatos (id, empresa,
+periodo), y los JSON se leen y decodifican de a `tamano_lote` planillas, que se
+escriben y se liberan antes de pedir el siguiente lote.
+
+Parquet requiere `pyarrow` (dependencia opcional); sin él, solo CSV gzip.
+"""
+import gzip
+import io
+import json
+import os
+import zipfile
+
+import pandas as pd
+
+from core.domain.periodos import periodo_ordenable
+from infrastructure.database.models import Empresa, PlanillaMensual
+
+FORMATO_CSV = "csv"
+FORMATO_PARQUET = "parquet"
+TAMANO_LOTE_DEFECTO = 6
+
+
+def parquet_disponible() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _listar_planillas(db, empresa_id=None, desde=None, hasta=None, solo_cerradas=False) -> list:
+    """Metadatos (id, empresa_id, periodo_key, estado) de las planillas del rango, sin los JSON."""
+    q = db.query(PlanillaMensual.id, PlanillaMensual.empresa_id, PlanillaMensual.periodo_key, PlanillaMensual.estado)
+    if empresa_id is not None:
+        q = q.filter(PlanillaMensual.empresa_id == empresa_id)
+    if solo_cerradas:
+        q = q.filter(PlanillaMensual.estado == 'CERRADA')
+    d = periodo_ordenable(desde) if desde else None
+    h = periodo_ordenable(hasta) if hasta else None
+    filas = [
+        f for f in q.all()
+        if (d is None or periodo_ordenable(f.periodo_key) >= d)
+        and (h is None or periodo_ordenable(f.periodo_key) <= h)
+    ]
+    return sorted(filas, key=lambda f: (f.empresa_id, periodo_ordenable(f.periodo_key)))
+
+
+def iterar_snapshots(db, empresa_id=None, desde=None, hasta=None, solo_cerradas=False,
+                     tamano_lote: int = TAMANO_LOTE_DEFECTO):
+    """
+    Genera (metadatos, df_sabana, df_locadores) periodo por periodo. Los JSON se
+    piden a la BD de a `tamano_lote` planillas.
+    """
+    filas = _listar_planillas(db, empresa_id, desde, hasta, solo_cerradas)
+    rucs = dict(db.query(Empresa.id, Empresa.ruc).filter(
+        Empresa.id.in_({f.empresa_id for f in filas})
+    ).all()) if filas else {}
+
+    for i in range(0, len(filas), tamano_lote):
+        lote = filas[i:i + tamano_lote]
+        jsons = {
+            r.id: (r.resultado_json, r.honorarios_json)
+            for r in db.query(
+                PlanillaMensual.id, PlanillaMensual.resultado_json, PlanillaMensual.honorarios_json,
+            ).filter(PlanillaMensual.id.in_([f.id for f in lote])).all()
+        }
+        for f in lote:
+            resultado_json, honorarios_json = jsons.pop(f.id, (None, None))
+            meta = {
+                "empresa_id": f.empresa_id,
+                "empresa_ruc": rucs.get(f.empresa_id) or "",
+                "periodo_key": f.periodo_key,
+                "periodo": f"{f.periodo_key[3:]}-{f.periodo_key[:2]}",   # partición AAAA-MM
+                "estado": f.estado or "ABIERTA",
+            }
+            # json.loads conserva los tipos del snapshot (DNI con ceros a la izquierda sigue siendo texto)
+            df_sabana = pd.DataFrame(json.loads(resultado_json or '[]'))
+            if not df_sabana.empty and 'Apellidos y Nombres' in df_sabana.columns:
+                df_sabana = df_sabana[df_sabana['Apellidos y Nombres'] != 'TOTALES']
+            df_loc = pd.DataFrame(json.loads(honorarios_json or '[]'))
+            yield meta, _con_metadatos(df_sabana, meta), _con_metadatos(df_loc, meta)
+
+
+def _con_metadatos(df: pd.DataFrame, meta: dict) -> pd.DataFrame:
+    if df.empty:
+        return df
+    df = df.copy()
+    for i, col in enumerate(("empresa_id", "empresa_ruc", "periodo", "estado")):
+        df.insert(i, col, meta[col])
+    return df
+
+
+def _serializar(df: pd.DataFrame, formato: str) -> bytes:
+    if formato == FORMATO_PARQUET:
+        buf = io.BytesIO()
+        df.to_parquet(buf, index=False)
+        return buf.getvalue()
+    return gzip.compress(df.to_csv(index=False).encode("utf-8"), compresslevel=6)
+
+
+def _ruta_particion(dataset: str, meta: dict, formato: str) -> str:
+    ext = "parquet" if formato == FORMATO_PARQUET else "csv.gz"
+    return f"{dataset}/empresa_id={meta['empresa_id']}/periodo={meta['periodo']}/part-0.{ext}"
+
+
+def exportar_historico(escribir, empresa_id=None, desde=None, hasta=None, formato: str = FORMATO_CSV,
+                       solo_cerradas=False, tamano_lote: int = TAMANO_LOTE_DEFECTO, db=None) -> dict:
+    """
+    Exporta el histórico llamando a `escribir(ruta_relativa, bytes)` por cada partición.
+    `desde`/`hasta` son periodos 'MM-YYYY' (inclusive). Retorna un resumen
+    {"periodos", "filas_sabana", "filas_locadores", "archivos"}.
+    """
+    if formato not in (FORMATO_CSV, FORMATO_PARQUET):
+        raise ValueError(f"Formato no soportado: {formato}")
+    if formato == FORMATO_PARQUET and not parquet_disponible():
+        raise ValueError("La exportación a Parquet requiere instalar 'pyarrow'. Use CSV gzip.")
+
+    propia = db is None
+    if propia:
+        from infrastructure.database.connection import SessionLocal
+        db = SessionLocal()
+    resumen = {"periodos": 0, "filas_sabana": 0, "filas_locadores": 0, "archivos": 0}
+    try:
+        for meta, df_sabana, df_loc in iterar_snapshots(db, empresa_id, desde, hasta, solo_cerradas, tamano_lote):
+            resumen["periodos"] += 1
+            for dataset, df, clave in (("sabana", df_sabana, "filas_sabana"), ("locadores", df_loc, "filas_locadores")):
+                if df.empty:
+                    continue
+                escribir(_ruta_particion(dataset, meta, formato), _serializar(df, formato))
+                resumen[clave] += len(df)
+                resumen["archivos"] += 1
+    finally:
+        if propia:
+            db.close()
+    return resumen
+
+
+def exportar_a_directorio(directorio: str, **kwargs) -> dict:
+    """Escribe las particiones bajo `directorio` (estructura tipo Hive)."""
+    def _escribir(ruta, data):
+        destino = os.path.join(directorio, *ruta.split("/"))
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, "wb") as f:
+            f.write(data)
+    return exportar_historico(_escribir, **kwargs)
+
+
+def exportar_a_zip(fileobj, **kwargs) -> dict:
+    """Escribe las particiones dentro de un ZIP (sin recomprimir: ya van comprimidas)."""
+    with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_STORED) as zf:
+        return exportar_historico(zf.writestr, **kwargs)
@@ -22,11 +22,12 @@ from datetime import date
 
 import pandas as pd
 
-from infrastructure.database.models import PlanillaMensual, Concepto, ConfiguracionContable
+from infrastructure.database.models import Concepto, ConfiguracionContable
+from infrastructure.repositories.repo_planilla import obtener_planilla
 
 # Marcador de versión — súbelo cada vez que se corrija algo en este archivo, para poder
 # confirmar en pantalla (pestaña Asiento Contable) si el código desplegado es el último.
-VERSION_GENERADOR = "2026-08-07-r8"
+VERSION_GENERADOR = "2026-10-19-r9"
 
 MESES_ES = {
     1: "ENERO", 2: "FEBRERO", 3: "MARZO", 4: "ABRIL", 5: "MAYO", 6: "JUNIO",
@@ -155,281 +156,309 @@ def generar_asiento_planilla(db, empresa_id, periodo_key):
             f"provisión mensual (fase futura). Este periodo se registra manualmente."
         )
 
-    planilla = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id, periodo_key=periodo_key).first()
+    planilla = obtener_planilla(db, empresa_id, periodo_key)
     if not planilla or planilla.estado != 'CERRADA':
         raise AsientoContableError(f"La planilla del periodo {periodo_key} no está cerrada todavía.")
 
     df_resultados = pd.read_json(io.StringIO(planilla.resultado_json), orient='records')
     auditoria_data = json.loads(planilla.auditoria_json)
-    df_data = df_resultados[df_resultados['Apellidos y Nombres'] != 'TOTALES']
+    conceptos_db = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
+    cfg = db.query(ConfiguracionContable).filter_by(empresa_id=empresa_id).first()
+    return generar_asiento_desde_snapshot(periodo_key, df_resultados, auditoria_data, conceptos_db, cfg)
+
+
+def generar_asiento_desde_snapshot(periodo_key, df_resultados, auditoria_data, conceptos_db, cfg,
+                                   formato="SISCONT"):
+    """
+    Igual que `generar_asiento_planilla`, pero sobre el snapshot ya decodificado
+    (sábana, auditoría, conceptos y configuración contable) — para quien ya lo tiene
+    cargado, como el exportador de cierre. No valida el estado de la planilla.
+    """
+    if formato not in ESCRITORES_ASIENTO:
+        raise ValueError(f"Formato de asiento no soportado: {formato}")
+    libro = construir_libro_asiento(periodo_key, df_resultados, auditoria_data, conceptos_db, cfg)
+    return ESCRITORES_ASIENTO[formato](libro)
+
+
+# ── Libro del asiento (independiente del formato de salida) ───────────────────
+#
+# Todo el asiento sale de UNA tabla de partidas (una fila por monto que se mueve):
+#   - partidas por trabajador: cada ingreso (Debe), cada descuento dinámico (Haber) y
+#     el residual de Remuneraciones por Pagar;
+#   - porciones por trabajador de las líneas globales (EsSalud, ONP, AFP, 5ta), que
+#     en el archivo se totalizan por cuenta.
+# De esa tabla salen, con agrupaciones, las líneas del archivo, los totales por cuenta,
+# las cuentas faltantes (toda partida con monto y sin cuenta configurada) y el
+# diagnóstico Debe/Haber por trabajador. Los escritores (SISCONT hoy) solo la formatean.
+
+_CUENTAS_FIJAS_INGRESO = {
+    "Descanso Vacacional": "cuenta_descanso_vacacional",
+    "Descanso Médico": "cuenta_descanso_medico",
+    "Licencia con Goce": "cuenta_licencia_goce",
+}
+
+_ETIQUETAS_CUENTAS_FIJAS = {
+    "cuenta_horas_extra_25": "Horas Extras 25% (Configuración Contable)",
+    "cuenta_horas_extra_35": "Horas Extras 35% (Configuración Contable)",
+    "cuenta_descanso_vacacional": "Descanso Vacacional (Configuración Contable)",
+    "cuenta_descanso_medico": "Descanso Médico (Configuración Contable)",
+    "cuenta_licencia_goce": "Licencia con Goce (Configuración Contable)",
+    "cuenta_essalud_gasto": "EsSalud - Gasto (Configuración Contable)",
+    "cuenta_essalud_pasivo": "EsSalud - Por Pagar (Configuración Contable)",
+    "cuenta_onp": "ONP (Configuración Contable)",
+    "cuenta_retencion_5ta": "Retención 5ta Categoría (Configuración Contable)",
+    "cuenta_remuneraciones_por_pagar": "Remuneraciones por Pagar (Configuración Contable)",
+    "cuenta_prestamos_personal": "Préstamos al Personal (Configuración Contable)",
+}
+_ETIQUETAS_CUENTAS_FIJAS.update({attr: f"{admin} (Configuración Contable)" for admin, attr in _AFP_CUENTA_ATTR.items()})
+
+# Orden de las líneas globales en el archivo: (cuenta fija, tercero)
+_LINEAS_GLOBALES = (
+    [("cuenta_essalud_gasto", ("", "", "")),
+     ("cuenta_essalud_pasivo", (_RUC_SUNAT, _RUC_SUNAT, _NOMBRE_SUNAT)),
+     ("cuenta_onp", (_RUC_SUNAT, _RUC_SUNAT, _NOMBRE_SUNAT))]
+    + [(attr, (_AFP_RUC_RSOCIAL[admin][0],) + _AFP_RUC_RSOCIAL[admin]) for admin, attr in _AFP_CUENTA_ATTR.items()]
+    + [("cuenta_retencion_5ta", (_RUC_SUNAT, _RUC_SUNAT, _NOMBRE_SUNAT))]
+)
+
+_COLUMNAS_PARTIDA = ["pos", "bloque", "orden", "origen", "ref", "debe", "haber", "global"]
+
+
+def _columna_num(df, nombre):
+    if nombre not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[nombre], errors='coerce').fillna(0.0).astype(float)
+
+
+def _partidas_globales(pos, attr, debe, haber):
+    return pd.DataFrame({
+        "pos": pos, "bloque": 9, "orden": 0, "origen": "fija", "ref": attr,
+        "debe": debe, "haber": haber, "global": True,
+    })[_COLUMNAS_PARTIDA]
+
+
+def construir_libro_asiento(periodo_key, df_resultados, auditoria_data, conceptos_db, cfg) -> dict:
+    """
+    Arma el libro del asiento del periodo, ya validado y cuadrado:
+
+        {
+            "fecha", "num_doc", "glosa",              # cabecera común a todas las líneas
+            "lineas":   DataFrame(cuenta, debe, haber, cod_prov_clie, ruc, r_social),
+            "totales":  DataFrame(cuenta, debe, haber) agrupado por cuenta,
+            "diagnostico": DataFrame(dni, nombre, debe, haber, diferencia) por trabajador,
+        }
+
+    Lanza AsientoContableError si el periodo no aplica, faltan cuentas o no cuadra.
+    """
+    mes_num = int(periodo_key[:2])
+    anio_num = int(periodo_key[3:])
 
+    if mes_num in _MESES_SIN_ASIENTO:
+        raise AsientoContableError(
+            f"El periodo {periodo_key} no genera asiento automático todavía — la "
+            f"gratificación de julio/diciembre está pendiente de un módulo de "
+            f"provisión mensual (fase futura). Este periodo se registra manualmente."
+        )
+
+    df_data = df_resultados[df_resultados['Apellidos y Nombres'] != 'TOTALES'].reset_index(drop=True)
     if df_data.empty:
         raise AsientoContableError(f"No hay trabajadores calculados en la planilla de {periodo_key}.")
 
-    conceptos_db = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
     cuentas_concepto = {c.nombre: (c.cuenta_contable or "").strip() for c in conceptos_db}
-    cfg = db.query(ConfiguracionContable).filter_by(empresa_id=empresa_id).first()
+    cuentas_fijas = {attr: ((getattr(cfg, attr, None) if cfg else None) or "").strip() for attr in _ETIQUETAS_CUENTAS_FIJAS}
+
+    dnis = df_data['DNI'].astype(str)
+    sist = df_data['Sist. Pensión'].fillna('').astype(str) if 'Sist. Pensión' in df_data.columns \
+        else pd.Series('', index=df_data.index)
+    pos = df_data.index
+
+    # ── 1. Conceptos de la auditoría en formato largo (una sola pasada) ──
+    movimientos = pd.DataFrame(
+        [
+            (p, bloque, orden, nombre_c, monto)
+            for p, dni in enumerate(dnis)
+            for bloque, seccion in ((0, 'ingresos'), (1, 'descuentos'))
+            for orden, (nombre_c, monto) in enumerate(((auditoria_data.get(dni, {}) or {}).get(seccion, {}) or {}).items())
+        ],
+        columns=["pos", "bloque", "orden", "concepto", "monto"],
+    )
+    movimientos["monto"] = pd.to_numeric(movimientos["monto"], errors='coerce').fillna(0.0).astype(float)
+    movimientos["concepto"] = movimientos["concepto"].astype(str)
+    es_ingreso = movimientos["bloque"] == 0
+    nombre_mov = movimientos["concepto"]
+
+    # "Ajuste AFP (Audit)" — ajuste manual del Panel de Auditoría Tributaria, se resta
+    # del neto POR SU CUENTA (no es un "descuento dinámico" más) y va a la MISMA cuenta
+    # de AFP/ONP del trabajador, sea positivo o negativo — nunca se descarta.
+    aj_afp = (
+        movimientos[~es_ingreso & (nombre_mov == _CLAVE_AJUSTE_AFP)]
+        .groupby("pos")["monto"].sum().reindex(pos, fill_value=0.0)
+    )
 
-    faltantes = set()
-
-    def _cuenta_fija(attr, etiqueta):
-        val = ((getattr(cfg, attr, None) if cfg else None) or "").strip()
-        if not val:
-            faltantes.add(etiqueta)
-        return val
-
-    def _cuenta_concepto(nombre_concepto):
-        val = cuentas_concepto.get(nombre_concepto, "")
-        if not val:
-            faltantes.add(f'Concepto "{nombre_concepto}" (Maestro de Conceptos)')
-        return val
-
-    # ── Determinar qué cuentas fijas hacen falta (solo las que van a tener monto) ──
-    necesita = {"he25": False, "he35": False, "dvac": False, "dmed": False, "lgoce": False}
-    afp_administradoras_usadas = set()
-    for _, row in df_data.iterrows():
-        sist = str(row.get('Sist. Pensión', '') or '')
-        if sist in _AFP_CUENTA_ATTR:
-            monto_afp = sum(float(row.get(c, 0) or 0) for c in ["AFP Aporte", "AFP Seguro", "AFP Comis."])
-            if monto_afp > 0:
-                afp_administradoras_usadas.add(sist)
-
-    for info in auditoria_data.values():
-        ingresos = info.get('ingresos', {}) or {}
-        if any(float(v or 0) > 0 for k, v in ingresos.items() if k.startswith("Horas Extras 25")):
-            necesita["he25"] = True
-        if any(float(v or 0) > 0 for k, v in ingresos.items() if k.startswith("Horas Extras 35")):
-            necesita["he35"] = True
-        if float(ingresos.get("Descanso Vacacional", 0) or 0) > 0:
-            necesita["dvac"] = True
-        if float(ingresos.get("Descanso Médico", 0) or 0) > 0:
-            necesita["dmed"] = True
-        if float(ingresos.get("Licencia con Goce", 0) or 0) > 0:
-            necesita["lgoce"] = True
-
-    if necesita["he25"]: _cuenta_fija('cuenta_horas_extra_25', "Horas Extras 25% (Configuración Contable)")
-    if necesita["he35"]: _cuenta_fija('cuenta_horas_extra_35', "Horas Extras 35% (Configuración Contable)")
-    if necesita["dvac"]: _cuenta_fija('cuenta_descanso_vacacional', "Descanso Vacacional (Configuración Contable)")
-    if necesita["dmed"]: _cuenta_fija('cuenta_descanso_medico', "Descanso Médico (Configuración Contable)")
-    if necesita["lgoce"]: _cuenta_fija('cuenta_licencia_goce', "Licencia con Goce (Configuración Contable)")
-
-    total_essalud_check = float(df_data.get('Aporte Seg. Social', pd.Series([0.0])).astype(float).sum() or 0)
-    if total_essalud_check > 0:
-        _cuenta_fija('cuenta_essalud_gasto', "EsSalud - Gasto (Configuración Contable)")
-        _cuenta_fija('cuenta_essalud_pasivo', "EsSalud - Por Pagar (Configuración Contable)")
-
-    total_onp_check = float(df_data.get('ONP (13%)', pd.Series([0.0])).astype(float).sum() or 0)
-    if total_onp_check > 0:
-        _cuenta_fija('cuenta_onp', "ONP (Configuración Contable)")
-
-    for admin in afp_administradoras_usadas:
-        _cuenta_fija(_AFP_CUENTA_ATTR[admin], f"{admin} (Configuración Contable)")
-
-    total_5ta_check = float(df_data.get('Ret. 5ta Cat.', pd.Series([0.0])).astype(float).sum() or 0)
-    if total_5ta_check > 0:
-        _cuenta_fija('cuenta_retencion_5ta', "Retención 5ta Categoría (Configuración Contable)")
-
-    _cuenta_fija('cuenta_remuneraciones_por_pagar', "Remuneraciones por Pagar (Configuración Contable)")
-
-    # (los descuentos dinámicos con cuenta propia se validan más abajo; esto solo cubre
-    # préstamos, que no son un "Concepto" configurable — usan la cuenta fija)
-    necesita_prestamos = any(
-        float(v or 0) > 0
-        for info in auditoria_data.values()
-        for k, v in (info.get('descuentos', {}) or {}).items()
-        if not _es_descuento_ya_manejado(k) and k not in cuentas_concepto
+    # Ingresos → Debe (cuenta del concepto, o cuenta fija para HE/descansos/licencia)
+    ingresos = movimientos[es_ingreso & (movimientos["monto"] > 0)
+                           & ~nombre_mov.isin(_CONCEPTOS_GRATI_EXCLUIDOS)].copy()
+    nom = ingresos["concepto"]
+    ingresos["origen"] = "concepto"
+    ingresos["ref"] = nom
+    ingresos.loc[nom.str.startswith("Sueldo Base"), "ref"] = "SUELDO BASICO"
+    ingresos.loc[nom == "Asignación Familiar", "ref"] = "ASIGNACION FAMILIAR"
+    fija = (
+        nom.map(_CUENTAS_FIJAS_INGRESO)
+        .mask(nom.str.startswith("Horas Extras 25"), "cuenta_horas_extra_25")
+        .mask(nom.str.startswith("Horas Extras 35"), "cuenta_horas_extra_35")
     )
-    if necesita_prestamos:
-        _cuenta_fija('cuenta_prestamos_personal', "Préstamos al Personal (Configuración Contable)")
-
-    # ── Validar cuentas de conceptos dinámicos (ingresos y descuentos) ──
-    for info in auditoria_data.values():
-        for nombre_c, monto in (info.get('ingresos', {}) or {}).items():
-            if float(monto or 0) <= 0 or nombre_c in _CONCEPTOS_GRATI_EXCLUIDOS:
-                continue
-            if nombre_c.startswith("Sueldo Base"):
-                _cuenta_concepto("SUELDO BASICO")
-            elif nombre_c == "Asignación Familiar":
-                _cuenta_concepto("ASIGNACION FAMILIAR")
-            elif nombre_c.startswith("Horas Extras") or nombre_c in ("Descanso Vacacional", "Descanso Médico", "Licencia con Goce"):
-                continue  # ya cubiertas arriba por cuentas fijas
-            else:
-                _cuenta_concepto(nombre_c)
-        for nombre_c, monto in (info.get('descuentos', {}) or {}).items():
-            if float(monto or 0) <= 0 or _es_descuento_ya_manejado(nombre_c):
-                continue
-            if nombre_c not in cuentas_concepto:
-                continue  # es un préstamo (no es Concepto) — ya cubierto por cuenta fija arriba
-            _cuenta_concepto(nombre_c)
+    ingresos.loc[fija.notna(), "origen"] = "fija"
+    ingresos.loc[fija.notna(), "ref"] = fija[fija.notna()]
+    ingresos["debe"], ingresos["haber"], ingresos["global"] = ingresos["monto"], 0.0, False
+
+    # Descuentos dinámicos → Haber (cuenta del concepto; si no es Concepto, es un préstamo)
+    ya_manejado = nombre_mov.isin(_DESCUENTOS_ESPECIALES + ("Aporte ONP",)) | nombre_mov.str.startswith(_PREFIJOS_DETALLE_PENSION)
+    descuentos = movimientos[~es_ingreso & (movimientos["monto"] > 0) & ~ya_manejado].copy()
+    es_concepto = descuentos["concepto"].isin(list(cuentas_concepto))
+    descuentos["origen"] = es_concepto.map({True: "concepto", False: "fija"})
+    descuentos["ref"] = descuentos["concepto"].where(es_concepto, "cuenta_prestamos_personal")
+    descuentos["debe"], descuentos["haber"], descuentos["global"] = 0.0, descuentos["monto"], False
+
+    # ── 2. Montos de la sábana por trabajador (vectorizado) ──
+    essalud = _columna_num(df_data, 'Aporte Seg. Social')
+    onp = _columna_num(df_data, 'ONP (13%)')
+    ret5ta = _columna_num(df_data, 'Ret. 5ta Cat.')
+    afp_calculado = sum(_columna_num(df_data, c) for c in ("AFP Aporte", "AFP Seguro", "AFP Comis."))
+    es_afp = sist.isin(list(_AFP_CUENTA_ATTR))
+    es_onp = sist == "ONP"
+    credito_pension = (afp_calculado + aj_afp).where(es_afp, aj_afp.where(es_onp, 0.0))
+
+    # Remuneraciones por Pagar se calcula como RESIDUAL (Total Bruto del trabajador
+    # menos todo lo que ya se le acreditó a otras cuentas) — NO se usa el campo
+    # "NETO A PAGAR" guardado en la planilla. Así el asiento cuadra por construcción,
+    # sin depender de que ese campo coincida con la suma de sus componentes.
+    bruto = ingresos.groupby("pos")["monto"].sum().reindex(pos, fill_value=0.0)
+    prestamos = descuentos.groupby("pos")["monto"].sum().reindex(pos, fill_value=0.0)
+    residual = bruto - onp - ret5ta - credito_pension - prestamos
+    con_residual = residual > 0
+    remun = pd.DataFrame({
+        "pos": pos[con_residual], "bloque": 2, "orden": 0, "origen": "fija",
+        "ref": "cuenta_remuneraciones_por_pagar", "debe": 0.0,
+        "haber": residual[con_residual].values, "global": False,
+    })
 
+    # Porciones por trabajador de las líneas globales (EsSalud es gasto y pasivo)
+    globales = [
+        _partidas_globales(pos, "cuenta_essalud_gasto", essalud.values, 0.0),
+        _partidas_globales(pos, "cuenta_essalud_pasivo", 0.0, essalud.values),
+        _partidas_globales(pos, "cuenta_onp", 0.0, (onp + aj_afp.where(es_onp, 0.0)).values),
+        _partidas_globales(pos, "cuenta_retencion_5ta", 0.0, ret5ta.values),
+    ]
+    if es_afp.any():
+        globales.append(_partidas_globales(
+            pos[es_afp], sist[es_afp].map(_AFP_CUENTA_ATTR).values, 0.0, credito_pension[es_afp].values,
+        ))
+
+    partidas = pd.concat(
+        [ingresos[_COLUMNAS_PARTIDA], descuentos[_COLUMNAS_PARTIDA], remun[_COLUMNAS_PARTIDA]] + globales,
+        ignore_index=True,
+    )
+    partidas["cuenta"] = [
+        cuentas_concepto.get(ref, "") if origen == "concepto" else cuentas_fijas.get(ref, "")
+        for origen, ref in zip(partidas["origen"], partidas["ref"])
+    ]
+
+    # ── 3. Agrupaciones: líneas globales, faltantes y diagnóstico ──
+    totales_globales = partidas[partidas["global"]].groupby("ref")[["debe", "haber"]].sum()
+    lineas_trab = partidas[~partidas["global"]].sort_values(["pos", "bloque", "orden"], kind="stable")
+
+    faltantes = {
+        f'Concepto "{ref}" (Maestro de Conceptos)' if origen == "concepto" else _ETIQUETAS_CUENTAS_FIJAS[ref]
+        for origen, ref, cuenta in zip(lineas_trab["origen"], lineas_trab["ref"], lineas_trab["cuenta"])
+        if not cuenta
+    }
+    for attr, _ in _LINEAS_GLOBALES:
+        if attr in totales_globales.index and totales_globales.loc[attr].sum() > 0 and not cuentas_fijas[attr]:
+            faltantes.add(_ETIQUETAS_CUENTAS_FIJAS[attr])
+    if not cuentas_fijas["cuenta_remuneraciones_por_pagar"]:
+        faltantes.add(_ETIQUETAS_CUENTAS_FIJAS["cuenta_remuneraciones_por_pagar"])
     if faltantes:
         raise AsientoContableError(
             "Faltan cuentas contables por configurar antes de generar el asiento.",
             cuentas_faltantes=sorted(faltantes),
         )
 
-    # ── Ya validado: armar las filas del asiento ──
-    dias_mes = calendar.monthrange(anio_num, mes_num)[1]
-    # Como texto "dd/mm/yyyy" (no como objeto date) para que SISCONT no lo reciba en
-    # formato ISO — Fecha, Fec.Doc y Fec.Ven usan este mismo valor en cada fila.
-    fecha_asiento = date(anio_num, mes_num, dias_mes).strftime('%d/%m/%Y')
-    num_doc_asiento = f"BS{mes_num:02d}-{anio_num}"
-    glosa_asiento = f"PLANILLA DE SUELDO {MESES_ES.get(mes_num, '')} {anio_num}"
-
-    cuenta_sueldo = cuentas_concepto.get("SUELDO BASICO", "")
-    cuenta_asig_fam = cuentas_concepto.get("ASIGNACION FAMILIAR", "")
-
-    filas = []
-    total_essalud = 0.0
-    total_onp = 0.0
-    total_5ta = 0.0
-    total_afp = {k: 0.0 for k in _AFP_CUENTA_ATTR}
+    nombres = df_data['Apellidos y Nombres']
+    lineas = pd.DataFrame({
+        "cuenta": lineas_trab["cuenta"].values,
+        "debe": lineas_trab["debe"].round(2).values,
+        "haber": lineas_trab["haber"].round(2).values,
+        "cod_prov_clie": dnis.iloc[lineas_trab["pos"]].values,
+        "ruc": dnis.iloc[lineas_trab["pos"]].values,
+        "r_social": nombres.iloc[lineas_trab["pos"]].values,
+    })
+    filas_globales = []
+    for attr, (cod, ruc, r_social) in _LINEAS_GLOBALES:
+        if attr not in totales_globales.index:
+            continue
+        debe, haber = totales_globales.loc[attr, "debe"], totales_globales.loc[attr, "haber"]
+        if debe + haber > 0:
+            filas_globales.append({
+                "cuenta": cuentas_fijas[attr], "debe": round(float(debe), 2), "haber": round(float(haber), 2),
+                "cod_prov_clie": cod, "ruc": ruc, "r_social": r_social,
+            })
+    if filas_globales:
+        lineas = pd.concat([lineas, pd.DataFrame(filas_globales)], ignore_index=True)
 
     # Diagnóstico: Debe/Haber acumulado POR TRABAJADOR (incluye su porción de las
-    # cuentas globales, aunque en el archivo salgan como una sola línea totalizada) —
-    # así, si el asiento no cuadra, se puede señalar exactamente quién causa la
+    # cuentas globales) — si el asiento no cuadra, señala exactamente quién causa la
     # diferencia en vez de solo el total general.
-    diagnostico = {}  # dni -> {"nombre": str, "debe": float, "haber": float}
-
-    def _diag(dni, nombre):
-        if dni not in diagnostico:
-            diagnostico[dni] = {"nombre": nombre, "debe": 0.0, "haber": 0.0}
-        return diagnostico[dni]
-
-    for _, row in df_data.iterrows():
-        dni = str(row['DNI'])
-        nombre = row['Apellidos y Nombres']
-        info = auditoria_data.get(dni, {})
-        ingresos = info.get('ingresos', {}) or {}
-        descuentos = info.get('descuentos', {}) or {}
-        sist = str(row.get('Sist. Pensión', '') or '')
-        d = _diag(dni, nombre)
-
-        # Débitos: cada concepto de ingreso con monto > 0
-        debe_ingresos_trab = 0.0  # Total Bruto de ESTE trabajador (sin EsSalud)
-        for nombre_c, monto in ingresos.items():
-            monto = float(monto or 0)
-            if monto <= 0 or nombre_c in _CONCEPTOS_GRATI_EXCLUIDOS:
-                continue
-            if nombre_c.startswith("Sueldo Base"):
-                cuenta = cuenta_sueldo
-            elif nombre_c == "Asignación Familiar":
-                cuenta = cuenta_asig_fam
-            elif nombre_c.startswith("Horas Extras 25"):
-                cuenta = getattr(cfg, 'cuenta_horas_extra_25', '')
-            elif nombre_c.startswith("Horas Extras 35"):
-                cuenta = getattr(cfg, 'cuenta_horas_extra_35', '')
-            elif nombre_c == "Descanso Vacacional":
-                cuenta = getattr(cfg, 'cuenta_descanso_vacacional', '')
-            elif nombre_c == "Descanso Médico":
-                cuenta = getattr(cfg, 'cuenta_descanso_medico', '')
-            elif nombre_c == "Licencia con Goce":
-                cuenta = getattr(cfg, 'cuenta_licencia_goce', '')
-            else:
-                cuenta = cuentas_concepto.get(nombre_c, "")
-            filas.append(_fila(11, 1, fecha_asiento, cuenta, monto, 0.0, num_doc_asiento, glosa_asiento,
-                                cod_prov_clie=dni, ruc=dni, r_social=nombre))
-            d["debe"] += monto
-            debe_ingresos_trab += monto
-
-        essalud_trab = float(row.get('Aporte Seg. Social', 0) or 0)
-        onp_trab = float(row.get('ONP (13%)', 0) or 0)
-        ret5ta_trab = float(row.get('Ret. 5ta Cat.', 0) or 0)
-        total_essalud += essalud_trab
-        total_onp += onp_trab
-        total_5ta += ret5ta_trab
-        d["debe"] += essalud_trab   # EsSalud es gasto también, aunque salga en línea global
-        d["haber"] += essalud_trab + onp_trab + ret5ta_trab
-
-        monto_afp_calculado = sum(float(row.get(c, 0) or 0) for c in ["AFP Aporte", "AFP Seguro", "AFP Comis."])
-
-        # "Ajuste AFP (Audit)" — ajuste manual del Panel de Auditoría Tributaria, se
-        # resta del neto POR SU CUENTA (no es un "descuento dinámico" más) y debe ir a
-        # la MISMA cuenta de AFP/ONP del trabajador, sea positivo o negativo — nunca se
-        # descarta, aunque sea negativo (ver bug corregido: antes se perdía).
-        aj_afp = float(descuentos.get(_CLAVE_AJUSTE_AFP, 0) or 0)
-        credito_pension_trab = 0.0  # lo que se le retuvo por AFP/ONP, para el residual de abajo
-        if sist in total_afp:
-            total_afp[sist] += monto_afp_calculado + aj_afp
-            d["haber"] += monto_afp_calculado + aj_afp
-            credito_pension_trab = monto_afp_calculado + aj_afp
-        elif sist == "ONP":
-            total_onp += aj_afp
-            d["haber"] += aj_afp
-            credito_pension_trab = aj_afp  # onp_trab ya se sumó arriba en la línea de EsSalud/ONP/5ta
-
-        # Créditos por trabajador: préstamos/descuentos dinámicos (cuenta propia)
-        credito_prestamos_dinamicos = 0.0
-        for nombre_c, monto in descuentos.items():
-            monto = float(monto or 0)
-            if monto <= 0 or _es_descuento_ya_manejado(nombre_c):
-                continue
-            cuenta_desc = cuentas_concepto.get(nombre_c) or getattr(cfg, 'cuenta_prestamos_personal', '')
-            filas.append(_fila(11, 1, fecha_asiento, cuenta_desc, 0.0, monto, num_doc_asiento, glosa_asiento,
-                                cod_prov_clie=dni, ruc=dni, r_social=nombre))
-            d["haber"] += monto
-            credito_prestamos_dinamicos += monto
-
-        # Remuneraciones por Pagar se calcula como RESIDUAL (Total Bruto del trabajador
-        # menos todo lo que ya se le acreditó a otras cuentas) — NO se usa el campo
-        # "NETO A PAGAR" guardado en la planilla. Esto garantiza que el asiento cuadre
-        # siempre por construcción, sin depender de que ese campo coincida exactamente
-        # con la suma de sus componentes (evita descuadres si el dato guardado difiere).
-        monto_remun_pagar = (
-            debe_ingresos_trab - onp_trab - ret5ta_trab
-            - credito_pension_trab - credito_prestamos_dinamicos
-        )
-        if monto_remun_pagar > 0:
-            filas.append(_fila(11, 1, fecha_asiento, getattr(cfg, 'cuenta_remuneraciones_por_pagar', ''),
-                                0.0, monto_remun_pagar, num_doc_asiento, glosa_asiento,
-                                cod_prov_clie=dni, ruc=dni, r_social=nombre))
-            d["haber"] += monto_remun_pagar
-
-    # ── Líneas globales: EsSalud (gasto + pasivo), ONP, AFP x4, Retención 5ta ──
-    if total_essalud > 0:
-        filas.append(_fila(11, 1, fecha_asiento, getattr(cfg, 'cuenta_essalud_gasto', ''),
-                            total_essalud, 0.0, num_doc_asiento, glosa_asiento))
-        filas.append(_fila(11, 1, fecha_asiento, getattr(cfg, 'cuenta_essalud_pasivo', ''),
-                            0.0, total_essalud, num_doc_asiento, glosa_asiento,
-                            cod_prov_clie=_RUC_SUNAT, ruc=_RUC_SUNAT, r_social=_NOMBRE_SUNAT))
-    if total_onp > 0:
-        filas.append(_fila(11, 1, fecha_asiento, getattr(cfg, 'cuenta_onp', ''),
-                            0.0, total_onp, num_doc_asiento, glosa_asiento,
-                            cod_prov_clie=_RUC_SUNAT, ruc=_RUC_SUNAT, r_social=_NOMBRE_SUNAT))
-    for admin, monto in total_afp.items():
-        if monto > 0:
-            ruc_afp, rsocial_afp = _AFP_RUC_RSOCIAL.get(admin, ("", ""))
-            filas.append(_fila(11, 1, fecha_asiento, getattr(cfg, _AFP_CUENTA_ATTR[admin], ''),
-                                0.0, monto, num_doc_asiento, glosa_asiento,
-                                cod_prov_clie=ruc_afp, ruc=ruc_afp, r_social=rsocial_afp))
-    if total_5ta > 0:
-        filas.append(_fila(11, 1, fecha_asiento, getattr(cfg, 'cuenta_retencion_5ta', ''),
-                            0.0, total_5ta, num_doc_asiento, glosa_asiento,
-                            cod_prov_clie=_RUC_SUNAT, ruc=_RUC_SUNAT, r_social=_NOMBRE_SUNAT))
+    diag = partidas.groupby("pos")[["debe", "haber"]].sum().reindex(pos, fill_value=0.0)
+    diagnostico = pd.DataFrame({
+        "dni": dnis.values, "nombre": nombres.values,
+        "debe": diag["debe"].round(2).values, "haber": diag["haber"].round(2).values,
+        "diferencia": (diag["debe"] - diag["haber"]).round(2).values,
+    })
 
     # ── Seguro interno: el asiento SIEMPRE debe cuadrar ──
-    total_debe = sum(f["Monto Debe"] for f in filas)
-    total_haber = sum(f["Monto Haber"] for f in filas)
+    total_debe = float(lineas["debe"].sum())
+    total_haber = float(lineas["haber"].sum())
     if round(total_debe - total_haber, 2) != 0:
-        detalle = []
-        for dni, d in diagnostico.items():
-            diferencia = round(d["debe"] - d["haber"], 2)
-            if diferencia != 0:
-                detalle.append({
-                    "dni": dni, "nombre": d["nombre"],
-                    "debe": round(d["debe"], 2), "haber": round(d["haber"], 2),
-                    "diferencia": diferencia,
-                })
-        detalle.sort(key=lambda x: abs(x["diferencia"]), reverse=True)
+        detalle = diagnostico[diagnostico["diferencia"] != 0]
+        detalle = detalle.reindex(detalle["diferencia"].abs().sort_values(ascending=False, kind="stable").index)
         raise AsientoContableError(
             f"El asiento no cuadra (Debe: S/ {total_debe:,.2f} vs Haber: S/ {total_haber:,.2f}). "
             f"No se generó el archivo — este es un error interno, no de configuración.",
-            detalle_diagnostico=detalle,
+            detalle_diagnostico=detalle.to_dict("records"),
         )
 
+    dias_mes = calendar.monthrange(anio_num, mes_num)[1]
+    return {
+        # Como texto "dd/mm/yyyy" (no como objeto date) para que SISCONT no lo reciba en
+        # formato ISO — Fecha, Fec.Doc y Fec.Ven usan este mismo valor en cada fila.
+        "fecha": date(anio_num, mes_num, dias_mes).strftime('%d/%m/%Y'),
+        "num_doc": f"BS{mes_num:02d}-{anio_num}",
+        "glosa": f"PLANILLA DE SUELDO {MESES_ES.get(mes_num, '')} {anio_num}",
+        "lineas": lineas,
+        "totales": lineas.groupby("cuenta", sort=True)[["debe", "haber"]].sum().reset_index(),
+        "diagnostico": diagnostico,
+    }
+
+
+# ── Escritores ────────────────────────────────────────────────────────────────
+
+def _escribir_siscont(libro: dict) -> io.BytesIO:
+    """Excel de importación a SISCONT: una fila por línea del libro, voucher 1, origen 11."""
+    filas = [
+        _fila(11, 1, libro["fecha"], ln.cuenta, float(ln.debe), float(ln.haber), libro["num_doc"], libro["glosa"],
+              cod_prov_clie=ln.cod_prov_clie, ruc=ln.ruc, r_social=ln.r_social)
+        for ln in libro["lineas"].itertuples(index=False)
+    ]
     df_out = pd.DataFrame(filas, columns=COLUMNAS_SISCONT)
     buffer = io.BytesIO()
     with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
         df_out.to_excel(writer, index=False, sheet_name='Asiento')
     buffer.seek(0)
     return buffer
+
+
+# Formato → función(libro) -> BytesIO. Un sistema contable nuevo solo agrega su escritor.
+ESCRITORES_ASIENTO = {
+    "SISCONT": _escribir_siscont,
+}
@@ -3,13 +3,20 @@ Generador de interfaces oficiales SUNAT/AFPnet.
 
   generar_archivos_plame()  → ZIP con .REM, .JOR, .SNL
   generar_excel_afpnet()    → XLSX con 18 columnas estrictas AFPnet
+  generar_txt_bcp()         → TXT de pago masivo Telecrédito BCP
 """
 import io
+import math
+import re
 import zipfile
 import unicodedata
 from datetime import date
+from xml.sax.saxutils import escape
 
 import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -176,67 +183,96 @@ def _limpiar_texto_bcp(texto: str) -> str:
     """Quita tildes, eñes y caracteres especiales para estándares bancarios."""
     if not texto: return ""
     s = str(texto).upper()
-    s = ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn')
+    s = ''.join(c for c in unicodedata.normalize('NFD', s) if not unicodedata.combining(c))
     return s.replace('Ñ', 'N').strip()
 
+
+def _limpiar_textos_bcp(textos: pd.Series) -> pd.Series:
+    """`_limpiar_texto_bcp` sobre una columna entera, con operaciones de texto vectorizadas."""
+    crudos = textos.map(lambda t: str(t) if t else "").astype(object)
+    nfd = crudos.str.upper().str.normalize('NFD')
+    # Marcas combinantes (tildes, diéresis) que aparecen en la salida NFD de esta columna
+    marcas = {c for c in set("".join(nfd.tolist())) if unicodedata.combining(c)}
+    if marcas:
+        nfd = nfd.str.translate(dict.fromkeys(map(ord, marcas)))
+    return nfd.str.replace('Ñ', 'N', regex=False).str.strip()
+
+
+def _columna(df: pd.DataFrame, *nombres, defecto=''):
+    """Primera columna existente entre `nombres` (como r.get(a, r.get(b, defecto)))."""
+    for nombre in nombres:
+        if nombre in df.columns:
+            return df[nombre]
+    return pd.Series(defecto, index=df.index, dtype=object)
+
+
+def locadores_desde_snapshot(honorarios_json: str) -> pd.DataFrame:
+    """
+    Locadores del snapshot (honorarios_json) listos para `generar_txt_bcp`: si el
+    snapshot no trae 'N° Cuenta', se arma con la cuenta BCP o, para otros bancos, el CCI.
+    """
+    df_loc = pd.read_json(io.StringIO(honorarios_json or '[]'), orient='records')
+    if not df_loc.empty and 'N° Cuenta' not in df_loc.columns:
+        df_loc['N° Cuenta'] = df_loc.apply(lambda r: str(r.get('cuenta_bancaria', '') or '') if str(r.get('Banco', '') or '') == 'BCP' else str(r.get('CCI', '') or ''), axis=1)
+    return df_loc
+
 def generar_txt_bcp(df_planilla: pd.DataFrame, cuenta_cargo: str, fecha_pago: date, df_loc: pd.DataFrame = None, solo_bcp: bool = False) -> io.BytesIO:
     """Genera el TXT de Pago Masivo para Telecrédito BCP."""
-    # 1. Consolidar personal (Planilla + Locadores si existen)
-    p_data = df_planilla[df_planilla['Apellidos y Nombres'] != 'TOTALES'].copy()
+    # 1. Consolidar personal (Planilla + Locadores si existen), columna a columna
+    p_data = df_planilla[df_planilla['Apellidos y Nombres'] != 'TOTALES']
     p_data = p_data[p_data['NETO A PAGAR'] > 0]
-    
-    personal = []
-    
-    def _agregar_personal(dni, nombre, cuenta_raw, neto):
-        cuenta_limpia = str(cuenta_raw).replace("-", "").strip()
-        if not cuenta_limpia or cuenta_limpia in ('NAN', 'NONE', ''): 
-            return
-        es_cci = len(cuenta_limpia) >= 20
-        if solo_bcp and es_cci:
-            return
-        personal.append({
-            'nombre': nombre,
-            'cuenta': cuenta_limpia,
-            'dni': str(dni).strip(),
-            'neto': float(neto),
-            'tipo_doc': "1" if len(str(dni).strip()) == 8 else "3"
-        })
-
-    for _, r in p_data.iterrows():
-        cta = r.get('N° Cuenta', r.get('Cuenta Bancaria', ''))
-        if not cta or str(cta).strip() in ('nan', 'None', ''):
-            cta = r.get('CCI', '')
-        _agregar_personal(r['DNI'], r['Apellidos y Nombres'], cta, r['NETO A PAGAR'])
-    
+
+    cta_plan = _columna(p_data, 'N° Cuenta', 'Cuenta Bancaria')
+    sin_cta = cta_plan.map(lambda c: not c or str(c).strip() in ('nan', 'None', '')).astype(bool)
+    cta_plan = cta_plan.where(~sin_cta, _columna(p_data, 'CCI'))
+    bloques = [pd.DataFrame({
+        'dni': p_data['DNI'], 'nombre': p_data['Apellidos y Nombres'],
+        'cuenta': cta_plan, 'neto': p_data['NETO A PAGAR'],
+    })]
+
     if df_loc is not None and not df_loc.empty:
         l_data = df_loc[df_loc['NETO A PAGAR'] > 0]
-        for _, r in l_data.iterrows():
-            cta = r.get('N° Cuenta', r.get('CCI', ''))
-            nombre_loc = r.get('Locador', r.get('Nombres y Apellidos', ''))
-            _agregar_personal(r['DNI'], nombre_loc, cta, r['NETO A PAGAR'])
-
-    if not personal:
+        bloques.append(pd.DataFrame({
+            'dni': l_data['DNI'],
+            'nombre': _columna(l_data, 'Locador', 'Nombres y Apellidos'),
+            'cuenta': _columna(l_data, 'N° Cuenta', 'CCI'),
+            'neto': l_data['NETO A PAGAR'],
+        }))
+
+    personal = pd.concat([b.astype(object) for b in bloques], ignore_index=True)
+    personal['cuenta'] = personal['cuenta'].map(str).str.replace("-", "", regex=False).str.strip()
+    personal = personal[~personal['cuenta'].isin(('NAN', 'NONE', ''))]
+    if solo_bcp:
+        personal = personal[personal['cuenta'].str.len() < 20]
+
+    if personal.empty:
         raise ValueError("No hay pagos pendientes con monto mayor a cero para los filtros seleccionados.")
 
+    return _txt_telecredito(personal, cuenta_cargo, fecha_pago)
+
+
+def _txt_telecredito(personal: pd.DataFrame, cuenta_cargo: str, fecha_pago: date) -> io.BytesIO:
+    """
+    Escribe el TXT Telecrédito a partir de los abonos ya consolidados y limpios
+    (columnas dni, nombre, cuenta, neto). Cuenta de 20+ dígitos = CCI (interbancario).
+    """
+    es_cci = personal['cuenta'].str.len() >= 20
+    cuentas = personal['cuenta']
+    dnis = personal['dni'].map(str).str.strip()
+    netos = personal['neto'].map(float)
+
     # 2. Cálculos globales
     cuenta_cargo_clean = str(cuenta_cargo).replace("-", "").strip()
-    sum_netos = sum(p['neto'] for p in personal)
+    sum_netos = sum(netos.tolist())
     monto_total_str = f"{sum_netos:.2f}".zfill(17)
     fecha_pago_str = fecha_pago.strftime("%Y%m%d")
 
-    # Checksum BCP
-    sumatoria_cuentas = int(cuenta_cargo_clean[:11] or 0)
-    for p in personal:
-        c = p['cuenta']
-        if len(c) >= 20: # CCI
-            sumatoria_cuentas += int(c[:10] or 0)
-        else: # BCP (13 o 14)
-            sumatoria_cuentas += int(c[:11] or 0)
-    
+    # Checksum BCP: cuenta de cargo + prefijo de cada cuenta abono (10 díg. CCI, 11 díg. BCP)
+    prefijos = cuentas.str[:11].where(~es_cci, cuentas.str[:10])
+    sumatoria_cuentas = int(cuenta_cargo_clean[:11] or 0) + sum(int(c or 0) for c in prefijos)
     checksum = str(sumatoria_cuentas).zfill(15)
 
     # 3. REGISTRO DE CABECERA
-    lineas = []
     cabecera = (
         f"1"                                  # Tipo
         f"{str(len(personal)).zfill(6)}"      # Cant abonos
@@ -249,32 +285,25 @@ def generar_txt_bcp(df_planilla: pd.DataFrame, cuenta_cargo: str, fecha_pago: da
         f"{'PAGO PLANILLA'.ljust(40)}"        # Referencia
         f"{checksum}"                         # Checksum
     )
-    lineas.append(cabecera)
-
-    # 4. REGISTROS DE DETALLE
-    for p in personal:
-        cta = p['cuenta']
-        t_cta = "I" if len(cta) >= 20 else ("C" if len(cta) == 14 else "A") # I=Interbancaria, C=Corriente, A=Ahorro
-        monto_p = f"{p['neto']:.2f}".zfill(17)
-        nombre_clean = _limpiar_texto_bcp(p['nombre'])[:75]
-        
-        detalle = (
-            f"2"                               # Tipo
-            f"{t_cta}"                         # Tipo Cta Abono
-            f"{cta.ljust(20)}"                 # Cta Abono
-            f"{p['tipo_doc']}"                 # Tipo Doc
-            f"{p['dni'].ljust(15)}"            # Num Doc (sin correlativo)
-            f"{nombre_clean.ljust(75)}"        # Nombre
-            f"{'HABERES'.ljust(40)}"           # Ref Beneficiario
-            f"{'PLANILLA'.ljust(20)}"          # Ref Empresa
-            f"0001"                            # Moneda Abono
-            f"{monto_p}"                       # Monto Abono
-            f"S"                               # IDC
-        )
-        lineas.append(detalle)
+
+    # 4. REGISTROS DE DETALLE (I=Interbancaria, C=Corriente, A=Ahorro)
+    t_cta = pd.Series("A", index=cuentas.index).mask(cuentas.str.len() == 14, "C").mask(es_cci, "I")
+    detalle = (
+        "2"                                               # Tipo
+        + t_cta                                           # Tipo Cta Abono
+        + cuentas.str.ljust(20)                           # Cta Abono
+        + dnis.str.len().eq(8).map({True: "1", False: "3"})  # Tipo Doc
+        + dnis.str.ljust(15)                              # Num Doc (sin correlativo)
+        + _limpiar_textos_bcp(personal['nombre']).str[:75].str.ljust(75)  # Nombre
+        + 'HABERES'.ljust(40)                             # Ref Beneficiario
+        + 'PLANILLA'.ljust(20)                            # Ref Empresa
+        + "0001"                                          # Moneda Abono
+        + netos.map("{:.2f}".format).str.zfill(17)        # Monto Abono
+        + "S"                                             # IDC
+    )
 
     output = io.BytesIO()
-    output.write("\r\n".join(lineas).encode('utf-8'))
+    output.write("\r\n".join([cabecera] + detalle.tolist()).encode('utf-8'))
     output.seek(0)
     return output
 
@@ -295,115 +324,179 @@ def generar_excel_afpnet(
     if df_trabajadores.empty:
         raise ValueError("No hay datos de trabajadores para generar el archivo AFPnet.")
 
-    # Mapa doc → trabajador
-    trab_map: dict = {}
-    for _, tr in df_trabajadores.iterrows():
-        trab_map[str(tr.get("Num. Doc.", ""))] = tr
-
     df_data = df_planilla[df_planilla["Apellidos y Nombres"] != "TOTALES"]
-
-    rows: list[dict] = []
-    seq = 1
-    for _, row in df_data.iterrows():
-        sistema = str(row.get("Sist. Pensión", "")).upper()
-        if "AFP" not in sistema:
-            continue  # Ignorar ONP y NO AFECTO
-
-        dni  = str(row["DNI"])
-        trab = trab_map.get(dni, pd.Series(dtype=object))
-        aud  = auditoria_data.get(dni, {})
-
-        # Apellidos y nombres separados - Limpieza de duplicidad
-        ap_pat  = str(trab.get("Apellido Paterno", "") or "").upper().strip()
-        ap_mat  = str(trab.get("Apellido Materno", "") or "").upper().strip()
-        
-        # Extraemos solo el nombre de pila para evitar la duplicidad de apellidos en el campo nombres
-        nombres_full = str(trab.get("Nombres y Apellidos", trab.get("nombres", "")) or "").upper().strip()
-        prefix_apellidos = f"{ap_pat} {ap_mat}".strip()
-        
-        if ap_pat and nombres_full.startswith(prefix_apellidos):
-            nombres = nombres_full[len(prefix_apellidos):].strip()
-        else:
-            nombres = nombres_full
-
-        cuspp = str(trab.get("CUSPP", "") or "").strip().ljust(12)[:12]
-        if not cuspp.strip():
-            raise ValueError(
-                f"El trabajador DNI {dni} ({nombres}) tiene AFP pero no tiene CUSPP registrado. "
-                f"Actualice el dato en el Maestro de Personal."
-            )
-
-        tipo_doc_afpnet = _tipo_doc_afpnet(str(trab.get("Tipo Doc.", "DNI") or "DNI"))
-
-        # Fecha de ingreso
-        fi = trab.get("Fecha Ingreso", None)
-        if hasattr(fi, 'strftime'):
-            fecha_inicio_str = fi.strftime("%d/%m/%Y")
-        elif fi:
-            fecha_inicio_str = str(fi)[:10]
-        else:
-            fecha_inicio_str = ""
-
-        # Inicio_Lab (S si ingresó en este mes)
-        inicio_lab = "N"
-        try:
-            fi_date = pd.to_datetime(fi)
-            inicio_lab = "S" if (fi_date.year == anio and fi_date.month == mes) else "N"
-        except Exception:
-            inicio_lab = "N"
-
-        # Lógica de Excepción de Aportar (Columna K del CSV)
-        # Solo si el total de días de suspensión iguala a los días del mes
-        excepcion = ""
-        suspensiones = aud.get("suspensiones", {})
-        dias_mes_total = int(aud.get("dias_computables", 30))
-        
-        # Códigos que exoneran aportes si cubren el mes completo
-        codigos_exencion = ["06", "07", "16", "20", "21"]
-        total_dias_susp = sum(int(suspensiones.get(c, 0)) for c in codigos_exencion)
-
-        if total_dias_susp >= dias_mes_total:
-            # L = Licencia/Faltas/PTP, U = Subsidio
-            if "21" in suspensiones:
-                excepcion = "U"
-            else:
-                excepcion = "L"
-
-        base_afp = float(aud.get("base_afp", 0.0))
-
-        rows.append({
-            "Número de secuencia":    seq,
-            "CUSPP":                  cuspp,
-            "Tipo  de documento de identidad": tipo_doc_afpnet,
-            "Número de documento de indentidad": dni,
-            "Apellido paterno":       ap_pat,
-            "Apellido materno":       ap_mat,
-            "Nombres":                nombres,
-            "Relación Laboral ":      "S",
-            "Inicio de RL":           inicio_lab,
-            "Cese de RL":             "N",
-            "Excepcion de Aportar":   excepcion,
-            "Remuneración asegurable": round(base_afp, 2),
-            "Aporte voluntario del afiliado con fin previsional": 0.00,
-            "Aporte voluntario del afiliado sin fin previsional": 0.00,
-            "Aporte voluntario del empleador": 0.00,
-            "Tipo de trabajo o Rubro": "N",
-            "AFP":                    "" # Se deja en blanco según sugerencia del CSV
-        })
-        seq += 1
-
-    if not rows:
+    sistema = _columna(df_data, "Sist. Pensión").map(str).str.upper()
+    df_afp = df_data[sistema.str.contains("AFP", regex=False)]  # Ignorar ONP y NO AFECTO
+    if df_afp.empty:
         raise ValueError("No hay trabajadores con AFP activo en esta planilla.")
 
-    df_out = pd.DataFrame(rows)
+    # Cruce doc → trabajador en bloque (si el doc se repite, gana el último, como el mapa anterior)
+    dnis = df_afp["DNI"].map(str).reset_index(drop=True)
+    trab = df_trabajadores.astype(object).copy()
+    trab.index = _columna(trab, "Num. Doc.").map(str)
+    trab = trab[~trab.index.duplicated(keep="last")]
+    encontrado = dnis.isin(trab.index).values
+    trab = trab.reindex(dnis)
+
+    def _texto(*columnas, defecto=""):
+        """str(trab.get(col, defecto) or defecto) por fila; sin trabajador → defecto."""
+        col = _columna(trab, *columnas, defecto=defecto)
+        return pd.Series(
+            [str(v or defecto) if ok else defecto for v, ok in zip(col, encontrado)], dtype=object,
+        )
+
+    # Apellidos y nombres separados - Limpieza de duplicidad
+    ap_pat = _texto("Apellido Paterno").str.upper().str.strip()
+    ap_mat = _texto("Apellido Materno").str.upper().str.strip()
+    nombres_full = _texto("Nombres y Apellidos", "nombres").str.upper().str.strip()
+    prefijo_apellidos = (ap_pat + " " + ap_mat).str.strip()
+    # Solo el nombre de pila, para no duplicar los apellidos en el campo nombres
+    nombres = pd.Series([
+        full[len(pref):].strip() if pat and full.startswith(pref) else full
+        for full, pref, pat in zip(nombres_full, prefijo_apellidos, ap_pat)
+    ], dtype=object)
+
+    cuspp = _texto("CUSPP").str.strip().str.ljust(12).str[:12]
+    sin_cuspp = cuspp.str.strip() == ""
+    if sin_cuspp.any():
+        i = int(sin_cuspp.values.argmax())
+        raise ValueError(
+            f"El trabajador DNI {dnis[i]} ({nombres[i]}) tiene AFP pero no tiene CUSPP registrado. "
+            f"Actualice el dato en el Maestro de Personal."
+        )
+
+    tipo_doc_afpnet = _texto("Tipo Doc.", defecto="DNI").map(_tipo_doc_afpnet).tolist()
+    fechas_ingreso = [v if ok else None for v, ok in zip(_columna(trab, "Fecha Ingreso", defecto=None), encontrado)]
+
+    auds = [auditoria_data.get(dni, {}) for dni in dnis]
+
+    rows = [
+        [
+            seq,                                  # Número de secuencia
+            cuspp_i,                              # CUSPP
+            tipo_doc_i,                           # Tipo de documento de identidad
+            dni,                                  # Número de documento de identidad
+            pat,                                  # Apellido paterno
+            mat,                                  # Apellido materno
+            nom,                                  # Nombres
+            "S",                                  # Relación Laboral
+            _inicio_lab_afpnet(fi, anio, mes),    # Inicio de RL
+            "N",                                  # Cese de RL
+            _excepcion_aportar(aud),              # Excepción de Aportar
+            round(float(aud.get("base_afp", 0.0)), 2),  # Remuneración asegurable
+            0.00,                                 # Aporte voluntario con fin previsional
+            0.00,                                 # Aporte voluntario sin fin previsional
+            0.00,                                 # Aporte voluntario del empleador
+            "N",                                  # Tipo de trabajo o Rubro
+            "",                                   # AFP (en blanco según sugerencia del CSV)
+        ]
+        for seq, (cuspp_i, tipo_doc_i, dni, pat, mat, nom, fi, aud) in enumerate(zip(
+            cuspp.tolist(), tipo_doc_afpnet, dnis.tolist(), ap_pat.tolist(), ap_mat.tolist(),
+            nombres.tolist(), fechas_ingreso, auds,
+        ), start=1)
+    ]
+
+    # Sin cabecera; ancho de cada columna = min(texto más largo + 2, 30)
+    anchos = [min(max(len(str(v or "")) for v in columna) + 2, 30) for columna in zip(*rows)]
+    return _xlsx_una_hoja("AFPnet", rows, anchos)
+
+
+# ── XLSX de una sola hoja ─────────────────────────────────────────────────────
+# openpyxl (incluso en write_only) arma un elemento XML por celda y con 10k filas
+# la serialización se lleva casi todo el tiempo. Aquí openpyxl escribe el libro
+# vacío (estilos, anchos, metadatos) y las filas se insertan como texto, con el
+# mismo marcado que produce su write_only: números 't="n"', textos 'inlineStr'.
+# Si la hoja vacía no trae el <sheetData> esperado (otra versión de openpyxl), se
+# escribe fila por fila con ws.append: mismo resultado, solo más lento.
+
+_SHEET_DATA_VACIO = re.compile(rb"<sheetData\s*/>|<sheetData>\s*</sheetData>")
+
+
+def _valor_celda(valor):
+    """NaN / ±inf no existen en Excel: celda vacía."""
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+def _celda_xml(ref: str, valor) -> str:
+    valor = _valor_celda(valor)
+    if valor is None:
+        return ""
+    if isinstance(valor, str):
+        if valor == "":
+            return f'<c r="{ref}" t="inlineStr" />'
+        if ILLEGAL_CHARACTERS_RE.search(valor):
+            raise ValueError(f"{valor!r} contiene caracteres no válidos en Excel.")
+        espacio = ' xml:space="preserve"' if valor.strip() and valor != valor.strip() else ""
+        return f'<c r="{ref}" t="inlineStr"><is><t{espacio}>{escape(valor[:32767])}</t></is></c>'
+    return f'<c r="{ref}" t="n"><v>{"%.16g" % valor}</v></c>'
+
+
+def _libro_una_hoja(nombre_hoja: str, anchos: list):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(nombre_hoja)
+    for idx, ancho in enumerate(anchos, start=1):
+        ws.column_dimensions[get_column_letter(idx)].width = ancho
+    return wb, ws
+
+
+def _xlsx_una_hoja_openpyxl(nombre_hoja: str, filas: list, anchos: list) -> io.BytesIO:
+    """Misma salida que `_xlsx_una_hoja`, celda por celda con openpyxl."""
+    wb, ws = _libro_una_hoja(nombre_hoja, anchos)
+    for fila in filas:
+        ws.append([_valor_celda(v) for v in fila])
     buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        # header=False elimina la cabecera de la primera fila
-        df_out.to_excel(writer, index=False, header=False, sheet_name="AFPnet")
-        ws = writer.sheets["AFPnet"]
-        # Ajustar anchos
-        for col in ws.columns:
-            max_len = max((len(str(c.value or "")) for c in col), default=10)
-            ws.column_dimensions[col[0].column_letter].width = min(max_len + 2, 30)
+    wb.save(buffer)
     buffer.seek(0)
     return buffer
+
+
+def _xlsx_una_hoja(nombre_hoja: str, filas: list, anchos: list) -> io.BytesIO:
+    """XLSX con una hoja sin estilos: `filas` (listas de números/textos/None) y ancho por columna."""
+    wb, _ = _libro_una_hoja(nombre_hoja, anchos)
+    vacio = io.BytesIO()
+    wb.save(vacio)
+
+    with zipfile.ZipFile(vacio) as origen:
+        hoja = origen.read("xl/worksheets/sheet1.xml")
+        marcador = _SHEET_DATA_VACIO.search(hoja)
+        if marcador is None:
+            return _xlsx_una_hoja_openpyxl(nombre_hoja, filas, anchos)
+
+        letras = [get_column_letter(i) for i in range(1, len(anchos) + 1)]
+        sheet_data = "<sheetData>" + "".join(
+            f'<row r="{r}">' + "".join(_celda_xml(f"{letra}{r}", v) for letra, v in zip(letras, fila)) + "</row>"
+            for r, fila in enumerate(filas, start=1)
+        ) + "</sheetData>"
+        hoja = hoja[:marcador.start()] + sheet_data.encode("utf-8") + hoja[marcador.end():]
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as destino:
+            for info in origen.infolist():
+                contenido = hoja if info.filename == "xl/worksheets/sheet1.xml" else origen.read(info.filename)
+                destino.writestr(info, contenido)
+    buffer.seek(0)
+    return buffer
+
+
+def _inicio_lab_afpnet(fi, anio: int, mes: int) -> str:
+    """'S' si el trabajador ingresó en el mes declarado."""
+    try:
+        fi_date = fi if hasattr(fi, "year") else pd.to_datetime(fi)
+        return "S" if (fi_date.year == anio and fi_date.month == mes) else "N"
+    except Exception:
+        return "N"
+
+
+def _excepcion_aportar(aud: dict) -> str:
+    """
+    Excepción de Aportar (columna K del CSV): solo si los días de suspensión que
+    exoneran aportes cubren el mes completo. L = Licencia/Faltas/PTP, U = Subsidio.
+    """
+    suspensiones = aud.get("suspensiones", {})
+    dias_mes_total = int(aud.get("dias_computables", 30))
+    total_dias_susp = sum(int(suspensiones.get(c, 0)) for c in ("06", "07", "16", "20", "21"))
+    if total_dias_susp >= dias_mes_total:
+        return "U" if "21" in suspensiones else "L"
+    return ""
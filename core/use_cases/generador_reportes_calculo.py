@@ -19,7 +19,8 @@ from datetime import datetime
 import pandas as pd
 
 # Excel
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.styles import Font
+from core.use_cases.excel_tabla import estilos_tabla_corporativa, excel_tabla_streaming
 
 # PDF
 from reportlab.lib import colors
@@ -99,52 +100,16 @@ def generar_excel_sabana(df, empresa_nombre, periodo, empresa_ruc=""):
     cols_mostrar = [c for c in df.columns if c not in _COLS_OCULTAS_SABANA]
     df_export = df[cols_mostrar]
 
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_export.to_excel(writer, sheet_name=f'Planilla_{periodo[:2]}', index=False, startrow=5)
-        ws = writer.sheets[f'Planilla_{periodo[:2]}']
-
-        # 1. Títulos de Cabecera
-        ws['A1'] = empresa_nombre
-        ws['A1'].font = Font(size=16, bold=True, color="0F2744")
-        ws['A2'] = empresa_ruc and f"RUC: {empresa_ruc}" or ""
-        ws['A2'].font = Font(size=10, color="64748B")
-        ws['A3'] = f"PLANILLA DE REMUNERACIONES — PERIODO: {periodo_texto}"
-        ws['A3'].font = Font(size=11, bold=True, color="1E4D8C")
-        ws['A4'] = f"Fecha de Cálculo: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-        ws['A4'].font = Font(size=10, italic=True, color="7F8C8D")
-        
-        # 2. Estilos Corporativos
-        fill_header = PatternFill(start_color="1A365D", end_color="1A365D", fill_type="solid")
-        font_header = Font(color="FFFFFF", bold=True)
-        align_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        border_thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        fill_total = PatternFill(start_color="E2E8F0", end_color="E2E8F0", fill_type="solid")
-        
-        # 3. Aplicar formato a las celdas de la tabla (datos desde fila 6)
-        for row in ws.iter_rows(min_row=6, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.border = border_thin
-                if cell.row == 6:  # Fila de nombres de columnas
-                    cell.fill = fill_header
-                    cell.font = font_header
-                    cell.alignment = align_center
-                elif cell.row == ws.max_row:  # Última fila (Totales)
-                    cell.fill = fill_total
-                    cell.font = Font(bold=True)
-                    
-        # 4. Auto-ajustar ancho de columnas (máximo 25 caracteres para no hacerlo gigante)
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length: max_length = len(str(cell.value))
-                except: pass
-            ws.column_dimensions[column].width = min(max_length + 2, 25)
-            
-    buffer.seek(0)
-    return buffer
+    return excel_tabla_streaming(
+        df_export, f'Planilla_{periodo[:2]}',
+        titulos=[
+            (empresa_nombre, Font(size=16, bold=True, color="0F2744")),
+            (empresa_ruc and f"RUC: {empresa_ruc}" or "", Font(size=10, color="64748B")),
+            (f"PLANILLA DE REMUNERACIONES — PERIODO: {periodo_texto}", Font(size=11, bold=True, color="1E4D8C")),
+            (f"Fecha de Cálculo: {datetime.now().strftime('%d/%m/%Y %H:%M')}", Font(size=10, italic=True, color="7F8C8D")),
+        ],
+        fila_cabecera=6, estilos=estilos_tabla_corporativa(), fila_totales=True, ajustar_anchos=True,
+    )
 
 def generar_pdf_sabana(df, empresa_nombre, periodo, empresa_ruc="", empresa_regimen=""):
     """Genera la sábana principal de planilla — ajustada a hoja, sin overflow."""
@@ -428,43 +393,16 @@ def generar_excel_honorarios(df_loc, empresa_nombre, periodo_key, empresa_ruc=""
     cols_excluir = ["Banco", "N° Cuenta", "CCI", "Observaciones"]
     df_export = df_loc[[c for c in df_loc.columns if c not in cols_excluir]].copy()
     
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-        df_export.to_excel(writer, sheet_name=f'Honorarios_{periodo_key[:2]}', index=False, startrow=5)
-        ws = writer.sheets[f'Honorarios_{periodo_key[:2]}']
-        ws['A1'] = empresa_nombre
-        ws['A1'].font = Font(size=16, bold=True, color="0F2744")
-        ws['A2'] = f"RUC: {empresa_ruc}" if empresa_ruc else ""
-        ws['A2'].font = Font(size=10, color="64748B")
-        ws['A3'] = f"VALORIZACIÓN DE LOCADORES DE SERVICIO (4ta Categoría) — PERIODO: {periodo_texto}"
-        ws['A3'].font = Font(size=11, bold=True, color="1E4D8C")
-        ws['A4'] = f"Fecha de Cálculo: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-        ws['A4'].font = Font(size=10, italic=True, color="7F8C8D")
-        fill_header = PatternFill(start_color="1A365D", end_color="1A365D", fill_type="solid")
-        font_header = Font(color="FFFFFF", bold=True)
-        align_center = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        border_thin = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-        fill_total = PatternFill(start_color="E2E8F0", end_color="E2E8F0", fill_type="solid")
-        for row in ws.iter_rows(min_row=6, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.border = border_thin
-                if cell.row == 6:
-                    cell.fill = fill_header
-                    cell.font = font_header
-                    cell.alignment = align_center
-                elif cell.row == ws.max_row:
-                    cell.fill = fill_total
-                    cell.font = Font(bold=True)
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length: max_length = len(str(cell.value))
-                except: pass
-            ws.column_dimensions[column].width = min(max_length + 2, 25)
-    buffer.seek(0)
-    return buffer
+    return excel_tabla_streaming(
+        df_export, f'Honorarios_{periodo_key[:2]}',
+        titulos=[
+            (empresa_nombre, Font(size=16, bold=True, color="0F2744")),
+            (f"RUC: {empresa_ruc}" if empresa_ruc else "", Font(size=10, color="64748B")),
+            (f"VALORIZACIÓN DE LOCADORES DE SERVICIO (4ta Categoría) — PERIODO: {periodo_texto}", Font(size=11, bold=True, color="1E4D8C")),
+            (f"Fecha de Cálculo: {datetime.now().strftime('%d/%m/%Y %H:%M')}", Font(size=10, italic=True, color="7F8C8D")),
+        ],
+        fila_cabecera=6, estilos=estilos_tabla_corporativa(), fila_totales=True, ajustar_anchos=True,
+    )
 
 
 def generar_pdf_honorarios(df_loc, empresa_nombre, periodo_key, empresa_ruc="", empresa_regimen=""):
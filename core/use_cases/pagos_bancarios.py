@@ -0,0 +1,234 @@
+"""
+Pago masivo multibanco — un archivo por banco a partir de la planilla cerrada.
+
+  FORMATOS_BANCO            → registro banco → generador de su archivo de pago masivo
+  validar_cuentas()         → validación de Banco / N° Cuenta / CCI por columnas,
+                              con caché por trabajador mientras sus datos no cambien
+  generar_pagos_por_banco() → reparte planilla + locadores en un archivo por banco
+
+Cada trabajador va al formato de SU banco si está registrado y su número de cuenta
+es válido para ese banco; si no, se paga por CCI a través del banco interbancario
+por defecto (hoy BCP Telecrédito, como `generar_txt_bcp`). Quien no tiene cuenta
+ni CCI válidos queda en la lista de observados (pago manual), con el motivo.
+"""
+import io
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from core.use_cases.generador_interfaces import _columna, _txt_telecredito
+
+# Código de entidad (3 primeros dígitos del CCI) de los bancos del maestro de personal
+CODIGO_CCI_BANCO = {
+    "BCP": "002",
+    "INTERBANK": "003",
+    "CITIBANK": "007",
+    "SCOTIABANK": "009",
+    "BBVA": "011",
+    "BANCO DE LA NACION": "018",
+    "BANCO PICHINCHA": "035",
+    "BANBIF": "038",
+}
+
+_SIN_BANCO = ("", "EFECTIVO/CHEQUE")
+
+# Caché de validación por trabajador
+VALIDACION_CACHE_MAX = 50_000
+_cache_validacion = OrderedDict()   # (dni, banco, cuenta, cci) → (cuenta, cci, cuenta_ok, cci_ok, motivo)
+_lock_validacion = threading.Lock()
+
+
+# ── Registro de formatos ──────────────────────────────────────────────────────
+# banco → {"generar": fn(pagos, cuenta_cargo, fecha_pago) -> (nombre_archivo, bytes),
+#          "longitudes_cuenta": longitudes válidas de la cuenta propia del banco,
+#          "interbancario": si el formato puede abonar a otros bancos por CCI}
+# `pagos` trae las columnas dni, nombre, cuenta (sin guiones; CCI si es interbancario) y neto.
+FORMATOS_BANCO = {}
+BANCO_INTERBANCARIO_DEFECTO = "BCP"
+
+
+def registrar_formato_banco(banco: str, longitudes_cuenta, interbancario: bool = False):
+    """Decorador: registra el generador del archivo de pago masivo de `banco`."""
+    def _registrar(generar):
+        with _lock_validacion:
+            _cache_validacion.clear()  # la validez de la cuenta propia depende del registro
+        FORMATOS_BANCO[banco] = {
+            "generar": generar,
+            "longitudes_cuenta": tuple(longitudes_cuenta),
+            "interbancario": interbancario,
+        }
+        return generar
+    return _registrar
+
+
+@registrar_formato_banco("BCP", longitudes_cuenta=(13, 14), interbancario=True)
+def _formato_bcp(pagos: pd.DataFrame, cuenta_cargo: str, fecha_pago: date):
+    buf = _txt_telecredito(pagos, cuenta_cargo, fecha_pago)
+    return f"BCP_HABERES_{fecha_pago.strftime('%Y%m%d')}.txt", buf.getvalue()
+
+
+# ── Validación de cuentas (por columnas, con caché por trabajador) ────────────
+
+_COLUMNAS_VALIDACION = ["cuenta", "cci", "cuenta_ok", "cci_ok", "motivo"]
+
+
+def _solo_digitos(serie: pd.Series) -> pd.Series:
+    limpia = serie.map(lambda v: "" if v is None or (isinstance(v, float) and v != v) else str(v))
+    limpia = limpia.astype(object).str.replace(r"[\s\-]", "", regex=True)
+    return limpia.where(~limpia.isin(("nan", "None")), "")
+
+
+def _validar_lote(claves: pd.DataFrame) -> pd.DataFrame:
+    """Valida en bloque filas (dni, banco, cuenta, cci) sin entrada en caché."""
+    banco = claves["banco"]
+    cuenta = _solo_digitos(claves["cuenta"])
+    cci = _solo_digitos(claves["cci"])
+
+    longitudes = banco.map(lambda b: FORMATOS_BANCO.get(b, {}).get("longitudes_cuenta", ()))
+    cuenta_ok = cuenta.str.isdigit() & pd.Series(
+        [len(c) in lon for c, lon in zip(cuenta, longitudes)], index=claves.index,
+    )
+    codigo_banco = banco.map(CODIGO_CCI_BANCO)
+    cci_formato_ok = (cci.str.len() == 20) & cci.str.isdigit()
+    cci_de_otro_banco = codigo_banco.notna() & (cci.str[:3] != codigo_banco)
+    cci_ok = cci_formato_ok & ~cci_de_otro_banco
+
+    sin_banco = banco.isin(_SIN_BANCO)
+    cuenta_ok &= ~sin_banco
+    cci_ok &= ~sin_banco
+    motivo = np.select(
+        [sin_banco, cuenta_ok | cci_ok, (cci != "") & ~cci_formato_ok, cci_formato_ok & cci_de_otro_banco],
+        ["Sin banco (pago en efectivo/cheque)", "", "CCI inválido (deben ser 20 dígitos)",
+         "El CCI no corresponde al banco registrado"],
+        default="Sin CCI y sin cuenta válida del banco",
+    )
+
+    return pd.DataFrame({
+        "cuenta": cuenta, "cci": cci, "cuenta_ok": cuenta_ok, "cci_ok": cci_ok, "motivo": motivo,
+    }, index=claves.index)
+
+
+def validar_cuentas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valida las columnas DNI / Banco / N° Cuenta / CCI de `df` y retorna, alineado a su
+    índice: banco (normalizado), cuenta y cci (solo dígitos), cuenta_ok, cci_ok y motivo
+    (vacío si se le puede pagar). Solo se validan las filas cuyos datos bancarios no
+    estén ya en caché — la clave incluye banco, cuenta y CCI, así que cualquier cambio
+    en el maestro invalida la entrada del trabajador.
+    """
+    claves = pd.DataFrame({
+        "dni": df["DNI"].map(str).str.strip(),
+        "banco": _columna(df, "Banco").map(lambda b: str(b or "").strip().upper()),
+        "cuenta": _columna(df, "N° Cuenta").map(lambda c: str(c) if c is not None else ""),
+        "cci": _columna(df, "CCI").map(lambda c: str(c) if c is not None else ""),
+    }, index=df.index)
+    tuplas = list(claves.itertuples(index=False, name=None))
+
+    with _lock_validacion:
+        en_cache = [_cache_validacion.get(t) for t in tuplas]
+        for t, v in zip(tuplas, en_cache):
+            if v is not None:
+                _cache_validacion.move_to_end(t)
+
+    faltan = [i for i, v in enumerate(en_cache) if v is None]
+    if faltan:
+        nuevos = _validar_lote(claves.iloc[faltan])
+        filas_nuevas = list(nuevos.itertuples(index=False, name=None))
+        with _lock_validacion:
+            for i, fila in zip(faltan, filas_nuevas):
+                en_cache[i] = fila
+                _cache_validacion[tuplas[i]] = fila
+            while len(_cache_validacion) > VALIDACION_CACHE_MAX:
+                _cache_validacion.popitem(last=False)
+
+    resultado = pd.DataFrame(en_cache, columns=_COLUMNAS_VALIDACION, index=df.index)
+    resultado.insert(0, "banco", claves["banco"])
+    return resultado
+
+
+# ── Separación por banco ──────────────────────────────────────────────────────
+
+def _pagos_consolidados(df_planilla: pd.DataFrame, df_loc: pd.DataFrame = None) -> pd.DataFrame:
+    """Planilla (sin TOTALES) + locadores con neto > 0, con sus datos bancarios."""
+    p_data = df_planilla[df_planilla['Apellidos y Nombres'] != 'TOTALES']
+    p_data = p_data[p_data['NETO A PAGAR'] > 0]
+    bloques = [pd.DataFrame({
+        "DNI": p_data["DNI"], "nombre": p_data["Apellidos y Nombres"],
+        "Banco": _columna(p_data, "Banco"), "N° Cuenta": _columna(p_data, "N° Cuenta", "Cuenta Bancaria"),
+        "CCI": _columna(p_data, "CCI"), "neto": p_data["NETO A PAGAR"],
+    })]
+    if df_loc is not None and not df_loc.empty:
+        l_data = df_loc[df_loc['NETO A PAGAR'] > 0]
+        bloques.append(pd.DataFrame({
+            "DNI": l_data["DNI"], "nombre": _columna(l_data, "Locador", "Nombres y Apellidos"),
+            "Banco": _columna(l_data, "Banco"), "N° Cuenta": _columna(l_data, "N° Cuenta"),
+            "CCI": _columna(l_data, "CCI"), "neto": l_data["NETO A PAGAR"],
+        }))
+    return pd.concat([b.astype(object) for b in bloques], ignore_index=True)
+
+
+def generar_pagos_por_banco(df_planilla: pd.DataFrame, cuentas_cargo: dict, fecha_pago: date,
+                            df_loc: pd.DataFrame = None) -> dict:
+    """
+    Reparte los pagos del periodo en un archivo por banco, en una sola pasada.
+
+    cuentas_cargo: banco → cuenta de cargo de la empresa en ese banco.
+
+    Retorna {
+        "archivos":   {nombre_archivo: bytes},
+        "resumen":    DataFrame(Banco, Abonos, Monto) por archivo,
+        "observados": DataFrame(DNI, Nombre, Banco, Neto, Motivo) — no incluidos,
+        "errores":    {banco: mensaje},   # p. ej. falta la cuenta de cargo
+    }
+    """
+    pagos = _pagos_consolidados(df_planilla, df_loc)
+    val = validar_cuentas(pagos)
+
+    # Destino: formato propio del banco si la cuenta es válida; si no, interbancario por CCI
+    con_formato = val["banco"].isin(list(FORMATOS_BANCO))
+    por_cuenta_propia = con_formato & val["cuenta_ok"]
+    destino = val["banco"].where(por_cuenta_propia, BANCO_INTERBANCARIO_DEFECTO)
+    pagable = por_cuenta_propia | val["cci_ok"]
+    abonos = pd.DataFrame({
+        "dni": pagos["DNI"].map(str).str.strip(),
+        "nombre": pagos["nombre"],
+        "cuenta": val["cuenta"].where(por_cuenta_propia, val["cci"]),
+        "neto": pagos["neto"].map(float),
+        "destino": destino,
+    })[pagable]
+
+    archivos, errores, resumen = {}, {}, []
+    for banco, grupo in abonos.groupby("destino", sort=True):
+        cuenta_cargo = str(cuentas_cargo.get(banco, "") or "").strip()
+        if not cuenta_cargo:
+            errores[banco] = f"Falta la cuenta de cargo de la empresa en {banco}."
+            continue
+        nombre, data = FORMATOS_BANCO[banco]["generar"](grupo, cuenta_cargo, fecha_pago)
+        archivos[nombre] = data
+        resumen.append({"Banco": banco, "Abonos": len(grupo), "Monto": round(float(grupo["neto"].sum()), 2)})
+
+    observados = pd.DataFrame({
+        "DNI": pagos["DNI"], "Nombre": pagos["nombre"], "Banco": val["banco"],
+        "Neto": pagos["neto"], "Motivo": val["motivo"],
+    })[~pagable].reset_index(drop=True)
+
+    return {
+        "archivos": archivos,
+        "resumen": pd.DataFrame(resumen, columns=["Banco", "Abonos", "Monto"]),
+        "observados": observados,
+        "errores": errores,
+    }
+
+
+def empaquetar_pagos_zip(archivos: dict) -> io.BytesIO:
+    """Un solo ZIP con los archivos de todos los bancos."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for nombre, data in archivos.items():
+            zf.writestr(nombre, data)
+    buf.seek(0)
+    return buf
@@ -0,0 +1,217 @@
+"""
+Pre-render de documentos al cerrar un periodo.
+
+Un periodo CERRADO es inmutable, así que sus boletas, sábana y reporte de tesorería
+se pueden generar una sola vez — en segundo plano, justo después del cierre — y
+servir desde el almacén de artefactos en cada descarga y en el envío autorizado,
+en vez de volver a pasar por reportlab/openpyxl cada vez.
+"""
+import io
+import logging
+import threading
+import zipfile
+
+import pandas as pd
+
+from infrastructure.database.connection import SessionLocal
+from infrastructure.database.models import Concepto
+from infrastructure.repositories.repo_planilla import obtener_planilla
+from infrastructure.services import almacen_artefactos
+
+logger = logging.getLogger(__name__)
+
+# ── Nombres de artefactos ─────────────────────────────────────────────────────
+ARTEFACTO_LIBRO_BOLETAS = "libro_boletas.pdf"
+ARTEFACTO_ZIP_BOLETAS   = "boletas_individuales.zip"
+ARTEFACTO_SABANA_XLSX   = "sabana.xlsx"
+ARTEFACTO_SABANA_PDF    = "sabana.pdf"
+
+
+def artefacto_boleta(dni: str, encriptada: bool = False) -> str:
+    return f"boleta_{dni}.enc.pdf" if encriptada else f"boleta_{dni}.pdf"
+
+
+def artefacto_tesoreria(formato: str) -> str:
+    return f"tesoreria_{(formato or 'CLASICO').upper()}.pdf"
+
+
+# Pre-renders en curso en este proceso, para no lanzar dos veces el mismo
+_en_curso = set()
+_lock_en_curso = threading.Lock()
+
+
+def _encabezado(empresa_info, empresa_regimen="") -> dict:
+    # El régimen se imprime en la sábana PDF: forma parte del encabezado del snapshot
+    return {**empresa_info, 'regimen': empresa_regimen or empresa_info.get('regimen', '') or ''}
+
+
+def _conceptos_no_remunerativos(db, empresa_id) -> set:
+    return {
+        nombre for (nombre,) in db.query(Concepto.nombre).filter_by(
+            empresa_id=empresa_id, tipo='INGRESO', no_remunerativo=True
+        )
+    }
+
+
+def _clave_planilla(db, planilla, encabezado, conceptos_norem=None):
+    """Clave del snapshot de `planilla` si está CERRADA, o None."""
+    if planilla is None or planilla.estado != 'CERRADA':
+        return None
+    if conceptos_norem is None:
+        conceptos_norem = _conceptos_no_remunerativos(db, planilla.empresa_id)
+    return almacen_artefactos.clave_snapshot(
+        planilla.resultado_json, planilla.auditoria_json, planilla.honorarios_json, encabezado, conceptos_norem,
+    )
+
+
+def clave_vigente(db, empresa_id, periodo_key, empresa_info, empresa_regimen=""):
+    """
+    Clave del snapshot del periodo tal como está hoy en la BD (None si no está CERRADO).
+    Es la que los lectores pasan a almacen_artefactos.leer_artefacto: el índice en /tmp
+    es por instancia y puede haber quedado viejo.
+    """
+    if almacen_artefactos.clave_publicada(empresa_id, periodo_key) is None:
+        return None   # nada pre-renderizado en esta instancia: no vale la pena leer el snapshot
+    planilla = obtener_planilla(db, empresa_id, periodo_key)
+    return _clave_planilla(db, planilla, _encabezado(empresa_info, empresa_regimen))
+
+
+def leer_artefacto_vigente(empresa_id, periodo_key, nombre, empresa_info, empresa_regimen=""):
+    """Bytes pre-renderizados del periodo si siguen vigentes según la BD, o None."""
+    if almacen_artefactos.clave_publicada(empresa_id, periodo_key) is None:
+        return None
+    db = SessionLocal()
+    try:
+        clave = clave_vigente(db, empresa_id, periodo_key, empresa_info, empresa_regimen)
+    finally:
+        db.close()
+    return almacen_artefactos.leer_artefacto(empresa_id, periodo_key, nombre, clave)
+
+
+def prerenderizar_periodo(empresa_id, periodo_key, empresa_info, empresa_regimen="", formato_tesoreria="CLASICO"):
+    """
+    Genera y guarda todos los artefactos del periodo. Retorna la clave del snapshot,
+    o None si el periodo ya no está CERRADO (p. ej. se reabrió mientras tanto).
+    """
+    from presentation.views.emision_boletas import _cargar_planilla_periodo
+
+    encabezado = _encabezado(empresa_info, empresa_regimen)
+
+    db = SessionLocal()
+    try:
+        conceptos_norem = _conceptos_no_remunerativos(db, empresa_id)
+        planilla = obtener_planilla(db, empresa_id, periodo_key)
+        clave = _clave_planilla(db, planilla, encabezado, conceptos_norem)
+        if clave is None:
+            return None
+        honorarios_json = planilla.honorarios_json or '[]'
+        df_res, aud, df_trab, df_var = _cargar_planilla_periodo(db, empresa_id, periodo_key)
+    finally:
+        db.close()
+
+    publicado = False
+    try:
+        _renderizar(empresa_id, periodo_key, clave, empresa_info, encabezado['regimen'], formato_tesoreria,
+                    df_res, aud, df_trab, df_var, honorarios_json, conceptos_norem)
+        publicado = _publicar_si_vigente(empresa_id, periodo_key, clave, encabezado)
+    finally:
+        if not publicado:
+            # Periodo reabierto (o render fallido) a mitad de camino: no dejar la carpeta huérfana
+            almacen_artefactos.descartar_snapshot(empresa_id, clave)
+    return clave if publicado else None
+
+
+def _renderizar(empresa_id, periodo_key, clave, empresa_info, empresa_regimen, formato_tesoreria,
+                df_res, aud, df_trab, df_var, honorarios_json, conceptos_norem):
+    # Import diferido: el motor de boletas vive en la capa de presentación
+    from presentation.views.emision_boletas import generar_pdf_boletas_masivas
+    from core.use_cases.generador_reportes_calculo import (
+        generar_excel_sabana, generar_pdf_sabana, generar_pdf_tesoreria,
+    )
+
+    empresa_nombre = empresa_info.get('nombre', '')
+    empresa_ruc = empresa_info.get('ruc', '')
+
+    def _guardar(nombre, buffer):
+        almacen_artefactos.guardar_artefacto(empresa_id, clave, nombre, buffer.getvalue())
+
+    # 1. Boletas: individuales (plana + encriptada con DNI), libro y ZIP
+    if df_res is not None and not df_res.empty:
+        df_data = df_res[df_res['Apellidos y Nombres'] != 'TOTALES']
+        zip_buffer = io.BytesIO()
+        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+            for _, row in df_data.iterrows():
+                dni = str(row['DNI'])
+                df_ind = df_data[df_data['DNI'] == dni]
+                pdf_plano = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_ind, df_trab, df_var, aud)
+                _guardar(artefacto_boleta(dni), pdf_plano)
+                zip_file.writestr(
+                    f"BOLETA_{dni}_{row['Apellidos y Nombres'].replace(' ', '_')}.pdf", pdf_plano.getvalue()
+                )
+                _guardar(artefacto_boleta(dni, encriptada=True), generar_pdf_boletas_masivas(
+                    empresa_info, periodo_key, df_ind, df_trab, df_var, aud, password=dni,
+                ))
+        zip_buffer.seek(0)
+        _guardar(ARTEFACTO_ZIP_BOLETAS, zip_buffer)
+        _guardar(ARTEFACTO_LIBRO_BOLETAS, generar_pdf_boletas_masivas(
+            empresa_info, periodo_key, df_res, df_trab, df_var, aud,
+        ))
+
+        # 2. Sábana
+        _guardar(ARTEFACTO_SABANA_XLSX, generar_excel_sabana(df_res, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc))
+        _guardar(ARTEFACTO_SABANA_PDF, generar_pdf_sabana(
+            df_res, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc, empresa_regimen=empresa_regimen,
+        ))
+
+    # 3. Tesorería (planilla sin fila de totales + snapshot de locadores)
+    df_loc = pd.read_json(io.StringIO(honorarios_json), orient='records')
+    df_plan_teso = None
+    if df_res is not None and not df_res.empty:
+        df_plan_teso = df_res[df_res['Apellidos y Nombres'] != 'TOTALES'].copy()
+    if df_plan_teso is not None or not df_loc.empty:
+        _guardar(artefacto_tesoreria(formato_tesoreria), generar_pdf_tesoreria(
+            df_planilla=df_plan_teso,
+            df_loc=df_loc if not df_loc.empty else None,
+            empresa_nombre=empresa_nombre,
+            periodo_key=periodo_key,
+            auditoria_data=aud,
+            empresa_ruc=empresa_ruc,
+            formato=formato_tesoreria,
+            conceptos_no_remunerativos=conceptos_norem,
+        ))
+
+
+def _publicar_si_vigente(empresa_id, periodo_key, clave, encabezado) -> bool:
+    """Publica solo si el periodo sigue cerrado con el mismo snapshot (y conceptos)."""
+    db = SessionLocal()
+    try:
+        sigue_igual = _clave_planilla(db, obtener_planilla(db, empresa_id, periodo_key), encabezado) == clave
+    finally:
+        db.close()
+    if sigue_igual:
+        almacen_artefactos.publicar_snapshot(empresa_id, periodo_key, clave)
+    return sigue_igual
+
+
+def programar_prerender(empresa_id, periodo_key, empresa_info, empresa_regimen="", formato_tesoreria="CLASICO"):
+    """
+    Lanza `prerenderizar_periodo` en un hilo de fondo y retorna de inmediato.
+    Un fallo del pre-render no afecta el cierre: las vistas renderizan al vuelo.
+    """
+    tarea = (empresa_id, periodo_key)
+    with _lock_en_curso:
+        if tarea in _en_curso:
+            return False
+        _en_curso.add(tarea)
+
+    def _ejecutar():
+        try:
+            prerenderizar_periodo(empresa_id, periodo_key, dict(empresa_info), empresa_regimen, formato_tesoreria)
+        except Exception:
+            logger.exception("Pre-render de %s (empresa %s) falló", periodo_key, empresa_id)
+        finally:
+            with _lock_en_curso:
+                _en_curso.discard(tarea)
+
+    threading.Thread(target=_ejecutar, name=f"prerender-{empresa_id}-{periodo_key}", daemon=True).start()
+    return True
@@ -0,0 +1,134 @@
+"""
+Motor de variaciones entre dos snapshots de planilla (periodo vs. periodo anterior).
+
+Alinea las dos sábanas por DNI y calcula, de forma vectorizada, el delta de cada
+concepto numérico por trabajador. Sobre eso marca alertas para revisar antes del
+cierre: trabajadores nuevos o ausentes, saltos de neto y de retención de 5ta.
+"""
+import pandas as pd
+
+# Umbrales por defecto (editables desde el panel de pre-cierre)
+UMBRALES_DEFECTO = {
+    "neto_pct": 20.0,     # variación % del neto a pagar
+    "neto_abs": 300.0,    # ... y al menos este monto (S/), para no alertar sueldos bajos
+    "quinta_abs": 100.0,  # aumento de la retención de 5ta (S/)
+}
+
+ALERTA_NUEVO = "NUEVO"
+ALERTA_AUSENTE = "AUSENTE"
+ALERTA_NETO = "NETO"
+ALERTA_QUINTA = "5TA"
+
+_COLUMNAS_NO_CONCEPTO = {"N°", "DNI"}
+_COLUMNAS_ALERTAS = ["DNI", "Trabajador", "Alerta", "Detalle", "Anterior", "Actual", "Delta"]
+
+
+def periodo_anterior(periodo_key: str) -> str:
+    """'01-2026' → '12-2025'."""
+    mes, anio = int(periodo_key[:2]), int(periodo_key[3:])
+    return f"12-{anio - 1}" if mes == 1 else f"{mes - 1:02d}-{anio}"
+
+
+def _normalizar_dni(dnis: pd.Series) -> pd.Series:
+    """
+    DNI como texto de 8 dígitos. Una sábana leída con read_json trae los DNI como
+    enteros (sin el 0 inicial) y la recién calculada como texto; sin esto el mismo
+    trabajador sale NUEVO y AUSENTE a la vez.
+    """
+    if pd.api.types.is_float_dtype(dnis):
+        dnis = dnis.astype('Int64')
+    return dnis.astype(str).str.strip().str.zfill(8)
+
+
+def _preparar(df: pd.DataFrame) -> tuple:
+    """Sábana sin TOTALES, indexada por DNI → (numéricos, nombres)."""
+    if df is None or df.empty or 'DNI' not in df.columns:
+        return pd.DataFrame(), pd.Series(dtype=object)
+    if 'Apellidos y Nombres' in df.columns:
+        df = df[df['Apellidos y Nombres'] != 'TOTALES']
+    df = df.assign(DNI=_normalizar_dni(df['DNI'])).drop_duplicates('DNI', keep='last').set_index('DNI')
+    nombres = df['Apellidos y Nombres'] if 'Apellidos y Nombres' in df.columns else pd.Series('', index=df.index)
+    numericos = df.select_dtypes('number').drop(columns=list(_COLUMNAS_NO_CONCEPTO & set(df.columns)), errors='ignore')
+    return numericos.astype(float), nombres
+
+
+def _columna(df: pd.DataFrame, nombre: str) -> pd.Series:
+    return df[nombre] if nombre in df.columns else pd.Series(0.0, index=df.index)
+
+
+def comparar_planillas(df_actual: pd.DataFrame, df_anterior: pd.DataFrame, umbrales: dict = None) -> dict:
+    """
+    Compara dos sábanas (resultado del motor de planilla).
+
+    Retorna {
+        "deltas":  DataFrame largo (DNI, Trabajador, Concepto, Anterior, Actual, Delta, Delta %)
+                   solo con los pares trabajador/concepto que cambiaron,
+        "alertas": DataFrame (DNI, Trabajador, Alerta, Detalle, Anterior, Actual, Delta),
+        "totales": DataFrame por concepto (Anterior, Actual, Delta, Delta %),
+    }
+    """
+    u = {**UMBRALES_DEFECTO, **(umbrales or {})}
+    act, nom_act = _preparar(df_actual)
+    ant, nom_ant = _preparar(df_anterior)
+
+    dnis = act.index.union(ant.index)
+    conceptos = act.columns.union(ant.columns, sort=False)
+    act_al = act.reindex(index=dnis, columns=conceptos).fillna(0.0)
+    ant_al = ant.reindex(index=dnis, columns=conceptos).fillna(0.0)
+    delta = act_al - ant_al
+    nombres = nom_act.reindex(dnis).fillna(nom_ant.reindex(dnis)).fillna('')
+
+    # ── Deltas por trabajador y concepto (formato largo, solo cambios) ────────
+    largo = pd.DataFrame({
+        "Anterior": ant_al.stack(),
+        "Actual": act_al.stack(),
+        "Delta": delta.stack(),
+    })
+    largo = largo[largo["Delta"].abs() >= 0.005]
+    largo.index.names = ["DNI", "Concepto"]
+    largo = largo.reset_index()
+    largo.insert(1, "Trabajador", largo["DNI"].map(nombres))
+    largo["Delta %"] = (largo["Delta"] / largo["Anterior"].where(largo["Anterior"] != 0) * 100).round(1)
+
+    # ── Alertas ───────────────────────────────────────────────────────────────
+    en_act, en_ant = dnis.isin(act.index), dnis.isin(ant.index)
+    neto_act, neto_ant = _columna(act_al, 'NETO A PAGAR'), _columna(ant_al, 'NETO A PAGAR')
+    neto_delta = neto_act - neto_ant
+    neto_pct = (neto_delta / neto_ant.where(neto_ant != 0) * 100).fillna(0.0)
+    quinta_delta = _columna(delta, 'Ret. 5ta Cat.')
+    comunes = en_act & en_ant
+
+    bloques = [
+        (en_act & ~en_ant, ALERTA_NUEVO, "No figuraba en el periodo anterior", neto_ant, neto_act, neto_delta),
+        (en_ant & ~en_act, ALERTA_AUSENTE, "Figuraba en el periodo anterior", neto_ant, neto_act, neto_delta),
+        (comunes & (neto_pct.abs() >= u["neto_pct"]) & (neto_delta.abs() >= u["neto_abs"]),
+         ALERTA_NETO, None, neto_ant, neto_act, neto_delta),
+        (comunes & (quinta_delta >= u["quinta_abs"]), ALERTA_QUINTA, "Aumento de retención de 5ta",
+         _columna(ant_al, 'Ret. 5ta Cat.'), _columna(act_al, 'Ret. 5ta Cat.'), quinta_delta),
+    ]
+    partes = []
+    for mascara, tipo, detalle, anterior, actual, d in bloques:
+        mascara = pd.Series(mascara, index=dnis)
+        if not mascara.any():
+            continue
+        idx = dnis[mascara.values]
+        partes.append(pd.DataFrame({
+            "DNI": idx,
+            "Trabajador": nombres.loc[idx].values,
+            "Alerta": tipo,
+            "Detalle": detalle if detalle else [f"Neto {p:+.1f}%" for p in neto_pct.loc[idx]],
+            "Anterior": anterior.loc[idx].round(2).values,
+            "Actual": actual.loc[idx].round(2).values,
+            "Delta": d.loc[idx].round(2).values,
+        }))
+    alertas = (
+        pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=_COLUMNAS_ALERTAS)
+    )
+
+    # ── Totales por concepto ──────────────────────────────────────────────────
+    totales = pd.DataFrame({"Anterior": ant_al.sum(), "Actual": act_al.sum()}).round(2)
+    totales["Delta"] = (totales["Actual"] - totales["Anterior"]).round(2)
+    totales["Delta %"] = (totales["Delta"] / totales["Anterior"].where(totales["Anterior"] != 0) * 100).round(1)
+    totales.index.name = "Concepto"
+
+    return {"deltas": largo, "alertas": alertas, "totales": totales.reset_index()}
@@ -1,6 +1,13 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
 
 # 1. Cargar las variables de entorno (Tu archivo .env)
@@ -21,39 +28,211 @@ DATABASE_URL = DATABASE_URL.strip()
 # Neon y otros PaaS entregan 'postgres://' pero SQLAlchemy 2.x requiere 'postgresql://'
 DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# 2. Crear el Motor (Engine) de SQLAlchemy
-# pool_size reducido para Cloud Run: cada instancia crea su propio pool.
-# Con pool_size=2 y max_overflow=3 → máx 5 conexiones por instancia.
-# Usa la URL del Pooler de Neon para evitar agotar el límite de conexiones.
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=2,
-    max_overflow=3
-)
-
-# 3. Crear la Fábrica de Sesiones
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# 4. Crear la Clase Base de donde heredarán todas nuestras tablas
-Base = declarative_base()
 
-# 5. Migraciones de columnas nuevas (sin Alembic — idempotente)
-def _run_startup_migrations():
-    from sqlalchemy import text
-    migrations = [
-        "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS fecha_cese DATE",
-    ]
-    with engine.connect() as conn:
-        for stmt in migrations:
-            try:
-                conn.execute(text(stmt))
-                conn.commit()
-            except Exception:
-                conn.rollback()
+# 2. Configuración del pool (variables de entorno DB_*)
+# Cloud Run: cada instancia crea su propio pool. Con la URL del Pooler de Neon
+# (host "...-pooler...", PgBouncer en modo transacción) las conexiones cliente son
+# baratas y se puede abrir más; contra el endpoint directo el límite es bajo.
+def _env_int(nombre: str, defecto: int) -> int:
+    try:
+        return int(os.getenv(nombre, defecto))
+    except ValueError:
+        return defecto
+
+
+def _env_bool(nombre: str, defecto: bool) -> bool:
+    valor = os.getenv(nombre)
+    return defecto if valor is None else valor.strip().lower() in ("1", "true", "si", "sí")
+
+
+_url = make_url(DATABASE_URL)
+ES_SQLITE = _url.get_backend_name() == "sqlite"
+MODO_PGBOUNCER = _env_bool("DB_PGBOUNCER", "-pooler" in (_url.host or ""))
+
+POOL_CONFIG = {
+    "pool_size":     _env_int("DB_POOL_SIZE", 5 if MODO_PGBOUNCER else 2),
+    "max_overflow":  _env_int("DB_MAX_OVERFLOW", 10 if MODO_PGBOUNCER else 3),
+    "pool_timeout":  _env_int("DB_POOL_TIMEOUT", 30),
+    # Neon suspende el cómputo tras ~5 min sin uso y corta las conexiones directas;
+    # el pooler las mantiene del lado cliente.
+    "pool_recycle":  _env_int("DB_POOL_RECYCLE", 1800 if MODO_PGBOUNCER else 280),
+    "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", True),
+}
+
+
+# ── Métricas del pool ─────────────────────────────────────────────────────────
+class _MetricasPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.conexiones_nuevas = 0
+        self.esperas = 0
+        self.espera_total_s = 0.0
+        self.espera_max_s = 0.0
+        self.timeouts = 0
+
+    def registrar_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def registrar_conexion(self):
+        with self._lock:
+            self.conexiones_nuevas += 1
+
+    def registrar_espera(self, segundos: float, timeout: bool = False):
+        with self._lock:
+            self.esperas += 1
+            self.espera_total_s += segundos
+            self.espera_max_s = max(self.espera_max_s, segundos)
+            if timeout:
+                self.timeouts += 1
+
+
+_metricas = _MetricasPool()
+
+
+class _PoolMedido(QueuePool):
+    """QueuePool que registra las esperas: checkouts con el pool y el overflow llenos."""
+
+    def connect(self):
+        lleno = self.checkedout() >= self.size() + POOL_CONFIG["max_overflow"]
+        if not lleno:
+            return super().connect()
+        t0 = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except exc.TimeoutError:
+            _metricas.registrar_espera(time.perf_counter() - t0, timeout=True)
+            raise
+        _metricas.registrar_espera(time.perf_counter() - t0)
+        return conexion
+
+
+# 3. Crear el Motor (Engine) de SQLAlchemy
+if ES_SQLITE:
+    # Desarrollo y scripts locales: sin ajustes de pool
+    engine = create_engine(DATABASE_URL)
+else:
+    engine = create_engine(DATABASE_URL, poolclass=_PoolMedido, **POOL_CONFIG)
+
+
+@event.listens_for(engine, "checkout")
+def _contar_checkout(dbapi_conn, registro, proxy):
+    _metricas.registrar_checkout()
+
+
+@event.listens_for(engine, "connect")
+def _contar_conexion(dbapi_conn, registro):
+    _metricas.registrar_conexion()
 
-_run_startup_migrations()
 
+def metricas_pool() -> dict:
+    """Estado actual del pool y contadores acumulados del proceso."""
+    pool = engine.pool
+    return {
+        "modo": "sqlite" if ES_SQLITE else ("pgbouncer" if MODO_PGBOUNCER else "directo"),
+        "tamano": POOL_CONFIG["pool_size"] if not ES_SQLITE else None,
+        "max_overflow": POOL_CONFIG["max_overflow"] if not ES_SQLITE else None,
+        "en_uso": pool.checkedout() if hasattr(pool, "checkedout") else None,
+        "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        "checkouts": _metricas.checkouts,
+        "conexiones_nuevas": _metricas.conexiones_nuevas,
+        "esperas": _metricas.esperas,
+        "espera_total_s": round(_metricas.espera_total_s, 3),
+        "espera_max_s": round(_metricas.espera_max_s, 3),
+        "timeouts": _metricas.timeouts,
+    }
+
+
+# 4. Sesiones: fábrica y alcance por ejecución del script
+# Dentro de `alcance_sesion()` (app.py lo abre en cada rerun de Streamlit) las
+# sesiones del mismo hilo comparten UNA conexión sacada del pool la primera vez que
+# se necesita: un checkout y un pre-ping por rerun en vez de uno por helper.
+# Cada SessionLocal() sigue siendo una sesión propia (su identity map, su commit, su
+# close). La conexión se elige al empezar cada transacción, no al crear la sesión:
+# la compartida solo si ninguna otra sesión tiene una transacción abierta en ella
+# (la "dueña"); si no, una del pool como antes. Así una sesión nunca se suma a la
+# transacción de otra, donde su commit no confirmaría nada y el rollback ajeno se
+# llevaría sus escrituras.
+class _ConexionEjecucion:
+    def __init__(self):
+        self.conexion = None
+        self.duena = None  # sesión con una transacción abierta sobre la conexión
+
+    def libre_para(self, sesion) -> bool:
+        if self.duena is not None:
+            return self.duena is sesion
+        return self.conexion is None or not self.conexion.in_transaction()
+
+    def obtener(self):
+        if self.conexion is None:
+            self.conexion = engine.connect()
+        return self.conexion
+
+    def liberar(self):
+        if self.conexion is not None:
+            if self.conexion.in_transaction():
+                self.conexion.rollback()  # sesión que quedó sin cerrar
+            self.conexion.close()
+            self.conexion = None
+        self.duena = None
+
+
+_conexion_ejecucion: ContextVar = ContextVar("conexion_ejecucion", default=None)
+
+
+class _SesionEjecucion(Session):
+    _bind_transaccion = None  # conexión (o engine) de la transacción en curso
+
+    def get_bind(self, mapper=None, **kw):
+        if self._bind_transaccion is not None:
+            return self._bind_transaccion
+        alcance = _conexion_ejecucion.get()
+        if alcance is None or self.bind is not engine or kw.get("bind") is not None:
+            return super().get_bind(mapper, **kw)
+        return alcance.obtener() if alcance.libre_para(self) else engine
+
+
+@event.listens_for(_SesionEjecucion, "after_begin")
+def _tomar_conexion(sesion, transaccion, conexion):
+    alcance = _conexion_ejecucion.get()
+    if alcance is not None and conexion is alcance.conexion:
+        alcance.duena = sesion
+        sesion._bind_transaccion = conexion
+    elif sesion.bind is engine:
+        sesion._bind_transaccion = engine
+
+
+@event.listens_for(_SesionEjecucion, "after_transaction_end")
+def _soltar_conexion(sesion, transaccion):
+    if transaccion.parent is not None:
+        return  # savepoint: la transacción de la sesión sigue abierta
+    alcance = _conexion_ejecucion.get()
+    if alcance is not None and alcance.duena is sesion:
+        alcance.duena = None
+    sesion._bind_transaccion = None
+
+
+SessionLocal = sessionmaker(class_=_SesionEjecucion, autocommit=False, autoflush=False, bind=engine)
+
+
+@contextmanager
+def alcance_sesion():
+    """Reutiliza una conexión para todas las sesiones del bloque (mismo hilo)."""
+    if _conexion_ejecucion.get() is not None:
+        yield
+        return
+    alcance = _ConexionEjecucion()
+    token = _conexion_ejecucion.set(alcance)
+    try:
+        yield
+    finally:
+        _conexion_ejecucion.reset(token)
+        alcance.liberar()
+
+
+# 5. Crear la Clase Base de donde heredarán todas nuestras tablas
+Base = declarative_base()
 
 # 6. Función para obtener la sesión de BD de forma segura
 def get_db():
@@ -62,4 +241,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,94 @@
+"""
+EXPLAIN de las consultas calientes y detección de lecturas secuenciales.
+
+Cada consulta de `CONSULTAS_CALIENTES` reproduce el filtro de una consulta real del
+motor o de las vistas (mismas columnas, mismo orden). `revisar_consultas` obtiene
+su plan y lista las tablas que se leen completas:
+
+  - PostgreSQL: `EXPLAIN (FORMAT JSON)` con `enable_seqscan = off` en la
+    transacción, para que el planificador use un índice siempre que exista uno
+    aplicable; un "Seq Scan" que sobrevive significa que falta el índice. Con
+    `forzar_indices=False` se ve el plan real (en tablas chicas el planificador
+    prefiere leerlas completas y eso es correcto).
+  - SQLite: `EXPLAIN QUERY PLAN`; "SCAN tabla" sin índice es lectura completa.
+
+Uso: python scripts/explicar_consultas.py
+"""
+from sqlalchemy import select, text
+
+from infrastructure.database.models import (
+    CuotaPrestamo, LogEnvioBoleta, ParametroLegal, PlanillaMensual, Prestamo, Trabajador, VariablesMes,
+)
+
+
+# nombre → función (empresa_id, periodo_key, trabajador_id) → select
+CONSULTAS_CALIENTES = {
+    "trabajadores_planilla_activos": lambda e, p, t: select(Trabajador.id).where(
+        Trabajador.empresa_id == e, Trabajador.situacion == "ACTIVO", Trabajador.tipo_contrato == "PLANILLA"),
+    "parametros_del_periodo": lambda e, p, t: select(ParametroLegal.id).where(
+        ParametroLegal.empresa_id == e, ParametroLegal.periodo_key == p),
+    "variables_del_periodo": lambda e, p, t: select(VariablesMes.id).where(
+        VariablesMes.empresa_id == e, VariablesMes.periodo_key == p),
+    "variables_del_trabajador": lambda e, p, t: select(VariablesMes.id).where(
+        VariablesMes.trabajador_id == t, VariablesMes.periodo_key == p),
+    "planilla_del_periodo": lambda e, p, t: select(PlanillaMensual.id).where(
+        PlanillaMensual.empresa_id == e, PlanillaMensual.periodo_key == p),
+    "ultima_planilla_cerrada": lambda e, p, t: select(PlanillaMensual.id).where(
+        PlanillaMensual.empresa_id == e, PlanillaMensual.estado == "CERRADA",
+    ).order_by(PlanillaMensual.fecha_calculo.desc()).limit(1),
+    "cuotas_pendientes_del_periodo": lambda e, p, t: select(CuotaPrestamo.id).join(Prestamo).where(
+        Prestamo.empresa_id == e, CuotaPrestamo.periodo_key == p, CuotaPrestamo.estado == "PENDIENTE"),
+    "prestamos_activos": lambda e, p, t: select(Prestamo.id).where(
+        Prestamo.empresa_id == e, Prestamo.estado == "ACTIVO"),
+    "envios_del_periodo": lambda e, p, t: select(LogEnvioBoleta.id).where(
+        LogEnvioBoleta.empresa_id == e, LogEnvioBoleta.periodo_key == p),
+    "envios_pendientes_del_trabajador": lambda e, p, t: select(LogEnvioBoleta.id).where(
+        LogEnvioBoleta.trabajador_id == t, LogEnvioBoleta.periodo_key == p, LogEnvioBoleta.estado == "PENDIENTE"),
+}
+
+
+def _sql_literal(conn, stmt) -> str:
+    return str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _nodos_postgres(nodo: dict):
+    yield nodo
+    for hijo in nodo.get("Plans", []):
+        yield from _nodos_postgres(hijo)
+
+
+def _plan_postgres(conn, sql: str) -> tuple:
+    """(plan legible, tablas con Seq Scan)."""
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    raiz = plan[0]["Plan"] if isinstance(plan, list) else plan
+    secuenciales = [n["Relation Name"] for n in _nodos_postgres(raiz) if n.get("Node Type") == "Seq Scan"]
+    legible = "\n".join(r[0] for r in conn.exec_driver_sql(f"EXPLAIN {sql}"))
+    return legible, secuenciales
+
+
+def _plan_sqlite(conn, sql: str) -> tuple:
+    filas = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    detalles = [f[-1] for f in filas]
+    secuenciales = [
+        d.split()[1] for d in detalles
+        if d.startswith("SCAN ") and "INDEX" not in d and "PRIMARY KEY" not in d
+    ]
+    return "\n".join(detalles), secuenciales
+
+
+def revisar_consultas(conn, empresa_id, periodo_key, trabajador_id, forzar_indices: bool = True) -> list:
+    """
+    [(nombre, plan, tablas leídas completas)] para cada consulta caliente.
+    No modifica datos: en PostgreSQL todo corre en una transacción que se revierte.
+    """
+    es_postgres = conn.dialect.name == "postgresql"
+    resultados = []
+    with conn.begin() as trans:
+        if es_postgres and forzar_indices:
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+        for nombre, construir in CONSULTAS_CALIENTES.items():
+            sql = _sql_literal(conn, construir(empresa_id, periodo_key, trabajador_id))
+            plan, secuenciales = (_plan_postgres if es_postgres else _plan_sqlite)(conn, sql)
+            resultados.append((nombre, plan, secuenciales))
+        trans.rollback()
+    return resultados
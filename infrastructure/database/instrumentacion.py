@@ -0,0 +1,111 @@
+"""
+Instrumentación de SQL por ejecución.
+
+Mientras un bloque `with medir_sql() as registro:` está activo en el hilo actual,
+cada sentencia que pasa por cualquier Engine se cuenta y cronometra (eventos
+before/after_cursor_execute). El registro resume:
+  - cantidad de sentencias y tiempo total en BD,
+  - las más lentas,
+  - los patrones repetidos (misma sentencia con distintos parámetros), que es la
+    firma de un N+1: un SELECT por trabajador dentro de un bucle.
+
+app.py abre un registro por rerun para el panel de diagnóstico; tests/conftest.py
+lo expone como fixture para fijar presupuestos de consultas.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Un patrón que se repite al menos estas veces en una ejecución se marca como N+1
+UMBRAL_REPETICION = 5
+
+_registro_actual: ContextVar = ContextVar("registro_sql", default=None)
+
+_RE_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_RE_LISTA_IN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_PARAM = re.compile(r"%\(\w+\)s|:\w+|\$\d+|__\[POSTCOMPILE_\w+\]")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar_sql(sql: str) -> str:
+    """Sentencia sin literales ni parámetros: dos ejecuciones del mismo bucle dan el mismo patrón."""
+    patron = _RE_PARAM.sub("?", sql)
+    patron = _RE_LITERAL.sub("?", patron)
+    patron = _RE_LISTA_IN.sub("(?…)", patron)
+    return _RE_ESPACIOS.sub(" ", patron).strip()
+
+
+class RegistroSQL:
+    def __init__(self, max_lentas: int = 5):
+        self.sentencias = 0
+        self.tiempo_total_s = 0.0
+        self.max_lentas = max_lentas
+        self.lentas = []      # [(segundos, sql)] ordenadas de mayor a menor
+        self.patrones = {}    # patrón normalizado → [veces, segundos]
+
+    def registrar(self, sql: str, segundos: float):
+        self.sentencias += 1
+        self.tiempo_total_s += segundos
+        if len(self.lentas) < self.max_lentas or segundos > self.lentas[-1][0]:
+            self.lentas.append((segundos, sql))
+            self.lentas.sort(key=lambda x: -x[0])
+            del self.lentas[self.max_lentas:]
+        acumulado = self.patrones.setdefault(normalizar_sql(sql), [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += segundos
+
+    def repetidas(self, umbral: int = UMBRAL_REPETICION) -> list:
+        """[(patrón, veces, segundos)] que aparecen >= umbral veces (posibles N+1)."""
+        filas = [(p, n, t) for p, (n, t) in self.patrones.items() if n >= umbral]
+        return sorted(filas, key=lambda x: -x[1])
+
+    def resumen(self) -> dict:
+        return {
+            "sentencias": self.sentencias,
+            "tiempo_total_s": round(self.tiempo_total_s, 4),
+            "lentas": [(round(s, 4), sql) for s, sql in self.lentas],
+            "repetidas": self.repetidas(),
+        }
+
+
+@contextmanager
+def medir_sql(max_lentas: int = 5):
+    """Registra las sentencias ejecutadas en el bloque (mismo hilo/contexto)."""
+    registro = RegistroSQL(max_lentas)
+    token = _registro_actual.set(registro)
+    try:
+        yield registro
+    finally:
+        _registro_actual.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    if _registro_actual.get() is not None:
+        conn.info.setdefault("_t_sql", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    registro = _registro_actual.get()
+    inicios = conn.info.get("_t_sql")
+    if registro is not None and inicios:
+        registro.registrar(statement, time.perf_counter() - inicios.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _fallida(contexto):
+    # Sin after_cursor_execute: el inicio quedaría en conn.info (que vive con la
+    # conexión del pool) y la siguiente sentencia mediría contra él.
+    conn = contexto.connection
+    inicios = conn.info.get("_t_sql") if conn is not None else None
+    if not inicios:
+        return
+    inicio = inicios.pop()
+    registro = _registro_actual.get()
+    if registro is not None and contexto.statement:
+        registro.registrar(contexto.statement, time.perf_counter() - inicio)
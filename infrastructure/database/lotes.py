@@ -0,0 +1,32 @@
+"""
+Recorrido por lotes de consultas grandes (jobs que cruzan todas las empresas).
+
+`iterar_por_lotes(db, select(...))` ejecuta la consulta con `yield_per` +
+`stream_results`: en PostgreSQL el driver usa un cursor del lado del servidor y
+trae `tamano` filas por viaje, así que la memoria no crece con el tamaño de la
+tabla. Pensado para selects de Core con columnas explícitas (tuplas, no
+entidades): proyectar solo lo necesario es la otra mitad del ahorro.
+
+El cursor vive dentro de la transacción de la sesión, por eso funciona también
+a través del pooler de Neon (PgBouncer en modo transacción). No hacer commit en
+la misma sesión mientras se recorre; si hay que escribir, usar otra sesión.
+"""
+from typing import Iterator
+
+LOTE_DEFECTO = 1000
+
+
+def iterar_por_lotes(db, stmt, tamano: int = LOTE_DEFECTO) -> Iterator[list]:
+    """Listas de hasta `tamano` filas (Row, se usan como tuplas)."""
+    resultado = db.execute(stmt.execution_options(yield_per=tamano, stream_results=True))
+    try:
+        for lote in resultado.partitions(tamano):
+            yield lote
+    finally:
+        resultado.close()
+
+
+def iterar_filas(db, stmt, tamano: int = LOTE_DEFECTO) -> Iterator:
+    """Fila por fila, leyendo de a `tamano` desde la BD."""
+    for lote in iterar_por_lotes(db, stmt, tamano):
+        yield from lote
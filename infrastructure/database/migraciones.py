@@ -0,0 +1,393 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada migración tiene un número de versión, una descripción y una lista de pasos
+(sentencias SQL o funciones que reciben la conexión). Se aplican en orden, una
+transacción por versión, y la versión aplicada queda registrada en la tabla
+`schema_version`. Todos los pasos son idempotentes (IF NOT EXISTS), así que una
+base creada antes del versionado se pone al día sin perder datos.
+
+Se ejecutan una vez por despliegue:
+
+    python scripts/migrar.py
+    python -m infrastructure.database.migraciones
+
+La app solo compara la versión registrada con la esperada al arrancar
+(`verificar_esquema`), una consulta por proceso.
+"""
+import json
+import logging
+import math
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.schema import CreateIndex
+
+from infrastructure.database.connection import Base, engine
+
+logger = logging.getLogger(__name__)
+
+# Clave arbitraria del advisory lock (PostgreSQL): evita que dos instancias de Cloud
+# Run migren a la vez si arrancan juntas tras un despliegue.
+_LOCK_MIGRACIONES = 724100041
+
+_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String(200), nullable=False),
+    Column("aplicada_en", DateTime, default=datetime.now),
+)
+
+
+def _crear_esquema_base(conn):
+    import infrastructure.database.models  # noqa: registra todos los modelos en Base.metadata
+    Base.metadata.create_all(bind=conn)
+
+
+def _crear_tiempos_calculo(conn):
+    from infrastructure.database.models import TiempoCalculo
+    TiempoCalculo.__table__.create(bind=conn, checkfirst=True)
+
+
+# ── v4: índices compuestos y parciales de las consultas calientes ────────────
+# Declarados en los modelos (__table_args__); aquí solo se crean en bases existentes.
+# En PostgreSQL van con CONCURRENTLY para no bloquear escrituras mientras se
+# construyen; eso no admite transacción, así que esta versión corre sus pasos en una
+# conexión en autocommit y solo el registro en `schema_version` va bajo el lock.
+_INDICES_CONSULTAS = {
+    "trabajadores":        ["ix_trabajadores_empresa_situacion_contrato"],
+    "parametros_legales":  ["ix_parametros_empresa_periodo"],
+    "variables_mes":       ["ix_variables_mes_empresa_periodo", "ix_variables_mes_trabajador_periodo"],
+    "planillas_mensuales": ["ix_planillas_cerradas_empresa_fecha"],
+    "prestamos":           ["ix_prestamos_empresa_estado", "ix_prestamos_trabajador"],
+    "cuotas_prestamo":     ["ix_cuotas_prestamo_prestamo_cuota", "ix_cuotas_pendientes_periodo"],
+    "log_envio_boletas":   ["ix_log_envio_empresa_periodo", "ix_log_envio_pendientes_trabajador"],
+}
+
+
+def _ddl_indice_concurrente(indice, dialecto) -> str:
+    ddl = str(CreateIndex(indice, if_not_exists=True).compile(dialect=dialecto))
+    return re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl, count=1)
+
+
+def _crear_indice_concurrente(conn, indice):
+    # Un CONCURRENTLY interrumpido deja el índice en el catálogo pero inválido, y
+    # IF NOT EXISTS lo daría por creado: se descarta y se vuelve a construir.
+    valido = conn.execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :n"),
+        {"n": indice.name},
+    ).scalar()
+    if valido is False:
+        conn.exec_driver_sql(f"DROP INDEX CONCURRENTLY IF EXISTS {indice.name}")
+    conn.exec_driver_sql(_ddl_indice_concurrente(indice, conn.dialect))
+
+
+def _crear_indices_consultas(conn):
+    import infrastructure.database.models  # noqa: registra todos los modelos en Base.metadata
+    for tabla, nombres in _INDICES_CONSULTAS.items():
+        indices = {ix.name: ix for ix in Base.metadata.tables[tabla].indexes}
+        for nombre in nombres:
+            if conn.dialect.name == "postgresql":
+                _crear_indice_concurrente(conn, indices[nombre])
+            else:
+                indices[nombre].create(bind=conn, checkfirst=True)
+
+
+# ── v2: migraciones incrementales previas al versionado ──────────────────────
+# Movidas tal cual desde presentation/app.py. Sintaxis PostgreSQL (IF NOT EXISTS,
+# SERIAL); en SQLite (desarrollo) las columnas ya salen de create_all en la v1.
+_INCREMENTALES_LEGADO = [
+    # Usuarios y Accesos (Enterprise Pack)
+    "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS email VARCHAR(100)",
+    "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS ultimo_login TIMESTAMP",
+    "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS acceso_total BOOLEAN DEFAULT false",
+    "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS modulos_restringidos TEXT DEFAULT '[]'",
+    "ALTER TABLE usuario_empresa ADD COLUMN IF NOT EXISTS fecha_asignacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+    # Seguro social (lote anterior)
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS seguro_social VARCHAR(20) DEFAULT 'ESSALUD'",
+    # Cierre de planilla (lote anterior)
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS estado VARCHAR(10) DEFAULT 'ABIERTA'",
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS cerrada_por VARCHAR(100)",
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS fecha_cierre TIMESTAMP",
+    # PLAME / AFPnet (lote actual)
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS horas_jornada_diaria FLOAT DEFAULT 8.0",
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS cuenta_cargo_bcp VARCHAR(20)",
+    "ALTER TABLE conceptos ADD COLUMN IF NOT EXISTS codigo_sunat VARCHAR(4)",
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS apellido_paterno VARCHAR(100)",
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS apellido_materno VARCHAR(100)",
+    "ALTER TABLE variables_mes ADD COLUMN IF NOT EXISTS suspensiones_json TEXT DEFAULT '{}'",
+    # Locadores de Servicio (4ta Categoría) — lote actual
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS tipo_contrato VARCHAR(20) DEFAULT 'PLANILLA'",
+    "ALTER TABLE variables_mes ADD COLUMN IF NOT EXISTS dias_descuento_locador INTEGER DEFAULT 0",
+    "ALTER TABLE parametros_legales ADD COLUMN IF NOT EXISTS tasa_4ta FLOAT DEFAULT 8.0",
+    "ALTER TABLE parametros_legales ADD COLUMN IF NOT EXISTS tope_4ta FLOAT DEFAULT 1500.0",
+    # Suspensión de retenciones 4ta Cat. para locadores con constancia SUNAT
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS tiene_suspension_4ta BOOLEAN DEFAULT false",
+    # Límite de edad AFP
+    "ALTER TABLE parametros_legales ADD COLUMN IF NOT EXISTS edad_maxima_prima_afp INTEGER DEFAULT 65",
+    # Préstamos y Descuentos Programados
+    "CREATE TABLE IF NOT EXISTS prestamos (id SERIAL PRIMARY KEY, empresa_id INTEGER NOT NULL REFERENCES empresas(id), trabajador_id INTEGER NOT NULL REFERENCES trabajadores(id), concepto VARCHAR(100) DEFAULT 'Préstamo Personal', monto_total FLOAT NOT NULL, numero_cuotas INTEGER NOT NULL, fecha_otorgamiento DATE, estado VARCHAR(20) DEFAULT 'ACTIVO')",
+    "CREATE TABLE IF NOT EXISTS cuotas_prestamo (id SERIAL PRIMARY KEY, prestamo_id INTEGER NOT NULL REFERENCES prestamos(id) ON DELETE CASCADE, numero_cuota INTEGER NOT NULL, periodo_key VARCHAR(10) NOT NULL, monto FLOAT NOT NULL, estado VARCHAR(20) DEFAULT 'PENDIENTE')",
+    # Forzar actualización de campos críticos en todas las empresas
+    "ALTER TABLE trabajadores ALTER COLUMN tipo_contrato SET DEFAULT 'PLANILLA'",
+    "UPDATE trabajadores SET tipo_contrato = 'PLANILLA' WHERE tipo_contrato IS NULL",
+    "UPDATE trabajadores SET tipo_contrato = 'PLANILLA' WHERE tipo_contrato IS NULL",
+    "ALTER TABLE variables_mes ADD COLUMN IF NOT EXISTS notas_gestion TEXT DEFAULT ''",
+    "ALTER TABLE conceptos ADD COLUMN IF NOT EXISTS prorrateable_por_asistencia BOOLEAN DEFAULT false",
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS factor_proyeccion_grati FLOAT",
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS honorarios_json TEXT DEFAULT '[]'",
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS fecha_cese DATE",
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS dias_vacaciones_anuales INTEGER DEFAULT 30",
+    "CREATE TABLE IF NOT EXISTS registro_vacaciones (id SERIAL PRIMARY KEY, trabajador_id INTEGER NOT NULL REFERENCES trabajadores(id), fecha_inicio DATE NOT NULL, fecha_fin DATE NOT NULL, dias_gozados INTEGER DEFAULT 0, dias_vendidos INTEGER DEFAULT 0, periodo_origen VARCHAR(50), estado VARCHAR(20) DEFAULT 'APROBADO', observaciones TEXT, fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS correo_electronico VARCHAR(100)",
+    "CREATE TABLE IF NOT EXISTS log_envio_boletas (id SERIAL PRIMARY KEY, empresa_id INTEGER NOT NULL REFERENCES empresas(id), trabajador_id INTEGER NOT NULL REFERENCES trabajadores(id), periodo_key VARCHAR(10) NOT NULL, correo_destino VARCHAR(100) NOT NULL, estado VARCHAR(20) DEFAULT 'ENVIADO', mensaje_error TEXT, fecha_envio TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+    "ALTER TABLE usuarios ADD COLUMN IF NOT EXISTS modulos_restringidos TEXT DEFAULT '[]'",
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS smtp_host VARCHAR(100)",
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS smtp_port INTEGER DEFAULT 587",
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS smtp_user VARCHAR(100)",
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS smtp_pass VARCHAR(100)",
+    "ALTER TABLE trabajadores ADD COLUMN IF NOT EXISTS tipo_documento VARCHAR(2) DEFAULT '01'",
+    "UPDATE trabajadores SET num_doc = REPLACE(num_doc, ' ', '') WHERE num_doc LIKE '% %'",
+    # Depósitos CTS (Beneficios Sociales)
+    """CREATE TABLE IF NOT EXISTS depositos_cts (
+        id SERIAL PRIMARY KEY,
+        empresa_id INTEGER NOT NULL REFERENCES empresas(id),
+        trabajador_id INTEGER NOT NULL REFERENCES trabajadores(id),
+        periodo_label VARCHAR(30),
+        periodo_key_deposito VARCHAR(10),
+        base_computable FLOAT DEFAULT 0.0,
+        sexto_grati FLOAT DEFAULT 0.0,
+        meses_computados FLOAT DEFAULT 0.0,
+        factor FLOAT DEFAULT 1.0,
+        monto FLOAT DEFAULT 0.0,
+        estado VARCHAR(20) DEFAULT 'PENDIENTE',
+        fecha_deposito DATE,
+        banco_cts VARCHAR(100),
+        cuenta_cts VARCHAR(100),
+        fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(empresa_id, trabajador_id, periodo_key_deposito)
+    )""",
+    # Formato de Reporte de Tesorería (Clásico / Detallado) — solo presentación
+    "ALTER TABLE empresas ADD COLUMN IF NOT EXISTS formato_reporte_tesoreria VARCHAR(20) DEFAULT 'CLASICO'",
+    # Etiqueta "No Remunerativo" para conceptos (Movilidad, Alimentación, etc.) —
+    # solo identifica en reportes, no altera afecto_afp/afecto_5ta/afecto_essalud/etc.
+    "ALTER TABLE conceptos ADD COLUMN IF NOT EXISTS no_remunerativo BOOLEAN DEFAULT false",
+    # Clasificación Recurrente/No Recurrente para la PROYECCIÓN de 5ta categoría.
+    # Todos los conceptos ya creados quedan como Recurrente (true) por defecto —
+    # editable luego desde Maestro de Conceptos.
+    "ALTER TABLE conceptos ADD COLUMN IF NOT EXISTS es_recurrente BOOLEAN DEFAULT true",
+    # Autorización obligatoria de envío de boletas (compuerta antes de enviar por correo)
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS boletas_autorizado BOOLEAN DEFAULT false",
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS boletas_autorizado_por VARCHAR(100)",
+    "ALTER TABLE planillas_mensuales ADD COLUMN IF NOT EXISTS boletas_fecha_autorizacion TIMESTAMP",
+    # Asiento Contable — cuenta por concepto (Sueldo Base, Asig. Familiar, dinámicos)
+    "ALTER TABLE conceptos ADD COLUMN IF NOT EXISTS cuenta_contable VARCHAR(20)",
+    # Asiento Contable — cuentas fijas de sistema (una fila por empresa)
+    """CREATE TABLE IF NOT EXISTS configuracion_contable (
+        id SERIAL PRIMARY KEY,
+        empresa_id INTEGER NOT NULL UNIQUE REFERENCES empresas(id),
+        cuenta_horas_extra_25 VARCHAR(20),
+        cuenta_horas_extra_35 VARCHAR(20),
+        cuenta_descanso_vacacional VARCHAR(20),
+        cuenta_descanso_medico VARCHAR(20),
+        cuenta_licencia_goce VARCHAR(20),
+        cuenta_essalud_gasto VARCHAR(20),
+        cuenta_essalud_pasivo VARCHAR(20),
+        cuenta_onp VARCHAR(20),
+        cuenta_afp_habitat VARCHAR(20),
+        cuenta_afp_integra VARCHAR(20),
+        cuenta_afp_prima VARCHAR(20),
+        cuenta_afp_profuturo VARCHAR(20),
+        cuenta_retencion_5ta VARCHAR(20),
+        cuenta_remuneraciones_por_pagar VARCHAR(20),
+        cuenta_prestamos_personal VARCHAR(20),
+        fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+
+
+def _aplicar_incrementales_legado(conn):
+    # Todas son idempotentes (IF NOT EXISTS / UPDATE ... WHERE): si una falla, la base
+    # tiene algo que la lista no contempla (columna con otro tipo, dato que viola una
+    # restricción) y hay que corregirlo a mano. La versión se revierte completa y no
+    # se registra, para que el siguiente `migrar.py` la reintente.
+    for sql in _INCREMENTALES_LEGADO:
+        try:
+            conn.execute(text(sql))
+        except Exception as e:
+            raise RuntimeError(f"v2: falló la sentencia ({' '.join(sql.split())[:100]}): {e}") from e
+
+
+# ── v5: conceptos_json / suspensiones_json a JSONB ───────────────────────────
+_COLUMNAS_JSON_VARIABLES = ("conceptos_json", "suspensiones_json")
+
+# json.dumps de Python escribe NaN / Infinity / -Infinity sin comillas y jsonb los
+# rechaza: un solo registro así abortaría la versión y con ella el arranque. El cast
+# pasa por esta función (temporal, vive solo en la transacción de la migración):
+# primero tal cual; si falla, con esos literales como null; si aun así no es JSON,
+# '{}' (el mismo valor que ya reciben los vacíos).
+_PATRON_NO_JSON = r"([:,\[]\s*)(-?Infinity|NaN)\M"   # solo en posición de valor, no dentro de "..."
+_FUNCION_JSONB_SEGURO = f"""
+CREATE OR REPLACE FUNCTION pg_temp.jsonb_seguro(t text) RETURNS jsonb AS $$
+BEGIN
+    RETURN t::jsonb;
+EXCEPTION WHEN others THEN
+    BEGIN
+        RETURN regexp_replace(t, '{_PATRON_NO_JSON}', '\\1null', 'g')::jsonb;
+    EXCEPTION WHEN others THEN
+        RETURN '{{}}'::jsonb;
+    END;
+END
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+
+def _sin_no_finitos(valor):
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    if isinstance(valor, dict):
+        return {k: _sin_no_finitos(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_sin_no_finitos(v) for v in valor]
+    return valor
+
+
+def _json_estricto(texto) -> str:
+    try:
+        return json.dumps(_sin_no_finitos(json.loads(texto)))   # json de Python sí lee NaN / Infinity
+    except (TypeError, ValueError):
+        return "{}"
+
+
+def _variables_json_estricto(conn):
+    # json_extract de SQLite también rechaza NaN / Infinity ("malformed JSON") y un
+    # solo registro así hace fallar la consulta de todo el periodo. Mismo criterio que
+    # jsonb_seguro: esos valores pasan a null y lo que no es JSON queda en '{}'.
+    for col in _COLUMNAS_JSON_VARIABLES:
+        filas = conn.execute(text(f"SELECT id, {col} FROM variables_mes WHERE json_valid({col}) = 0")).fetchall()
+        if filas:
+            logger.warning("v5: %s registros de variables_mes.%s no son JSON estricto; se corrigen", len(filas), col)
+            conn.execute(
+                text(f"UPDATE variables_mes SET {col} = :valor WHERE id = :id"),
+                [{"id": id_, "valor": _json_estricto(valor)} for id_, valor in filas],
+            )
+
+
+def _variables_a_jsonb(conn):
+    # Vacíos y NULL heredados de versiones antiguas: '' no es JSON válido
+    for col in _COLUMNAS_JSON_VARIABLES:
+        conn.execute(text(f"UPDATE variables_mes SET {col} = '{{}}' WHERE {col} IS NULL OR CAST({col} AS TEXT) = ''"))
+    if conn.dialect.name != "postgresql":
+        _variables_json_estricto(conn)  # SQLite: el tipo JSON se guarda como texto; solo se sanea
+        return
+    from sqlalchemy.dialects.postgresql import JSONB
+    tipos = {c["name"]: c["type"] for c in inspect(conn).get_columns("variables_mes")}
+    pendientes = [col for col in _COLUMNAS_JSON_VARIABLES if not isinstance(tipos.get(col), JSONB)]
+    if pendientes:
+        conn.exec_driver_sql(_FUNCION_JSONB_SEGURO)
+    for col in pendientes:
+        invalidos = conn.execute(
+            text(f"SELECT count(*) FROM variables_mes WHERE CAST({col} AS TEXT) ~ :patron"),
+            {"patron": _PATRON_NO_JSON},
+        ).scalar()
+        if invalidos:
+            logger.warning("v5: %s registros de variables_mes.%s con NaN/Infinity pasan a null", invalidos, col)
+        conn.execute(text(f"ALTER TABLE variables_mes ALTER COLUMN {col} DROP DEFAULT"))
+        conn.execute(text(
+            f"ALTER TABLE variables_mes ALTER COLUMN {col} TYPE JSONB USING pg_temp.jsonb_seguro(CAST({col} AS TEXT))"
+        ))
+        conn.execute(text(f"ALTER TABLE variables_mes ALTER COLUMN {col} SET DEFAULT '{{}}'::jsonb"))
+    if pendientes:
+        conn.exec_driver_sql("DROP FUNCTION pg_temp.jsonb_seguro(text)")
+    import infrastructure.database.models  # noqa: registra todos los modelos en Base.metadata
+    indices = {ix.name: ix for ix in Base.metadata.tables["variables_mes"].indexes}
+    for nombre in ("ix_variables_mes_conceptos_gin", "ix_variables_mes_suspensiones_gin"):
+        indices[nombre].create(bind=conn, checkfirst=True)
+
+# (version, descripcion, pasos, solo_postgres) — SIEMPRE agregar al final, nunca renumerar
+MIGRACIONES = [
+    (1, "Esquema base (create_all de los modelos)", [_crear_esquema_base], False),
+    (2, "Columnas y tablas incrementales previas al versionado", [_aplicar_incrementales_legado], True),
+    (3, "Tabla tiempos_calculo (trazas del motor de planilla)", [_crear_tiempos_calculo], False),
+    (4, "Índices compuestos y parciales de las consultas calientes", [_crear_indices_consultas], False),
+    (5, "variables_mes: conceptos_json y suspensiones_json como JSONB + índices GIN", [_variables_a_jsonb], False),
+]
+
+VERSION_ESPERADA = MIGRACIONES[-1][0]
+
+# Versiones cuyos pasos corren fuera de la transacción en PostgreSQL (CREATE INDEX
+# CONCURRENTLY). Deben ser idempotentes: si fallan a medias, se repiten enteras.
+_VERSIONES_SIN_TRANSACCION = {4}
+
+
+def version_actual(conn) -> int:
+    """Última versión registrada en `schema_version` (0 si la tabla no existe)."""
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version).order_by(schema_version.c.version.desc())).scalar() or 0
+
+
+def verificar_esquema(motor=None) -> tuple:
+    """(versión actual, versión esperada). Solo lee; no modifica la base."""
+    with (motor or engine).connect() as conn:
+        return version_actual(conn), VERSION_ESPERADA
+
+
+def _bloquear(conn, es_postgres: bool):
+    # Lock de transacción (se libera solo al commit/rollback): a diferencia del de
+    # sesión, funciona también a través del pooler de Neon (PgBouncer modo transacción).
+    if es_postgres:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _LOCK_MIGRACIONES})
+
+
+def _ejecutar_pasos(conn, pasos):
+    for paso in pasos:
+        if callable(paso):
+            paso(conn)
+        else:
+            conn.execute(text(paso))
+
+
+def aplicar_migraciones(motor=None, log=print) -> list:
+    """
+    Aplica las migraciones pendientes en orden y retorna las versiones aplicadas.
+    Cada versión corre en su propia transacción junto con su registro en
+    `schema_version`: si un paso falla, esa versión queda sin aplicar. Las de
+    `_VERSIONES_SIN_TRANSACCION` ejecutan sus pasos antes, en autocommit.
+    """
+    motor = motor or engine
+    es_postgres = motor.dialect.name == "postgresql"
+    aplicadas = []
+    with motor.connect() as conn:
+        with conn.begin():
+            _bloquear(conn, es_postgres)
+            schema_version.create(conn, checkfirst=True)
+        for version, descripcion, pasos, solo_postgres in MIGRACIONES:
+            sin_transaccion = es_postgres and version in _VERSIONES_SIN_TRANSACCION
+            if sin_transaccion:
+                with conn.begin():
+                    _bloquear(conn, es_postgres)
+                    pendiente = version_actual(conn) < version
+                if pendiente:
+                    # Conexión aparte en autocommit; `conn` queda sin transacción abierta,
+                    # que CONCURRENTLY esperaría hasta el infinito.
+                    with motor.connect().execution_options(isolation_level="AUTOCOMMIT") as auto:
+                        _ejecutar_pasos(auto, pasos)
+            with conn.begin():
+                _bloquear(conn, es_postgres)
+                # Releída bajo el lock: otra instancia pudo aplicarla mientras esperábamos
+                if version_actual(conn) >= version:
+                    continue
+                if (not solo_postgres or es_postgres) and not sin_transaccion:
+                    _ejecutar_pasos(conn, pasos)
+                conn.execute(schema_version.insert().values(version=version, descripcion=descripcion))
+            aplicadas.append(version)
+            log(f"[OK] v{version}: {descripcion}")
+    return aplicadas
+
+
+if __name__ == "__main__":
+    aplicar_migraciones()
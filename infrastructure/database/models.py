@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, ForeignKey, DateTime, UniqueConstraint, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, ForeignKey, DateTime, UniqueConstraint, Text, Index, JSON, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from infrastructure.database.connection import Base
 
+# JSONB en PostgreSQL (indexable con GIN, consultable por clave en SQL); JSON (texto) en SQLite.
+# Se leen y asignan como dict: para modificar, asignar un dict nuevo (la mutación
+# in situ no se detecta).
+JSONDoc = JSON().with_variant(JSONB(), "postgresql")
+
 
 # TABLA INTERMEDIA PARA PERMISOS DE USUARIOS POR EMPRESA (Control de Accesos SAP Style)
 class UsuarioEmpresa(Base):
@@ -71,7 +77,10 @@ class Empresa(Base):
 # 2. TABLA MAESTRA DE TRABAJADORES
 class Trabajador(Base):
     __tablename__ = "trabajadores"
-    
+    __table_args__ = (
+        Index('ix_trabajadores_empresa_situacion_contrato', 'empresa_id', 'situacion', 'tipo_contrato'),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     empresa_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
     
@@ -159,7 +168,10 @@ class Concepto(Base):
 
 class ParametroLegal(Base):
     __tablename__ = "parametros_legales"
-    
+    __table_args__ = (
+        Index('ix_parametros_empresa_periodo', 'empresa_id', 'periodo_key'),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     empresa_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
     periodo_key = Column(String(10), nullable=False) # Formato "01-2026"
@@ -201,6 +213,12 @@ class VariablesMes(Base):
     __tablename__ = "variables_mes"
     __table_args__ = (
         UniqueConstraint('empresa_id', 'trabajador_id', 'periodo_key', name='uq_variable_mes'),
+        # La única empieza por (empresa_id, trabajador_id): no sirve para "todo el periodo"
+        Index('ix_variables_mes_empresa_periodo', 'empresa_id', 'periodo_key'),
+        Index('ix_variables_mes_trabajador_periodo', 'trabajador_id', 'periodo_key'),
+        # GIN (jsonb_ops): "¿quién tiene el concepto X?" → conceptos_json ? 'X'
+        Index('ix_variables_mes_conceptos_gin', 'conceptos_json', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        Index('ix_variables_mes_suspensiones_gin', 'suspensiones_json', postgresql_using='gin').ddl_if(dialect='postgresql'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -215,10 +233,10 @@ class VariablesMes(Base):
     hrs_extras_35 = Column(Float, default=0.0)
 
     # Suspensiones por tipo SUNAT Tabla 21: {"07": 2, "20": 3}
-    suspensiones_json = Column(Text, default='{}')
+    suspensiones_json = Column(JSONDoc, default=dict)
 
     # Montos de conceptos dinámicos: {"BONO DE RIESGO": 500.0, "GRATIFICACION (JUL/DIC)": 3000.0}
-    conceptos_json = Column(Text, default='{}')
+    conceptos_json = Column(JSONDoc, default=dict)
 
     # Días sin prestar servicios para locadores (4ta categoría)
     dias_descuento_locador = Column(Integer, default=0)
@@ -233,6 +251,9 @@ class VariablesMes(Base):
     empresa = relationship("Empresa", backref="variables_mes")
 
 
+GRUPO_SNAPSHOT = "snapshot"  # grupo de columnas diferidas de PlanillaMensual
+
+
 # 6. TABLA DE PLANILLAS CALCULADAS (Resultado Mensual Cerrado)
 class PlanillaMensual(Base):
     """
@@ -243,6 +264,9 @@ class PlanillaMensual(Base):
     __tablename__ = "planillas_mensuales"
     __table_args__ = (
         UniqueConstraint('empresa_id', 'periodo_key', name='uq_planilla_mes'),
+        # Parcial: "última planilla cerrada" y listados de cerradas (más reciente primero)
+        Index('ix_planillas_cerradas_empresa_fecha', 'empresa_id', 'fecha_calculo',
+              postgresql_where=text("estado = 'CERRADA'"), sqlite_where=text("estado = 'CERRADA'")),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -250,12 +274,15 @@ class PlanillaMensual(Base):
     periodo_key = Column(String(10), nullable=False)  # Formato "MM-YYYY"
     fecha_calculo = Column(DateTime, default=datetime.now)
 
+    # Snapshot JSON (pesado): diferido en grupo — los listados no lo transfieren, y al
+    # acceder a cualquiera de las tres columnas se cargan las tres en una sola consulta.
+    # Para leerlo junto con la fila: repo_planilla.obtener_planilla().
     # DataFrame completo de resultados serializado como JSON
-    resultado_json = Column(Text, nullable=False)
+    resultado_json = deferred(Column(Text, nullable=False), group=GRUPO_SNAPSHOT)
     # Datos de auditoría por trabajador (desglose detallado)
-    auditoria_json = Column(Text, nullable=False)
+    auditoria_json = deferred(Column(Text, nullable=False), group=GRUPO_SNAPSHOT)
     # NUEVO: Resultados calculados de locadores (snapshot)
-    honorarios_json = Column(Text, default='[]')
+    honorarios_json = deferred(Column(Text, default='[]'), group=GRUPO_SNAPSHOT)
 
     # Cierre de planilla
     estado      = Column(String(10), default="ABIERTA")   # ABIERTA | CERRADA
@@ -273,6 +300,10 @@ class PlanillaMensual(Base):
 # 7. TABLA DE PRÉSTAMOS / DESCUENTOS PROGRAMADOS
 class Prestamo(Base):
     __tablename__ = "prestamos"
+    __table_args__ = (
+        Index('ix_prestamos_empresa_estado', 'empresa_id', 'estado'),
+        Index('ix_prestamos_trabajador', 'trabajador_id'),
+    )
 
     id              = Column(Integer, primary_key=True, index=True)
     empresa_id      = Column(Integer, ForeignKey("empresas.id"), nullable=False)
@@ -290,6 +321,12 @@ class Prestamo(Base):
 
 class CuotaPrestamo(Base):
     __tablename__ = "cuotas_prestamo"
+    __table_args__ = (
+        Index('ix_cuotas_prestamo_prestamo_cuota', 'prestamo_id', 'numero_cuota'),
+        # Parcial: el motor solo descuenta las cuotas PENDIENTES del periodo
+        Index('ix_cuotas_pendientes_periodo', 'periodo_key', 'prestamo_id',
+              postgresql_where=text("estado = 'PENDIENTE'"), sqlite_where=text("estado = 'PENDIENTE'")),
+    )
 
     id           = Column(Integer, primary_key=True, index=True)
     prestamo_id  = Column(Integer, ForeignKey("prestamos.id"), nullable=False)
@@ -353,12 +390,18 @@ class DepositoCTS(Base):
 
 class LogEnvioBoleta(Base):
     __tablename__ = "log_envio_boletas"
+    __table_args__ = (
+        Index('ix_log_envio_empresa_periodo', 'empresa_id', 'periodo_key'),
+        # Parcial: reintentos de envío (trabajadores sin correo)
+        Index('ix_log_envio_pendientes_trabajador', 'trabajador_id', 'periodo_key',
+              postgresql_where=text("estado = 'PENDIENTE'"), sqlite_where=text("estado = 'PENDIENTE'")),
+    )
     id = Column(Integer, primary_key=True, index=True)
     empresa_id = Column(Integer, ForeignKey("empresas.id"), nullable=False)
     trabajador_id = Column(Integer, ForeignKey("trabajadores.id"), nullable=False)
     periodo_key = Column(String(10), nullable=False)
     correo_destino = Column(String(100), nullable=False)
-    estado = Column(String(20), default="ENVIADO") # ENVIADO | ERROR
+    estado = Column(String(20), default="ENVIADO") # ENVIANDO (vence a ERROR) | ENVIADO | ERROR | PENDIENTE (sin correo)
     mensaje_error = Column(Text, nullable=True)
     fecha_envio = Column(DateTime, default=datetime.now)
 
@@ -398,3 +441,60 @@ class ConfiguracionContable(Base):
     fecha_actualizacion = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     empresa = relationship("Empresa")
+
+
+# 11. RESUMEN MATERIALIZADO POR PERIODO (KPIs de dashboards, sin decodificar snapshots)
+class ResumenPlanilla(Base):
+    """
+    Totales de cada PlanillaMensual, escritos al guardar, cerrar y reabrir el periodo
+    (repo_planilla.actualizar_resumen_planilla). Los dashboards leen una fila de aquí en
+    lugar de decodificar resultado_json.
+    """
+    __tablename__ = "resumen_planillas"
+    __table_args__ = (
+        UniqueConstraint('empresa_id', 'periodo_key', name='uq_resumen_planilla'),
+        Index('ix_resumen_empresa_estado_fecha', 'empresa_id', 'estado', 'fecha_calculo'),
+    )
+
+    id            = Column(Integer, primary_key=True, index=True)
+    empresa_id    = Column(Integer, ForeignKey("empresas.id"), nullable=False)
+    periodo_key   = Column(String(10), nullable=False)   # Formato "MM-YYYY"
+    estado        = Column(String(10), default="ABIERTA")
+    fecha_calculo = Column(DateTime, nullable=True)      # copia de PlanillaMensual.fecha_calculo
+
+    n_trabajadores   = Column(Integer, default=0)        # filas de la sábana (sin TOTALES)
+    n_locadores      = Column(Integer, default=0)
+    total_bruto      = Column(Float, default=0.0)
+    total_essalud    = Column(Float, default=0.0)
+    total_neto       = Column(Float, default=0.0)
+    total_quinta     = Column(Float, default=0.0)
+    total_afp        = Column(Float, default=0.0)        # aporte + seguro + comisión
+    total_onp        = Column(Float, default=0.0)
+    total_honorarios = Column(Float, default=0.0)        # neto a pagar de locadores
+
+    # Cartera de préstamos de la empresa al momento de guardar/cerrar
+    saldo_prestamos     = Column(Float, default=0.0)
+    n_prestamos_activos = Column(Integer, default=0)
+
+    fecha_actualizacion = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+# 12. HISTORIAL DE TIEMPOS DEL MOTOR DE PLANILLA (una fila por ejecución)
+class TiempoCalculo(Base):
+    """
+    Duración total y por etapa de cada ejecución del motor de planilla
+    (infrastructure/services/trazas.py). Permite ubicar las empresas cuyo cálculo es lento.
+    """
+    __tablename__ = "tiempos_calculo"
+    __table_args__ = (
+        Index('ix_tiempos_calculo_empresa_fecha', 'empresa_id', 'fecha'),
+    )
+
+    id             = Column(Integer, primary_key=True, index=True)
+    empresa_id     = Column(Integer, ForeignKey("empresas.id"), nullable=False)
+    periodo_key    = Column(String(10), nullable=False)
+    usuario        = Column(String(50), nullable=True)
+    fecha          = Column(DateTime, default=datetime.now)
+    n_trabajadores = Column(Integer, default=0)
+    total_ms       = Column(Float, default=0.0)
+    etapas_json    = Column(Text, default='[]')   # [{"Etapa", "Llamadas", "Total ms", ...}]
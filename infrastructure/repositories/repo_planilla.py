@@ -8,10 +8,13 @@ de las entidades: ParametroLegal, Trabajador, VariablesMes, Concepto, PlanillaMe
 import json
 import io
 import pandas as pd
-from datetime import datetime
-from sqlalchemy import or_
+from datetime import datetime, timedelta
+from sqlalchemy import String, or_, func, case, distinct, select, update
+from sqlalchemy.orm import undefer_group
+from infrastructure.database.lotes import iterar_filas
 from infrastructure.database.models import (
-    Trabajador, Concepto, ParametroLegal, VariablesMes, PlanillaMensual,
+    Trabajador, Concepto, ParametroLegal, VariablesMes, PlanillaMensual, GRUPO_SNAPSHOT,
+    Prestamo, CuotaPrestamo, ResumenPlanilla, TiempoCalculo, Empresa, LogEnvioBoleta,
 )
 
 
@@ -107,52 +110,94 @@ def cargar_trabajadores_df(db, empresa_id, mes_calc: int = 0, anio_calc: int = 0
     return pd.DataFrame(rows)
 
 
+# ── Lecturas proyectadas (Core select → DataFrame) ───────────────────────────
+# Solo las columnas necesarias, con el JOIN a trabajadores en la misma consulta:
+# sin objetos ORM ni lazy load de `v.trabajador` (un SELECT extra por fila).
+
+def _df_consulta(db, stmt) -> pd.DataFrame:
+    resultado = db.execute(stmt)
+    return pd.DataFrame(resultado.all(), columns=list(resultado.keys()))
+
+
+def variables_periodo_df(db, empresa_id, periodo_key) -> pd.DataFrame:
+    """VariablesMes del periodo con num_doc y nombres del trabajador (columnas de BD, JSON como dict)."""
+    return _df_consulta(db, (
+        select(
+            Trabajador.num_doc, Trabajador.nombres,
+            VariablesMes.dias_faltados, VariablesMes.min_tardanza,
+            VariablesMes.hrs_extras_25, VariablesMes.hrs_extras_35,
+            VariablesMes.suspensiones_json, VariablesMes.conceptos_json,
+        )
+        .join(Trabajador, Trabajador.id == VariablesMes.trabajador_id)
+        .where(VariablesMes.empresa_id == empresa_id, VariablesMes.periodo_key == periodo_key)
+    ))
+
+
+def trabajadores_boletas_df(db, empresa_id) -> pd.DataFrame:
+    """Datos del trabajador que imprime la boleta, ya con los valores por defecto."""
+    df = _df_consulta(db, (
+        select(
+            Trabajador.num_doc.label('Num. Doc.'),
+            Trabajador.nombres.label('Nombres y Apellidos'),
+            Trabajador.cargo.label('Cargo'),
+            Trabajador.fecha_ingreso.label('Fecha Ingreso'),
+            Trabajador.sistema_pension.label('Sistema Pensión'),
+            Trabajador.cuspp.label('CUSPP'),
+            Trabajador.seguro_social.label('Seguro Social'),
+            Trabajador.correo_electronico,
+        )
+        .where(Trabajador.empresa_id == empresa_id)
+    ))
+    # `or` de Python: también '' cae al valor por defecto
+    for col, defecto in (('Cargo', 'No especificado'), ('Sistema Pensión', 'NO AFECTO'), ('CUSPP', ''),
+                         ('Seguro Social', 'ESSALUD'), ('correo_electronico', '')):
+        df[col] = df[col].where(df[col].notna() & (df[col] != ''), defecto)
+    return df
+
+
+def _expandir_json(serie: pd.Series) -> pd.DataFrame:
+    """Columna de dicts → DataFrame (una columna por clave, NaN donde falta)."""
+    return pd.DataFrame(serie.map(lambda d: d or {}).tolist(), index=serie.index)
+
+
 def cargar_variables_df(db, empresa_id, periodo_key, conceptos) -> pd.DataFrame:
-    """Lee VariablesMes de Neon y los devuelve como DataFrame compatible."""
-    variables = (
-        db.query(VariablesMes)
-        .filter_by(empresa_id=empresa_id, periodo_key=periodo_key)
-        .all()
-    )
+    """Variables del periodo como DataFrame compatible con el motor."""
     concepto_nombres = [c.nombre for c in conceptos]
-    rows = []
-    for v in variables:
-        susp = json.loads(getattr(v, 'suspensiones_json', '{}') or '{}')
-        # Total de ausencias desde suspensiones_json; fallback a dias_faltados
-        total_ausencias = sum(susp.values()) if susp else (v.dias_faltados or 0)
-        row = {
-            "Num. Doc.": v.trabajador.num_doc,
-            "Nombres y Apellidos": v.trabajador.nombres,
-            "Días Faltados": total_ausencias,
-            "suspensiones_json": json.dumps(susp),
-            "Min. Tardanza": v.min_tardanza or 0,
-            "Hrs Extras 25%": v.hrs_extras_25 or 0.0,
-            "Hrs Extras 35%": v.hrs_extras_35 or 0.0,
-        }
-        conceptos_data = json.loads(v.conceptos_json or '{}')
-        for nombre in concepto_nombres:
-            row[nombre] = conceptos_data.get(nombre, 0.0)
-        # Preservar el JSON completo para que el motor de cálculo pueda leer
-        # los ajustes de auditoría (_ajuste_afp, _ajuste_quinta, _ajuste_otros)
-        row["conceptos_json"] = v.conceptos_json or '{}'
-        rows.append(row)
-    if not rows:
-        cols_base = [
-            "Num. Doc.", "Nombres y Apellidos", "Días Faltados",
-            "suspensiones_json", "Min. Tardanza",
-            "Hrs Extras 25%", "Hrs Extras 35%",
-        ]
+    cols_base = [
+        "Num. Doc.", "Nombres y Apellidos", "Días Faltados",
+        "suspensiones_json", "Min. Tardanza",
+        "Hrs Extras 25%", "Hrs Extras 35%",
+    ]
+    raw = variables_periodo_df(db, empresa_id, periodo_key)
+    if raw.empty:
         return pd.DataFrame(columns=cols_base + concepto_nombres + ["conceptos_json"])
-    df = pd.DataFrame(rows)
-    # fillna solo en columnas numéricas para no borrar el JSON de ajustes
-    cols_num = [c for c in df.columns if c != "conceptos_json"]
-    df[cols_num] = df[cols_num].fillna(0.0)
+
+    susp = _expandir_json(raw["suspensiones_json"])
+    conceptos_df = _expandir_json(raw["conceptos_json"])
+    # Total de ausencias desde suspensiones_json; fallback a dias_faltados
+    con_susp = susp.notna().any(axis=1)
+    df = pd.DataFrame({
+        "Num. Doc.": raw["num_doc"],
+        "Nombres y Apellidos": raw["nombres"],
+        "Días Faltados": susp.sum(axis=1).where(con_susp, raw["dias_faltados"].fillna(0)).astype(int),
+        "suspensiones_json": raw["suspensiones_json"].map(lambda d: json.dumps(d or {})),
+        "Min. Tardanza": raw["min_tardanza"].fillna(0).astype(int),
+        "Hrs Extras 25%": raw["hrs_extras_25"].fillna(0.0),
+        "Hrs Extras 35%": raw["hrs_extras_35"].fillna(0.0),
+    })
+    df = pd.concat([df, conceptos_df.reindex(columns=concepto_nombres).fillna(0.0)], axis=1)
+    # JSON completo para que el motor lea los ajustes de auditoría (_ajuste_afp, _ajuste_quinta, _ajuste_otros)
+    df["conceptos_json"] = raw["conceptos_json"].map(lambda d: json.dumps(d or {}))
     return df
 
 
-def cargar_conceptos_df(db, empresa_id) -> pd.DataFrame:
-    """Lee conceptos de la empresa de Neon como DataFrame compatible con el motor."""
-    conceptos = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
+def cargar_conceptos_df(db, empresa_id, conceptos=None) -> pd.DataFrame:
+    """
+    Lee conceptos de la empresa de Neon como DataFrame compatible con el motor.
+    `conceptos`: los Concepto de la empresa si ya se consultaron (no se vuelven a leer).
+    """
+    if conceptos is None:
+        conceptos = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
     rows = []
     for c in conceptos:
         rows.append({
@@ -190,25 +235,288 @@ def guardar_planilla(db, empresa_id, periodo_key, df_resultados, auditoria_data,
             existente.honorarios_json = hon_json
         existente.fecha_calculo = datetime.now()
     else:
-        nueva = PlanillaMensual(
+        existente = PlanillaMensual(
             empresa_id=empresa_id,
             periodo_key=periodo_key,
             resultado_json=resultado_json,
             auditoria_json=auditoria_json,
             honorarios_json=hon_json
         )
-        db.add(nueva)
+        db.add(existente)
+    actualizar_resumen_planilla(db, existente, df_resultados, df_locadores)
     db.commit()
 
 
+def listar_planillas(db, empresa_id=None, estado=None) -> list:
+    """
+    Planillas (más reciente primero) SIN el snapshot JSON: solo id, periodo, estado,
+    fechas y autorización. Para listados, selectores y recordatorios.
+    """
+    q = db.query(PlanillaMensual)
+    if empresa_id is not None:
+        q = q.filter(PlanillaMensual.empresa_id == empresa_id)
+    if estado is not None:
+        q = q.filter(PlanillaMensual.estado == estado)
+    return q.order_by(PlanillaMensual.fecha_calculo.desc()).all()
+
+
+def obtener_planilla(db, empresa_id, periodo_key):
+    """La planilla del periodo con su snapshot JSON ya cargado (una sola consulta), o None."""
+    return (
+        db.query(PlanillaMensual)
+        .options(undefer_group(GRUPO_SNAPSHOT))
+        .filter_by(empresa_id=empresa_id, periodo_key=periodo_key)
+        .first()
+    )
+
+
 def cargar_planilla_guardada(db, empresa_id, periodo_key):
     """Recupera una planilla previamente guardada de Neon. Retorna (df, auditoria) o (None, None)."""
-    p = db.query(PlanillaMensual).filter_by(
-        empresa_id=empresa_id, periodo_key=periodo_key
-    ).first()
+    p = obtener_planilla(db, empresa_id, periodo_key)
     if not p:
         return None, None
-    df = pd.read_json(io.StringIO(p.resultado_json), orient='records')
+    # DNI como texto: sin dtype, read_json convierte '07123456' en 7123456
+    df = pd.read_json(io.StringIO(p.resultado_json), orient='records', dtype={'DNI': str})
     auditoria = json.loads(p.auditoria_json)
     return df, auditoria
 
+
+
+# ── Consultas por clave de conceptos_json / suspensiones_json ────────────────
+# En PostgreSQL (JSONB) la extracción y el filtro por clave corren en SQL y usan los
+# índices GIN; en SQLite se resuelven con json_extract. Nunca traen el JSON completo.
+
+def _valor_json(columna, clave: str):
+    return func.coalesce(columna[clave].as_float(), 0.0)
+
+
+def _filtro_clave(db, columna, clave: str):
+    if db.get_bind().dialect.name == "postgresql":
+        return columna.op("?", is_comparison=True)(clave)   # conceptos_json ? 'X' → índice GIN
+    return columna[clave].as_float().isnot(None)
+
+
+def montos_concepto_periodo(db, empresa_id, periodo_key, concepto: str) -> dict:
+    """{trabajador_id: monto} de quienes tienen `concepto` distinto de 0 en el periodo."""
+    monto = _valor_json(VariablesMes.conceptos_json, concepto)
+    filas = (
+        db.query(VariablesMes.trabajador_id, monto)
+        .filter(
+            VariablesMes.empresa_id == empresa_id,
+            VariablesMes.periodo_key == periodo_key,
+            _filtro_clave(db, VariablesMes.conceptos_json, concepto),
+            monto != 0,
+        )
+        .all()
+    )
+    return {trabajador_id: float(valor) for trabajador_id, valor in filas}
+
+
+def total_concepto_periodo(db, empresa_id, periodo_key, concepto: str) -> float:
+    """Suma de `concepto` en el periodo, agregada en la BD."""
+    total = (
+        db.query(func.sum(_valor_json(VariablesMes.conceptos_json, concepto)))
+        .filter(
+            VariablesMes.empresa_id == empresa_id,
+            VariablesMes.periodo_key == periodo_key,
+            _filtro_clave(db, VariablesMes.conceptos_json, concepto),
+        )
+        .scalar()
+    )
+    return float(total or 0.0)
+
+
+def dias_suspension_periodo(db, empresa_id, periodo_key, codigo: str) -> dict:
+    """{trabajador_id: días} con la suspensión `codigo` (Tabla 21 SUNAT) en el periodo."""
+    dias = _valor_json(VariablesMes.suspensiones_json, codigo)
+    filas = (
+        db.query(VariablesMes.trabajador_id, dias)
+        .filter(
+            VariablesMes.empresa_id == empresa_id,
+            VariablesMes.periodo_key == periodo_key,
+            _filtro_clave(db, VariablesMes.suspensiones_json, codigo),
+            dias != 0,
+        )
+        .all()
+    )
+    return {trabajador_id: int(valor) for trabajador_id, valor in filas}
+
+
+# ── Resumen materializado por periodo (ResumenPlanilla) ───────────────────────
+
+_COLUMNAS_AFP = ("AFP Aporte", "AFP Seguro", "AFP Comis.")
+
+
+def _suma(df, columna) -> float:
+    if df is None or df.empty or columna not in df.columns:
+        return 0.0
+    return round(float(pd.to_numeric(df[columna], errors='coerce').fillna(0).sum()), 2)
+
+
+def saldo_prestamos_pendiente(db, empresa_id) -> tuple:
+    """(saldo de cuotas PENDIENTE, n° de préstamos ACTIVO) de la empresa, en una sola consulta."""
+    saldo, n_prestamos = (
+        db.query(
+            func.coalesce(func.sum(case((CuotaPrestamo.estado == 'PENDIENTE', CuotaPrestamo.monto), else_=0.0)), 0.0),
+            func.count(distinct(Prestamo.id)),
+        )
+        .select_from(Prestamo)
+        .outerjoin(CuotaPrestamo, CuotaPrestamo.prestamo_id == Prestamo.id)
+        .filter(Prestamo.empresa_id == empresa_id, Prestamo.estado == 'ACTIVO')
+        .one()
+    )
+    return round(float(saldo or 0.0), 2), int(n_prestamos or 0)
+
+
+def actualizar_resumen_planilla(db, planilla, df_resultados=None, df_locadores=None):
+    """
+    Recalcula la fila de ResumenPlanilla de `planilla` (sin hacer commit: va en la misma
+    transacción que el guardado/cierre). Los DataFrames que se pasen reemplazan sus
+    totales; los que sean None conservan los ya resumidos — y si el resumen aún no
+    existe, se toman del snapshot JSON.
+    """
+    db.flush()  # fecha_calculo por defecto y cuotas recién marcadas, visibles para las consultas
+    resumen = db.query(ResumenPlanilla).filter_by(
+        empresa_id=planilla.empresa_id, periodo_key=planilla.periodo_key
+    ).first()
+    if resumen is None:
+        resumen = ResumenPlanilla(empresa_id=planilla.empresa_id, periodo_key=planilla.periodo_key)
+        db.add(resumen)
+        if df_resultados is None:
+            df_resultados = pd.DataFrame(json.loads(planilla.resultado_json or '[]'))
+        if df_locadores is None:
+            df_locadores = pd.DataFrame(json.loads(planilla.honorarios_json or '[]'))
+
+    if df_resultados is not None:
+        df_data = df_resultados
+        if 'Apellidos y Nombres' in df_data.columns:
+            df_data = df_data[df_data['Apellidos y Nombres'] != 'TOTALES']
+        resumen.n_trabajadores = len(df_data)
+        resumen.total_bruto    = _suma(df_data, 'TOTAL BRUTO')
+        resumen.total_essalud  = _suma(df_data, 'Aporte Seg. Social')
+        resumen.total_neto     = _suma(df_data, 'NETO A PAGAR')
+        resumen.total_quinta   = _suma(df_data, 'Ret. 5ta Cat.')
+        resumen.total_afp      = round(sum(_suma(df_data, c) for c in _COLUMNAS_AFP), 2)
+        resumen.total_onp      = _suma(df_data, 'ONP (13%)')
+    if df_locadores is not None:
+        resumen.n_locadores      = len(df_locadores)
+        resumen.total_honorarios = _suma(df_locadores, 'NETO A PAGAR')
+
+    resumen.estado        = planilla.estado or 'ABIERTA'
+    resumen.fecha_calculo = planilla.fecha_calculo
+    resumen.saldo_prestamos, resumen.n_prestamos_activos = saldo_prestamos_pendiente(db, planilla.empresa_id)
+    return resumen
+
+
+def obtener_ultimo_resumen_cerrado(db, empresa_id):
+    """
+    Resumen de la última planilla CERRADA de la empresa. Si esa planilla es anterior a la
+    tabla de resúmenes, lo genera una vez a partir de su snapshot y lo guarda.
+    """
+    ultima = (
+        db.query(PlanillaMensual)
+        .filter_by(empresa_id=empresa_id, estado='CERRADA')
+        .order_by(PlanillaMensual.fecha_calculo.desc())
+        .first()
+    )
+    if ultima is None:
+        return None
+    resumen = db.query(ResumenPlanilla).filter_by(
+        empresa_id=empresa_id, periodo_key=ultima.periodo_key, estado='CERRADA'
+    ).first()
+    if resumen is None:
+        resumen = actualizar_resumen_planilla(db, ultima)
+        db.commit()
+    return resumen
+
+
+def boletas_pendientes_por_empresa(db, desde_periodo: int):
+    """
+    Una fila por empresa con planillas CERRADAS sin boletas autorizadas desde
+    `desde_periodo` (AAAAMM): (empresa_id, razon_social, correo_electronico,
+    periodo_key más antiguo pendiente, cantidad de periodos pendientes).
+    Una sola consulta agregada para todas las empresas, leída por lotes.
+    """
+    # "MM-AAAA" → "AAAAMM": comparable como texto, sin CAST (no falla con claves mal formadas)
+    ordenable = (func.substr(PlanillaMensual.periodo_key, 4, 4, type_=String)
+                 + func.substr(PlanillaMensual.periodo_key, 1, 2, type_=String))
+    stmt = (
+        select(
+            Empresa.id, Empresa.razon_social, Empresa.correo_electronico,
+            func.min(ordenable), func.count(PlanillaMensual.id),
+        )
+        .join(Empresa, Empresa.id == PlanillaMensual.empresa_id)
+        .where(
+            PlanillaMensual.estado == 'CERRADA',
+            func.coalesce(PlanillaMensual.boletas_autorizado, False).is_(False),
+            ordenable >= str(desde_periodo),
+        )
+        .group_by(Empresa.id, Empresa.razon_social, Empresa.correo_electronico)
+        .order_by(Empresa.razon_social)
+    )
+    for empresa_id, razon_social, correo, mas_antiguo, n in iterar_filas(db, stmt, tamano=500):
+        yield empresa_id, razon_social, correo, f"{mas_antiguo[4:]}-{mas_antiguo[:4]}", n
+
+
+# ─── BITÁCORA DE ENVÍOS ───────────────────────────────────────────────────────
+
+# Un log ENVIANDO más antiguo que esto ya no tiene un proceso vivo detrás: el envío
+# se interrumpió y no se sabe si el correo salió. Se trata como ERROR (reenviable).
+MINUTOS_ENVIO_VENCIDO = 15
+
+
+def cerrar_envios_interrumpidos(db, empresa_id) -> int:
+    """
+    Pasa a ERROR los LogEnvioBoleta de la empresa que siguen en ENVIANDO después de
+    MINUTOS_ENVIO_VENCIDO. Retorna cuántos cerró (no hace commit).
+    """
+    limite = datetime.now() - timedelta(minutes=MINUTOS_ENVIO_VENCIDO)
+    res = db.execute(
+        update(LogEnvioBoleta)
+        .where(
+            LogEnvioBoleta.empresa_id == empresa_id,
+            LogEnvioBoleta.estado == 'ENVIANDO',
+            LogEnvioBoleta.fecha_envio < limite,
+        )
+        .values(estado='ERROR', mensaje_error='Envío interrumpido: no se confirmó la salida del correo')
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount or 0
+
+
+# ─── TIEMPOS DEL MOTOR ────────────────────────────────────────────────────────
+
+def registrar_tiempo_calculo(db, empresa_id, periodo_key, usuario, n_trabajadores, traza):
+    """Guarda el resumen por etapa de una ejecución del motor (no hace commit)."""
+    registro = TiempoCalculo(
+        empresa_id=empresa_id,
+        periodo_key=periodo_key,
+        usuario=usuario,
+        n_trabajadores=n_trabajadores,
+        total_ms=round(traza.total_s * 1000, 1),
+        etapas_json=json.dumps(traza.resumen(), ensure_ascii=False),
+    )
+    db.add(registro)
+    return registro
+
+
+def empresas_calculo_lento(db, desde: datetime, limite: int = 10) -> list:
+    """
+    Empresas ordenadas por el tiempo promedio de su motor de planilla desde `desde`:
+    [(razon_social, ejecuciones, promedio_ms, maximo_ms, promedio_trabajadores)].
+    """
+    return (
+        db.query(
+            Empresa.razon_social,
+            func.count(TiempoCalculo.id),
+            func.avg(TiempoCalculo.total_ms),
+            func.max(TiempoCalculo.total_ms),
+            func.avg(TiempoCalculo.n_trabajadores),
+        )
+        .join(Empresa, Empresa.id == TiempoCalculo.empresa_id)
+        .filter(TiempoCalculo.fecha >= desde)
+        .group_by(Empresa.id, Empresa.razon_social)
+        .order_by(func.avg(TiempoCalculo.total_ms).desc())
+        .limit(limite)
+        .all()
+    )
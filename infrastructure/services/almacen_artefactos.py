@@ -0,0 +1,210 @@
+"""
+Almacén de artefactos pre-renderizados de periodos CERRADOS.
+
+Al cerrar un periodo se generan una sola vez las boletas (planas y encriptadas con
+el DNI), el libro consolidado, el ZIP, la sábana y el reporte de tesorería. Aquí se
+guardan en disco, direccionados por el hash del snapshot congelado en
+PlanillaMensual (resultado/auditoría/honorarios + encabezado de la empresa + conceptos
+no remunerativos, que cambian el reporte de tesorería):
+
+    <ARTEFACTOS_DIR>/<empresa_id>/<clave>/<nombre>     bytes del artefacto
+    <ARTEFACTOS_DIR>/<empresa_id>/<periodo_key>.json   índice periodo → clave
+
+El índice solo se escribe cuando TODOS los artefactos del snapshot están en disco,
+así que un lector nunca ve un pre-render a medias. Reabrir el periodo borra el
+índice y la carpeta (ver `invalidar_periodo`).
+
+En Cloud Run el disco es /tmp en memoria y por instancia: si el artefacto no está
+(otra instancia, reinicio), el llamador simplemente renderiza como antes. Por lo
+mismo el índice local puede estar viejo (otra instancia reabrió y volvió a cerrar el
+periodo): el lector pasa la clave vigente calculada desde la BD y solo se sirve el
+artefacto si coincide con la indexada. Por eso el
+almacén tiene tope (ARTEFACTOS_MAX_MB): al publicar un snapshot se descartan los
+menos usados recientemente hasta quedar bajo el tope (LRU por fecha de la carpeta,
+que se actualiza en cada lectura).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+ARTEFACTOS_DIR = os.getenv(
+    "ARTEFACTOS_DIR", os.path.join(tempfile.gettempdir(), "planillas_artefactos")
+)
+try:
+    ARTEFACTOS_MAX_BYTES = int(float(os.getenv("ARTEFACTOS_MAX_MB", "256")) * 1024 * 1024)
+except ValueError:
+    ARTEFACTOS_MAX_BYTES = 256 * 1024 * 1024
+
+_lock_recorte = threading.Lock()
+
+
+def _digest_encabezado(encabezado: dict) -> str:
+    """Hash estable de los datos de empresa que se imprimen en los documentos."""
+    canon = json.dumps({k: str(v or '') for k, v in (encabezado or {}).items()}, sort_keys=True)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:16]
+
+
+def clave_snapshot(resultado_json, auditoria_json, honorarios_json, encabezado=None,
+                   conceptos_no_remunerativos=()) -> str:
+    """Clave de contenido del snapshot de un periodo (sha256 hex)."""
+    h = hashlib.sha256()
+    for parte in (resultado_json, auditoria_json, honorarios_json):
+        h.update((parte or '').encode("utf-8"))
+        h.update(b"\x00")
+    h.update(_digest_encabezado(encabezado).encode("ascii"))
+    for nombre in sorted(conceptos_no_remunerativos or ()):
+        h.update(b"\x00")
+        h.update(nombre.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _dir_empresa(empresa_id) -> str:
+    return os.path.join(ARTEFACTOS_DIR, str(int(empresa_id)))
+
+
+def _ruta_indice(empresa_id, periodo_key) -> str:
+    return os.path.join(_dir_empresa(empresa_id), f"{periodo_key}.json")
+
+
+def _escribir_atomico(ruta: str, data: bytes):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(ruta), prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, ruta)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def guardar_artefacto(empresa_id, clave: str, nombre: str, data: bytes):
+    """Guarda los bytes de un artefacto bajo la clave del snapshot."""
+    _escribir_atomico(os.path.join(_dir_empresa(empresa_id), clave, nombre), data)
+
+
+def publicar_snapshot(empresa_id, periodo_key, clave: str):
+    """Marca el snapshot como completo: a partir de aquí los lectores lo usan."""
+    indice = {"clave": clave}
+    _escribir_atomico(_ruta_indice(empresa_id, periodo_key), json.dumps(indice).encode("utf-8"))
+    recortar_almacen(conservar=(empresa_id, clave))
+
+
+def _claves_publicadas(dir_empresa: str) -> set:
+    claves = set()
+    for nombre in os.listdir(dir_empresa):
+        if not nombre.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(dir_empresa, nombre), "r", encoding="utf-8") as f:
+                claves.add(json.load(f).get("clave"))
+        except (OSError, ValueError):
+            pass
+    return claves
+
+
+def descartar_snapshot(empresa_id, clave: str):
+    """
+    Borra los artefactos escritos para `clave` si ningún periodo la publica (pre-render
+    que falló o cuyo periodo se reabrió mientras se generaba).
+    """
+    dir_empresa = _dir_empresa(empresa_id)
+    if not os.path.isdir(dir_empresa) or clave in _claves_publicadas(dir_empresa):
+        return
+    shutil.rmtree(os.path.join(dir_empresa, clave), ignore_errors=True)
+
+
+def _tamano_dir(ruta: str) -> int:
+    total = 0
+    for raiz, _, archivos in os.walk(ruta):
+        for a in archivos:
+            try:
+                total += os.path.getsize(os.path.join(raiz, a))
+            except OSError:
+                pass
+    return total
+
+
+def recortar_almacen(max_bytes: int = None, conservar: tuple = None):
+    """
+    Descarta snapshots (y su índice) del menos usado al más usado hasta quedar bajo el
+    tope. `conservar` = (empresa_id, clave) que no se toca (el recién publicado).
+    """
+    max_bytes = ARTEFACTOS_MAX_BYTES if max_bytes is None else max_bytes
+    protegido = (_dir_empresa(conservar[0]), conservar[1]) if conservar else None
+    with _lock_recorte:
+        if not os.path.isdir(ARTEFACTOS_DIR):
+            return
+        snapshots = []   # (último uso, tamaño, dir_empresa, clave)
+        for empresa in os.listdir(ARTEFACTOS_DIR):
+            dir_empresa = os.path.join(ARTEFACTOS_DIR, empresa)
+            if not os.path.isdir(dir_empresa):
+                continue
+            for clave in os.listdir(dir_empresa):
+                ruta = os.path.join(dir_empresa, clave)
+                if os.path.isdir(ruta):
+                    snapshots.append((os.path.getmtime(ruta), _tamano_dir(ruta), dir_empresa, clave))
+        total = sum(s[1] for s in snapshots)
+        for _, tamano, dir_empresa, clave in sorted(snapshots):
+            if total <= max_bytes:
+                break
+            if (dir_empresa, clave) == protegido:
+                continue
+            for nombre in os.listdir(dir_empresa):
+                if nombre.endswith(".json"):
+                    ruta_indice = os.path.join(dir_empresa, nombre)
+                    try:
+                        with open(ruta_indice, "r", encoding="utf-8") as f:
+                            apunta = json.load(f).get("clave") == clave
+                        if apunta:
+                            os.remove(ruta_indice)
+                    except (OSError, ValueError):
+                        pass
+            shutil.rmtree(os.path.join(dir_empresa, clave), ignore_errors=True)
+            total -= tamano
+
+
+def clave_publicada(empresa_id, periodo_key):
+    """Clave del snapshot indexado en ESTE disco para el periodo, o None."""
+    try:
+        with open(_ruta_indice(empresa_id, periodo_key), "r", encoding="utf-8") as f:
+            return json.load(f).get("clave")
+    except (OSError, ValueError):
+        return None
+
+
+def leer_artefacto(empresa_id, periodo_key, nombre: str, clave_vigente):
+    """
+    Bytes del artefacto pre-renderizado del periodo, o None si no está disponible.
+    `clave_vigente` es la clave del snapshot tal como está hoy en la BD: si el índice
+    local apunta a otra (o no hay clave vigente), el artefacto no se sirve.
+    """
+    clave = clave_publicada(empresa_id, periodo_key)
+    if not clave or clave != clave_vigente:
+        return None
+    dir_clave = os.path.join(_dir_empresa(empresa_id), clave)
+    try:
+        with open(os.path.join(dir_clave, nombre), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        os.utime(dir_clave)   # último uso, para el recorte LRU
+    except OSError:
+        pass
+    return data
+
+
+def invalidar_periodo(empresa_id, periodo_key):
+    """Borra el índice y los artefactos del periodo (al reabrirlo)."""
+    clave = clave_publicada(empresa_id, periodo_key)
+    try:
+        os.remove(_ruta_indice(empresa_id, periodo_key))
+    except OSError:
+        pass
+    if clave:
+        shutil.rmtree(os.path.join(_dir_empresa(empresa_id), clave), ignore_errors=True)
@@ -0,0 +1,109 @@
+"""
+Caché en memoria de reportes generados (PDF/Excel), direccionada por contenido.
+
+La clave es (hash de los datos de entrada, tipo de reporte, formato, encabezado de
+empresa): mismos datos → mismos bytes, sin importar qué sesión o vista los pida. Vive
+a nivel de proceso, así que la comparten todos los usuarios de la instancia, y se
+acota por tamaño total con desalojo LRU (`CACHE_REPORTES_MAX_MB`, por defecto 64).
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+CACHE_REPORTES_MAX_BYTES = int(float(os.getenv("CACHE_REPORTES_MAX_MB", "64")) * 1024 * 1024)
+
+_entradas = OrderedDict()   # clave → bytes (más reciente al final)
+_bytes_totales = 0
+_aciertos = 0
+_fallos = 0
+_lock = threading.Lock()
+
+
+def _actualizar_hash(h, parte):
+    if parte is None:
+        h.update(b"\x01")
+    elif isinstance(parte, pd.DataFrame):
+        h.update(json.dumps([str(c) for c in parte.columns]).encode("utf-8"))
+        try:
+            h.update(pd.util.hash_pandas_object(parte, index=True).values.tobytes())
+        except TypeError:
+            # Columnas con objetos no hasheables (listas/dicts): se usa su JSON
+            h.update(parte.to_json(orient="split", date_format="iso").encode("utf-8"))
+    elif isinstance(parte, (bytes, bytearray)):
+        h.update(parte)
+    elif isinstance(parte, str):
+        h.update(parte.encode("utf-8"))
+    else:
+        h.update(json.dumps(parte, sort_keys=True, default=str).encode("utf-8"))
+    h.update(b"\x00")
+
+
+def hash_contenido(*partes) -> str:
+    """Hash sha256 de los datos de entrada de un reporte (DataFrames, JSON, dicts, sets)."""
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, (set, frozenset)):
+            parte = sorted(parte)
+        _actualizar_hash(h, parte)
+    return h.hexdigest()
+
+
+def clave_reporte(tipo: str, contenido_hash: str, formato: str = "", encabezado=None) -> str:
+    encab = json.dumps({k: str(v or '') for k, v in (encabezado or {}).items()}, sort_keys=True)
+    return f"{tipo}|{formato}|{contenido_hash}|{hashlib.sha256(encab.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _guardar(clave: str, data: bytes):
+    global _bytes_totales
+    if len(data) > CACHE_REPORTES_MAX_BYTES:
+        return  # no cabe: se sirve sin cachear
+    with _lock:
+        anterior = _entradas.pop(clave, None)
+        if anterior is not None:
+            _bytes_totales -= len(anterior)
+        _entradas[clave] = data
+        _bytes_totales += len(data)
+        while _bytes_totales > CACHE_REPORTES_MAX_BYTES and _entradas:
+            _, desalojado = _entradas.popitem(last=False)
+            _bytes_totales -= len(desalojado)
+
+
+def _leer(clave: str):
+    global _aciertos, _fallos
+    with _lock:
+        data = _entradas.get(clave)
+        if data is None:
+            _fallos += 1
+            return None
+        _entradas.move_to_end(clave)
+        _aciertos += 1
+        return data
+
+
+def obtener_o_generar(tipo: str, contenido_hash: str, generar, formato: str = "", encabezado=None) -> bytes:
+    """
+    Bytes del reporte desde la caché o, si no está, llamando a `generar()` (que retorna
+    un BytesIO o bytes) y guardando el resultado.
+    """
+    clave = clave_reporte(tipo, contenido_hash, formato, encabezado)
+    data = _leer(clave)
+    if data is None:
+        resultado = generar()
+        data = resultado.getvalue() if hasattr(resultado, "getvalue") else bytes(resultado)
+        _guardar(clave, data)
+    return data
+
+
+def estadisticas() -> dict:
+    with _lock:
+        return {
+            "entradas": len(_entradas),
+            "bytes": _bytes_totales,
+            "max_bytes": CACHE_REPORTES_MAX_BYTES,
+            "aciertos": _aciertos,
+            "fallos": _fallos,
+        }
@@ -0,0 +1,120 @@
+"""
+Trazas por etapa del motor de planilla.
+
+`with trazar("planilla", empresa_id=...) as traza:` (o `activar(traza)` para una
+traza ya creada) la deja activa en el hilo actual. Dentro, cualquier función puede
+marcar `with etapa("quinta"):` sin recibir la traza como parámetro (si no hay traza
+activa, `etapa` no hace nada). Cada traza:
+  - acumula llamadas y tiempo por etapa (`resumen()`, para la UI y el historial),
+  - guarda los eventos individuales en formato Chrome trace (`chrome_trace()`), que
+    se abre en chrome://tracing o https://ui.perfetto.dev.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Más allá de este número de eventos solo se acumula el resumen (10k trabajadores ×
+# 3 etapas por fila darían un JSON de varios MB)
+MAX_EVENTOS = 20000
+
+_traza_actual: ContextVar = ContextVar("traza_actual", default=None)
+
+
+class Traza:
+    def __init__(self, nombre: str, **metadatos):
+        self.nombre = nombre
+        self.metadatos = metadatos
+        self._t0 = time.perf_counter()
+        self._fin = None
+        self.eventos = []
+        self.etapas = {}      # etapa → [llamadas, segundos]; conserva el orden de aparición
+
+    def registrar(self, nombre: str, inicio: float, duracion: float, args: dict = None):
+        acumulado = self.etapas.setdefault(nombre, [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += duracion
+        if len(self.eventos) < MAX_EVENTOS:
+            self.eventos.append((nombre, inicio - self._t0, duracion, args))
+
+    @contextmanager
+    def etapa(self, nombre: str, **args):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, inicio, time.perf_counter() - inicio, args or None)
+
+    def cerrar(self):
+        if self._fin is None:
+            self._fin = time.perf_counter()
+
+    @property
+    def total_s(self) -> float:
+        return (self._fin or time.perf_counter()) - self._t0
+
+    def resumen(self) -> list:
+        """[{Etapa, Llamadas, Total ms, Promedio ms, % del total}] en orden de aparición."""
+        total = self.total_s or 1e-9
+        return [
+            {
+                "Etapa": nombre,
+                "Llamadas": n,
+                "Total ms": round(seg * 1000, 1),
+                "Promedio ms": round(seg * 1000 / n, 3),
+                "% del total": round(seg / total * 100, 1),
+            }
+            for nombre, (n, seg) in self.etapas.items()
+        ]
+
+    def chrome_trace(self) -> dict:
+        """Formato Trace Event (eventos completos "X", tiempos en µs)."""
+        pid, tid = os.getpid(), threading.get_ident()
+        eventos = [{
+            "name": self.nombre, "ph": "X", "ts": 0, "dur": round(self.total_s * 1e6, 1),
+            "pid": pid, "tid": tid, "args": {k: str(v) for k, v in self.metadatos.items()},
+        }]
+        for nombre, inicio, duracion, args in self.eventos:
+            evento = {"name": nombre, "ph": "X", "ts": round(inicio * 1e6, 1),
+                      "dur": round(duracion * 1e6, 1), "pid": pid, "tid": tid}
+            if args:
+                evento["args"] = {k: str(v) for k, v in args.items()}
+            eventos.append(evento)
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def chrome_trace_json(self) -> bytes:
+        return json.dumps(self.chrome_trace(), ensure_ascii=False).encode("utf-8")
+
+
+@contextmanager
+def activar(traza: Traza):
+    """Hace de `traza` la traza activa del bloque (mismo hilo/contexto)."""
+    token = _traza_actual.set(traza)
+    try:
+        yield traza
+    finally:
+        _traza_actual.reset(token)
+
+
+@contextmanager
+def trazar(nombre: str, **metadatos):
+    """Crea y activa una traza para el bloque; se cierra al salir."""
+    traza = Traza(nombre, **metadatos)
+    with activar(traza):
+        try:
+            yield traza
+        finally:
+            traza.cerrar()
+
+
+@contextmanager
+def etapa(nombre: str, **args):
+    """Marca una etapa en la traza activa; sin traza activa no mide nada."""
+    traza = _traza_actual.get()
+    if traza is None:
+        yield
+        return
+    with traza.etapa(nombre, **args):
+        yield
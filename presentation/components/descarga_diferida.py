@@ -0,0 +1,23 @@
+import streamlit as st
+
+from infrastructure.services.cache_reportes import obtener_o_generar
+
+
+def boton_descarga_diferida(etiqueta, generar, file_name, mime, key, tipo, contenido_hash,
+                            formato="", encabezado=None, **kwargs_descarga):
+    """
+    Botón "Generar" → botón de descarga. El reporte solo se renderiza cuando el usuario
+    lo pide, y pasa por la caché de reportes (mismos datos → mismos bytes). Una vez
+    pedido, el botón de descarga se mantiene visible en los siguientes reruns mientras
+    los datos no cambien.
+    """
+    flag = f"_descarga_pedida_{key}_{contenido_hash[:12]}"
+    kwargs_boton = {k: v for k, v in kwargs_descarga.items() if k == "use_container_width"}
+    if not st.session_state.get(flag):
+        if not st.button(etiqueta, key=f"gen_{key}", **kwargs_boton):
+            return
+        st.session_state[flag] = True
+
+    with st.spinner("Generando reporte..."):
+        data = obtener_o_generar(tipo, contenido_hash, generar, formato=formato, encabezado=encabezado)
+    st.download_button(etiqueta, data=data, file_name=file_name, mime=mime, key=key, **kwargs_descarga)
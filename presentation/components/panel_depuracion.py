@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from infrastructure.database.connection import SessionLocal, metricas_pool
+from infrastructure.database.instrumentacion import UMBRAL_REPETICION
+
+
+def _render_sql(registro, vista):
+    import pandas as pd  # diferido: solo se carga cuando un admin ve el panel
+
+    r = registro.resumen()
+    st.markdown(f"**SQL de este rerun** · {vista or 'Selector de Empresa'}")
+    c1, c2 = st.columns(2)
+    c1.metric("Sentencias", r['sentencias'])
+    c2.metric("Tiempo BD", f"{r['tiempo_total_s'] * 1000:.0f} ms")
+
+    if r['repetidas']:
+        st.warning(f"⚠️ {len(r['repetidas'])} patrón(es) repetidos ≥ {UMBRAL_REPETICION} veces (posible N+1)")
+        st.dataframe(
+            pd.DataFrame(
+                [(n, round(t * 1000, 1), p[:300]) for p, n, t in r['repetidas']],
+                columns=["Veces", "ms", "Sentencia"],
+            ),
+            use_container_width=True, hide_index=True,
+        )
+    if r['lentas']:
+        st.caption("Más lentas")
+        st.dataframe(
+            pd.DataFrame([(round(s * 1000, 1), sql[:300]) for s, sql in r['lentas']], columns=["ms", "Sentencia"]),
+            use_container_width=True, hide_index=True,
+        )
+
+
+def _render_pool():
+    m = metricas_pool()
+    st.markdown(f"**Pool de conexiones** · modo `{m['modo']}`")
+    c1, c2 = st.columns(2)
+    c1.metric("En uso", m['en_uso'] if m['en_uso'] is not None else "—")
+    c2.metric("Overflow", max(m['overflow'] or 0, 0))
+    c1.metric("Checkouts", m['checkouts'])
+    c2.metric("Conexiones nuevas", m['conexiones_nuevas'])
+    c1.metric("Esperas", m['esperas'])
+    c2.metric("Timeouts", m['timeouts'])
+    if m['esperas']:
+        st.caption(
+            f"Espera total {m['espera_total_s']:.2f} s · máxima {m['espera_max_s']:.2f} s. "
+            "Si crece, subir DB_POOL_SIZE / DB_MAX_OVERFLOW."
+        )
+    if m['tamano'] is not None:
+        st.caption(f"pool_size={m['tamano']} · max_overflow={m['max_overflow']}")
+
+
+def _render_empresas_lentas():
+    if not st.checkbox("Empresas con cálculo más lento (30 días)", key="diag_empresas_lentas"):
+        return
+    import pandas as pd
+    from infrastructure.repositories.repo_planilla import empresas_calculo_lento
+
+    db = SessionLocal()
+    try:
+        filas = empresas_calculo_lento(db, datetime.now() - timedelta(days=30))
+    finally:
+        db.close()
+    if not filas:
+        st.caption("Sin ejecuciones registradas en el periodo.")
+        return
+    st.dataframe(
+        pd.DataFrame(filas, columns=["Empresa", "Ejecuciones", "Prom. ms", "Máx. ms", "Trab. prom."]),
+        use_container_width=True, hide_index=True,
+    )
+
+
+def render_panel_depuracion(registro_sql=None, vista=None):
+    """Expander de diagnóstico en el sidebar, solo para el rol admin."""
+    if st.session_state.get('usuario_rol') != 'admin':
+        return
+    with st.sidebar.expander("🛠️ Diagnóstico", expanded=False):
+        if registro_sql is not None:
+            _render_sql(registro_sql, vista)
+            st.markdown("---")
+        _render_pool()
+        st.markdown("---")
+        _render_empresas_lentas()
@@ -42,6 +42,8 @@ def render_sidebar():
         # Si no hay empresa activa, mostramos Selector y Gestión de Usuarios si aplica
         if not empresa_id:
             opciones_inicio = ["Selector de Empresa"]
+            if usuario_rol != 'asistente':
+                opciones_inicio.append("Dashboard Holding")
             if usuario_rol == 'admin':
                 opciones_inicio.append("Gestión de Usuarios")
             
@@ -84,6 +86,7 @@ def render_sidebar():
         else:
             opciones_base = [
                 "Dashboard Principal",
+                "Dashboard Holding",
                 "Parámetros Legales",
                 "Configuración Contable",
                 "Maestro de Personal",
@@ -10,11 +10,13 @@ Solo aplica a periodos a partir de 07-2026 (no afecta meses anteriores ya proces
 from datetime import datetime
 import streamlit as st
 
+from core.domain.periodos import periodo_ordenable
 from infrastructure.database.connection import SessionLocal
 from infrastructure.database.models import PlanillaMensual
+from infrastructure.repositories.repo_planilla import listar_planillas
 from presentation.views.emision_boletas import (
     _cargar_planilla_periodo,
-    generar_pdf_boletas_masivas,
+    _pdf_boleta,
     enviar_boletas_periodo,
     _periodo_legible,
 )
@@ -23,24 +25,15 @@ from presentation.views.emision_boletas import (
 UMBRAL_PERIODO = 202607  # 07-2026
 
 
-def _periodo_ordenable(periodo_key: str) -> int:
-    """'07-2026' -> 202607, para poder comparar periodos cronológicamente."""
-    try:
-        mes, anio = periodo_key.split("-")
-        return int(anio) * 100 + int(mes)
-    except Exception:
-        return 0
-
-
 def _periodos_pendientes(db, empresa_id):
     """Periodos CERRADOS, no autorizados, desde 07-2026 en adelante — el más antiguo primero."""
-    planillas = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id, estado='CERRADA').all()
+    planillas = listar_planillas(db, empresa_id, estado='CERRADA')
     pendientes = [
         p for p in planillas
         if not getattr(p, 'boletas_autorizado', False)
-        and _periodo_ordenable(p.periodo_key) >= UMBRAL_PERIODO
+        and periodo_ordenable(p.periodo_key) >= UMBRAL_PERIODO
     ]
-    pendientes.sort(key=lambda p: _periodo_ordenable(p.periodo_key))
+    pendientes.sort(key=lambda p: periodo_ordenable(p.periodo_key))
     return pendientes
 
 
@@ -116,6 +109,7 @@ def render(periodo_key):
         'ruc': st.session_state.get('empresa_activa_ruc', ''),
         'domicilio': st.session_state.get('empresa_activa_domicilio', ''),
         'representante': st.session_state.get('empresa_activa_representante', ''),
+        'regimen':       st.session_state.get('empresa_activa_regimen', '') or '',
     }
 
     df_sin_totales = df_resultados[df_resultados['Apellidos y Nombres'] != 'TOTALES']
@@ -142,9 +136,9 @@ def render(periodo_key):
         dni_sel = trabajador_sel.split(" - ")[0]
         nombre_sel = trabajador_sel.split(" - ", 1)[1]
         if st.button(f"📄 Generar boleta de {nombre_sel}", key="btn_ver_boleta_gate"):
-            df_individual = df_sin_totales[df_sin_totales['DNI'] == dni_sel]
             with st.spinner("Generando boleta..."):
-                pdf_buffer = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_individual, df_trab, df_var, auditoria_data)
+                pdf_buffer = _pdf_boleta(empresa_id, empresa_info, periodo_key, dni_sel,
+                                         df_sin_totales, df_trab, df_var, auditoria_data)
                 st.download_button(
                     label=f"📥 Descargar BOLETA_{dni_sel}.pdf",
                     data=pdf_buffer, file_name=f"BOLETA_{dni_sel}_{periodo_key}.pdf",
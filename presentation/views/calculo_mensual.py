@@ -8,7 +8,7 @@ from datetime import datetime
 
 
 # Base de Datos Neon
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from infrastructure.database.connection import SessionLocal
 from infrastructure.database.models import Trabajador, Concepto, ParametroLegal, VariablesMes, PlanillaMensual, Prestamo, CuotaPrestamo, Empresa as EmpresaModel
 from core.use_cases.calculo_honorarios import calcular_recibo_honorarios
@@ -18,12 +18,20 @@ from core.use_cases.generador_reportes_calculo import (
     generar_pdf_combinado, generar_pdf_tesoreria, generar_pdf_personalizado,
     _periodo_legible_calc,
 )
+from core.use_cases.prerender_cierre import (
+    programar_prerender, leer_artefacto_vigente, ARTEFACTO_SABANA_XLSX, ARTEFACTO_SABANA_PDF,
+)
+from infrastructure.services.almacen_artefactos import invalidar_periodo
+from infrastructure.services.cache_reportes import hash_contenido
+from presentation.components.descarga_diferida import boton_descarga_diferida
+from infrastructure.services.trazas import Traza, activar, etapa
 
 
 # ─── HELPERS DE BASE DE DATOS (ver infrastructure/repositories/repo_planilla.py) ─
 from infrastructure.repositories.repo_planilla import (
     cargar_parametros, cargar_trabajadores_df, cargar_variables_df,
-    cargar_conceptos_df, guardar_planilla, cargar_planilla_guardada,
+    cargar_conceptos_df, guardar_planilla, cargar_planilla_guardada, obtener_planilla,
+    actualizar_resumen_planilla, registrar_tiempo_calculo,
 )
 
 MESES = ["01 - Enero", "02 - Febrero", "03 - Marzo", "04 - Abril", "05 - Mayo", "06 - Junio", 
@@ -36,54 +44,59 @@ MESES = ["01 - Enero", "02 - Febrero", "03 - Marzo", "04 - Abril", "05 - Mayo",
 
 def _cargar_contexto_calculo(empresa_id, periodo_key, mes_idx, anio_seleccionado) -> dict:
     """Carga el contexto auxiliar (histórico 5ta, cuotas, factor_g, notas) para el motor de planilla."""
-    # Cargar historial de quinta categoría de periodos anteriores del mismo año
+    # Cargar historial de quinta categoría de periodos anteriores del mismo año (una consulta)
     historico_quinta: dict = {}
     try:
         db_hq = SessionLocal()
-        for mes_ant in range(1, mes_idx):
-            periodo_ant = f"{mes_ant:02d}-{anio_seleccionado}"
-            plan_ant = db_hq.query(PlanillaMensual).filter_by(
-                empresa_id=empresa_id, periodo_key=periodo_ant
-            ).first()
-            if plan_ant:
-                try:
-                    aud_ant = json.loads(plan_ant.auditoria_json or '{}')
-                    for dni_ant, data_ant in aud_ant.items():
-                        q_ant = data_ant.get('quinta', {})
-                        b = float(q_ant.get('base_mes', 0.0))
-                        r = float(q_ant.get('retencion', 0.0))
-                        if b > 0 or r > 0:
-                            if dni_ant not in historico_quinta:
-                                historico_quinta[dni_ant] = {'rem_previa': 0.0, 'ret_previa': 0.0}
-                            historico_quinta[dni_ant]['rem_previa'] += b
-                            historico_quinta[dni_ant]['ret_previa'] += r
-                except Exception:
-                    pass
+        periodos_ant = [f"{mes_ant:02d}-{anio_seleccionado}" for mes_ant in range(1, mes_idx)]
+        auditorias_ant = db_hq.execute(
+            select(PlanillaMensual.auditoria_json).where(
+                PlanillaMensual.empresa_id == empresa_id,
+                PlanillaMensual.periodo_key.in_(periodos_ant),
+            )
+        ).scalars().all() if periodos_ant else []
+        for auditoria_json in auditorias_ant:
+            try:
+                aud_ant = json.loads(auditoria_json or '{}')
+                for dni_ant, data_ant in aud_ant.items():
+                    q_ant = data_ant.get('quinta', {})
+                    b = float(q_ant.get('base_mes', 0.0))
+                    r = float(q_ant.get('retencion', 0.0))
+                    if b > 0 or r > 0:
+                        if dni_ant not in historico_quinta:
+                            historico_quinta[dni_ant] = {'rem_previa': 0.0, 'ret_previa': 0.0}
+                        historico_quinta[dni_ant]['rem_previa'] += b
+                        historico_quinta[dni_ant]['ret_previa'] += r
+            except Exception:
+                pass
         db_hq.close()
     except Exception:
         pass
 
-    # Precargar cuotas de préstamos pendientes del periodo (una sola consulta)
+    # Precargar cuotas de préstamos pendientes del periodo (una sola consulta, con el
+    # préstamo y el DNI en la misma fila)
     cuotas_del_mes: dict = {}
     try:
         db_cuotas = SessionLocal()
-        _cuotas = (
-            db_cuotas.query(CuotaPrestamo)
-            .join(Prestamo)
-            .filter(
+        _cuotas = db_cuotas.execute(
+            select(
+                Trabajador.num_doc, CuotaPrestamo.id, CuotaPrestamo.numero_cuota, CuotaPrestamo.monto,
+                Prestamo.numero_cuotas, Prestamo.concepto,
+            )
+            .join(Prestamo, Prestamo.id == CuotaPrestamo.prestamo_id)
+            .join(Trabajador, Trabajador.id == Prestamo.trabajador_id)
+            .where(
                 Prestamo.empresa_id == empresa_id,
                 CuotaPrestamo.periodo_key == periodo_key,
                 CuotaPrestamo.estado == 'PENDIENTE',
             )
-            .all()
-        )
+        ).all()
         for _c in _cuotas:
-            _dni_c = _c.prestamo.trabajador.num_doc
-            cuotas_del_mes.setdefault(_dni_c, []).append({
+            cuotas_del_mes.setdefault(_c.num_doc, []).append({
                 'id':            _c.id,
                 'numero_cuota':  _c.numero_cuota,
-                'numero_cuotas': _c.prestamo.numero_cuotas,
-                'concepto':      _c.prestamo.concepto,
+                'numero_cuotas': _c.numero_cuotas,
+                'concepto':      _c.concepto,
                 'monto':         float(_c.monto),
             })
         db_cuotas.close()
@@ -108,9 +121,13 @@ def _cargar_contexto_calculo(empresa_id, periodo_key, mes_idx, anio_seleccionado
     notas_gestion_map = {}
     try:
         db_n = SessionLocal()
-        _v_notas = db_n.query(VariablesMes).filter_by(empresa_id=empresa_id, periodo_key=periodo_key).all()
-        for _vn in _v_notas:
-            notas_gestion_map[_vn.trabajador.num_doc] = getattr(_vn, 'notas_gestion', '') or ''
+        _v_notas = db_n.execute(
+            select(Trabajador.num_doc, VariablesMes.notas_gestion)
+            .join(Trabajador, Trabajador.id == VariablesMes.trabajador_id)
+            .where(VariablesMes.empresa_id == empresa_id, VariablesMes.periodo_key == periodo_key)
+        ).all()
+        for _num_doc, _notas in _v_notas:
+            notas_gestion_map[_num_doc] = _notas or ''
         db_n.close()
     except: pass
     return {
@@ -552,28 +569,31 @@ def _calcular_fila_trabajador(row, p, horas_jornada, mes_calc, anio_calc, mes_id
     sistema = str(row.get('Sistema Pensión', 'NO AFECTO')).upper()
 
     # ── BASES Y HABERES ──────────────────────────────────────────────────────
-    h = _calcular_haberes(
-        row, p, horas_jornada, mes_calc, anio_calc,
-        dni_trabajador, cuotas_del_mes, notas_gestion_map, conceptos_empresa,
-    )
+    with etapa("haberes"):
+        h = _calcular_haberes(
+            row, p, horas_jornada, mes_calc, anio_calc,
+            dni_trabajador, cuotas_del_mes, notas_gestion_map, conceptos_empresa,
+        )
     if h is None:
         return None
 
     # ── PENSIONES ───────────────────────────────────────────────────────────
-    pen = _calcular_pension(
-        sistema, h['base_afp_onp'], row, p, mes_calc, anio_calc,
-        h['desglose_descuentos'], h['obs_trab'],
-    )
+    with etapa("pension"):
+        pen = _calcular_pension(
+            sistema, h['base_afp_onp'], row, p, mes_calc, anio_calc,
+            h['desglose_descuentos'], h['obs_trab'],
+        )
 
     # ── 5TA CATEGORÍA ────────────────────────────────────────────────────────
-    qta = _calcular_quinta(
-        h['base_quinta_mes'], mes_idx, anio_calc, mes_calc, p,
-        historico_quinta, dni_trabajador,
-        h['sueldo_base_nominal'], h['sueldo_computable'], h['conceptos_recuperados_5ta'],
-        h['total_ausencias'], h['ingreso_este_mes'], factor_g,
-        h['monto_ausencias_rem'],
-        h['monto_no_recurrente_5ta'],
-    )
+    with etapa("quinta"):
+        qta = _calcular_quinta(
+            h['base_quinta_mes'], mes_idx, anio_calc, mes_calc, p,
+            historico_quinta, dni_trabajador,
+            h['sueldo_base_nominal'], h['sueldo_computable'], h['conceptos_recuperados_5ta'],
+            h['total_ausencias'], h['ingreso_este_mes'], factor_g,
+            h['monto_ausencias_rem'],
+            h['monto_no_recurrente_5ta'],
+        )
 
     # Desempaquetar variables mutables (se modifican en ajustes de auditoría)
     desglose_descuentos = h['desglose_descuentos']
@@ -694,12 +714,50 @@ def _calcular_fila_trabajador(row, p, horas_jornada, mes_calc, anio_calc, mes_id
     }
     return fila, auditoria
 
+def _guardar_traza(traza, empresa_id, periodo_key, n_trabajadores):
+    """Cierra la traza del motor, la deja en sesión para la UI y la suma al historial de la empresa."""
+    traza.cerrar()
+    st.session_state[f'traza_planilla_{periodo_key}'] = {
+        "total_ms": round(traza.total_s * 1000, 1),
+        "resumen": traza.resumen(),
+        "chrome_trace": traza.chrome_trace_json(),
+    }
+    db_t = SessionLocal()
+    try:
+        registrar_tiempo_calculo(
+            db_t, empresa_id, periodo_key, st.session_state.get('usuario_logueado'), n_trabajadores, traza,
+        )
+        db_t.commit()
+    except Exception:
+        db_t.rollback()  # el historial de tiempos nunca debe impedir el cálculo
+    finally:
+        db_t.close()
+
+
+def _render_tiempos_calculo(periodo_key):
+    datos = st.session_state.get(f'traza_planilla_{periodo_key}')
+    if not datos:
+        return
+    with st.expander(f"⏱️ Tiempos de la última ejecución del motor ({datos['total_ms'] / 1000:.2f} s)"):
+        st.dataframe(pd.DataFrame(datos["resumen"]), use_container_width=True, hide_index=True)
+        st.download_button(
+            "Descargar traza (Chrome trace .json)", data=datos["chrome_trace"],
+            file_name=f"TRAZA_PLANILLA_{periodo_key}.json", mime="application/json", key="dl_traza_planilla",
+        )
+        st.caption("Abrir en chrome://tracing o ui.perfetto.dev para ver la línea de tiempo.")
+
+
 def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_seleccionado, periodo_key, mes_idx):
+    # Traza por etapa: la carga corre en cada rerun, pero solo se conserva si en este
+    # rerun se ejecuta el motor (ver _guardar_traza)
+    traza = Traza("Motor de planilla", empresa_id=empresa_id, periodo=periodo_key)
+
     # ─── LEER DATOS DESDE NEON ────────────────────────────────────────────────
     db = SessionLocal()
     try:
         # 1. Parámetros Legales
-        p = cargar_parametros(db, empresa_id, periodo_key)
+        with traza.etapa("cargar_parametros"):
+            p = cargar_parametros(db, empresa_id, periodo_key)
         if not p:
             st.error(f"🛑 ALTO: No se han configurado los Parámetros Legales para el periodo **{periodo_key}**.")
             st.info("Vaya al módulo 'Parámetros Legales' y configure las tasas para este periodo.")
@@ -710,36 +768,40 @@ def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_sele
         horas_jornada = float(getattr(empresa_obj, 'horas_jornada_diaria', None) or 8.0)
 
         # 2. Trabajadores activos (+ cesados en su último mes)
-        df_trab = cargar_trabajadores_df(db, empresa_id, mes_calc=mes_idx, anio_calc=anio_seleccionado)
+        with traza.etapa("cargar_trabajadores_df"):
+            df_trab = cargar_trabajadores_df(db, empresa_id, mes_calc=mes_idx, anio_calc=anio_seleccionado)
         if df_trab.empty:
             st.warning("⚠️ No hay trabajadores activos registrados en el Maestro de Personal.")
             return
 
         # 3. Conceptos de la empresa
-        conceptos_list = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
-        conceptos_empresa = cargar_conceptos_df(db, empresa_id)
+        with traza.etapa("cargar_conceptos"):
+            conceptos_list = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
+            conceptos_empresa = cargar_conceptos_df(db, empresa_id, conceptos_list)
 
         # 4. Variables del periodo
-        df_var = cargar_variables_df(db, empresa_id, periodo_key, conceptos_list)
+        with traza.etapa("cargar_variables_df"):
+            df_var = cargar_variables_df(db, empresa_id, periodo_key, conceptos_list)
 
         # Left join: incluye cesados del mes aunque no tengan registro de Asistencias
-        df_planilla = pd.merge(df_trab, df_var, on="Num. Doc.", how="left")
-        # Garantizar columnas mínimas de variables (ausentes cuando df_var está vacío
-        # o el trabajador no tiene asistencias registradas en este periodo)
-        _cols_default_cero = ["Días Faltados", "Min. Tardanza", "Hrs Extras 25%", "Hrs Extras 35%"]
-        _cols_default_json = ["conceptos_json", "suspensiones_json"]
-        for _c in _cols_default_cero:
-            if _c not in df_planilla.columns:
-                df_planilla[_c] = 0
-        for _c in _cols_default_json:
-            if _c not in df_planilla.columns:
-                df_planilla[_c] = "{}"
-        # Rellenar NaN para trabajadores sin registro de asistencias (cesados recientes)
-        for _c in df_planilla.columns:
-            if _c in set(_cols_default_json):
-                df_planilla[_c] = df_planilla[_c].fillna("{}")
-            elif df_planilla[_c].dtype in (float, "float64", int, "int64"):
-                df_planilla[_c] = df_planilla[_c].fillna(0)
+        with traza.etapa("merge"):
+            df_planilla = pd.merge(df_trab, df_var, on="Num. Doc.", how="left")
+            # Garantizar columnas mínimas de variables (ausentes cuando df_var está vacío
+            # o el trabajador no tiene asistencias registradas en este periodo)
+            _cols_default_cero = ["Días Faltados", "Min. Tardanza", "Hrs Extras 25%", "Hrs Extras 35%"]
+            _cols_default_json = ["conceptos_json", "suspensiones_json"]
+            for _c in _cols_default_cero:
+                if _c not in df_planilla.columns:
+                    df_planilla[_c] = 0
+            for _c in _cols_default_json:
+                if _c not in df_planilla.columns:
+                    df_planilla[_c] = "{}"
+            # Rellenar NaN para trabajadores sin registro de asistencias (cesados recientes)
+            for _c in df_planilla.columns:
+                if _c in set(_cols_default_json):
+                    df_planilla[_c] = df_planilla[_c].fillna("{}")
+                elif df_planilla[_c].dtype in (float, "float64", int, "int64"):
+                    df_planilla[_c] = df_planilla[_c].fillna(0)
 
         # Sin trabajadores activos ni cesados en el periodo → no hay planilla
         if df_planilla.empty:
@@ -822,31 +884,34 @@ def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_sele
 
             mes_calc  = int(mes_seleccionado[:2])
             anio_calc = int(anio_seleccionado)
-            contexto  = _cargar_contexto_calculo(empresa_id, periodo_key, mes_idx, anio_seleccionado)
+            with traza.etapa("contexto_calculo"):
+                contexto = _cargar_contexto_calculo(empresa_id, periodo_key, mes_idx, anio_seleccionado)
             seq_num   = 0
-            for index, row in df_planilla.iterrows():
-                resultado = _calcular_fila_trabajador(
-                    row, p, horas_jornada, mes_calc, anio_calc, mes_idx, periodo_key,
-                    contexto['historico_quinta'], contexto['cuotas_del_mes'],
-                    contexto['notas_gestion_map'], conceptos_empresa, contexto['factor_g'],
-                )
-                if resultado is not None:
-                    seq_num += 1
-                    fila, auditoria_row = resultado
-                    fila['N°'] = seq_num
-                    resultados.append(fila)
-                    auditoria_data[fila['DNI']] = auditoria_row
-
-            df_resultados = pd.DataFrame(resultados).fillna(0.0)
-            
+            # haberes / pension / quinta se marcan dentro de _calcular_fila_trabajador
+            with activar(traza), traza.etapa("motor_por_trabajador", filas=len(df_planilla)):
+                for index, row in df_planilla.iterrows():
+                    resultado = _calcular_fila_trabajador(
+                        row, p, horas_jornada, mes_calc, anio_calc, mes_idx, periodo_key,
+                        contexto['historico_quinta'], contexto['cuotas_del_mes'],
+                        contexto['notas_gestion_map'], conceptos_empresa, contexto['factor_g'],
+                    )
+                    if resultado is not None:
+                        seq_num += 1
+                        fila, auditoria_row = resultado
+                        fila['N°'] = seq_num
+                        resultados.append(fila)
+                        auditoria_data[fila['DNI']] = auditoria_row
+
             # --- FILA DE TOTALES DINÁMICA ---
-            cols_texto = {"N°", "DNI", "Apellidos y Nombres", "Sist. Pensión", "Seg. Social", "Banco", "N° Cuenta", "CCI", "Observaciones"}
-            totales = {"N°": "", "DNI": "", "Apellidos y Nombres": "TOTALES", "Sist. Pensión": "", "Seg. Social": "", "Banco": "", "N° Cuenta": "", "CCI": "", "Observaciones": ""}
-            for col in df_resultados.columns:
-                if col not in cols_texto:
-                    totales[col] = df_resultados[col].sum()
-                
-            df_resultados = pd.concat([df_resultados, pd.DataFrame([totales])], ignore_index=True)
+            with traza.etapa("totales"):
+                df_resultados = pd.DataFrame(resultados).fillna(0.0)
+                cols_texto = {"N°", "DNI", "Apellidos y Nombres", "Sist. Pensión", "Seg. Social", "Banco", "N° Cuenta", "CCI", "Observaciones"}
+                totales = {"N°": "", "DNI": "", "Apellidos y Nombres": "TOTALES", "Sist. Pensión": "", "Seg. Social": "", "Banco": "", "N° Cuenta": "", "CCI": "", "Observaciones": ""}
+                for col in df_resultados.columns:
+                    if col not in cols_texto:
+                        totales[col] = df_resultados[col].sum()
+
+                df_resultados = pd.concat([df_resultados, pd.DataFrame([totales])], ignore_index=True)
             st.session_state['res_planilla'] = df_resultados
             st.session_state['auditoria_data'] = auditoria_data
 
@@ -870,15 +935,18 @@ def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_sele
                     df_loc_to_save = pd.DataFrame()
                 elif df_loc_to_save is None:
                     # Recuperar snapshot existente para no perderlo si el usuario solo calculó la 5ta categoría
-                    p_exist = db2.query(PlanillaMensual).filter_by(empresa_id=empresa_id, periodo_key=periodo_key).first()
+                    p_exist = obtener_planilla(db2, empresa_id, periodo_key)
                     if p_exist and p_exist.honorarios_json and p_exist.honorarios_json != '[]':
                         df_loc_to_save = pd.read_json(io.StringIO(p_exist.honorarios_json), orient='records')
 
-                guardar_planilla(db2, empresa_id, periodo_key, df_resultados, auditoria_data, df_locadores=df_loc_to_save)
+                with traza.etapa("guardar_planilla"):
+                    guardar_planilla(db2, empresa_id, periodo_key, df_resultados, auditoria_data, df_locadores=df_loc_to_save)
                 db2.close()
             except Exception as e:
                 st.warning(f"Planilla calculada pero no se pudo guardar en la nube: {e}")
 
+            _guardar_traza(traza, empresa_id, periodo_key, n_trabajadores=len(resultados))
+
     # --- RECUPERACIÓN DE SNAPSHOT (Inmutabilidad para Periodos Cerrados) ---
     # Si es un periodo CERRADO, forzamos la carga desde la base de datos y bloqueamos recálculos
     if es_cerrada:
@@ -886,7 +954,7 @@ def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_sele
             db3 = SessionLocal()
             df_rec, aud_rec = cargar_planilla_guardada(db3, empresa_id, periodo_key)
             # Cargar también snapshot de honorarios
-            p_snap = db3.query(PlanillaMensual).filter_by(empresa_id=empresa_id, periodo_key=periodo_key).first()
+            p_snap = obtener_planilla(db3, empresa_id, periodo_key)
             db3.close()
             
             if df_rec is not None and not df_rec.empty:
@@ -921,6 +989,7 @@ def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_sele
 
         if not es_cerrada:
             st.success("✅ Planilla generada con éxito.")
+            _render_tiempos_calculo(periodo_key)
 
         st.markdown("### 📊 Matriz de Nómina")
         st.dataframe(df_resultados.iloc[:-1], use_container_width=True, hide_index=True)
@@ -929,16 +998,41 @@ def _render_planilla_tab(empresa_id, empresa_nombre, mes_seleccionado, anio_sele
         st.markdown("#### 📥 Exportación Corporativa (Planilla)")
         empresa_ruc_s = st.session_state.get('empresa_activa_ruc', '')
         empresa_reg_s = st.session_state.get('empresa_activa_regimen', '')
+        _encab_s = {
+            'nombre':        empresa_nombre,
+            'ruc':           empresa_ruc_s,
+            'domicilio':     st.session_state.get('empresa_activa_domicilio', ''),
+            'representante': st.session_state.get('empresa_activa_representante', ''),
+            'regimen':       st.session_state.get('empresa_activa_regimen', '') or '',
+        }
+        _hash_s = hash_contenido(df_resultados, periodo_key)
+
+        def _sabana_xl():
+            # Periodo cerrado: sábana pre-renderizada al cierre (si ya está lista)
+            guardado = leer_artefacto_vigente(empresa_id, periodo_key, ARTEFACTO_SABANA_XLSX, _encab_s) if es_cerrada else None
+            return guardado or generar_excel_sabana(df_resultados, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_s)
+
+        def _sabana_pdf():
+            guardado = leer_artefacto_vigente(empresa_id, periodo_key, ARTEFACTO_SABANA_PDF, _encab_s) if es_cerrada else None
+            return guardado or generar_pdf_sabana(df_resultados, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_s, empresa_regimen=empresa_reg_s)
+
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
             try:
-                excel_file = generar_excel_sabana(df_resultados, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_s)
-                st.download_button("📊 Descargar Sábana (.xlsx)", data=excel_file, file_name=f"PLANILLA_{periodo_key}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", use_container_width=True, key="dl_plan_xl")
+                boton_descarga_diferida(
+                    "📊 Descargar Sábana (.xlsx)", _sabana_xl, f"PLANILLA_{periodo_key}.xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="dl_plan_xl",
+                    tipo="sabana_xlsx", contenido_hash=_hash_s, encabezado=_encab_s, use_container_width=True,
+                )
             except Exception: pass
         with col_btn2:
             try:
-                pdf_buffer = generar_pdf_sabana(df_resultados, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_s, empresa_regimen=empresa_reg_s)
-                st.download_button("📄 Descargar Sábana y Resumen (PDF)", data=pdf_buffer, file_name=f"SABANA_{periodo_key}.pdf", mime="application/pdf", use_container_width=True, key="dl_plan_pdf")
+                boton_descarga_diferida(
+                    "📄 Descargar Sábana y Resumen (PDF)", _sabana_pdf, f"SABANA_{periodo_key}.pdf",
+                    "application/pdf", key="dl_plan_pdf",
+                    tipo="sabana_pdf", contenido_hash=_hash_s, formato=empresa_reg_s or '', encabezado=_encab_s,
+                    use_container_width=True,
+                )
             except Exception: pass
 
 
@@ -1006,7 +1100,7 @@ def _render_honorarios_tab(empresa_id, empresa_nombre, periodo_key):
         vars_por_doc: dict = {}
         for v in variables_mes:
             dni = v.trabajador.num_doc
-            conceptos_data = json.loads(v.conceptos_json or '{}')
+            conceptos_data = v.conceptos_json or {}
             vars_por_doc[dni] = {
                 'dias_no_prestados': getattr(v, 'dias_descuento_locador', 0) or 0,
                 'otros_pagos':       float(conceptos_data.get('_otros_pagos_loc', 0.0) or 0.0),
@@ -1129,13 +1223,15 @@ def _render_honorarios_tab(empresa_id, empresa_nombre, periodo_key):
             if _plan_hon:
                 _plan_hon.honorarios_json = _hon_json_str
             else:
-                db_hon.add(PlanillaMensual(
+                _plan_hon = PlanillaMensual(
                     empresa_id=empresa_id,
                     periodo_key=periodo_key,
                     resultado_json='[]',
                     auditoria_json='{}',
                     honorarios_json=_hon_json_str,
-                ))
+                )
+                db_hon.add(_plan_hon)
+            actualizar_resumen_planilla(db_hon, _plan_hon, df_locadores=_df_hon_save)
             db_hon.commit()
             db_hon.close()
         except Exception as _e_hon_save:
@@ -1157,22 +1253,23 @@ def _render_honorarios_tab(empresa_id, empresa_nombre, periodo_key):
         col_h1, col_h2 = st.columns(2)
         empresa_ruc_h = st.session_state.get('empresa_activa_ruc', '')
         empresa_reg_h = st.session_state.get('empresa_activa_regimen', '')
+        _encab_h = {'nombre': empresa_nombre, 'ruc': empresa_ruc_h}
+        _hash_h = hash_contenido(df_loc, periodo_key)
         with col_h1:
-            buf_xls = generar_excel_honorarios(df_loc, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_h)
-            st.download_button(
+            boton_descarga_diferida(
                 "📊 Descargar Valorización (.xlsx)",
-                data=buf_xls,
-                file_name=f"HONORARIOS_{periodo_key}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True,
+                lambda: generar_excel_honorarios(df_loc, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_h),
+                f"HONORARIOS_{periodo_key}.xlsx",
+                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="dl_hon_xl",
+                tipo="honorarios_xlsx", contenido_hash=_hash_h, encabezado=_encab_h, use_container_width=True,
             )
         with col_h2:
-            pdf_hon = generar_pdf_honorarios(df_loc, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_h, empresa_regimen=empresa_reg_h)
-            st.download_button(
+            boton_descarga_diferida(
                 "📄 Descargar Valorización (PDF)",
-                data=pdf_hon,
-                file_name=f"HONORARIOS_{periodo_key}.pdf",
-                mime="application/pdf",
+                lambda: generar_pdf_honorarios(df_loc, empresa_nombre, periodo_key, empresa_ruc=empresa_ruc_h, empresa_regimen=empresa_reg_h),
+                f"HONORARIOS_{periodo_key}.pdf",
+                "application/pdf", key="dl_hon_pdf",
+                tipo="honorarios_pdf", contenido_hash=_hash_h, formato=empresa_reg_h or '', encabezado=_encab_h,
                 use_container_width=True,
             )
     else:
@@ -1193,7 +1290,7 @@ def _render_seccion_tesoreria(empresa_id, empresa_nombre, periodo_key):
     if df_loc_glob.empty:
         try:
             _db_s = SessionLocal()
-            _p_s = _db_s.query(PlanillaMensual).filter_by(empresa_id=empresa_id, periodo_key=periodo_key).first()
+            _p_s = obtener_planilla(_db_s, empresa_id, periodo_key)
             if _p_s and _p_s.honorarios_json and _p_s.honorarios_json != '[]':
                 df_loc_glob = pd.read_json(io.StringIO(_p_s.honorarios_json), orient='records')
                 st.session_state[f'res_honorarios_{periodo_key}'] = df_loc_glob
@@ -1250,24 +1347,24 @@ def _render_seccion_tesoreria(empresa_id, empresa_nombre, periodo_key):
                         ).all()
                     }
                     _db_norem.close()
-                    buf_teso_f = generar_pdf_tesoreria(
-                        df_planilla=df_plan_glob if not df_plan_glob.empty else None,
-                        df_loc=df_loc_glob if not df_loc_glob.empty else None,
-                        empresa_nombre=empresa_nombre,
-                        periodo_key=periodo_key,
-                        auditoria_data=aud_glob,
-                        empresa_ruc=st.session_state.get('empresa_activa_ruc', ''),
-                        formato=fmt_teso_glob,
-                        conceptos_no_remunerativos=_conceptos_norem_glob,
-                    )
-                    st.download_button(
+                    _empresa_ruc_t = st.session_state.get('empresa_activa_ruc', '')
+                    boton_descarga_diferida(
                         "🏦 Descargar Reporte de Tesorería (PDF)",
-                        data=buf_teso_f,
-                        file_name=f"TESORERIA_{periodo_key}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True,
-                        type="primary",
-                        key="btn_teso_global_v_final"
+                        lambda: generar_pdf_tesoreria(
+                            df_planilla=df_plan_glob if not df_plan_glob.empty else None,
+                            df_loc=df_loc_glob if not df_loc_glob.empty else None,
+                            empresa_nombre=empresa_nombre,
+                            periodo_key=periodo_key,
+                            auditoria_data=aud_glob,
+                            empresa_ruc=_empresa_ruc_t,
+                            formato=fmt_teso_glob,
+                            conceptos_no_remunerativos=_conceptos_norem_glob,
+                        ),
+                        f"TESORERIA_{periodo_key}.pdf", "application/pdf", key="btn_teso_global_v_final",
+                        tipo="tesoreria_pdf", formato=fmt_teso_glob,
+                        contenido_hash=hash_contenido(df_plan_glob, df_loc_glob, aud_glob, _conceptos_norem_glob, periodo_key),
+                        encabezado={'nombre': empresa_nombre, 'ruc': _empresa_ruc_t},
+                        use_container_width=True, type="primary",
                     )
                 except Exception: pass
 
@@ -1338,19 +1435,19 @@ def _render_seccion_reporte_combinado(empresa_id, empresa_nombre, periodo_key):
                 empresa_reg_c = st.session_state.get('empresa_activa_regimen', '')
                 col_comb1, col_comb2 = st.columns(2)
                 with col_comb1:
-                    pdf_comb = generar_pdf_combinado(
-                        df_plan_comb,
-                        df_loc_comb if not df_loc_comb.empty else None,
-                        empresa_nombre, periodo_key,
-                        empresa_ruc=empresa_ruc_c, empresa_regimen=empresa_reg_c
-                    )
-                    st.download_button(
+                    boton_descarga_diferida(
                         "📄 Descargar Reporte Combinado (PDF)",
-                        data=pdf_comb,
-                        file_name=f"COSTO_LABORAL_{periodo_key}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True,
-                        type="primary",
+                        lambda: generar_pdf_combinado(
+                            df_plan_comb,
+                            df_loc_comb if not df_loc_comb.empty else None,
+                            empresa_nombre, periodo_key,
+                            empresa_ruc=empresa_ruc_c, empresa_regimen=empresa_reg_c
+                        ),
+                        f"COSTO_LABORAL_{periodo_key}.pdf", "application/pdf", key="dl_comb_pdf",
+                        tipo="combinado_pdf", formato=empresa_reg_c or '',
+                        contenido_hash=hash_contenido(df_plan_comb, df_loc_comb, periodo_key),
+                        encabezado={'nombre': empresa_nombre, 'ruc': empresa_ruc_c},
+                        use_container_width=True, type="primary",
                     )
                 with col_comb2:
                     buf_comb_xl = io.BytesIO()
@@ -1371,6 +1468,62 @@ def _render_seccion_reporte_combinado(empresa_id, empresa_nombre, periodo_key):
 
 
 
+def _render_panel_variaciones(empresa_id, periodo_key):
+    """Pre-cierre: variaciones por trabajador y concepto frente al periodo anterior."""
+    from core.use_cases.variaciones_planilla import comparar_planillas, periodo_anterior, UMBRALES_DEFECTO
+
+    periodo_ant = periodo_anterior(periodo_key)
+    # El cuerpo de un st.expander corre aunque esté cerrado: con el toggle los dos
+    # snapshots se leen y comparan solo cuando el usuario abre el panel.
+    if not st.toggle(f"🔍 Variaciones vs. periodo anterior ({periodo_ant})", key=f"var_panel_{periodo_key}"):
+        return
+    df_actual = st.session_state.get('res_planilla')
+    try:
+        db_var = SessionLocal()
+        if df_actual is None or df_actual.empty:
+            df_actual, _ = cargar_planilla_guardada(db_var, empresa_id, periodo_key)
+        df_anterior, _ = cargar_planilla_guardada(db_var, empresa_id, periodo_ant)
+        db_var.close()
+    except Exception as e_var:
+        st.warning(f"No se pudo cargar la planilla para comparar: {e_var}")
+        return
+    if df_actual is None or df_actual.empty:
+        return
+
+    with st.container(border=True):
+        if df_anterior is None:
+            st.info(f"No hay planilla guardada para {periodo_ant}; todos los trabajadores figuran como nuevos.")
+        c1, c2, c3 = st.columns(3)
+        umbrales = {
+            "neto_pct": c1.number_input("Variación de neto (%)", min_value=0.0,
+                                        value=UMBRALES_DEFECTO["neto_pct"], step=5.0, key="var_neto_pct"),
+            "neto_abs": c2.number_input("… y al menos (S/)", min_value=0.0,
+                                        value=UMBRALES_DEFECTO["neto_abs"], step=50.0, key="var_neto_abs"),
+            "quinta_abs": c3.number_input("Aumento de 5ta (S/)", min_value=0.0,
+                                          value=UMBRALES_DEFECTO["quinta_abs"], step=50.0, key="var_quinta_abs"),
+        }
+        res = comparar_planillas(df_actual, df_anterior, umbrales)
+        alertas = res["alertas"]
+
+        conteo = alertas["Alerta"].value_counts()
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("Nuevos", int(conteo.get("NUEVO", 0)))
+        k2.metric("Ausentes", int(conteo.get("AUSENTE", 0)))
+        k3.metric("Saltos de Neto", int(conteo.get("NETO", 0)))
+        k4.metric("Saltos de 5ta", int(conteo.get("5TA", 0)))
+
+        if alertas.empty:
+            st.success("✅ Sin variaciones fuera de los umbrales.")
+        else:
+            st.dataframe(alertas, use_container_width=True, hide_index=True)
+
+        tab_tot, tab_det = st.tabs(["Totales por concepto", "Detalle por trabajador"])
+        with tab_tot:
+            st.dataframe(res["totales"], use_container_width=True, hide_index=True)
+        with tab_det:
+            st.dataframe(res["deltas"], use_container_width=True, hide_index=True)
+
+
 def _render_seccion_cierre(empresa_id, empresa_nombre, periodo_key):
     """Sección de Cierre del Periodo: confirmar cierre o reabrir según rol de usuario."""
     # ── SECCIÓN GLOBAL DE CIERRE DEL PERIODO ──────────────────────────────────
@@ -1423,8 +1576,11 @@ def _render_seccion_cierre(empresa_id, empresa_nombre, periodo_key):
                         )
                         for _cr in _cuotas_rev:
                             _cr.estado = 'PENDIENTE'
+                        actualizar_resumen_planilla(db_up, p)
                         db_up.commit()
                         db_up.close()
+                        # Los documentos pre-renderizados al cierre ya no son válidos
+                        invalidar_periodo(empresa_id, periodo_key)
                         st.toast("Periodo REABIERTO para edición", icon="🔓")
                         st.rerun()
                 except Exception as e_re:
@@ -1433,6 +1589,7 @@ def _render_seccion_cierre(empresa_id, empresa_nombre, periodo_key):
             st.warning("Solo un **Supervisor** o **Admin** puede reabrir este periodo.")
     else:
         st.info(f"El periodo **{periodo_key}** está **ABIERTO**. Puede recalcularse hasta que sea cerrado.")
+        _render_panel_variaciones(empresa_id, periodo_key)
         if rol_usuario in ["supervisor", "admin"]:
             with st.expander("Cerrar Periodo"):
                 st.warning("Al cerrar el periodo se bloquearán las ediciones y asistencias.")
@@ -1516,8 +1673,26 @@ def _render_seccion_cierre(empresa_id, empresa_nombre, periodo_key):
                             for _cp in _cuotas_pag:
                                 _cp.estado = 'PAGADA'
 
+                            actualizar_resumen_planilla(
+                                db_up, p, pd.DataFrame(_resultado_list), pd.DataFrame(_hon_list),
+                            )
                             db_up.commit()
                             db_up.close()
+
+                            # Boletas, sábana y tesorería se pre-renderizan en segundo plano;
+                            # descargas y envío autorizado leerán los bytes ya generados.
+                            programar_prerender(
+                                empresa_id, periodo_key,
+                                {
+                                    'nombre':        empresa_nombre,
+                                    'ruc':           st.session_state.get('empresa_activa_ruc', ''),
+                                    'domicilio':     st.session_state.get('empresa_activa_domicilio', ''),
+                                    'representante': st.session_state.get('empresa_activa_representante', ''),
+                                    'regimen':       st.session_state.get('empresa_activa_regimen', '') or '',
+                                },
+                                empresa_regimen=st.session_state.get('empresa_activa_regimen', '') or '',
+                                formato_tesoreria=st.session_state.get('empresa_formato_reporte_tesoreria', 'CLASICO') or 'CLASICO',
+                            )
                             st.toast(f"Periodo {periodo_key} CERRADO exitosamente", icon="🔒")
                             st.rerun()
                     except Exception as e_cl:
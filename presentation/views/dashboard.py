@@ -1,9 +1,10 @@
 import streamlit as st
-import pandas as pd
-import json
-import io
+from sqlalchemy import func
 from infrastructure.database.connection import SessionLocal
-from infrastructure.database.models import Empresa, Trabajador, PlanillaMensual, Prestamo, RegistroVacaciones, LogEnvioBoleta
+from infrastructure.database.models import Trabajador, LogEnvioBoleta
+from infrastructure.repositories.repo_planilla import (
+    cerrar_envios_interrumpidos, obtener_ultimo_resumen_cerrado, saldo_prestamos_pendiente,
+)
 from core.use_cases.calculo_kardex import calcular_saldo_vacacional
 
 def render():
@@ -22,17 +23,20 @@ def render():
     db = SessionLocal()
     try:
         # ── EXTRACCIÓN DE DATOS PARA BI ───────────────────────────────────────
-        count_planilla = db.query(Trabajador).filter_by(empresa_id=empresa_id, tipo_contrato='PLANILLA', situacion='ACTIVO').count()
-        count_locadores = db.query(Trabajador).filter_by(empresa_id=empresa_id, tipo_contrato='LOCADOR', situacion='ACTIVO').count()
-        
-        # Última planilla cerrada para KPIs financieros
-        ultima_planilla = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id, estado='CERRADA').order_by(PlanillaMensual.fecha_calculo.desc()).first()
-        
-        # Deuda total pendiente en préstamos
-        total_prestamos_saldo = 0.0
-        prestamos_activos = db.query(Prestamo).filter_by(empresa_id=empresa_id, estado='ACTIVO').all()
-        for pr in prestamos_activos:
-            total_prestamos_saldo += sum(float(c.monto) for c in pr.cuotas if c.estado == 'PENDIENTE')
+        activos_por_tipo = dict(
+            db.query(Trabajador.tipo_contrato, func.count(Trabajador.id))
+            .filter_by(empresa_id=empresa_id, situacion='ACTIVO')
+            .group_by(Trabajador.tipo_contrato)
+            .all()
+        )
+        count_planilla = activos_por_tipo.get('PLANILLA', 0)
+        count_locadores = activos_por_tipo.get('LOCADOR', 0)
+
+        # KPIs financieros de la última planilla cerrada (resumen materializado al cierre)
+        ultimo_resumen = obtener_ultimo_resumen_cerrado(db, empresa_id)
+
+        # Deuda total pendiente en préstamos (suma en la BD, siempre al día)
+        total_prestamos_saldo, n_prestamos = saldo_prestamos_pendiente(db, empresa_id)
 
         # ── KPIs SUPERIORES ───────────────────────────────────────────────────
         c1, c2, c3, c4 = st.columns(4)
@@ -58,19 +62,15 @@ def render():
         # ── ANÁLISIS DE COSTO LABORAL (BI TONE) ──────────────────────────────
         col_graf, col_data = st.columns([2, 1])
 
-        if ultima_planilla:
+        if ultimo_resumen:
             try:
-                aud = json.loads(ultima_planilla.auditoria_json)
-                df_res = pd.read_json(io.StringIO(ultima_planilla.resultado_json), orient='records')
-                df_data = df_res[df_res['Apellidos y Nombres'] != 'TOTALES']
-
-                bruto = df_data['TOTAL BRUTO'].sum()
-                essalud = df_data['Aporte Seg. Social'].sum()
-                neto = df_data['NETO A PAGAR'].sum()
+                bruto = ultimo_resumen.total_bruto or 0.0
+                essalud = ultimo_resumen.total_essalud or 0.0
+                neto = ultimo_resumen.total_neto or 0.0
                 costo_total = bruto + essalud
 
                 with col_graf:
-                    st.subheader(f"📈 Estructura de Costos: {ultima_planilla.periodo_key}")
+                    st.subheader(f"📈 Estructura de Costos: {ultimo_resumen.periodo_key}")
                     # Simulación de composición BI
                     st.markdown(f"**Costo Laboral Real: S/ {costo_total:,.2f}**")
                     
@@ -84,7 +84,7 @@ def render():
 
                 with col_data:
                     st.subheader("📌 Resumen Financiero")
-                    st.info(f"**Periodo:** {ultima_planilla.periodo_key}\n\n"
+                    st.info(f"**Periodo:** {ultimo_resumen.periodo_key}\n\n"
                             f"**Masa Salarial:** S/ {bruto:,.2f}\n\n"
                             f"**Desembolso Neto:** S/ {neto:,.2f}\n\n"
                             f"**Estado:** 🔒 CERRADA")
@@ -134,7 +134,6 @@ def render():
         
         with alert_col2:
             # Alerta de Préstamos
-            n_prestamos = len(prestamos_activos)
             if n_prestamos > 0:
                 st.markdown(f'<div style="background-color:#FFFBEB; padding:15px; border-radius:10px; border-left: 5px solid #F59E0B;">'
                             f'<strong>Gestión de Cobranzas:</strong><br>'
@@ -184,5 +183,15 @@ def render():
                     else:
                         st.caption(f"• {t.nombres} ({t.num_doc})")
 
+        # Envíos de boletas que quedaron colgados en ENVIANDO (el proceso murió a mitad
+        # de un lote): pasan a ERROR para que se reenvíen desde Emisión de Boletas.
+        n_interrumpidos = cerrar_envios_interrumpidos(db, empresa_id)
+        if n_interrumpidos:
+            db.commit()
+            st.warning(
+                f"📧 {n_interrumpidos} envío(s) de boletas se interrumpieron sin confirmar si el correo "
+                f"salió. Quedaron marcados con error: reenvíelos desde Emisión de Boletas."
+            )
+
     finally:
         db.close()
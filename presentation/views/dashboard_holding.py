@@ -0,0 +1,80 @@
+import time
+
+import streamlit as st
+
+from infrastructure.database.connection import SessionLocal
+from core.use_cases.consolidado_holding import (
+    empresas_del_usuario, consolidar_holding, generar_resumenes_faltantes,
+)
+from presentation.views.autorizacion_boletas import UMBRAL_PERIODO
+
+
+def render():
+    st.title("🏛️ Dashboard Holding")
+    st.markdown("**Vista consolidada** de todas las empresas asignadas a su usuario.")
+    st.markdown("---")
+
+    t0 = time.perf_counter()
+    db = SessionLocal()
+    try:
+        empresas = empresas_del_usuario(db, st.session_state.get('usuario_logueado'))
+        if not empresas:
+            st.info("ℹ️ Su usuario no tiene empresas asignadas.")
+            return
+        df = consolidar_holding(db, empresas, umbral_boletas=UMBRAL_PERIODO)
+    finally:
+        db.close()
+    t_carga = time.perf_counter() - t0
+
+    # ── KPIs CONSOLIDADOS ─────────────────────────────────────────────────────
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Empresas", len(df))
+    c2.metric("Trabajadores (último cierre)", int(df["Trabajadores"].sum()))
+    c3.metric("Costo Laboral", f"S/ {df['Costo Laboral'].sum():,.2f}")
+    c4.metric("Cierres Pendientes", int(df["Cierres Pendientes"].sum()))
+    c5.metric("Boletas por Autorizar", int(df["Boletas Pendientes"].sum()))
+
+    st.markdown("---")
+
+    # ── DETALLE POR EMPRESA ───────────────────────────────────────────────────
+    filtro = st.radio(
+        "Mostrar:", ["Todas", "Con pendientes"], horizontal=True, key="holding_filtro",
+    )
+    df_mostrar = df
+    if filtro == "Con pendientes":
+        df_mostrar = df[(df["Cierres Pendientes"] > 0) | (df["Boletas Pendientes"] > 0)]
+
+    def _alerta(val):
+        return "background-color:#FFF8E1; color:#E65100; font-weight:bold" if val else ""
+
+    st.dataframe(
+        df_mostrar.drop(columns=["empresa_id", "Sin Resumen"]).style
+        .map(_alerta, subset=["Cierres Pendientes", "Boletas Pendientes"])
+        .format({c: "S/ {:,.2f}" for c in ("Masa Salarial", "EsSalud", "Costo Laboral", "Neto Pagado")}),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    df_costos = df[df["Costo Laboral"] > 0].set_index("Empresa")["Costo Laboral"]
+    if not df_costos.empty:
+        st.subheader("📈 Costo Laboral por Empresa (último cierre)")
+        st.bar_chart(df_costos.sort_values(ascending=False))
+
+    st.caption(f"Consolidado generado en {t_carga:.2f} s a partir de los resúmenes por periodo.")
+
+    # Planillas anteriores a los resúmenes materializados: se generan una sola vez
+    n_sin_resumen = int(df["Sin Resumen"].sum())
+    if n_sin_resumen and st.session_state.get('usuario_rol') in ('admin', 'supervisor'):
+        st.warning(
+            f"⚠️ {n_sin_resumen} planilla(s) guardadas antes de los resúmenes por periodo no figuran "
+            "en los totales."
+        )
+        if st.button("Generar resúmenes faltantes", key="holding_generar_resumenes"):
+            db = SessionLocal()
+            try:
+                with st.spinner("Generando resúmenes..."):
+                    n = generar_resumenes_faltantes(db, df["empresa_id"].tolist())
+            finally:
+                db.close()
+            st.toast(f"{n} resumen(es) generados", icon="✅")
+            st.rerun()
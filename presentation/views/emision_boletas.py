@@ -3,14 +3,12 @@ import streamlit as st
 import pandas as pd
 import io
 import zipfile
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 
 from infrastructure.database.connection import SessionLocal
-from infrastructure.database.models import Trabajador, Concepto, VariablesMes, PlanillaMensual
+from infrastructure.database.models import Trabajador
+from infrastructure.repositories.repo_planilla import (
+    listar_planillas, obtener_planilla, trabajadores_boletas_df, variables_periodo_df,
+)
 
 
 def _recuperar_datos_desde_neon(db, empresa_id):
@@ -18,13 +16,8 @@ def _recuperar_datos_desde_neon(db, empresa_id):
     Intenta recuperar la planilla, trabajadores y variables de Neon.
     Retorna (df_resultados, auditoria_data, df_trab, df_var, periodo_key) o None si no hay nada.
     """
-    # 1. Planillas disponibles para esta empresa (más reciente primero)
-    planillas = (
-        db.query(PlanillaMensual)
-        .filter_by(empresa_id=empresa_id)
-        .order_by(PlanillaMensual.fecha_calculo.desc())
-        .all()
-    )
+    # 1. Planillas disponibles para esta empresa (más reciente primero, sin snapshot JSON)
+    planillas = listar_planillas(db, empresa_id)
     if not planillas:
         return None
 
@@ -33,9 +26,7 @@ def _recuperar_datos_desde_neon(db, empresa_id):
 
 def _cargar_planilla_periodo(db, empresa_id, periodo_key):
     """Carga una planilla específica de Neon y los datos de soporte."""
-    planilla = db.query(PlanillaMensual).filter_by(
-        empresa_id=empresa_id, periodo_key=periodo_key
-    ).first()
+    planilla = obtener_planilla(db, empresa_id, periodo_key)
     if not planilla:
         return None, None, None, None
 
@@ -43,37 +34,24 @@ def _cargar_planilla_periodo(db, empresa_id, periodo_key):
     aud = json.loads(planilla.auditoria_json)
 
     # Trabajadores con los campos que necesita generar_pdf_boletas_masivas
-    trabajadores = db.query(Trabajador).filter_by(empresa_id=empresa_id).all()
-    df_trab = pd.DataFrame([{
-        'Num. Doc.': t.num_doc,
-        'Nombres y Apellidos': t.nombres,
-        'Cargo': t.cargo or 'No especificado',
-        'Fecha Ingreso': t.fecha_ingreso,
-        'Sistema Pensión': t.sistema_pension or 'NO AFECTO',
-        'CUSPP': t.cuspp or '',
-        'Seguro Social': getattr(t, 'seguro_social', None) or 'ESSALUD',
-        'correo_electronico': getattr(t, 'correo_electronico', '') or '',
-    } for t in trabajadores])
+    df_trab = trabajadores_boletas_df(db, empresa_id)
 
     # Variables del periodo (solo necesitamos horas extras para las boletas)
-    conceptos = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
-    variables = db.query(VariablesMes).filter_by(
-        empresa_id=empresa_id, periodo_key=periodo_key
-    ).all()
-    rows_var = []
-    for v in variables:
-        conceptos_data = json.loads(v.conceptos_json or '{}')
-        row = {
-            'Num. Doc.': v.trabajador.num_doc,
-            'Nombres y Apellidos': v.trabajador.nombres,
-            'Días Faltados': v.dias_faltados or 0,
-            'Min. Tardanza': v.min_tardanza or 0,
-            'Hrs Extras 25%': v.hrs_extras_25 or 0.0,
-            'Hrs Extras 35%': v.hrs_extras_35 or 0.0,
-        }
-        row.update(conceptos_data)
-        rows_var.append(row)
-    df_var = pd.DataFrame(rows_var).fillna(0.0) if rows_var else pd.DataFrame()
+    raw = variables_periodo_df(db, empresa_id, periodo_key)
+    if raw.empty:
+        df_var = pd.DataFrame()
+    else:
+        df_var = pd.DataFrame({
+            'Num. Doc.': raw['num_doc'],
+            'Nombres y Apellidos': raw['nombres'],
+            'Días Faltados': raw['dias_faltados'].fillna(0).astype(int),
+            'Min. Tardanza': raw['min_tardanza'].fillna(0).astype(int),
+            'Hrs Extras 25%': raw['hrs_extras_25'].fillna(0.0),
+            'Hrs Extras 35%': raw['hrs_extras_35'].fillna(0.0),
+        })
+        conceptos_df = pd.DataFrame(raw['conceptos_json'].map(lambda d: d or {}).tolist(), index=raw.index)
+        df_var = df_var.drop(columns=[c for c in conceptos_df.columns if c in df_var.columns])
+        df_var = pd.concat([df_var, conceptos_df], axis=1).fillna(0.0)
 
     return df_res, aud, df_trab, df_var
 
@@ -93,11 +71,24 @@ def _periodo_legible(periodo_key: str) -> str:
     return periodo_key
 
 
-def generar_pdf_boletas_masivas(empresa_info, periodo, df_resultados, df_trabajadores, df_variables, auditoria_data):
+def generar_pdf_boletas_masivas(empresa_info, periodo, df_resultados, df_trabajadores, df_variables, auditoria_data,
+                                password=None):
     """
     Genera un PDF con boletas a página completa — Diseño corporativo elegante.
     empresa_info: dict con claves: nombre, ruc, domicilio, representante
+    password: si se indica (el DNI en los envíos por correo), el PDF sale ya encriptado
+    desde reportlab — RC4 128 bits, misma protección que aplicaba PyPDF2 — sin tener
+    que re-parsear el documento con `encriptar_pdf_en_memoria`.
     """
+    # reportlab se importa aquí: este módulo también lo carga la compuerta de
+    # autorización de boletas en cada navegación, donde no se genera ningún PDF.
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+    from reportlab.lib.pdfencrypt import StandardEncryption
+
     # ── Paleta corporativa ────────────────────────────────────────────────────
     C_NAVY   = colors.HexColor("#0F2744")   # azul marino oscuro — cabeceras
     C_STEEL  = colors.HexColor("#1E4D8C")   # azul medio — sub-cabeceras
@@ -117,9 +108,13 @@ def generar_pdf_boletas_masivas(empresa_info, periodo, df_resultados, df_trabaja
     periodo_texto = _periodo_legible(periodo)
 
     buffer = io.BytesIO()
+    encrypt = None
+    if password:
+        encrypt = StandardEncryption(str(password), ownerPassword=str(password), strength=128)
     doc = SimpleDocTemplate(
         buffer, pagesize=A4,
-        rightMargin=36, leftMargin=36, topMargin=30, bottomMargin=30
+        rightMargin=36, leftMargin=36, topMargin=30, bottomMargin=30,
+        encrypt=encrypt,
     )
     elements = []
     styles = getSampleStyleSheet()
@@ -404,6 +399,115 @@ def generar_zip_boletas(empresa_info, periodo, df_resultados, df_trabajadores, d
     return zip_buffer
 
 
+def _pdf_boleta(empresa_id, empresa_info, periodo_key, dni, df_resultados, df_trab, df_var, auditoria_data,
+                encriptada=False, clave_cierre=None):
+    """
+    Boleta individual del trabajador. Si el periodo está cerrado y ya fue pre-renderizado
+    (ver core.use_cases.prerender_cierre) se sirven los bytes guardados; si no, se genera.
+    `clave_cierre`: clave vigente del snapshot (prerender_cierre.clave_vigente).
+    """
+    from core.use_cases.prerender_cierre import artefacto_boleta
+    from infrastructure.services.almacen_artefactos import leer_artefacto
+
+    guardado = leer_artefacto(empresa_id, periodo_key, artefacto_boleta(dni, encriptada), clave_cierre)
+    if guardado is not None:
+        return io.BytesIO(guardado)
+    df_ind = df_resultados[df_resultados['DNI'] == dni]
+    return generar_pdf_boletas_masivas(empresa_info, periodo_key, df_ind, df_trab, df_var, auditoria_data,
+                                       password=dni if encriptada else None)
+
+
+# ── Bitácora de envíos (LogEnvioBoleta) ──────────────────────────────────────
+# Los correos salen por lotes de LOTE_ENVIO: las filas del lote se insertan juntas en
+# ENVIANDO (un commit) ANTES de enviar, y se cierran juntas a ENVIADO / ERROR al terminar
+# el lote (otro commit). Si el proceso muere a mitad de un lote sus filas quedan en
+# ENVIANDO y, pasados MINUTOS_ENVIO_VENCIDO, cerrar_envios_interrumpidos las pasa a ERROR
+# para que se puedan reenviar: ningún correo enviado queda sin registro.
+ESTADO_ENVIANDO = "ENVIANDO"
+LOTE_ENVIO = 25
+
+
+def _mapa_ids_trabajador(db, empresa_id):
+    """DNI → id de todos los trabajadores de la empresa, en una sola consulta."""
+    return {
+        str(num_doc): t_id
+        for t_id, num_doc in db.query(Trabajador.id, Trabajador.num_doc).filter_by(empresa_id=empresa_id)
+    }
+
+
+def _volcar_logs_envio(db, buffer_logs):
+    """Inserta en bloque los LogEnvioBoleta acumulados (sin correo: no hay envío) y vacía el buffer."""
+    if not buffer_logs:
+        return
+    from sqlalchemy import insert
+    from infrastructure.database.models import LogEnvioBoleta
+
+    db.execute(insert(LogEnvioBoleta), buffer_logs)
+    db.commit()
+    buffer_logs.clear()
+
+
+def _registrar_intentos_envio(db, filas) -> list:
+    """Inserta en un solo executemany los logs ENVIANDO del lote y los confirma; retorna sus ids en orden."""
+    from collections import defaultdict
+    from sqlalchemy import insert
+    from infrastructure.database.models import LogEnvioBoleta
+
+    # RETURNING de un INSERT por lotes no garantiza el orden de las filas: se emparejan
+    # por su contenido (dos filas idénticas del mismo lote son intercambiables).
+    ids_por_fila = defaultdict(list)
+    for log_id, *clave in db.execute(
+        insert(LogEnvioBoleta).returning(
+            LogEnvioBoleta.id, LogEnvioBoleta.trabajador_id, LogEnvioBoleta.periodo_key,
+            LogEnvioBoleta.correo_destino,
+        ),
+        [dict(fila, estado=ESTADO_ENVIANDO) for fila in filas],
+    ):
+        ids_por_fila[tuple(clave)].append(log_id)
+    db.commit()
+    return [ids_por_fila[(f['trabajador_id'], f['periodo_key'], f['correo_destino'])].pop() for f in filas]
+
+
+def _cerrar_intentos_envio(db, log_ids, resultados):
+    """ENVIANDO → ENVIADO / ERROR de todo el lote en un solo executemany."""
+    from sqlalchemy import bindparam, update
+    from infrastructure.database.models import LogEnvioBoleta
+
+    if not log_ids:
+        return
+    tabla = LogEnvioBoleta.__table__
+    db.execute(
+        update(tabla).where(tabla.c.id == bindparam("log_id"))
+        .values(estado=bindparam("nuevo_estado"), mensaje_error=bindparam("error")),
+        [
+            dict(log_id=log_id,
+                 nuevo_estado="ENVIADO" if resultado is True else "ERROR",
+                 error=None if resultado is True else str(resultado))
+            for log_id, resultado in zip(log_ids, resultados)
+        ],
+    )
+    db.commit()
+
+
+def _enviar_lote(db, envios, enviar, al_enviar=None) -> list:
+    """
+    Registra (ENVIANDO), envía y cierra un lote. `envios`: [(fila_log, args_correo)].
+    `enviar(*args_correo)` devuelve True o el mensaje de error. Si algo revienta a
+    mitad del lote, los que no alcanzaron a salir se cierran como ERROR igual.
+    """
+    log_ids = _registrar_intentos_envio(db, [fila for fila, _ in envios])
+    resultados = []
+    try:
+        for _, args_correo in envios:
+            resultados.append(enviar(*args_correo))
+            if al_enviar:
+                al_enviar()
+    finally:
+        faltan = len(log_ids) - len(resultados)
+        _cerrar_intentos_envio(db, log_ids, resultados + ["Lote interrumpido antes de enviar"] * faltan)
+    return resultados
+
+
 def enviar_boletas_periodo(empresa_id, empresa_nombre, empresa_info, periodo_key, periodo_legible,
                             df_resultados, df_trab, df_var, auditoria_data, con_correo, sin_correo=None):
     """
@@ -418,8 +522,9 @@ def enviar_boletas_periodo(empresa_id, empresa_nombre, empresa_info, periodo_key
 
     Retorna (exitos, errores).
     """
-    from core.use_cases.envio_correos import encriptar_pdf_en_memoria, enviar_boleta_por_correo
-    from infrastructure.database.models import LogEnvioBoleta
+    from core.use_cases.envio_correos import enviar_boleta_por_correo
+    from core.use_cases.prerender_cierre import clave_vigente
+    from infrastructure.repositories.repo_planilla import cerrar_envios_interrumpidos
 
     progress_bar = st.progress(0)
     status_text = st.empty()
@@ -428,56 +533,57 @@ def enviar_boletas_periodo(empresa_id, empresa_nombre, empresa_info, periodo_key
     errores = 0
 
     db_log = SessionLocal()
+    buffer_logs = []
     try:
+        if cerrar_envios_interrumpidos(db_log, empresa_id):
+            db_log.commit()
+        ids_por_dni = _mapa_ids_trabajador(db_log, empresa_id)
+        clave_cierre = clave_vigente(db_log, empresa_id, periodo_key, empresa_info)
+
         if sin_correo is not None and not sin_correo.empty:
-            for _, t_row in sin_correo.iterrows():
-                dni_pend = str(t_row['Num. Doc.'])
-                trab_obj = db_log.query(Trabajador).filter_by(num_doc=dni_pend, empresa_id=empresa_id).first()
-                db_log.add(LogEnvioBoleta(
+            for dni_pend in sin_correo['Num. Doc.'].astype(str):
+                buffer_logs.append(dict(
                     empresa_id=empresa_id,
-                    trabajador_id=trab_obj.id if trab_obj else 0,
+                    trabajador_id=ids_por_dni.get(dni_pend, 0),
                     periodo_key=periodo_key,
                     correo_destino="",
                     estado="PENDIENTE",
                     mensaje_error="Sin correo electrónico registrado al momento del envío",
                 ))
-            db_log.commit()
-
-        total_envios = len(con_correo)
-        for i, (_, t_row) in enumerate(con_correo.iterrows()):
-            dni_envio = str(t_row['Num. Doc.'])
-            nombre_envio = t_row['Nombres y Apellidos']
-            mail_destino = t_row['correo_electronico']
-
-            status_text.text(f"Procesando ({i+1}/{total_envios}): {nombre_envio}")
-
-            # 1. Generar PDF Individual
-            df_ind = df_resultados[df_resultados['DNI'] == dni_envio]
-            pdf_orig = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_ind, df_trab, df_var, auditoria_data)
-
-            # 2. Encriptar con DNI
-            pdf_enc = encriptar_pdf_en_memoria(pdf_orig, dni_envio)
-
-            # 3. Enviar (correo institucional único — configurado por variables de entorno)
-            resultado = enviar_boleta_por_correo(mail_destino, periodo_legible, pdf_enc, nombre_envio, empresa_nombre)
-
-            # 4. Log
-            trab_obj = db_log.query(Trabajador).filter_by(num_doc=dni_envio, empresa_id=empresa_id).first()
-            log = LogEnvioBoleta(
-                empresa_id=empresa_id,
-                trabajador_id=trab_obj.id if trab_obj else 0,
-                periodo_key=periodo_key,
-                correo_destino=mail_destino,
-                estado="ENVIADO" if resultado is True else "ERROR",
-                mensaje_error=None if resultado is True else str(resultado)
-            )
-            db_log.add(log)
-            db_log.commit()
-
-            if resultado is True: exitos += 1
-            else: errores += 1
+            _volcar_logs_envio(db_log, buffer_logs)
+
+        filas = list(con_correo[['Num. Doc.', 'Nombres y Apellidos', 'correo_electronico']]
+                     .itertuples(index=False, name=None))
+        total_envios = len(filas)
+        procesados = 0
+
+        def _avance():
+            nonlocal procesados
+            procesados += 1
+            progress_bar.progress(procesados / total_envios)
+
+        for inicio in range(0, total_envios, LOTE_ENVIO):
+            lote = filas[inicio:inicio + LOTE_ENVIO]
+            status_text.text(f"Procesando ({inicio + 1}-{inicio + len(lote)}/{total_envios}): {lote[0][1]}")
+
+            # 1-2. PDF individual encriptado con el DNI (pre-renderizado si el periodo ya cerró)
+            envios = []
+            for num_doc, nombre_envio, mail_destino in lote:
+                dni_envio = str(num_doc)
+                pdf_enc = _pdf_boleta(empresa_id, empresa_info, periodo_key, dni_envio,
+                                      df_resultados, df_trab, df_var, auditoria_data, encriptada=True,
+                                      clave_cierre=clave_cierre)
+                envios.append((
+                    dict(empresa_id=empresa_id, trabajador_id=ids_por_dni.get(dni_envio, 0),
+                         periodo_key=periodo_key, correo_destino=mail_destino),
+                    (mail_destino, periodo_legible, pdf_enc, nombre_envio, empresa_nombre),
+                ))
 
-            progress_bar.progress((i + 1) / total_envios)
+            # 3-4. Logs del lote confirmados antes de enviar (ver ESTADO_ENVIANDO) y envío
+            # (correo institucional único — configurado por variables de entorno)
+            for resultado in _enviar_lote(db_log, envios, enviar_boleta_por_correo, _avance):
+                if resultado is True: exitos += 1
+                else: errores += 1
     finally:
         db_log.close()
 
@@ -491,35 +597,36 @@ def enviar_boletas_pendientes_trabajador(empresa_id, empresa_nombre, empresa_inf
     aparece en Maestro de Personal apenas se le registra/corrige el correo.
     Retorna (exitos, errores).
     """
-    from core.use_cases.envio_correos import encriptar_pdf_en_memoria, enviar_boleta_por_correo
-    from infrastructure.database.models import LogEnvioBoleta
+    from core.use_cases.envio_correos import enviar_boleta_por_correo
+    from core.use_cases.prerender_cierre import clave_vigente
+    from infrastructure.repositories.repo_planilla import cerrar_envios_interrumpidos
 
     exitos = 0
     errores = 0
     db = SessionLocal()
     try:
+        if cerrar_envios_interrumpidos(db, empresa_id):
+            db.commit()
+        envios = []
         for periodo_key in periodos_key:
             df_resultados, auditoria_data, df_trab, df_var = _cargar_planilla_periodo(db, empresa_id, periodo_key)
             if df_resultados is None:
                 continue
-            df_ind = df_resultados[df_resultados['DNI'] == trabajador.num_doc]
-            if df_ind.empty:
+            if df_resultados[df_resultados['DNI'] == trabajador.num_doc].empty:
                 continue
-            pdf_orig = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_ind, df_trab, df_var, auditoria_data)
-            pdf_enc = encriptar_pdf_en_memoria(pdf_orig, trabajador.num_doc)
-            resultado = enviar_boleta_por_correo(
-                trabajador.correo_electronico, _periodo_legible(periodo_key), pdf_enc,
-                trabajador.nombres, empresa_nombre,
-            )
-            db.add(LogEnvioBoleta(
-                empresa_id=empresa_id, trabajador_id=trabajador.id, periodo_key=periodo_key,
-                correo_destino=trabajador.correo_electronico,
-                estado="ENVIADO" if resultado is True else "ERROR",
-                mensaje_error=None if resultado is True else str(resultado),
+            pdf_enc = _pdf_boleta(empresa_id, empresa_info, periodo_key, trabajador.num_doc,
+                                  df_resultados, df_trab, df_var, auditoria_data, encriptada=True,
+                                  clave_cierre=clave_vigente(db, empresa_id, periodo_key, empresa_info))
+            envios.append((
+                dict(empresa_id=empresa_id, trabajador_id=trabajador.id, periodo_key=periodo_key,
+                     correo_destino=trabajador.correo_electronico),
+                (trabajador.correo_electronico, _periodo_legible(periodo_key), pdf_enc,
+                 trabajador.nombres, empresa_nombre),
             ))
-            db.commit()
-            if resultado is True: exitos += 1
-            else: errores += 1
+        for inicio in range(0, len(envios), LOTE_ENVIO):
+            for resultado in _enviar_lote(db, envios[inicio:inicio + LOTE_ENVIO], enviar_boleta_por_correo):
+                if resultado is True: exitos += 1
+                else: errores += 1
     finally:
         db.close()
 
@@ -602,9 +709,20 @@ def render():
         'ruc':           st.session_state.get('empresa_activa_ruc', ''),
         'domicilio':     st.session_state.get('empresa_activa_domicilio', ''),
         'representante': st.session_state.get('empresa_activa_representante', ''),
+        'regimen':       st.session_state.get('empresa_activa_regimen', '') or '',
     }
     periodo_legible = _periodo_legible(periodo_key)
 
+    from core.use_cases.prerender_cierre import ARTEFACTO_LIBRO_BOLETAS, ARTEFACTO_ZIP_BOLETAS, clave_vigente
+    from infrastructure.services.almacen_artefactos import leer_artefacto
+
+    # Clave del snapshot vigente en la BD: los pre-renders solo se sirven si coinciden
+    db_clave = SessionLocal()
+    try:
+        clave_cierre = clave_vigente(db_clave, empresa_id, periodo_key, empresa_info)
+    finally:
+        db_clave.close()
+
     st.success(f"✅ Planilla del periodo **{periodo_legible}** lista para emisión.")
     st.markdown(f"**Empresa:** {empresa_nombre}")
 
@@ -625,7 +743,9 @@ def render():
             st.info("**Opción 1: Libro Consolidado**\n\nGenera un único archivo PDF que contiene todas las boletas una detrás de otra. Ideal para imprimir todo de una sola vez y archivar físicamente.")
             if st.button("🖨️ Generar 1 Solo PDF con Todo", use_container_width=True):
                 with st.spinner('Compilando libro maestro...'):
-                    pdf_buffer = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_resultados, df_trab, df_var, auditoria_data)
+                    pdf_buffer = leer_artefacto(empresa_id, periodo_key, ARTEFACTO_LIBRO_BOLETAS, clave_cierre)
+                    if pdf_buffer is None:
+                        pdf_buffer = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_resultados, df_trab, df_var, auditoria_data)
                     st.download_button(
                         label=f"📥 Descargar LIBRO_{periodo_legible}.pdf",
                         data=pdf_buffer, file_name=f"LIBRO_BOLETAS_{periodo_key}.pdf", mime="application/pdf",
@@ -636,7 +756,9 @@ def render():
             st.info("**Opción 2: Archivo ZIP (Separadas)**\n\nGenera un archivo comprimido (.zip) que contiene las boletas en formato PDF individualizadas, cada una con el DNI y Nombre del trabajador.")
             if st.button("🗂️ Generar Archivo ZIP (PDFs separados)", use_container_width=True):
                 with st.spinner('Empaquetando PDFs individuales en ZIP...'):
-                    zip_buffer = generar_zip_boletas(empresa_info, periodo_key, df_resultados, df_trab, df_var, auditoria_data)
+                    zip_buffer = leer_artefacto(empresa_id, periodo_key, ARTEFACTO_ZIP_BOLETAS, clave_cierre)
+                    if zip_buffer is None:
+                        zip_buffer = generar_zip_boletas(empresa_info, periodo_key, df_resultados, df_trab, df_var, auditoria_data)
                     st.download_button(
                         label=f"📥 Descargar PAQUETE_{periodo_legible}.zip",
                         data=zip_buffer, file_name=f"BOLETAS_INDIVIDUALES_{periodo_key}.zip", mime="application/zip",
@@ -660,10 +782,10 @@ def render():
             col_ind1, col_ind2 = st.columns(2)
             
             if col_ind1.button(f"📄 Generar Boleta de {nombre_sel}", type="primary", use_container_width=True):
-                df_individual = df_sin_totales[df_sin_totales['DNI'] == dni_sel]
-                
                 with st.spinner('Generando boleta...'):
-                    pdf_ind_buffer = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_individual, df_trab, df_var, auditoria_data)
+                    pdf_ind_buffer = _pdf_boleta(empresa_id, empresa_info, periodo_key, dni_sel,
+                                                 df_sin_totales, df_trab, df_var, auditoria_data,
+                                                 clave_cierre=clave_cierre)
                     st.download_button(
                         label=f"📥 Descargar BOLETA_{dni_sel}.pdf",
                         data=pdf_ind_buffer,
@@ -679,17 +801,15 @@ def render():
                 email_destino = trab_email_row.iloc[0].get('correo_electronico', "")
 
             if col_ind2.button(f"📧 Enviar por Correo a {nombre_sel}", use_container_width=True, disabled=not email_destino):
-                from core.use_cases.envio_correos import encriptar_pdf_en_memoria, enviar_boleta_por_correo
+                from core.use_cases.envio_correos import enviar_boleta_por_correo
                 from infrastructure.database.models import LogEnvioBoleta, Trabajador as TrabajadorModel
 
                 with st.spinner('Procesando envío seguro...'):
                     try:
-                        # 1. Generar PDF
-                        df_ind_mail = df_sin_totales[df_sin_totales['DNI'] == dni_sel]
-                        pdf_orig_ind = generar_pdf_boletas_masivas(empresa_info, periodo_key, df_ind_mail, df_trab, df_var, auditoria_data)
-
-                        # 2. Encriptar
-                        pdf_enc_ind = encriptar_pdf_en_memoria(pdf_orig_ind, dni_sel)
+                        # 1-2. PDF encriptado con el DNI (pre-renderizado si el periodo ya cerró)
+                        pdf_enc_ind = _pdf_boleta(empresa_id, empresa_info, periodo_key, dni_sel,
+                                                  df_sin_totales, df_trab, df_var, auditoria_data, encriptada=True,
+                                                  clave_cierre=clave_cierre)
 
                         # 3. Enviar (correo institucional único — configurado por variables de entorno)
                         res_mail = enviar_boleta_por_correo(email_destino, periodo_legible, pdf_enc_ind, nombre_sel, empresa_nombre)
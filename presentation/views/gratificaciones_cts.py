@@ -5,7 +5,6 @@ Gratificaciones: Ley 27735 — dos pagos anuales (Julio y Diciembre).
 CTS: D.L. 650 — dos depósitos anuales (Mayo y Noviembre).
 """
 import io
-import json
 import calendar
 import datetime
 
@@ -27,6 +26,8 @@ from core.use_cases.calculo_beneficios_sociales import (
     SEMESTRES_GRATI,
     PERIODOS_CTS,
 )
+from core.use_cases.excel_tabla import estilos_tabla_simple, excel_tabla_streaming
+from infrastructure.repositories.repo_planilla import montos_concepto_periodo
 
 C_NAVY  = colors.HexColor("#0F2744")
 C_STEEL = colors.HexColor("#1E4D8C")
@@ -55,14 +56,14 @@ def _anio_grati(periodo_cts: str, anio_dep: int) -> int:
 # ── Helpers de exportación ─────────────────────────────────────────────────────
 
 def _excel_beneficios(df: pd.DataFrame, titulo: str) -> io.BytesIO:
-    buf = io.BytesIO()
-    with pd.ExcelWriter(buf, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, startrow=3, sheet_name='Detalle')
-        ws = writer.sheets['Detalle']
-        ws['A1'] = titulo
-        ws['A2'] = f"Generado: {datetime.date.today().strftime('%d/%m/%Y')}"
-    buf.seek(0)
-    return buf
+    return excel_tabla_streaming(
+        df, 'Detalle',
+        titulos=[
+            (titulo, None),
+            (f"Generado: {datetime.date.today().strftime('%d/%m/%Y')}", None),
+        ],
+        fila_cabecera=4, estilos=estilos_tabla_simple(),
+    )
 
 
 def _pdf_beneficios(df: pd.DataFrame, titulo: str, empresa_nombre: str) -> io.BytesIO:
@@ -642,9 +643,9 @@ def _render_tab_gratificaciones(empresa_id: int, empresa_nombre: str,
                     )
                     db2.add(v)
                     db2.flush()
-                cj = json.loads(v.conceptos_json or '{}')
+                cj = dict(v.conceptos_json or {})  # copia: el JSON no detecta mutaciones
                 cj[f['_concepto_key']] = round(f['_monto_grati'], 2)
-                v.conceptos_json = json.dumps(cj)
+                v.conceptos_json = cj
                 registrados += 1
             db2.commit()
             st.success(
@@ -726,21 +727,16 @@ def _render_tab_cts(empresa_id: int, empresa_nombre: str,
             sem_grati = _semestre_grati(periodo_cts)
             anio_g    = _anio_grati(periodo_cts, anio_dep)
 
+            # Gratificaciones ya registradas en VariablesMes: una sola consulta por clave del JSON
+            gratis_registradas = montos_concepto_periodo(db, empresa_id, grati_pk, "GRATIFICACION (JUL/DIC)")
+
             filas = []
             for t in trabajadores:
                 # ── 1. Intentar leer grati registrada en VariablesMes ──────────
-                v_grati = db.query(VariablesMes).filter_by(
-                    empresa_id=empresa_id,
-                    trabajador_id=t.id,
-                    periodo_key=grati_pk,
-                ).first()
-                grati_val   = 0.0
+                grati_val   = gratis_registradas.get(t.id, 0.0)
                 grati_fuente = "sin dato"
-                if v_grati:
-                    cj = json.loads(v_grati.conceptos_json or '{}')
-                    grati_val = float(cj.get("GRATIFICACION (JUL/DIC)", 0.0))
-                    if grati_val > 0:
-                        grati_fuente = "planilla"
+                if grati_val > 0:
+                    grati_fuente = "planilla"
 
                 # ── 2. Si no hay, calcular grati teórica como estimado ─────────
                 if grati_val == 0.0:
@@ -1,4 +1,3 @@
-import json
 import streamlit as st
 import pandas as pd
 from sqlalchemy import or_
@@ -204,7 +203,7 @@ def render():
                 conceptos_vals = {}
                 for t in planilleros:
                     v = variables_exist.get(t.id)
-                    conceptos_vals[t.id] = json.loads(v.conceptos_json) if v else {}
+                    conceptos_vals[t.id] = (v.conceptos_json or {}) if v else {}
 
                 def get_v(t_id, field, default):
                     v = variables_exist.get(t_id)
@@ -213,7 +212,7 @@ def render():
                 def get_susp(t_id, cod):
                     v = variables_exist.get(t_id)
                     if v:
-                        susp = json.loads(getattr(v, 'suspensiones_json', '{}') or '{}')
+                        susp = v.suspensiones_json or {}
                         if not susp and cod == "07":
                             return getattr(v, 'dias_faltados', 0) or 0
                         return susp.get(cod, 0)
@@ -346,13 +345,10 @@ def render():
                                 v_exist.min_tardanza     = int(fila_t["Min. Tardanza"] or 0)
                                 v_exist.hrs_extras_25    = float(fila_t["Hrs Extras 25%"] or 0.0)
                                 v_exist.hrs_extras_35    = float(fila_t["Hrs Extras 35%"] or 0.0)
-                                v_exist.suspensiones_json = json.dumps(susp_dict)
+                                v_exist.suspensiones_json = susp_dict
                                 
                                 # Fusión de conceptos: preservar ajustes de auditoría
-                                try:
-                                    cj_actual = json.loads(v_exist.conceptos_json or '{}')
-                                except:
-                                    cj_actual = {}
+                                cj_actual = dict(v_exist.conceptos_json or {})  # copia: el JSON no detecta mutaciones
                                 
                                 # Limpiar solo conceptos operativos antiguos (no ajustes)
                                 for c in conceptos_ing + conceptos_desc:
@@ -360,7 +356,7 @@ def render():
                                 
                                 # Integrar nuevos valores de esta pestaña
                                 cj_actual.update(conceptos_data)
-                                v_exist.conceptos_json = json.dumps(cj_actual)
+                                v_exist.conceptos_json = cj_actual
                             else:
                                 db.add(VariablesMes(
                                     empresa_id=empresa_id, trabajador_id=trab_id, periodo_key=periodo_key,
@@ -368,8 +364,8 @@ def render():
                                     min_tardanza=int(fila_t["Min. Tardanza"] or 0),
                                     hrs_extras_25=float(fila_t["Hrs Extras 25%"] or 0.0),
                                     hrs_extras_35=float(fila_t["Hrs Extras 35%"] or 0.0),
-                                    suspensiones_json=json.dumps(susp_dict),
-                                    conceptos_json=json.dumps(conceptos_data),
+                                    suspensiones_json=susp_dict,
+                                    conceptos_json=conceptos_data,
                                 ))
 
                         db.commit()
@@ -399,7 +395,7 @@ def render():
                 def get_loc_concepto(t_id, key):
                     v = variables_exist.get(t_id)
                     if v:
-                        c = json.loads(v.conceptos_json or '{}')
+                        c = v.conceptos_json or {}
                         return float(c.get(key, 0.0))
                     return 0.0
 
@@ -458,22 +454,19 @@ def render():
                                 v_exist.dias_descuento_locador = dias
 
                                 # Fusión de conceptos: preservar ajustes de auditoría
-                                try:
-                                    cj_actual = json.loads(v_exist.conceptos_json or '{}')
-                                except:
-                                    cj_actual = {}
+                                cj_actual = dict(v_exist.conceptos_json or {})
 
                                 cj_actual.update(conceptos_data)
                                 # Eliminar entradas en cero para mantener el JSON limpio
                                 cj_actual = {k: v for k, v in cj_actual.items() if v}
-                                v_exist.conceptos_json = json.dumps(cj_actual)
+                                v_exist.conceptos_json = cj_actual
                             else:
                                 db.add(VariablesMes(
                                     empresa_id=empresa_id,
                                     trabajador_id=trab_id,
                                     periodo_key=periodo_key,
                                     dias_descuento_locador=dias,
-                                    conceptos_json=json.dumps(conceptos_data),
+                                    conceptos_json=conceptos_data,
                                 ))
 
                         db.commit()
@@ -550,7 +543,7 @@ def render():
                     df_ajustes_data = []
                     for t in planilleros:
                         v = variables_exist.get(t.id)
-                        cj = json.loads(v.conceptos_json or '{}') if v else {}
+                        cj = (v.conceptos_json or {}) if v else {}
                         df_ajustes_data.append({
                             "ID": t.id,
                             "Trabajador": t.nombres,
@@ -578,7 +571,7 @@ def render():
                             for _, fila in df_aj_edit.iterrows():
                                 tid = fila["ID"]
                                 v_ex = variables_exist.get(tid)
-                                cj = json.loads(v_ex.conceptos_json or '{}') if v_ex else {}
+                                cj = dict(v_ex.conceptos_json or {}) if v_ex else {}
                                 
                                 # Inyectar claves de ajuste en el JSON
                                 cj['_ajuste_afp'] = float(fila["Ajuste AFP (S/)"] or 0.0)
@@ -586,11 +579,11 @@ def render():
                                 cj['_ajuste_otros'] = float(fila["Otros Ajustes (S/)"] or 0.0)
                                 
                                 if v_ex:
-                                    v_ex.conceptos_json = json.dumps(cj)
+                                    v_ex.conceptos_json = cj
                                 else:
                                     db.add(VariablesMes(
                                         empresa_id=empresa_id, trabajador_id=tid, 
-                                        periodo_key=periodo_key, conceptos_json=json.dumps(cj)
+                                        periodo_key=periodo_key, conceptos_json=cj
                                     ))
                             db.commit()
                             st.session_state['_msg_asistencia'] = "Ajustes de Auditoría guardados correctamente."
@@ -321,12 +321,15 @@ def render():
                     if st.button(f"Confirmar Eliminación de {concepto_a_borrar}", type="secondary", use_container_width=True):
                         try:
                             # 🔒 CANDADO: Verificar uso en planillas cerradas
-                            planillas_historicas = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id).all()
+                            # Solo la columna de auditoría (el snapshot está diferido en el modelo)
+                            auditorias_historicas = db.query(PlanillaMensual.auditoria_json).filter(
+                                PlanillaMensual.empresa_id == empresa_id
+                            ).all()
                             en_uso = False
-                            for p in planillas_historicas:
+                            for (auditoria_json,) in auditorias_historicas:
                                 try:
                                     # Buscamos el nombre del concepto en el snapshot de auditoría
-                                    aud = json.loads(p.auditoria_json or '{}')
+                                    aud = json.loads(auditoria_json or '{}')
                                     for dni in aud:
                                         if concepto_a_borrar in aud[dni].get('ingresos', {}) or \
                                            concepto_a_borrar in aud[dni].get('descuentos', {}):
@@ -2,11 +2,6 @@ import streamlit as st
 import pandas as pd
 import datetime
 import io
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, portrait
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from infrastructure.database.connection import get_db
 from infrastructure.database.models import Trabajador, PlanillaMensual, LogEnvioBoleta
 
@@ -21,6 +16,12 @@ def determinar_regimen_trabajador(fecha_ingreso, regimen_empresa, fecha_acogimie
 
 
 def generar_pdf_ficha_trabajador(t, empresa_nombre, empresa_ruc, regimen_empresa):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, portrait
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=portrait(A4), rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
     elements = []
@@ -450,6 +451,7 @@ def render():
                         'ruc': st.session_state.get('empresa_activa_ruc', ''),
                         'domicilio': st.session_state.get('empresa_activa_domicilio', ''),
                         'representante': st.session_state.get('empresa_activa_representante', ''),
+                        'regimen':       st.session_state.get('empresa_activa_regimen', '') or '',
                     }
                     with st.spinner("Enviando boletas pendientes..."):
                         exitos_c, errores_c = enviar_boletas_pendientes_trabajador(
@@ -598,13 +600,13 @@ def render():
                             # Verificar si aparece en alguna planilla cerrada
                             try:
                                 import json as _jdel
-                                planillas_cerradas = db.query(PlanillaMensual).filter_by(
-                                    empresa_id=empresa_id, estado='CERRADA'
+                                resultados_cerrados = db.query(PlanillaMensual.resultado_json).filter(
+                                    PlanillaMensual.empresa_id == empresa_id, PlanillaMensual.estado == 'CERRADA'
                                 ).all()
                                 en_cerrada = any(
                                     any(str(row.get('DNI', '')) == str(t.num_doc)
-                                        for row in _jdel.loads(p.resultado_json or '[]'))
-                                    for p in planillas_cerradas
+                                        for row in _jdel.loads(resultado_json or '[]'))
+                                    for (resultado_json,) in resultados_cerrados
                                 )
                                 if en_cerrada:
                                     st.error(
@@ -9,11 +9,6 @@ import streamlit as st
 import pandas as pd
 import io
 from datetime import date, datetime
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import portrait, letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from infrastructure.database.connection import SessionLocal
 from infrastructure.database.models import Trabajador, Prestamo, CuotaPrestamo
 
@@ -21,6 +16,8 @@ from infrastructure.database.models import Trabajador, Prestamo, CuotaPrestamo
 # ─── HELPERS DE REPORTES ───────────────────────────────────────────────────────
 
 def generar_excel_cronograma(dp, empresa_nombre):
+    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+
     buffer = io.BytesIO()
     df = pd.DataFrame(dp['cuotas'])
     df = df[['numero_cuota', 'periodo_key', 'monto', 'estado']]
@@ -38,6 +35,11 @@ def generar_excel_cronograma(dp, empresa_nombre):
     return buffer
 
 def generar_pdf_cronograma(dp, empresa_nombre):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import portrait, letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=portrait(letter))
     elements = []
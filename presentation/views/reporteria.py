@@ -1,13 +1,19 @@
 import json
 import io
+import tempfile
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 
 import calendar as _cal
 from infrastructure.database.connection import SessionLocal
-from infrastructure.database.models import PlanillaMensual, Trabajador, VariablesMes, ParametroLegal
+from infrastructure.database.models import Trabajador, VariablesMes, ParametroLegal
+from infrastructure.repositories.repo_planilla import listar_planillas, obtener_planilla
+from core.domain.periodos import periodo_ordenable
 from core.use_cases.exportador_plame import generar_zip_plame
+from core.use_cases.prerender_cierre import ARTEFACTO_SABANA_XLSX, artefacto_tesoreria, leer_artefacto_vigente
+from infrastructure.services.cache_reportes import hash_contenido
+from presentation.components.descarga_diferida import boton_descarga_diferida
 
 _MESES_ES = {
     "01": "Enero", "02": "Febrero", "03": "Marzo", "04": "Abril",
@@ -22,6 +28,75 @@ def _periodo_legible(periodo_key: str) -> str:
     return periodo_key
 
 
+def _encabezado_empresa() -> dict:
+    """Datos de la empresa activa que se imprimen en la cabecera de los documentos."""
+    return {
+        'nombre':        st.session_state.get('empresa_activa_nombre', ''),
+        'ruc':           st.session_state.get('empresa_activa_ruc', ''),
+        'domicilio':     st.session_state.get('empresa_activa_domicilio', ''),
+        'representante': st.session_state.get('empresa_activa_representante', ''),
+        'regimen':       st.session_state.get('empresa_activa_regimen', '') or '',
+    }
+
+
+def _artefacto_cierre(empresa_id, periodo_key, nombre):
+    """Bytes pre-renderizados al cerrar el periodo (snapshot vigente en la BD), o None."""
+    return leer_artefacto_vigente(empresa_id, periodo_key, nombre, _encabezado_empresa())
+
+
+# Tamaño hasta el que el ZIP de la exportación histórica se arma en memoria
+EXPORTACION_EN_MEMORIA_MAX = 32 * 1024 * 1024
+
+
+def _render_exportacion_historica(empresa_id, periodos_key):
+    """Descarga del histórico de sábanas/locadores particionado por periodo (para BI)."""
+    from core.use_cases.exportador_historico import (
+        FORMATO_CSV, FORMATO_PARQUET, exportar_a_zip, parquet_disponible,
+    )
+
+    with st.expander("📦 Exportación histórica (BI)"):
+        st.caption(
+            "Un archivo por periodo (empresa_id=…/periodo=AAAA-MM), listo para cargar en "
+            "Power BI, DuckDB o Excel. Para todas las empresas use scripts/exportar_historico.py."
+        )
+        ordenados = sorted(periodos_key, key=periodo_ordenable)
+        c1, c2, c3 = st.columns(3)
+        desde = c1.selectbox("Desde:", ordenados, index=0, format_func=_periodo_legible, key="rep_hist_desde")
+        hasta = c2.selectbox("Hasta:", ordenados, index=len(ordenados) - 1,
+                             format_func=_periodo_legible, key="rep_hist_hasta")
+        formatos = [FORMATO_CSV] + ([FORMATO_PARQUET] if parquet_disponible() else [])
+        formato = c3.selectbox("Formato:", formatos, format_func=lambda f: "CSV (gzip)" if f == FORMATO_CSV else "Parquet",
+                               key="rep_hist_formato")
+        solo_cerradas = st.checkbox("Solo planillas cerradas", value=True, key="rep_hist_cerradas")
+
+        if st.button("Generar exportación", key="rep_hist_generar"):
+            # El ZIP pasa a disco apenas supera EXPORTACION_EN_MEMORIA_MAX: muchos periodos
+            # no se acumulan en RAM mientras se escriben.
+            with tempfile.SpooledTemporaryFile(max_size=EXPORTACION_EN_MEMORIA_MAX) as archivo_zip:
+                try:
+                    with st.spinner("Exportando histórico..."):
+                        resumen = exportar_a_zip(
+                            archivo_zip, empresa_id=empresa_id, desde=desde, hasta=hasta,
+                            formato=formato, solo_cerradas=solo_cerradas,
+                        )
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                if not resumen["archivos"]:
+                    st.info("No hay planillas en el rango seleccionado.")
+                    return
+                st.success(
+                    f"{resumen['periodos']} periodo(s), {resumen['filas_sabana']} fila(s) de planilla "
+                    f"y {resumen['filas_locadores']} de locadores."
+                )
+                archivo_zip.seek(0)
+                st.download_button(
+                    "📥 Descargar histórico (ZIP)", data=archivo_zip.read(),
+                    file_name=f"HISTORICO_{desde.replace('-', '')}_{hasta.replace('-', '')}.zip",
+                    mime="application/zip", key="rep_hist_descarga",
+                )
+
+
 def render():
     st.title("📊 Reportería de Planillas")
     
@@ -35,17 +110,10 @@ def render():
         st.error("Seleccione una empresa en el Dashboard para acceder a reportería.")
         return
 
-    # ── Cargar todas las planillas de la empresa ──────────────────────────────
-    from sqlalchemy.orm import joinedload
+    # ── Cargar todas las planillas de la empresa (solo metadatos) ─────────────
     try:
         db = SessionLocal()
-        planillas = (
-            db.query(PlanillaMensual)
-            .options(joinedload(PlanillaMensual.empresa))
-            .filter_by(empresa_id=empresa_id)
-            .order_by(PlanillaMensual.fecha_calculo.desc())
-            .all()
-        )
+        planillas = listar_planillas(db, empresa_id)
     except Exception as e:
         st.error(f"Error al conectar con la base de datos: {e}")
         return
@@ -105,6 +173,8 @@ def render():
         hide_index=True,
     )
 
+    _render_exportacion_historica(empresa_id, [r['Periodo Key'] for r in resumen])
+
     st.markdown("---")
     st.markdown("### Ver detalle de una planilla")
 
@@ -114,7 +184,8 @@ def render():
     sel_label = st.selectbox("Seleccione el periodo:", periodos_label, key="rep_periodo_sel")
     sel_key   = periodos_disp[periodos_label.index(sel_label)]
 
-    planilla_sel = next((p for p in planillas if p.periodo_key == sel_key), None)
+    # Solo el periodo elegido trae su snapshot JSON
+    planilla_sel = obtener_planilla(db, empresa_id, sel_key)
     if not planilla_sel:
         return
 
@@ -152,6 +223,12 @@ def render():
         st.error(f"No se pudo deserializar la planilla: {e}")
         return
 
+    # Hash del snapshot (más el filtro de cesados) — clave de la caché de reportes
+    _hash_snap = hash_contenido(
+        planilla_sel.resultado_json, planilla_sel.auditoria_json,
+        getattr(planilla_sel, 'honorarios_json', '') or '', sorted(dnis_a_omitir), sel_key,
+    )
+
     # Tabs de detalle
     tab_sabana, tab_resumen, tab_audit, tab_interfaces, tab_loc, tab_tesoreria, tab_bcp, tab_asiento, tab_personalizado = st.tabs(
         ["📋 Sábana de Planilla", "📊 Resumen de Obligaciones",
@@ -167,15 +244,20 @@ def render():
         with col_xl:
             try:
                 from presentation.views.calculo_mensual import generar_excel_sabana
-                buf_xl = generar_excel_sabana(
-                    df_planilla, empresa_nombre, sel_key,
-                    empresa_ruc=st.session_state.get('empresa_activa_ruc', '')
-                )
-                st.download_button(
-                    "📊 Descargar Excel", data=buf_xl,
-                    file_name=f"PLANILLA_{sel_key}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    use_container_width=True
+
+                def _sabana_xl():
+                    # Pre-renderizada al cierre — solo vale si no hubo que filtrar cesados
+                    guardado = None if dnis_a_omitir else _artefacto_cierre(empresa_id, sel_key, ARTEFACTO_SABANA_XLSX)
+                    return guardado or generar_excel_sabana(
+                        df_planilla, empresa_nombre, sel_key,
+                        empresa_ruc=st.session_state.get('empresa_activa_ruc', '')
+                    )
+
+                boton_descarga_diferida(
+                    "📊 Descargar Excel", _sabana_xl, f"PLANILLA_{sel_key}.xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="rep_dl_sabana_xl",
+                    tipo="sabana_xlsx", contenido_hash=_hash_snap, encabezado=_encabezado_empresa(),
+                    use_container_width=True,
                 )
             except Exception:
                 pass
@@ -324,6 +406,33 @@ def render():
                     except Exception as ex:
                         st.error(f"Error inesperado: {ex}")
 
+            # ── Paquete de cierre: todas las interfaces en una sola pasada ──
+            st.markdown("---")
+            st.markdown("#### 📦 Paquete de Cierre")
+            st.caption(
+                "PLAME, T-Registro, AFPnet, Telecrédito BCP (cuenta de cargo de la empresa) y "
+                "Asiento Contable en un solo ZIP, leyendo el snapshot una sola vez."
+            )
+            if st.button("Generar Paquete de Cierre", use_container_width=True, key="btn_paquete_cierre"):
+                from core.use_cases.exportador_cierre import exportar_cierre, empaquetar_zip, ExportacionCierreError
+                try:
+                    with st.spinner("Generando interfaces del periodo..."):
+                        paquete = exportar_cierre(empresa_id, sel_key)
+                    for exportador, msg in paquete["errores"].items():
+                        st.warning(f"⚠️ {exportador}: {msg}")
+                    if paquete["archivos"]:
+                        st.download_button(
+                            f"⬇️ Descargar PAQUETE_CIERRE_{sel_key}.zip",
+                            data=empaquetar_zip(paquete),
+                            file_name=f"PAQUETE_CIERRE_{sel_key}.zip", mime="application/zip",
+                            use_container_width=True, key="dl_paquete_cierre",
+                        )
+                    st.caption("⏱️ " + " · ".join(f"{k}: {v:.2f}s" for k, v in paquete["tiempos"].items()))
+                except ExportacionCierreError as ece:
+                    st.error(f"❌ {ece}")
+                except Exception as ex:
+                    st.error(f"Error inesperado: {ex}")
+
     with tab_loc:
         st.markdown("### 🧾 Locadores de Servicio — Valorización (4ta Categoría)")
         st.markdown(f"**Periodo:** {_periodo_legible(sel_key)}  |  **Estado:** {badge}")
@@ -370,31 +479,33 @@ def render():
             with col_l1:
                 try:
                     from presentation.views.calculo_mensual import generar_excel_honorarios
-                    buf_xl_loc = generar_excel_honorarios(
-                        df_loc_rep, empresa_nombre, sel_key,
-                        empresa_ruc=st.session_state.get('empresa_activa_ruc', '')
-                    )
-                    st.download_button(
-                        "📊 Descargar Excel Locadores", data=buf_xl_loc,
-                        file_name=f"HONORARIOS_{sel_key}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        use_container_width=True, key="rep_dl_hon_xl"
+                    boton_descarga_diferida(
+                        "📊 Descargar Excel Locadores",
+                        lambda: generar_excel_honorarios(
+                            df_loc_rep, empresa_nombre, sel_key,
+                            empresa_ruc=st.session_state.get('empresa_activa_ruc', '')
+                        ),
+                        f"HONORARIOS_{sel_key}.xlsx",
+                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key="rep_dl_hon_xl",
+                        tipo="honorarios_xlsx", contenido_hash=_hash_snap, encabezado=_encabezado_empresa(),
+                        use_container_width=True,
                     )
                 except Exception as ex_xl:
                     st.error(f"Error generando Excel: {ex_xl}")
             with col_l2:
                 try:
                     from presentation.views.calculo_mensual import generar_pdf_honorarios
-                    buf_pdf_loc = generar_pdf_honorarios(
-                        df_loc_rep, empresa_nombre, sel_key,
-                        empresa_ruc=st.session_state.get('empresa_activa_ruc', ''),
-                        empresa_regimen=st.session_state.get('empresa_activa_regimen', '')
-                    )
-                    st.download_button(
-                        "📄 Descargar PDF Locadores", data=buf_pdf_loc,
-                        file_name=f"HONORARIOS_{sel_key}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True, key="rep_dl_hon_pdf"
+                    _regimen_rep = st.session_state.get('empresa_activa_regimen', '') or ''
+                    boton_descarga_diferida(
+                        "📄 Descargar PDF Locadores",
+                        lambda: generar_pdf_honorarios(
+                            df_loc_rep, empresa_nombre, sel_key,
+                            empresa_ruc=st.session_state.get('empresa_activa_ruc', ''),
+                            empresa_regimen=_regimen_rep
+                        ),
+                        f"HONORARIOS_{sel_key}.pdf", "application/pdf", key="rep_dl_hon_pdf",
+                        tipo="honorarios_pdf", contenido_hash=_hash_snap, formato=_regimen_rep,
+                        encabezado=_encabezado_empresa(), use_container_width=True,
                     )
                 except Exception as ex_pdf:
                     st.error(f"Error generando PDF: {ex_pdf}")
@@ -470,9 +581,6 @@ def render():
                 key="sel_fmt_teso_rep",
                 help="Solo cambia cómo se presenta el reporte — no afecta ningún cálculo de planilla.",
             )
-            # En reportería el DF ya incluye la fila de totales, debemos limpiarla antes de enviarla al PDF
-            df_p_clean = df_planilla[df_planilla['Apellidos y Nombres'] != 'TOTALES'].copy()
-
             from infrastructure.database.models import Concepto as _ConceptoTeso
             _db_norem = SessionLocal()
             _conceptos_norem_rep = {
@@ -482,23 +590,32 @@ def render():
             }
             _db_norem.close()
 
-            buf_teso = generar_pdf_tesoreria(
-                df_planilla=df_p_clean,
-                df_loc=df_loc_t if not df_loc_t.empty else None,
-                empresa_nombre=empresa_nombre,
-                periodo_key=sel_key,
-                auditoria_data=auditoria,
-                empresa_ruc=st.session_state.get('empresa_activa_ruc', ''),
-                formato=fmt_teso_rep,
-                conceptos_no_remunerativos=_conceptos_norem_rep,
-            )
-            st.download_button(
-                "🏦 Descargar Reporte de Tesorería (PDF)",
-                data=buf_teso,
-                file_name=f"TESORERIA_{sel_key}.pdf",
-                mime="application/pdf",
-                use_container_width=True,
-                key="rep_dl_teso",
+            def _tesoreria_pdf():
+                # Pre-renderizado al cierre — solo vale si no hubo que filtrar cesados
+                guardado = None if dnis_a_omitir else _artefacto_cierre(
+                    empresa_id, sel_key, artefacto_tesoreria(fmt_teso_rep)
+                )
+                if guardado is not None:
+                    return guardado
+                # En reportería el DF ya incluye la fila de totales, debemos limpiarla antes de enviarla al PDF
+                df_p_clean = df_planilla[df_planilla['Apellidos y Nombres'] != 'TOTALES'].copy()
+                return generar_pdf_tesoreria(
+                    df_planilla=df_p_clean,
+                    df_loc=df_loc_t if not df_loc_t.empty else None,
+                    empresa_nombre=empresa_nombre,
+                    periodo_key=sel_key,
+                    auditoria_data=auditoria,
+                    empresa_ruc=st.session_state.get('empresa_activa_ruc', ''),
+                    formato=fmt_teso_rep,
+                    conceptos_no_remunerativos=_conceptos_norem_rep,
+                )
+
+            boton_descarga_diferida(
+                "🏦 Descargar Reporte de Tesorería (PDF)", _tesoreria_pdf,
+                f"TESORERIA_{sel_key}.pdf", "application/pdf", key="rep_dl_teso",
+                tipo="tesoreria_pdf", formato=fmt_teso_rep,
+                contenido_hash=hash_contenido(_hash_snap, _conceptos_norem_rep),
+                encabezado=_encabezado_empresa(), use_container_width=True,
             )
         except Exception as e_teso:
             st.error(f"Error generando Reporte de Tesorería: {e_teso}")
@@ -528,15 +645,10 @@ def render():
                 st.error("Debe ingresar la cuenta de cargo de la empresa.")
             else:
                 try:
-                    from core.use_cases.generador_interfaces import generar_txt_bcp
-                    
-                    # LECTURA DE SNAPSHOT
-                    hon_json_str = getattr(planilla_sel, 'honorarios_json', '[]') or '[]'
-                    df_loc_bcp = pd.read_json(io.StringIO(hon_json_str), orient='records')
+                    from core.use_cases.generador_interfaces import generar_txt_bcp, locadores_desde_snapshot
                     
-                    # Mapeo de seguridad para cuentas bancarias en Snapshot BCP
-                    if not df_loc_bcp.empty and 'N° Cuenta' not in df_loc_bcp.columns:
-                        df_loc_bcp['N° Cuenta'] = df_loc_bcp.apply(lambda r: str(r.get('cuenta_bancaria', '') or '') if str(r.get('Banco', '') or '') == 'BCP' else str(r.get('CCI', '') or ''), axis=1)
+                    # LECTURA DE SNAPSHOT (con mapeo de seguridad de cuentas bancarias)
+                    df_loc_bcp = locadores_desde_snapshot(getattr(planilla_sel, 'honorarios_json', '[]') or '[]')
 
                     txt_bcp = generar_txt_bcp(df_planilla, cta_cargo, f_pago, df_loc=df_loc_bcp, solo_bcp=solo_bcp_flag)
                     st.download_button(
@@ -551,6 +663,38 @@ def render():
                 except Exception as e:
                     st.error(f"Error inesperado: {e}")
 
+        # ── Pago multibanco: un archivo por banco en una sola pasada ──
+        st.markdown("---")
+        st.markdown("#### 🏦 Pago Multibanco")
+        st.caption(
+            "Separa la planilla y los locadores en un archivo por banco con formato registrado; "
+            "el resto se abona por CCI vía BCP. Lista a quienes no tienen cuenta o CCI válidos."
+        )
+        if st.button("Generar Archivos por Banco", use_container_width=True, key="btn_pago_multibanco"):
+            from core.use_cases.generador_interfaces import locadores_desde_snapshot
+            from core.use_cases.pagos_bancarios import generar_pagos_por_banco, empaquetar_pagos_zip
+            try:
+                res_pagos = generar_pagos_por_banco(
+                    df_planilla, {"BCP": cta_cargo}, f_pago,
+                    df_loc=locadores_desde_snapshot(getattr(planilla_sel, 'honorarios_json', '[]') or '[]'),
+                )
+                for banco_err, msg in res_pagos["errores"].items():
+                    st.error(f"⚠️ {banco_err}: {msg}")
+                if not res_pagos["resumen"].empty:
+                    st.dataframe(res_pagos["resumen"], use_container_width=True, hide_index=True)
+                if res_pagos["archivos"]:
+                    st.download_button(
+                        f"⬇️ Descargar PAGOS_{f_pago.strftime('%Y%m%d')}.zip",
+                        data=empaquetar_pagos_zip(res_pagos["archivos"]),
+                        file_name=f"PAGOS_{f_pago.strftime('%Y%m%d')}.zip", mime="application/zip",
+                        use_container_width=True, key="dl_pago_multibanco",
+                    )
+                if not res_pagos["observados"].empty:
+                    st.warning(f"⚠️ {len(res_pagos['observados'])} pago(s) no incluidos (pago manual):")
+                    st.dataframe(res_pagos["observados"], use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"Error inesperado: {e}")
+
     # ── TAB: ASIENTO CONTABLE (Excel de importación a SISCONT) ─────────────────
     with tab_asiento:
         from core.use_cases.generador_asiento_contable import VERSION_GENERADOR
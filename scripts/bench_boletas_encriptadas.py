@@ -0,0 +1,93 @@
+"""
+Benchmark: costo por boleta de la encriptación con DNI.
+
+Compara los dos caminos de generación de una boleta protegida:
+  - ANTES:   reportlab genera el PDF plano → PyPDF2 lo re-parsea y lo encripta
+             (`encriptar_pdf_en_memoria`).
+  - DESPUÉS: reportlab emite el PDF ya encriptado
+             (`generar_pdf_boletas_masivas(..., password=dni)`).
+
+Usa datos sintéticos — no toca la base de datos real.
+
+Uso: python scripts/bench_boletas_encriptadas.py [n_boletas]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+# El módulo de boletas importa la conexión; basta una BD SQLite desechable.
+os.environ.setdefault(
+    "DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "bench_planillas.db")
+)
+
+import pandas as pd
+
+from core.use_cases.envio_correos import encriptar_pdf_en_memoria
+from presentation.views.emision_boletas import generar_pdf_boletas_masivas
+
+
+def _datos_sinteticos(n: int):
+    filas, trab, aud = [], [], {}
+    for i in range(n):
+        dni = str(40000000 + i)
+        bruto, neto = 3500.0 + i, 3010.0 + i
+        filas.append({
+            'DNI': dni, 'Apellidos y Nombres': f"TRABAJADOR PRUEBA {i}",
+            'TOTAL BRUTO': bruto, 'NETO A PAGAR': neto, 'Aporte Seg. Social': 315.0,
+        })
+        trab.append({
+            'Num. Doc.': dni, 'Nombres y Apellidos': f"TRABAJADOR PRUEBA {i}",
+            'Cargo': 'Analista', 'Fecha Ingreso': date(2022, 3, 1),
+            'Sistema Pensión': 'INTEGRA', 'CUSPP': f"CUSPP{i:07d}", 'Seguro Social': 'ESSALUD',
+        })
+        aud[dni] = {
+            'dias': 30, 'rem_diaria': bruto / 30, 'seguro_social': 'ESSALUD',
+            'aporte_seg_social': 315.0,
+            'ingresos': {'Sueldo Básico': 3400.0 + i, 'Asignación Familiar': 100.0},
+            'descuentos': {'AFP Aporte': 350.0, 'AFP Prima': 60.0, 'AFP Comisión': 80.0},
+            'totales': {'ingreso': bruto, 'descuento': bruto - neto},
+        }
+    return pd.DataFrame(filas), pd.DataFrame(trab), pd.DataFrame(), aud
+
+
+def _medir(etiqueta, fn, dnis):
+    t0 = time.perf_counter()
+    tamanos = [len(fn(dni).getvalue()) for dni in dnis]
+    total = time.perf_counter() - t0
+    print(f"{etiqueta:<28} {total / len(dnis) * 1000:8.2f} ms/boleta   "
+          f"{sum(tamanos) / len(tamanos) / 1024:7.1f} KB/boleta")
+    return total
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    df_res, df_trab, df_var, aud = _datos_sinteticos(n)
+    empresa_info = {'nombre': 'EMPRESA BENCH S.A.C.', 'ruc': '20123456789',
+                    'domicilio': 'Av. Siempre Viva 123', 'representante': 'GERENTE GENERAL'}
+    dnis = list(df_res['DNI'])
+
+    def _antes(dni):
+        df_ind = df_res[df_res['DNI'] == dni]
+        pdf = generar_pdf_boletas_masivas(empresa_info, '07-2026', df_ind, df_trab, df_var, aud)
+        return encriptar_pdf_en_memoria(pdf, dni)
+
+    def _despues(dni):
+        df_ind = df_res[df_res['DNI'] == dni]
+        return generar_pdf_boletas_masivas(empresa_info, '07-2026', df_ind, df_trab, df_var, aud, password=dni)
+
+    _despues(dnis[0])  # calentar fuentes/estilos de reportlab
+    print(f"Boletas: {n}")
+    t_antes = _medir("ANTES (reportlab + PyPDF2)", _antes, dnis)
+    t_desp = _medir("DESPUÉS (reportlab encrypt)", _despues, dnis)
+    print(f"Mejora: {(1 - t_desp / t_antes) * 100:.1f}% menos tiempo por boleta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: consolidado del Dashboard Holding para N empresas.
+
+Crea una BD SQLite temporal con N empresas, 24 periodos cada una (planilla +
+resumen, snapshots de ~40 KB simulados) y un usuario con acceso_total, y mide
+`consolidar_holding`. Objetivo: < 1 s para 200 empresas.
+
+Uso: python scripts/bench_holding.py [n_empresas]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench_holding.db')}"
+
+from infrastructure.database.connection import Base, SessionLocal, engine
+from infrastructure.database.models import Empresa, Usuario, PlanillaMensual, ResumenPlanilla
+from core.use_cases.consolidado_holding import empresas_del_usuario, consolidar_holding
+
+_SNAPSHOT = "[" + ",".join(['{"DNI":"40000000","NETO A PAGAR":2500.0}'] * 1000) + "]"
+
+
+def _poblar(db, n_empresas: int):
+    db.add(Usuario(username="holding", password_hash="x", rol="admin", acceso_total=True))
+    for i in range(n_empresas):
+        emp = Empresa(ruc=f"20{i:09d}", razon_social=f"EMPRESA {i:03d} S.A.C.")
+        db.add(emp)
+        db.flush()
+        for m in range(24):
+            periodo = f"{m % 12 + 1:02d}-{2025 + m // 12}"
+            estado = "CERRADA" if m < 22 else "ABIERTA"
+            fecha = datetime(2025 + m // 12, m % 12 + 1, 28)
+            db.add(PlanillaMensual(
+                empresa_id=emp.id, periodo_key=periodo, estado=estado, fecha_calculo=fecha,
+                resultado_json=_SNAPSHOT, auditoria_json="{}", honorarios_json="[]",
+            ))
+            db.add(ResumenPlanilla(
+                empresa_id=emp.id, periodo_key=periodo, estado=estado, fecha_calculo=fecha,
+                n_trabajadores=150, total_bruto=450000.0, total_essalud=40500.0, total_neto=390000.0,
+            ))
+        db.commit()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        _poblar(db, n)
+        db.expunge_all()
+
+        tiempos = []
+        for _ in range(3):
+            t0 = time.perf_counter()
+            empresas = empresas_del_usuario(db, "holding")
+            df = consolidar_holding(db, empresas, umbral_boletas=202607)
+            tiempos.append(time.perf_counter() - t0)
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(_tmp, ignore_errors=True)
+
+    print(f"Empresas: {len(df)}  (planillas: {n * 24})")
+    print(f"  Consolidado holding: {tiempos[0]:7.3f} s (primera)  {min(tiempos):7.3f} s (mejor de 3)")
+    print(f"  Costo laboral total: S/ {df['Costo Laboral'].sum():,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: costo de importación (arranque en frío) por módulo.
+
+Importa cada módulo en un intérprete nuevo con `python -X importtime` y resume el
+tiempo total y los paquetes raíz más pesados (reportlab,
+openpyxl, pandas, ...). Sirve para vigilar que la pantalla de login y la compuerta
+de boletas no vuelvan a arrastrar librerías de reportes.
+
+Uso:
+    python scripts/bench_importtime.py                      # login, compuerta y todas las vistas
+    python scripts/bench_importtime.py core.use_cases.asiento_contable ...
+"""
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+# Módulos que se cargan siempre, antes de elegir vista
+_ARRANQUE = [
+    "presentation.views.login",
+    "presentation.components.sidebar",
+    "presentation.views.autorizacion_boletas",
+]
+
+_LINEA = re.compile(r"^import time:\s+(\d+)\s+\|\s+\d+\s+\|\s*(\S+)")
+
+
+def _medir(modulo: str) -> dict:
+    """Importa `modulo` en un proceso aparte y parsea la salida de -X importtime."""
+    entorno = {**os.environ, "PYTHONPATH": _ruta_raiz}
+    entorno.setdefault("DATABASE_URL", "sqlite://")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True, cwd=_ruta_raiz, env=entorno,
+    )
+    paquetes = {}
+    for linea in proc.stderr.splitlines():
+        m = _LINEA.match(linea)
+        if not m:
+            continue
+        # Tiempo propio (self) por paquete raíz: sumarlo no cuenta dos veces a los hijos
+        propio, raiz = int(m.group(1)), m.group(2).split(".")[0]
+        paquetes[raiz] = paquetes.get(raiz, 0) + propio
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["?"])[-1]
+    return {"total_ms": sum(paquetes.values()) / 1000, "paquetes": paquetes, "error": error}
+
+
+def main():
+    modulos = sys.argv[1:] or _ARRANQUE + sorted(
+        f"presentation.views.{p.stem}"
+        for p in (Path(_ruta_raiz) / "presentation" / "views").glob("*.py")
+        if p.stem not in ("__init__",) and f"presentation.views.{p.stem}" not in _ARRANQUE
+    )
+    print(f"{'Módulo':45s} {'Total':>9s}   Más pesados")
+    for modulo in modulos:
+        r = _medir(modulo)
+        pesados = sorted(r["paquetes"].items(), key=lambda kv: -kv[1])[:4]
+        detalle = ", ".join(f"{k} {v / 1000:.0f}" for k, v in pesados)
+        print(f"{modulo:45s} {r['total_ms']:7.0f} ms  {detalle}")
+        if r["error"]:
+            print(f"{'':45s} ⚠ {r['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: TXT Telecrédito BCP y Excel AFPnet para planillas grandes.
+
+Genera N trabajadores sintéticos (nombres con tildes/eñes, cuentas BCP y CCI) y
+mide `generar_txt_bcp` y `generar_excel_afpnet`. No toca la base de datos.
+
+Uso: python scripts/bench_interfaces_pago.py [n_trabajadores]
+"""
+import os
+import sys
+import time
+from datetime import date
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+import pandas as pd
+
+from core.use_cases.generador_interfaces import generar_txt_bcp, generar_excel_afpnet
+
+
+def _datos_sinteticos(n: int):
+    planilla, trab, aud = [], [], {}
+    for i in range(n):
+        dni = str(40000000 + i)
+        planilla.append({
+            'DNI': dni, 'Apellidos y Nombres': f"PÉREZ ÑAUPARI JOSÉ {i}",
+            'NETO A PAGAR': 2500.0 + i / 100, 'Sist. Pensión': 'AFP INTEGRA' if i % 4 else 'ONP',
+            'N° Cuenta': "191-12345678-0-12" if i % 3 else "00219100123456780123",
+        })
+        trab.append({
+            'Num. Doc.': dni, 'Apellido Paterno': "PÉREZ", 'Apellido Materno': "ÑAUPARI",
+            'Nombres y Apellidos': f"PÉREZ ÑAUPARI JOSÉ {i}", 'Tipo Doc.': "DNI",
+            'Fecha Ingreso': date(2022, 3, 1), 'CUSPP': f"{i:06d}ABCDEF", 'Sistema Pensión': "AFP INTEGRA",
+        })
+        aud[dni] = {'base_afp': 2800.0, 'suspensiones': {}, 'dias_computables': 30}
+    return pd.DataFrame(planilla), pd.DataFrame(trab), aud
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    df_planilla, df_trab, aud = _datos_sinteticos(n)
+
+    t0 = time.perf_counter()
+    txt = generar_txt_bcp(df_planilla, "191-1234567-0-12", date.today())
+    t_bcp = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    xlsx = generar_excel_afpnet(date.today().year, date.today().month, df_planilla, aud, df_trab)
+    t_afp = time.perf_counter() - t0
+
+    print(f"Trabajadores: {n}")
+    print(f"  TXT BCP:      {t_bcp:7.3f} s  ({len(txt.getvalue()) / 1024:,.0f} KB)")
+    print(f"  Excel AFPnet: {t_afp:7.3f} s  ({len(xlsx.getvalue()) / 1024:,.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: motor de variaciones entre dos sábanas de N trabajadores.
+
+Genera dos periodos sintéticos (con altas, bajas, horas extras variables y algunos
+saltos de neto/5ta) y mide `comparar_planillas`. No toca la base de datos.
+
+Uso: python scripts/bench_variaciones.py [n_trabajadores]
+"""
+import os
+import sys
+import time
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+import numpy as np
+import pandas as pd
+
+from core.use_cases.variaciones_planilla import comparar_planillas
+
+
+def _sabana(n: int, semilla: int, desde: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(semilla)
+    dnis = [str(40000000 + i) for i in range(desde, desde + n)]
+    bruto = 2500.0 + rng.integers(0, 4, n) * 120.0
+    quinta = np.where(rng.random(n) < 0.02, 350.0, 0.0)
+    df = pd.DataFrame({
+        "N°": range(1, n + 1), "DNI": dnis, "Apellidos y Nombres": [f"PÉREZ JOSÉ {d}" for d in dnis],
+        "Sist. Pensión": "AFP INTEGRA", "Sueldo Base": 2500.0, "Horas Extras": bruto - 2500.0,
+        "TOTAL BRUTO": bruto, "AFP Aporte": bruto * 0.1, "Ret. 5ta Cat.": quinta,
+        "NETO A PAGAR": bruto * 0.88 - quinta, "Aporte Seg. Social": bruto * 0.09,
+    })
+    return pd.concat([df, pd.DataFrame([{"Apellidos y Nombres": "TOTALES", "DNI": ""}])], ignore_index=True)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    df_anterior = _sabana(n, 1)
+    df_actual = _sabana(n, 2, desde=n // 50)  # ~2% de bajas y altas
+
+    t0 = time.perf_counter()
+    res = comparar_planillas(df_actual, df_anterior)
+    t = time.perf_counter() - t0
+
+    print(f"Trabajadores: {n}")
+    print(f"  Variaciones: {t:7.3f} s  ({len(res['deltas'])} deltas, {len(res['alertas'])} alertas)")
+    print(res["alertas"]["Alerta"].value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Compila los catálogos SUNAT (Tabla 21 y 22 PLAME) desde los CSV de la raíz al
+artefacto core/domain/catalogos_sunat_compilado.py. Correr cada vez que se edite
+un CSV (el Dockerfile lo ejecuta en cada build).
+
+Uso: python scripts/compilar_catalogos.py
+"""
+import os
+import sys
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+from core.domain.catalogos_sunat import _ARTEFACTO, compilar_artefacto
+
+
+def main():
+    r = compilar_artefacto()
+    print(f"[OK] {_ARTEFACTO.name}: T22 {r['t22']} conceptos, T21 {r['t21']} suspensiones")
+    print(f"     sha256 {r['digest']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Corre EXPLAIN sobre las consultas calientes y reporta las lecturas secuenciales.
+
+Uso:
+    python scripts/explicar_consultas.py                    # toma empresa/periodo de la última planilla
+    python scripts/explicar_consultas.py --empresa 3 --periodo 02-2026 --trabajador 120
+    python scripts/explicar_consultas.py --plan-real        # sin forzar índices (PostgreSQL)
+    python scripts/explicar_consultas.py --detalle          # imprime el plan de cada consulta
+
+Sale con 1 si alguna consulta lee una tabla completa.
+"""
+import argparse
+import os
+import sys
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+from sqlalchemy import select
+
+from infrastructure.database.connection import engine
+from infrastructure.database.diagnostico_consultas import revisar_consultas
+from infrastructure.database.models import PlanillaMensual, Trabajador
+
+
+def _parametros_por_defecto(conn) -> tuple:
+    """Empresa y periodo de la última planilla calculada, y un trabajador de esa empresa."""
+    fila = conn.execute(
+        select(PlanillaMensual.empresa_id, PlanillaMensual.periodo_key)
+        .order_by(PlanillaMensual.fecha_calculo.desc()).limit(1)
+    ).first()
+    empresa_id, periodo_key = fila if fila else (1, "01-2026")
+    trabajador_id = conn.execute(
+        select(Trabajador.id).where(Trabajador.empresa_id == empresa_id).limit(1)
+    ).scalar() or 1
+    conn.rollback()
+    return empresa_id, periodo_key, trabajador_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN de las consultas calientes.")
+    parser.add_argument("--empresa", type=int)
+    parser.add_argument("--periodo")
+    parser.add_argument("--trabajador", type=int)
+    parser.add_argument("--plan-real", action="store_true", help="No desactivar enable_seqscan (PostgreSQL)")
+    parser.add_argument("--detalle", action="store_true", help="Imprimir el plan completo")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        empresa_id, periodo_key, trabajador_id = _parametros_por_defecto(conn)
+        empresa_id = args.empresa or empresa_id
+        periodo_key = args.periodo or periodo_key
+        trabajador_id = args.trabajador or trabajador_id
+        print(f"Motor: {conn.dialect.name} · empresa {empresa_id} · periodo {periodo_key} · trabajador {trabajador_id}")
+        resultados = revisar_consultas(
+            conn, empresa_id, periodo_key, trabajador_id, forzar_indices=not args.plan_real
+        )
+
+    con_secuencial = 0
+    for nombre, plan, secuenciales in resultados:
+        if secuenciales:
+            con_secuencial += 1
+            print(f"  [SEQ] {nombre:<36} lectura completa de: {', '.join(sorted(set(secuenciales)))}")
+        else:
+            print(f"  [OK]  {nombre}")
+        if args.detalle or secuenciales:
+            print("        " + plan.replace("\n", "\n        "))
+
+    print(f"{len(resultados)} consultas · {con_secuencial} con lectura secuencial")
+    sys.exit(1 if con_secuencial else 0)
+
+
+if __name__ == "__main__":
+    main()
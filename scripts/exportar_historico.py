@@ -0,0 +1,62 @@
+"""
+Exporta el histórico de planillas (sábanas y locadores) en archivos particionados
+por empresa y periodo, listos para cargar en una herramienta de BI.
+
+Uso:
+    python scripts/exportar_historico.py --empresa 3 --desde 01-2025 --hasta 12-2025 --salida ./historico
+    python scripts/exportar_historico.py --todas --formato parquet --salida ./historico
+    python scripts/exportar_historico.py --todas --zip historico.zip
+"""
+import argparse
+import os
+import sys
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+from core.use_cases.exportador_historico import (
+    FORMATO_CSV, FORMATO_PARQUET, TAMANO_LOTE_DEFECTO, exportar_a_directorio, exportar_a_zip,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación histórica de planillas para BI.")
+    alcance = parser.add_mutually_exclusive_group(required=True)
+    alcance.add_argument("--empresa", type=int, help="ID de la empresa a exportar")
+    alcance.add_argument("--todas", action="store_true", help="Exportar todas las empresas")
+    parser.add_argument("--desde", help="Periodo inicial MM-YYYY (inclusive)")
+    parser.add_argument("--hasta", help="Periodo final MM-YYYY (inclusive)")
+    parser.add_argument("--formato", choices=(FORMATO_CSV, FORMATO_PARQUET), default=FORMATO_CSV)
+    parser.add_argument("--solo-cerradas", action="store_true", help="Solo planillas CERRADAS")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_DEFECTO,
+                        help="Planillas decodificadas a la vez (memoria acotada)")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--salida", help="Directorio de salida (particiones tipo Hive)")
+    destino.add_argument("--zip", help="Archivo ZIP de salida")
+    args = parser.parse_args()
+
+    opciones = dict(
+        empresa_id=None if args.todas else args.empresa,
+        desde=args.desde, hasta=args.hasta, formato=args.formato,
+        solo_cerradas=args.solo_cerradas, tamano_lote=max(1, args.lote),
+    )
+    try:
+        if args.zip:
+            with open(args.zip, "wb") as f:
+                resumen = exportar_a_zip(f, **opciones)
+        else:
+            resumen = exportar_a_directorio(args.salida, **opciones)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Periodos exportados: {resumen['periodos']}")
+    print(f"  Filas sábana:    {resumen['filas_sabana']}")
+    print(f"  Filas locadores: {resumen['filas_locadores']}")
+    print(f"  Archivos:        {resumen['archivos']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Aplica las migraciones pendientes del esquema (una vez por despliegue).
+
+Uso:
+    python scripts/migrar.py              # aplica lo pendiente
+    python scripts/migrar.py --verificar  # solo muestra la versión; sale con 1 si está atrasada
+
+En producción corre como Cloud Run Job con la imagen de la app, antes de publicar
+la revisión (ver Dockerfile). La app no migra sola salvo MIGRACIONES_AUTOMATICAS=1.
+"""
+import argparse
+import os
+import sys
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+from infrastructure.database.migraciones import aplicar_migraciones, verificar_esquema
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones versionadas del esquema.")
+    parser.add_argument("--verificar", action="store_true", help="Solo verificar, no aplicar")
+    args = parser.parse_args()
+
+    actual, esperada = verificar_esquema()
+    print(f"Versión del esquema: {actual} (esperada: {esperada})")
+    if args.verificar:
+        sys.exit(0 if actual >= esperada else 1)
+    if actual >= esperada:
+        print("[OK] Esquema al día.")
+        return
+    aplicadas = aplicar_migraciones()
+    print(f"[OK] {len(aplicadas)} migración(es) aplicadas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,8 +20,8 @@ if _ruta_raiz not in sys.path:
     sys.path.append(_ruta_raiz)
 
 from infrastructure.database.connection import SessionLocal
-from infrastructure.database.models import Empresa, PlanillaMensual
-from presentation.views.autorizacion_boletas import _periodo_ordenable, UMBRAL_PERIODO, _periodo_legible
+from infrastructure.repositories.repo_planilla import boletas_pendientes_por_empresa
+from presentation.views.autorizacion_boletas import UMBRAL_PERIODO, _periodo_legible
 
 
 def _enviar_recordatorio(correo_destino: str, empresa_nombre: str, periodo_legible: str) -> bool:
@@ -60,27 +60,14 @@ def _enviar_recordatorio(correo_destino: str, empresa_nombre: str, periodo_legib
 def main():
     db = SessionLocal()
     try:
-        empresas = db.query(Empresa).all()
+        # Una consulta agregada para todas las empresas (sin cargar planillas ni snapshots)
         notificadas = 0
-        for empresa in empresas:
-            planillas = db.query(PlanillaMensual).filter_by(
-                empresa_id=empresa.id, estado='CERRADA'
-            ).all()
-            pendientes = [
-                p for p in planillas
-                if not getattr(p, 'boletas_autorizado', False)
-                and _periodo_ordenable(p.periodo_key) >= UMBRAL_PERIODO
-            ]
-            if not pendientes:
+        for _, razon_social, correo, mas_antiguo, n_pendientes in boletas_pendientes_por_empresa(db, UMBRAL_PERIODO):
+            if not correo:
+                print(f"⚠️  {razon_social} tiene boletas pendientes pero no tiene correo de contacto registrado.")
                 continue
-            if not empresa.correo_electronico:
-                print(f"⚠️  {empresa.razon_social} tiene boletas pendientes pero no tiene correo de contacto registrado.")
-                continue
-
-            pendientes.sort(key=lambda p: _periodo_ordenable(p.periodo_key))
-            periodo_mas_antiguo = _periodo_legible(pendientes[0].periodo_key)
-            if _enviar_recordatorio(empresa.correo_electronico, empresa.razon_social, periodo_mas_antiguo):
-                print(f"✅ Recordatorio enviado a {empresa.razon_social} ({empresa.correo_electronico})")
+            if _enviar_recordatorio(correo, razon_social, _periodo_legible(mas_antiguo)):
+                print(f"✅ Recordatorio enviado a {razon_social} ({correo}) — {n_pendientes} periodo(s) pendiente(s)")
                 notificadas += 1
 
         print(f"\nProceso terminado. Empresas notificadas: {notificadas}")
@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+# Igual patrón que presentation/app.py para poder importar el resto del proyecto
+_ruta_raiz = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ruta_raiz not in sys.path:
+    sys.path.append(_ruta_raiz)
+
+# connection.py exige DATABASE_URL al importarse; los tests corren sobre SQLite
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from infrastructure.database.connection import Base, SessionLocal, engine
+from infrastructure.database.instrumentacion import medir_sql
+
+
+@pytest.fixture
+def registro_sql():
+    """Registro de las sentencias SQL ejecutadas durante el test."""
+    with medir_sql() as registro:
+        yield registro
+
+
+@pytest.fixture
+def presupuesto_sql():
+    """
+    Fija un presupuesto de consultas para un bloque:
+
+        def test_plame(presupuesto_sql):
+            with presupuesto_sql(12):
+                generar_zip_plame(...)
+
+    Falla si el bloque ejecuta más de `maximo` sentencias o repite un mismo patrón
+    `max_repeticiones` veces o más (N+1).
+    """
+    @contextmanager
+    def _presupuesto(maximo: int, max_repeticiones: int = None):
+        with medir_sql() as registro:
+            yield registro
+        assert registro.sentencias <= maximo, (
+            f"{registro.sentencias} sentencias SQL (presupuesto {maximo}). Más lentas: "
+            + "; ".join(sql[:120] for _, sql in registro.lentas)
+        )
+        if max_repeticiones is not None:
+            repetidas = registro.repetidas(max_repeticiones)
+            assert not repetidas, "Posible N+1: " + "; ".join(f"{n}× {p[:120]}" for p, n, _ in repetidas)
+
+    return _presupuesto
+
+
+# ── Base de datos de tests ────────────────────────────────────────────────────
+@pytest.fixture
+def bd():
+    """Esquema completo sobre la BD de tests (SQLite en memoria), vacío y descartado al terminar."""
+    import infrastructure.database.models  # noqa: registra todos los modelos en Base.metadata
+    Base.metadata.create_all(bind=engine)
+    try:
+        yield
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+def _sembrar(n_trabajadores: int, periodo_key: str) -> int:
+    """
+    Empresa con `n_trabajadores` en planilla: parámetros legales, variables, un concepto
+    SUNAT, un préstamo con cuota pendiente cada dos trabajadores y la planilla CERRADA.
+    """
+    from infrastructure.database.models import (
+        Concepto, CuotaPrestamo, Empresa, ParametroLegal, PlanillaMensual, Prestamo, Trabajador, VariablesMes,
+    )
+
+    db = SessionLocal()
+    try:
+        ruc = f"20{db.query(Empresa).count() + 100000001:09d}"
+        empresa = Empresa(ruc=ruc, razon_social=f"EMPRESA DE PRUEBA {ruc} S.A.C.")
+        db.add(empresa)
+        db.flush()
+        db.add(Concepto(empresa_id=empresa.id, nombre="BONO PRODUCTIVIDAD", tipo="INGRESO", codigo_sunat="0909"))
+        db.add(ParametroLegal(
+            empresa_id=empresa.id, periodo_key=periodo_key, rmv=1130.0, uit=5350.0, tasa_essalud=9.0,
+            tasa_eps=6.75, tasa_onp=13.0, tope_afp=12234.34,
+            h_ap=10.0, h_pr=1.37, h_fl=1.47, h_mx=0.0, i_ap=10.0, i_pr=1.37, i_fl=1.55, i_mx=0.0,
+            p_ap=10.0, p_pr=1.37, p_fl=1.60, p_mx=0.0, pr_ap=10.0, pr_pr=1.37, pr_fl=1.69, pr_mx=0.0,
+        ))
+        auditoria, sabana = {}, []
+        for i in range(n_trabajadores):
+            dni = f"0{7000000 + i}" if i % 3 == 0 else str(40000000 + i)   # algunos con 0 inicial
+            afp = i % 2 == 1
+            t = Trabajador(
+                empresa_id=empresa.id, num_doc=dni, nombres=f"TRABAJADOR {i:04d}", sueldo_base=2000.0 + i,
+                situacion="ACTIVO", tipo_contrato="PLANILLA", fecha_ingreso=date(2022, 1, 1),
+                sistema_pension="AFP INTEGRA" if afp else "ONP", banco="BCP",
+                cuenta_bancaria=f"191{i:011d}", cci=f"002191{i:014d}",
+            )
+            db.add(t)
+            db.flush()
+            db.add(VariablesMes(
+                empresa_id=empresa.id, trabajador_id=t.id, periodo_key=periodo_key,
+                suspensiones_json={"07": 1} if i % 4 == 0 else {}, conceptos_json={"BONO PRODUCTIVIDAD": 100.0},
+                hrs_extras_25=1.0, notas_gestion=f"nota {i}" if i % 5 == 0 else "",
+            ))
+            if i % 2 == 0:
+                prestamo = Prestamo(empresa_id=empresa.id, trabajador_id=t.id, monto_total=600.0, numero_cuotas=3)
+                db.add(prestamo)
+                db.flush()
+                db.add(CuotaPrestamo(prestamo_id=prestamo.id, numero_cuota=1, periodo_key=periodo_key,
+                                     monto=200.0, estado="PENDIENTE"))
+            auditoria[dni] = {
+                "ingresos": {"Sueldo Base": 2000.0 + i, "BONO PRODUCTIVIDAD": 100.0},
+                "descuentos": {},
+                "detalle_pensiones": {"tipo": "AFP" if afp else "ONP",
+                                      "desglose": {"aporte": 200.0, "comision": 0.0, "prima": 30.0}},
+                "quinta": {"retencion": 0.0},
+            }
+            sabana.append({"N°": i + 1, "DNI": dni, "Apellidos y Nombres": f"TRABAJADOR {i:04d}",
+                           "Sist. Pensión": "AFP INTEGRA" if afp else "ONP", "Sueldo Base": 2000.0 + i,
+                           "TOTAL BRUTO": 2100.0 + i, "NETO A PAGAR": 1850.0 + i})
+        sabana.append({"N°": "", "DNI": "", "Apellidos y Nombres": "TOTALES", "Sist. Pensión": "",
+                       "Sueldo Base": sum(f["Sueldo Base"] for f in sabana),
+                       "TOTAL BRUTO": sum(f["TOTAL BRUTO"] for f in sabana),
+                       "NETO A PAGAR": sum(f["NETO A PAGAR"] for f in sabana)})
+        db.add(PlanillaMensual(
+            empresa_id=empresa.id, periodo_key=periodo_key, estado="CERRADA",
+            resultado_json=json.dumps(sabana), auditoria_json=json.dumps(auditoria), honorarios_json="[]",
+        ))
+        db.commit()
+        return empresa.id
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def sembrar_periodo(bd):
+    """
+    Fábrica de datos de un periodo cerrado:
+
+        empresa_id = sembrar_periodo(50)               # 50 trabajadores en 05-2026
+    """
+    def _fabrica(n_trabajadores: int, periodo_key: str = "05-2026") -> int:
+        return _sembrar(n_trabajadores, periodo_key)
+
+    return _fabrica
@@ -0,0 +1,64 @@
+"""
+Pre-renders del cierre: solo se sirven si el índice local apunta al snapshot vigente
+en la BD (el /tmp de cada instancia de Cloud Run puede haber quedado viejo).
+"""
+import pytest
+
+from core.use_cases import prerender_cierre
+from infrastructure.database.connection import SessionLocal
+from infrastructure.database.models import Concepto, PlanillaMensual
+from infrastructure.services import almacen_artefactos
+
+PERIODO = "05-2026"
+ENCABEZADO = {'nombre': "EMPRESA", 'ruc': "20100000001", 'regimen': "GENERAL"}
+
+
+@pytest.fixture
+def publicado(sembrar_periodo, tmp_path, monkeypatch):
+    """Empresa con el periodo cerrado y un artefacto publicado con la clave vigente."""
+    monkeypatch.setattr(almacen_artefactos, "ARTEFACTOS_DIR", str(tmp_path))
+    empresa_id = sembrar_periodo(3)
+    db = SessionLocal()
+    try:
+        clave = prerender_cierre.clave_vigente(db, empresa_id, PERIODO, ENCABEZADO)
+        assert clave is None   # sin índice local ni siquiera se lee el snapshot
+        planilla = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id, periodo_key=PERIODO).one()
+        clave = prerender_cierre._clave_planilla(db, planilla, ENCABEZADO)
+    finally:
+        db.close()
+    almacen_artefactos.guardar_artefacto(empresa_id, clave, "sabana.xlsx", b"XLSX")
+    almacen_artefactos.publicar_snapshot(empresa_id, PERIODO, clave)
+    return empresa_id
+
+
+def _leer(empresa_id):
+    return prerender_cierre.leer_artefacto_vigente(empresa_id, PERIODO, "sabana.xlsx", ENCABEZADO)
+
+
+def test_sirve_el_snapshot_vigente(publicado):
+    assert _leer(publicado) == b"XLSX"
+    assert prerender_cierre.leer_artefacto_vigente(
+        publicado, PERIODO, "sabana.xlsx", {**ENCABEZADO, 'ruc': "20999999999"}) is None
+
+
+def test_indice_viejo_no_se_sirve(publicado):
+    """Otra instancia reabrió y volvió a cerrar el periodo con otro resultado."""
+    db = SessionLocal()
+    try:
+        planilla = db.query(PlanillaMensual).filter_by(empresa_id=publicado, periodo_key=PERIODO).one()
+        planilla.resultado_json = planilla.resultado_json.replace("TOTALES", "TOTAL")
+        db.commit()
+    finally:
+        db.close()
+    assert _leer(publicado) is None
+    assert almacen_artefactos.leer_artefacto(publicado, PERIODO, "sabana.xlsx", None) is None
+
+
+def test_conceptos_no_remunerativos_cambian_la_clave(publicado):
+    db = SessionLocal()
+    try:
+        db.query(Concepto).filter_by(empresa_id=publicado).update({Concepto.no_remunerativo: True})
+        db.commit()
+    finally:
+        db.close()
+    assert _leer(publicado) is None
@@ -0,0 +1,129 @@
+"""
+Asiento contable SISCONT comparado contra un archivo de referencia.
+
+tests/datos/asiento_siscont.json se generó con la implementación fila a fila
+anterior al libro de partidas agregado: mismas líneas (cuenta, Debe, Haber,
+tercero) en el mismo orden y mismos totales.
+"""
+import json
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from core.use_cases.generador_asiento_contable import (
+    AsientoContableError, construir_libro_asiento, generar_asiento_desde_snapshot,
+)
+
+DATOS = os.path.join(os.path.dirname(__file__), "datos")
+PERIODO = "05-2026"
+
+_SISTEMAS = ["ONP", "AFP INTEGRA", "AFP PRIMA", "ONP", "AFP HABITAT", "NO AFECTO"]
+
+
+def planilla_asiento():
+    """Sábana, auditoría, conceptos y configuración contable fijos (AFP/ONP, HE, préstamos, ajustes)."""
+    sabana, aud = [], {}
+    for i in range(6):
+        dni = f"0{7100000 + i}" if i % 3 == 0 else str(41000000 + i)
+        sist = _SISTEMAS[i]
+        sueldo = 1500.0 + i * 123.45
+        ingresos = {"Sueldo Base": sueldo, "Asignación Familiar": 113.0 if i % 2 else 0.0}
+        if i % 3 == 1:
+            ingresos["Horas Extras 25% (4.0h)"] = 31.25 + i
+        if i == 2:
+            ingresos["Descanso Médico"] = 210.0
+            ingresos["Gratificación"] = 999.0          # excluida por diseño
+        if i % 2 == 0:
+            ingresos["BONO PRODUCTIVIDAD"] = 150.0 + i
+        bruto = sum(ingresos.values()) - ingresos.get("Gratificación", 0.0)
+        onp = round(bruto * 0.13, 2) if sist == "ONP" else 0.0
+        afp = (round(bruto * 0.10, 2), round(bruto * 0.0137, 2), round(bruto * 0.0155, 2)) \
+            if sist.startswith("AFP") else (0.0, 0.0, 0.0)
+        ret5ta = 45.5 if i == 4 else 0.0
+        descuentos = {}
+        if i % 2 == 1:
+            descuentos["PRÉSTAMO CUOTA 1/3"] = 200.0
+        if i == 3:
+            descuentos["ADELANTO QUINCENA"] = 300.0
+            descuentos[f"APORTE OBLIGATORIO {sist}"] = onp
+        if i == 1:
+            descuentos["Ajuste AFP (Audit)"] = -12.5
+        if i == 0:
+            descuentos["Ajuste AFP (Audit)"] = 7.25
+            descuentos["Faltas"] = 50.0
+        if ret5ta:
+            descuentos["Retención 5ta Cat."] = ret5ta
+        aud[dni] = {"ingresos": ingresos, "descuentos": descuentos}
+        sabana.append({
+            "N°": i + 1, "DNI": dni, "Apellidos y Nombres": f"TRABAJADOR ASIENTO {i}", "Sist. Pensión": sist,
+            "TOTAL BRUTO": bruto, "ONP (13%)": onp, "AFP Aporte": afp[0], "AFP Seguro": afp[1],
+            "AFP Comis.": afp[2], "Ret. 5ta Cat.": ret5ta, "Aporte Seg. Social": round(bruto * 0.09, 2),
+        })
+    sabana.append({"N°": "", "DNI": "", "Apellidos y Nombres": "TOTALES", "Sist. Pensión": ""})
+
+    conceptos = [
+        SimpleNamespace(nombre="BONO PRODUCTIVIDAD", cuenta_contable="6224001"),
+        SimpleNamespace(nombre="SUELDO BASICO", cuenta_contable="6211001"),
+        SimpleNamespace(nombre="ASIGNACION FAMILIAR", cuenta_contable="6211002"),
+        SimpleNamespace(nombre="ADELANTO QUINCENA", cuenta_contable=" 1411001 "),
+    ]
+    cfg = SimpleNamespace(
+        cuenta_horas_extra_25="6211003", cuenta_horas_extra_35="6211004",
+        cuenta_descanso_vacacional="6215001", cuenta_descanso_medico="6215002",
+        cuenta_licencia_goce="6215003", cuenta_essalud_gasto="6271001",
+        cuenta_essalud_pasivo="4031001", cuenta_onp="4032001", cuenta_retencion_5ta="4017001",
+        cuenta_remuneraciones_por_pagar="4111001", cuenta_prestamos_personal="1411002",
+        cuenta_afp_habitat="4170001", cuenta_afp_integra="4170002",
+        cuenta_afp_prima="4170003", cuenta_afp_profuturo="4170004",
+    )
+    return pd.DataFrame(sabana), aud, conceptos, cfg
+
+
+def _lineas_excel(buffer) -> list:
+    df = pd.read_excel(buffer, sheet_name="Asiento", dtype={"Cuenta": str, "Cod.Prov.Clie": str, "RUC": str})
+    df = df.fillna("")
+    return [
+        [r["Cuenta"], round(float(r["Monto Debe"]), 2), round(float(r["Monto Haber"]), 2),
+         r["Cod.Prov.Clie"], r["RUC"], r["R.Social"], r["Fecha"], r["Num.Doc"], r["Glosa"]]
+        for _, r in df.iterrows()
+    ]
+
+
+def test_asiento_siscont_igual_a_referencia():
+    df, aud, conceptos, cfg = planilla_asiento()
+    with open(os.path.join(DATOS, "asiento_siscont.json"), encoding="utf-8") as f:
+        esperado = json.load(f)
+
+    lineas = _lineas_excel(generar_asiento_desde_snapshot(PERIODO, df, aud, conceptos, cfg))
+    assert lineas == esperado["lineas"]
+
+    total_debe = round(sum(ln[1] for ln in lineas), 2)
+    total_haber = round(sum(ln[2] for ln in lineas), 2)
+    assert total_debe == total_haber == esperado["total_debe"] == esperado["total_haber"]
+
+
+def test_totales_por_cuenta_del_libro():
+    df, aud, conceptos, cfg = planilla_asiento()
+    with open(os.path.join(DATOS, "asiento_siscont.json"), encoding="utf-8") as f:
+        esperado = json.load(f)
+
+    totales = construir_libro_asiento(PERIODO, df, aud, conceptos, cfg)["totales"]
+    por_cuenta = {}
+    for cuenta, debe, haber, *_ in esperado["lineas"]:
+        d, h = por_cuenta.get(cuenta, (0.0, 0.0))
+        por_cuenta[cuenta] = (d + debe, h + haber)
+    assert {c: (round(d, 2), round(h, 2)) for c, d, h in totales.itertuples(index=False)} == \
+        {c: (round(d, 2), round(h, 2)) for c, (d, h) in por_cuenta.items()}
+
+
+def test_cuentas_faltantes():
+    df, aud, conceptos, cfg = planilla_asiento()
+    cfg.cuenta_onp = ""
+    conceptos = [c for c in conceptos if c.nombre != "BONO PRODUCTIVIDAD"]
+    with pytest.raises(AsientoContableError) as exc:
+        generar_asiento_desde_snapshot(PERIODO, df, aud, conceptos, cfg)
+    assert exc.value.cuentas_faltantes == [
+        'Concepto "BONO PRODUCTIVIDAD" (Maestro de Conceptos)', "ONP (Configuración Contable)",
+    ]
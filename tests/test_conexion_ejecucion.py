@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from infrastructure.database import connection
+from infrastructure.database.connection import SessionLocal, alcance_sesion
+
+
+@pytest.fixture
+def motor(tmp_path, monkeypatch):
+    """Motor SQLite en archivo (QueuePool: conexiones distintas de verdad) como engine de la app."""
+    motor = create_engine(f"sqlite:///{tmp_path / 'alcance.db'}")
+    monkeypatch.setattr(connection, "engine", motor)
+    monkeypatch.setattr(SessionLocal, "kw", {**SessionLocal.kw, "bind": motor})
+    with motor.begin() as conn:
+        conn.execute(text("CREATE TABLE notas (id INTEGER PRIMARY KEY, texto TEXT)"))
+    motor.checkouts = 0
+
+    @event.listens_for(motor, "checkout")
+    def _contar(*_):
+        motor.checkouts += 1
+
+    yield motor
+    motor.dispose()
+
+
+def _insertar(sesion, texto):
+    sesion.execute(text("INSERT INTO notas (texto) VALUES (:t)"), {"t": texto})
+
+
+def _notas(motor) -> list:
+    with motor.connect() as conn:
+        return [t for (t,) in conn.execute(text("SELECT texto FROM notas ORDER BY id"))]
+
+
+def test_sesiones_secuenciales_comparten_un_checkout(motor):
+    with alcance_sesion():
+        for texto in ("uno", "dos", "tres"):
+            db = SessionLocal()
+            _insertar(db, texto)
+            db.commit()
+            db.close()
+    assert motor.checkouts == 1
+    assert _notas(motor) == ["uno", "dos", "tres"]
+
+
+def test_sesion_intercalada_no_pierde_su_commit(motor):
+    with alcance_sesion():
+        a = SessionLocal()
+        _insertar(a, "a1")
+        a.commit()
+        b = SessionLocal()                          # toma la conexión compartida
+        b.execute(text("SELECT count(*) FROM notas")).scalar()
+        _insertar(a, "a2")                          # b sigue abierta: a va al pool
+        a.commit()
+        b.close()                                   # el rollback de b no toca a a2
+        a.close()
+    assert _notas(motor) == ["a1", "a2"]
+
+
+def test_sesion_anidada_usa_otra_conexion(motor):
+    with alcance_sesion():
+        externa = SessionLocal()
+        externa.execute(text("SELECT count(*) FROM notas")).scalar()   # transacción abierta
+        interna = SessionLocal()
+        _insertar(interna, "descartada")
+        interna.rollback()
+        _insertar(interna, "interna")
+        interna.commit()
+        interna.close()
+        _insertar(externa, "externa")
+        externa.commit()
+        externa.close()
+    assert motor.checkouts == 3          # la compartida + una del pool por transacción de la interna
+    assert _notas(motor) == ["interna", "externa"]
@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from infrastructure.database.diagnostico_consultas import CONSULTAS_CALIENTES, revisar_consultas
+from infrastructure.database.migraciones import aplicar_migraciones
+
+
+@pytest.fixture
+def motor_migrado():
+    """Base SQLite nueva llevada a la última versión por las migraciones (incluye los índices de v4)."""
+    motor = create_engine("sqlite://")
+    aplicar_migraciones(motor, log=lambda _: None)
+    yield motor
+    motor.dispose()
+
+
+def test_consultas_calientes_sin_lecturas_completas(motor_migrado):
+    with motor_migrado.connect() as conn:
+        resultados = revisar_consultas(conn, 1, "05-2026", 1)
+    assert [nombre for nombre, _, _ in resultados] == list(CONSULTAS_CALIENTES)
+    completas = {nombre: (secuenciales, plan) for nombre, plan, secuenciales in resultados if secuenciales}
+    assert not completas, completas
+
+
+def test_indice_faltante_se_detecta(motor_migrado):
+    with motor_migrado.begin() as conn:
+        conn.execute(text("DROP INDEX ix_log_envio_empresa_periodo"))
+    with motor_migrado.connect() as conn:
+        resultados = {nombre: secuenciales for nombre, _, secuenciales in revisar_consultas(conn, 1, "05-2026", 1)}
+    assert resultados["envios_del_periodo"] == ["log_envio_boletas"]
@@ -0,0 +1,102 @@
+import gzip
+import io
+import json
+import tempfile
+import zipfile
+
+import pandas as pd
+import pytest
+
+from core.use_cases.exportador_historico import (
+    FORMATO_PARQUET, exportar_a_directorio, exportar_a_zip, iterar_snapshots, parquet_disponible,
+)
+from infrastructure.database.connection import SessionLocal
+from infrastructure.database.models import PlanillaMensual
+
+_PERIODOS = ["11-2025", "12-2025", "01-2026", "02-2026", "03-2026"]
+
+
+@pytest.fixture
+def historico(sembrar_periodo):
+    """Empresa con cinco periodos (de 11-2025 a 03-2026); el último con un locador."""
+    empresa_id = sembrar_periodo(3, _PERIODOS[0])
+    db = SessionLocal()
+    try:
+        base = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id).one()
+        for periodo in _PERIODOS[1:]:
+            db.add(PlanillaMensual(
+                empresa_id=empresa_id, periodo_key=periodo, estado="CERRADA",
+                resultado_json=base.resultado_json, auditoria_json="{}", honorarios_json="[]",
+            ))
+        db.flush()
+        ultima = db.query(PlanillaMensual).filter_by(empresa_id=empresa_id, periodo_key=_PERIODOS[-1]).one()
+        ultima.estado = "ABIERTA"
+        ultima.honorarios_json = json.dumps([{"DNI": "10456789", "Locador": "CONSULTORÍA", "NETO A PAGAR": 1500.0}])
+        db.commit()
+    finally:
+        db.close()
+    return empresa_id
+
+
+def _consultas_de_json(registro) -> int:
+    return sum(n for patron, (n, _) in registro.patrones.items() if "resultado_json" in patron)
+
+
+def test_json_decodificado_por_lotes(historico, registro_sql):
+    db = SessionLocal()
+    try:
+        snapshots = iterar_snapshots(db, historico, tamano_lote=2)
+        meta, df_sabana, _ = next(snapshots)
+        assert _consultas_de_json(registro_sql) == 1         # solo el primer lote
+        assert meta["periodo"] == "2025-11"
+        assert df_sabana["DNI"].tolist()[0] == "07000000"    # el DNI sigue siendo texto
+        periodos = [meta["periodo"]] + [m["periodo"] for m, _, _ in snapshots]
+    finally:
+        db.close()
+    assert periodos == ["2025-11", "2025-12", "2026-01", "2026-02", "2026-03"]
+    assert _consultas_de_json(registro_sql) == 3             # ceil(5 / 2)
+
+
+def test_particiones_en_directorio(historico, tmp_path):
+    resumen = exportar_a_directorio(str(tmp_path), empresa_id=historico, desde="12-2025", hasta="02-2026")
+
+    assert resumen == {"periodos": 3, "filas_sabana": 9, "filas_locadores": 0, "archivos": 3}
+    rutas = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*") if p.is_file())
+    assert rutas == [
+        f"sabana/empresa_id={historico}/periodo={p}/part-0.csv.gz" for p in ("2025-12", "2026-01", "2026-02")
+    ]
+    df = pd.read_csv(tmp_path / rutas[0], dtype={"DNI": str})
+    assert df.columns[:4].tolist() == ["empresa_id", "empresa_ruc", "periodo", "estado"]
+    assert set(df["periodo"]) == {"2025-12"} and "TOTALES" not in set(df["Apellidos y Nombres"])
+
+
+def test_zip_con_locadores_y_solo_cerradas(historico):
+    # Como en Reportería: archivo temporal que pasa a disco (aquí desde el primer KB)
+    buf = tempfile.SpooledTemporaryFile(max_size=1024)
+    resumen = exportar_a_zip(buf, empresa_id=historico)
+    assert buf._rolled
+    buf.seek(0)
+    with buf, zipfile.ZipFile(buf) as zf:
+        nombres = zf.namelist()
+        loc = pd.read_csv(io.BytesIO(gzip.decompress(zf.read(
+            f"locadores/empresa_id={historico}/periodo=2026-03/part-0.csv.gz"))))
+    assert resumen["archivos"] == len(nombres) == 6
+    assert loc["estado"].tolist() == ["ABIERTA"] and loc["Locador"].tolist() == ["CONSULTORÍA"]
+
+    assert exportar_a_zip(io.BytesIO(), empresa_id=historico, solo_cerradas=True)["periodos"] == 4
+
+
+def test_rango_vacio(historico, tmp_path):
+    resumen = exportar_a_directorio(str(tmp_path), empresa_id=historico, desde="01-2027", hasta="12-2027")
+    assert resumen == {"periodos": 0, "filas_sabana": 0, "filas_locadores": 0, "archivos": 0}
+    assert not any(tmp_path.iterdir())
+
+
+def test_parquet(historico, tmp_path):
+    if not parquet_disponible():
+        with pytest.raises(ValueError, match="pyarrow"):
+            exportar_a_directorio(str(tmp_path), empresa_id=historico, formato=FORMATO_PARQUET)
+        return
+    resumen = exportar_a_directorio(str(tmp_path), empresa_id=historico, formato=FORMATO_PARQUET)
+    archivo = tmp_path / f"sabana/empresa_id={historico}/periodo=2026-01/part-0.parquet"
+    assert resumen["archivos"] == 6 and len(pd.read_parquet(archivo)) == 3
@@ -0,0 +1,20 @@
+import zipfile
+
+from core.use_cases.exportador_plame import generar_zip_plame
+
+
+def _contar_consultas(presupuesto_sql, empresa_id):
+    with presupuesto_sql(10, max_repeticiones=3) as registro:
+        zip_buf = generar_zip_plame(empresa_id, 5, 2026)
+    return registro.sentencias, zip_buf
+
+
+def test_plame_consultas_constantes_con_n_trabajadores(sembrar_periodo, presupuesto_sql):
+    # Dos empresas con distinto tamaño sobre la misma BD: el número de consultas no depende de N
+    pocas, _ = _contar_consultas(presupuesto_sql, sembrar_periodo(5))
+    muchas, zip_buf = _contar_consultas(presupuesto_sql, sembrar_periodo(60))
+    assert pocas == muchas
+
+    with zipfile.ZipFile(zip_buf) as zf:
+        rem = [n for n in zf.namelist() if n.endswith(".rem")]
+        assert rem and zf.read(rem[0]).decode("utf-8").strip()
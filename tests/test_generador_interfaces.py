@@ -0,0 +1,151 @@
+"""
+Salidas de Telecrédito BCP y AFPnet comparadas contra archivos de referencia.
+
+Los archivos de tests/datos/ se generaron con la implementación fila a fila
+anterior a la versión por columnas: el TXT debe coincidir byte a byte y el
+Excel celda a celda (valores y anchos de columna).
+"""
+import json
+import os
+import re
+from datetime import date
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from core.use_cases import generador_interfaces
+from core.use_cases.generador_interfaces import (
+    _limpiar_texto_bcp, _limpiar_textos_bcp, generar_excel_afpnet, generar_txt_bcp,
+)
+
+DATOS = os.path.join(os.path.dirname(__file__), "datos")
+
+_NOMBRES = ["PÉREZ ÑAUPARI JOSÉ", "Güemes Núñez, María", "O'BRIEN  ANA", "ÁLVAREZ-ÍÑIGO ÚRSULA", "LÓPEZ"]
+_CUENTAS = ["191-12345678-0-12", "00219100123456780123", "", "19412345678901", None, "nan", "191-7654321-0-99"]
+
+
+def planilla_referencia():
+    """Planilla, locadores, maestro de trabajadores y auditoría fijos (tildes, CCI, cuentas vacías)."""
+    planilla, trab, aud = [], [], {}
+    for i in range(40):
+        dni = f"0{7000000 + i}" if i % 5 == 0 else str(40000000 + i)
+        apellidos = _NOMBRES[i % len(_NOMBRES)]
+        planilla.append({
+            "DNI": dni, "Apellidos y Nombres": f"{apellidos} {i}",
+            "NETO A PAGAR": 0.0 if i % 11 == 0 else 1800.0 + i * 37.45,
+            "Sist. Pensión": "ONP" if i % 4 == 0 or i % 13 == 7 else ("NO AFECTO" if i % 9 == 0 else "AFP PRIMA"),
+            "N° Cuenta": _CUENTAS[i % len(_CUENTAS)], "CCI": f"0021910{i:013d}" if i % 2 else "",
+        })
+        if i % 13 == 7:
+            continue                          # sin ficha en el maestro
+        pat, _, mat = apellidos.upper().partition(" ")
+        trab.append({
+            "Num. Doc.": dni, "Apellido Paterno": pat, "Apellido Materno": mat.split(" ")[0] if i % 6 else "",
+            "Nombres y Apellidos": f"{apellidos} {i}".upper() if i % 3 else f"NOMBRE {i}",
+            "Tipo Doc.": ["DNI", "CE", "PASAPORTE", "PTP"][i % 4],
+            "Fecha Ingreso": date(2026, 5, 3) if i % 8 == 1 else date(2021, 1, 15),
+            "CUSPP": f"{i:04d}CUSPPX" + ("LARGO123" if i % 10 == 3 else ""),
+        })
+        aud[dni] = {
+            "base_afp": 1800.0 + i * 37.455,
+            "dias_computables": 30,
+            "suspensiones": {"07": 30} if i % 10 == 2 else ({"21": 15, "16": 15} if i % 10 == 6 else {"05": 2}),
+        }
+    planilla.append({"DNI": "", "Apellidos y Nombres": "TOTALES", "NETO A PAGAR": 99999.0, "Sist. Pensión": ""})
+    locadores = pd.DataFrame([
+        {"DNI": "10456789", "Locador": "CONSULTORÍA ÑUÑOA", "N° Cuenta": "191-55555555-0-55", "NETO A PAGAR": 3000.0},
+        {"DNI": "20654321", "Locador": "SERVICIOS GÜIÑO", "N° Cuenta": "00219100999999999999", "NETO A PAGAR": 1200.5},
+        {"DNI": "30111222", "Locador": "SIN PAGO", "N° Cuenta": "191-1-0-1", "NETO A PAGAR": 0.0},
+    ])
+    return pd.DataFrame(planilla), locadores, pd.DataFrame(trab), aud
+
+
+def _leer_referencia(nombre, modo="rb"):
+    with open(os.path.join(DATOS, nombre), modo) as f:
+        return f.read()
+
+
+def _celdas_y_anchos(buffer) -> dict:
+    ws = load_workbook(buffer).active
+    return {
+        "filas": [list(fila) for fila in ws.iter_rows(values_only=True)],
+        "anchos": {letra: dim.width for letra, dim in ws.column_dimensions.items()},
+    }
+
+
+@pytest.mark.parametrize("con_locadores, solo_bcp, archivo", [
+    (False, False, "telecredito_planilla.txt"),
+    (True, False, "telecredito_con_locadores.txt"),
+    (True, True, "telecredito_solo_bcp.txt"),
+])
+def test_txt_bcp_identico_a_referencia(con_locadores, solo_bcp, archivo):
+    df_planilla, df_loc, _, _ = planilla_referencia()
+    txt = generar_txt_bcp(
+        df_planilla, "191-2345678-0-11", date(2026, 5, 29), df_loc if con_locadores else None, solo_bcp=solo_bcp,
+    )
+    assert txt.getvalue() == _leer_referencia(archivo)
+
+
+def test_excel_afpnet_identico_a_referencia():
+    df_planilla, _, df_trab, aud = planilla_referencia()
+    xlsx = generar_excel_afpnet(2026, 5, df_planilla, aud, df_trab)
+    assert _celdas_y_anchos(xlsx) == json.loads(_leer_referencia("afpnet_celdas.json", "r"))
+
+
+def test_excel_afpnet_sin_cuspp():
+    df_planilla, _, df_trab, aud = planilla_referencia()
+    df_trab.loc[df_trab["Num. Doc."] == "40000001", "CUSPP"] = ""
+    with pytest.raises(ValueError, match="40000001"):
+        generar_excel_afpnet(2026, 5, df_planilla, aud, df_trab)
+
+
+def test_limpieza_vectorizada_igual_a_la_escalar():
+    textos = pd.Series(_NOMBRES + ["", None, "  çédille  ", "ǅemal"], dtype=object)
+    assert _limpiar_textos_bcp(textos).tolist() == [_limpiar_texto_bcp(t) for t in textos]
+
+
+def _planilla_afp(n):
+    df_planilla = pd.DataFrame({
+        "DNI": [str(40000000 + i) for i in range(n)],
+        "Apellidos y Nombres": [f"PÉREZ ÑAUPARI JOSÉ {i}" for i in range(n)],
+        "Sist. Pensión": "AFP INTEGRA", "NETO A PAGAR": 2500.0,
+    })
+    df_trab = pd.DataFrame({
+        "Num. Doc.": df_planilla["DNI"], "Apellido Paterno": "PÉREZ", "Apellido Materno": "ÑAUPARI",
+        "Nombres y Apellidos": df_planilla["Apellidos y Nombres"], "Tipo Doc.": "DNI",
+        "Fecha Ingreso": date(2022, 3, 1), "CUSPP": [f"{i:06d}ABCDEF" for i in range(n)],
+    })
+    aud = {dni: {"base_afp": 2800.0 + i * 0.005, "suspensiones": {}, "dias_computables": 30}
+           for i, dni in enumerate(df_planilla["DNI"])}
+    aud["40000003"]["base_afp"] = float("nan")
+    aud["40000004"]["base_afp"] = float("inf")
+    return df_planilla, aud, df_trab
+
+
+def test_excel_afpnet_masivo():
+    n = 3000
+    df_planilla, aud, df_trab = _planilla_afp(n)
+    celdas = _celdas_y_anchos(generar_excel_afpnet(2026, 5, df_planilla, aud, df_trab))
+    filas = celdas["filas"]
+    assert len(filas) == n
+    assert [f[0] for f in filas] == list(range(1, n + 1))
+    assert filas[0] == [1, "000000ABCDEF", 0, "40000000", "PÉREZ", "ÑAUPARI", "JOSÉ 0",
+                        "S", "N", "N", None, 2800, 0, 0, 0, "N", None]
+    assert filas[-1][1:4] == ["002999ABCDEF", 0, "40002999"]
+    assert filas[3][11] is None and filas[4][11] is None     # NaN / inf → celda vacía
+    assert celdas["anchos"]["B"] == 14 and celdas["anchos"]["G"] == 11
+
+
+def test_xlsx_una_hoja_igual_a_openpyxl(monkeypatch):
+    """El XML insertado produce las mismas celdas que escribir con ws.append (y sin marcador, se usa ese camino)."""
+    filas = [
+        [1, "  con espacios ", "", None, 2800.555, float("nan"), "A&B <ñ>", 0.0],
+        [2, "X" * 40, "texto", -1.5, float("-inf"), 10 ** 12, "", None],
+    ]
+    anchos = [5, 30, 10, 8, 12, 12, 10, 6]
+    referencia = _celdas_y_anchos(generador_interfaces._xlsx_una_hoja_openpyxl("AFPnet", filas, anchos))
+    assert _celdas_y_anchos(generador_interfaces._xlsx_una_hoja("AFPnet", filas, anchos)) == referencia
+
+    monkeypatch.setattr(generador_interfaces, "_SHEET_DATA_VACIO", re.compile(rb"(?!)"))
+    assert _celdas_y_anchos(generador_interfaces._xlsx_una_hoja("AFPnet", filas, anchos)) == referencia
@@ -0,0 +1,93 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from infrastructure.database import connection, migraciones
+from infrastructure.database.migraciones import VERSION_ESPERADA, aplicar_migraciones, version_actual
+
+
+def test_base_nueva_queda_en_la_version_esperada():
+    motor = create_engine("sqlite://")
+    assert aplicar_migraciones(motor, log=lambda _: None) == list(range(1, VERSION_ESPERADA + 1))
+    with motor.connect() as conn:
+        assert version_actual(conn) == VERSION_ESPERADA
+        assert inspect(conn).has_table("variables_mes")
+    assert aplicar_migraciones(motor, log=lambda _: None) == []      # idempotente
+
+
+def test_legado_sentencia_fallida_aborta_la_version(monkeypatch):
+    monkeypatch.setattr(migraciones, "_INCREMENTALES_LEGADO", [
+        "CREATE TABLE legado_a (x INTEGER)",
+        "ALTER TABLE no_existe ADD COLUMN y INTEGER",
+        "CREATE TABLE legado_b (x INTEGER)",
+    ])
+    motor = create_engine("sqlite://")
+    with motor.connect() as conn:
+        with pytest.raises(RuntimeError, match="no_existe"):
+            with conn.begin():
+                migraciones._aplicar_incrementales_legado(conn)
+        assert not inspect(conn).has_table("legado_b")
+
+
+def test_indices_v4_concurrentes_en_postgres():
+    import infrastructure.database.models  # noqa: registra todos los modelos en Base.metadata
+    from sqlalchemy.dialects import postgresql
+    indices = {ix.name: ix for ix in connection.Base.metadata.tables["cuotas_prestamo"].indexes}
+    ddl = migraciones._ddl_indice_concurrente(indices["ix_cuotas_pendientes_periodo"], postgresql.dialect())
+    assert ddl.startswith("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cuotas_pendientes_periodo ON cuotas_prestamo")
+    assert "WHERE" in ddl
+    assert 4 in migraciones._VERSIONES_SIN_TRANSACCION
+
+
+def test_json_heredado_se_lee_por_clave_tras_v5(sembrar_periodo):
+    from infrastructure.database.models import VariablesMes
+    from infrastructure.repositories.repo_planilla import (
+        dias_suspension_periodo, montos_concepto_periodo, total_concepto_periodo,
+    )
+
+    empresa_id = sembrar_periodo(4)
+    # Texto tal como lo dejaban las versiones anteriores (json.dumps sin allow_nan=False)
+    legado = [
+        ('{"BONO PRODUCTIVIDAD": 150.5, "OTRO": NaN}', '{"07": 2}'),
+        ('{"BONO PRODUCTIVIDAD": Infinity}', '{"07": -Infinity, "20": 1}'),
+        ('', None),
+        ('{"OTRO": 5}', 'no es json'),
+    ]
+    with connection.engine.begin() as conn:
+        filas = conn.execute(
+            text("SELECT id, trabajador_id FROM variables_mes WHERE empresa_id = :e ORDER BY id"), {"e": empresa_id},
+        ).fetchall()
+        for (id_, _), (conceptos, suspensiones) in zip(filas, legado):
+            conn.execute(
+                text("UPDATE variables_mes SET conceptos_json = :c, suspensiones_json = :s WHERE id = :id"),
+                {"c": conceptos, "s": suspensiones, "id": id_},
+            )
+        migraciones._variables_a_jsonb(conn)
+    t = [trabajador_id for _, trabajador_id in filas]
+
+    db = connection.SessionLocal()
+    try:
+        assert montos_concepto_periodo(db, empresa_id, "05-2026", "BONO PRODUCTIVIDAD") == {t[0]: 150.5}
+        assert total_concepto_periodo(db, empresa_id, "05-2026", "BONO PRODUCTIVIDAD") == 150.5
+        assert montos_concepto_periodo(db, empresa_id, "05-2026", "OTRO") == {t[3]: 5.0}
+        assert dias_suspension_periodo(db, empresa_id, "05-2026", "07") == {t[0]: 2}
+        assert dias_suspension_periodo(db, empresa_id, "05-2026", "20") == {t[1]: 1}
+        variables = {v.trabajador_id: v for v in db.query(VariablesMes).filter_by(empresa_id=empresa_id)}
+        assert variables[t[1]].conceptos_json == {"BONO PRODUCTIVIDAD": None}
+        assert variables[t[2]].conceptos_json == {} and variables[t[2]].suspensiones_json == {}
+        assert variables[t[3]].suspensiones_json == {}
+    finally:
+        db.close()
+
+
+def test_cast_jsonb_tolera_nan_e_infinity():
+    if connection.engine.dialect.name != "postgresql":
+        pytest.skip("el cast a JSONB solo corre en PostgreSQL")
+    with connection.engine.connect() as conn:
+        conn.exec_driver_sql(migraciones._FUNCION_JSONB_SEGURO)
+        seguro = text("SELECT pg_temp.jsonb_seguro(:t)")
+        assert conn.execute(seguro, {"t": '{"a": NaN, "b": -Infinity, "c": Infinity, "NaN": 1}'}).scalar() == {
+            "a": None, "b": None, "c": None, "NaN": 1,
+        }
+        assert conn.execute(seguro, {"t": '{"07": 2}'}).scalar() == {"07": 2}
+        assert conn.execute(seguro, {"t": "no es json"}).scalar() == {}
+        conn.rollback()
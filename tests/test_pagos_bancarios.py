@@ -0,0 +1,121 @@
+"""
+Pago masivo multibanco: un archivo por banco con el layout de ancho fijo de su
+formato, totales de cabecera que cuadran con el detalle y observados (sin cuenta
+ni CCI válidos) fuera de los archivos, con su motivo.
+"""
+import zipfile
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from core.use_cases import pagos_bancarios
+from core.use_cases.pagos_bancarios import empaquetar_pagos_zip, generar_pagos_por_banco
+
+FECHA = date(2026, 5, 29)
+CARGO_BCP = "191-2345678-0-11"
+
+_LARGO_CABECERA_BCP = 113
+_LARGO_DETALLE_BCP = 195
+
+
+def planilla_bancos():
+    filas = [
+        # DNI, nombre, banco, cuenta, cci, neto
+        ("40000001", "PÉREZ ÑAUPARI JOSÉ", "BCP", "191-12345678-0-12", "", 1837.45),    # corriente (14)
+        ("40000002", "GÜEMES NÚÑEZ MARÍA", "BCP", "1911234567801", "", 1500.0),          # ahorros (13)
+        ("07000003", "O'BRIEN ANA", "BCP", "191-1", "00219100123456780123", 2100.1),     # cuenta mala → CCI
+        ("40000004", "ÁLVAREZ ÚRSULA", "INTERBANK", "2003001234567", "00320000300123456789", 999.99),
+        ("40000005", "LÓPEZ LUIS", "INTERBANK", "", "00219100123456780199", 1200.0),     # CCI de otro banco
+        ("40000006", "SIN BANCO", "", "", "", 800.0),
+        ("40000007", "SIN CUENTA", "BBVA", None, None, 950.0),
+        ("40000008", "CCI CORTO", "BBVA", "", "0111234", 700.0),
+        ("40000009", "NETO CERO", "BCP", "19112345678013", "", 0.0),
+    ]
+    df = pd.DataFrame(filas, columns=["DNI", "Apellidos y Nombres", "Banco", "N° Cuenta", "CCI", "NETO A PAGAR"])
+    df.loc[len(df)] = ["", "TOTALES", "", "", "", float(df["NETO A PAGAR"].sum())]
+    return df
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpia():
+    pagos_bancarios._cache_validacion.clear()
+    yield
+    pagos_bancarios._cache_validacion.clear()
+
+
+def test_formato_bcp_ancho_fijo_y_totales():
+    res = generar_pagos_por_banco(planilla_bancos(), {"BCP": CARGO_BCP}, FECHA)
+    assert list(res["archivos"]) == ["BCP_HABERES_20260529.txt"] and res["errores"] == {}
+
+    cabecera, *detalle = res["archivos"]["BCP_HABERES_20260529.txt"].decode("utf-8").split("\r\n")
+    assert len(cabecera) == _LARGO_CABECERA_BCP
+    assert all(len(linea) == _LARGO_DETALLE_BCP for linea in detalle)
+
+    # Cabecera: cantidad de abonos, fecha, cuenta de cargo y monto total = suma del detalle
+    montos = [float(linea[177:194]) for linea in detalle]
+    assert int(cabecera[1:7]) == len(detalle) == 4
+    assert cabecera[7:15] == "20260529"
+    assert cabecera[15:21] == "OC0001" and cabecera[21:41] == "1912345678011".ljust(20)
+    assert float(cabecera[41:58]) == round(sum(montos), 2) == 6437.54
+
+    por_dni = {linea[23:38].strip(): linea for linea in detalle}
+    assert por_dni["40000001"][1:22] == "C" + "19112345678012".ljust(20)
+    assert por_dni["40000002"][1:22] == "A" + "1911234567801".ljust(20)
+    assert por_dni["07000003"][1:22] == "I" + "00219100123456780123"        # cuenta inválida → CCI
+    assert por_dni["40000004"][1:22] == "I" + "00320000300123456789"        # INTERBANK sin formato propio → CCI
+    assert por_dni["40000001"][38:113].rstrip() == "PEREZ NAUPARI JOSE"
+
+    assert res["resumen"].to_dict("records") == [{"Banco": "BCP", "Abonos": 4, "Monto": 6437.54}]
+
+
+def test_observados_con_motivo():
+    res = generar_pagos_por_banco(planilla_bancos(), {"BCP": CARGO_BCP}, FECHA)
+    motivos = dict(zip(res["observados"]["DNI"], res["observados"]["Motivo"]))
+    assert motivos == {
+        "40000005": "El CCI no corresponde al banco registrado",
+        "40000006": "Sin banco (pago en efectivo/cheque)",
+        "40000007": "Sin CCI y sin cuenta válida del banco",
+        "40000008": "CCI inválido (deben ser 20 dígitos)",
+    }
+    incluidos = res["resumen"]["Monto"].sum() + res["observados"]["Neto"].sum()
+    assert round(incluidos, 2) == round(planilla_bancos()["NETO A PAGAR"].iloc[:-1].sum(), 2)
+
+
+def test_falta_cuenta_de_cargo():
+    res = generar_pagos_por_banco(planilla_bancos(), {}, FECHA)
+    assert res["archivos"] == {}
+    assert res["errores"] == {"BCP": "Falta la cuenta de cargo de la empresa en BCP."}
+
+
+def test_banco_con_formato_propio_y_locadores(monkeypatch):
+    """Un banco registrado recibe sus abonos por cuenta propia; el resto sigue yendo al BCP."""
+    def _formato_interbank(pagos, cuenta_cargo, fecha_pago):
+        lineas = [f"{r.cuenta:<13}{r.dni:<15}{r.neto:015.2f}" for r in pagos.itertuples()]
+        return f"IBK_{fecha_pago:%Y%m%d}.txt", "\n".join([cuenta_cargo] + lineas).encode("ascii")
+
+    monkeypatch.setitem(pagos_bancarios.FORMATOS_BANCO, "INTERBANK", {
+        "generar": _formato_interbank, "longitudes_cuenta": (13,), "interbancario": False,
+    })
+    locadores = pd.DataFrame([
+        {"DNI": "10456789", "Locador": "CONSULTORÍA ÑUÑOA", "Banco": "BCP", "N° Cuenta": "191-55555555-0-55",
+         "CCI": "", "NETO A PAGAR": 3000.0},
+        {"DNI": "20654321", "Locador": "SIN PAGO", "Banco": "BCP", "N° Cuenta": "19155555555056",
+         "CCI": "", "NETO A PAGAR": 0.0},
+    ])
+    res = generar_pagos_por_banco(planilla_bancos(), {"BCP": CARGO_BCP, "INTERBANK": "200-3000000001"}, FECHA,
+                                  df_loc=locadores)
+
+    assert sorted(res["archivos"]) == ["BCP_HABERES_20260529.txt", "IBK_20260529.txt"]
+    assert res["archivos"]["IBK_20260529.txt"].decode("ascii").split("\n") == [
+        "200-3000000001", "2003001234567" + "40000004".ljust(15) + "000000000999.99",
+    ]
+    assert res["resumen"].to_dict("records") == [
+        {"Banco": "BCP", "Abonos": 4, "Monto": 8437.55},
+        {"Banco": "INTERBANK", "Abonos": 1, "Monto": 999.99},
+    ]
+    bcp = res["archivos"]["BCP_HABERES_20260529.txt"].decode("utf-8").split("\r\n")
+    assert "10456789" in {linea[23:38].strip() for linea in bcp[1:]}
+
+    with zipfile.ZipFile(empaquetar_pagos_zip(res["archivos"])) as zf:
+        assert sorted(zf.namelist()) == sorted(res["archivos"])
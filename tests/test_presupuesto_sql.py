@@ -0,0 +1,169 @@
+"""
+Presupuesto de consultas de las cargas de cada pantalla: el número de sentencias
+no puede crecer con la cantidad de trabajadores (sin N+1). El PLAME se mide en
+test_exportador_plame.py.
+"""
+import pandas as pd
+import pytest
+
+from infrastructure.database.connection import SessionLocal
+from infrastructure.database.models import Concepto, Empresa
+from infrastructure.repositories.repo_planilla import (
+    cargar_conceptos_df, cargar_parametros, cargar_trabajadores_df, cargar_variables_df, obtener_planilla,
+    trabajadores_boletas_df, variables_periodo_df,
+)
+
+PERIODO = "05-2026"
+
+
+def _sentencias(presupuesto_sql, maximo, cargar, empresa_id) -> int:
+    with presupuesto_sql(maximo, max_repeticiones=2) as registro:
+        cargar(empresa_id)
+    return registro.sentencias
+
+
+def _comparar(presupuesto_sql, sembrar_periodo, maximo, cargar):
+    pocas = _sentencias(presupuesto_sql, maximo, cargar, sembrar_periodo(4))
+    muchas = _sentencias(presupuesto_sql, maximo, cargar, sembrar_periodo(40))
+    assert pocas == muchas
+
+
+# ── Cálculo mensual ───────────────────────────────────────────────────────────
+def _carga_calculo_mensual(empresa_id):
+    """Las lecturas de _render_planilla_tab antes de correr el motor."""
+    db = SessionLocal()
+    try:
+        assert cargar_parametros(db, empresa_id, PERIODO)
+        db.query(Empresa).filter_by(id=empresa_id).first()
+        df_trab = cargar_trabajadores_df(db, empresa_id, mes_calc=5, anio_calc=2026)
+        conceptos = db.query(Concepto).filter_by(empresa_id=empresa_id).all()
+        cargar_conceptos_df(db, empresa_id, conceptos)
+        df_var = cargar_variables_df(db, empresa_id, PERIODO, conceptos)
+        assert len(df_trab) == len(df_var)
+    finally:
+        db.close()
+
+
+def test_calculo_mensual_carga(sembrar_periodo, presupuesto_sql):
+    _comparar(presupuesto_sql, sembrar_periodo, 8, _carga_calculo_mensual)
+
+
+def test_calculo_mensual_contexto(sembrar_periodo, presupuesto_sql):
+    pytest.importorskip("streamlit")
+    from presentation.views.calculo_mensual import _cargar_contexto_calculo
+
+    def _cargar(empresa_id):
+        ctx = _cargar_contexto_calculo(empresa_id, PERIODO, 5, 2026)
+        assert ctx["cuotas_del_mes"] and ctx["notas_gestion_map"]
+
+    _comparar(presupuesto_sql, sembrar_periodo, 4, _cargar)
+
+
+# ── Emisión de boletas ────────────────────────────────────────────────────────
+def _carga_boletas(empresa_id):
+    """Las lecturas de emision_boletas._cargar_planilla_periodo."""
+    db = SessionLocal()
+    try:
+        assert obtener_planilla(db, empresa_id, PERIODO) is not None
+        trabajadores_boletas_df(db, empresa_id)
+        variables_periodo_df(db, empresa_id, PERIODO)
+    finally:
+        db.close()
+
+
+def test_boletas_carga(sembrar_periodo, presupuesto_sql):
+    _comparar(presupuesto_sql, sembrar_periodo, 4, _carga_boletas)
+
+
+def test_boletas_cargar_planilla_periodo(sembrar_periodo, presupuesto_sql):
+    pytest.importorskip("streamlit")
+    from presentation.views.emision_boletas import _cargar_planilla_periodo
+
+    def _cargar(empresa_id):
+        db = SessionLocal()
+        try:
+            df_res, _, df_trab, df_var = _cargar_planilla_periodo(db, empresa_id, PERIODO)
+        finally:
+            db.close()
+        assert len(df_res) - 1 == len(df_trab) == len(df_var)
+
+    _comparar(presupuesto_sql, sembrar_periodo, 4, _cargar)
+
+
+
+def test_boletas_envio_por_lotes(sembrar_periodo, presupuesto_sql, monkeypatch):
+    """Los logs de envío se escriben por lote (un INSERT y un UPDATE), no por correo."""
+    pytest.importorskip("streamlit")
+    import core.use_cases.envio_correos as envio_correos
+    import presentation.views.emision_boletas as emision
+    from infrastructure.database.models import LogEnvioBoleta, Trabajador
+
+    monkeypatch.setattr(emision, "_pdf_boleta", lambda *a, **k: b"%PDF")
+    monkeypatch.setattr(envio_correos, "enviar_boleta_por_correo",
+                        lambda correo, *a: True if not correo.startswith("x") else "SMTP caído")
+
+    n = 2 * emision.LOTE_ENVIO
+    empresa_id = sembrar_periodo(n)
+    db = SessionLocal()
+    try:
+        con_correo = pd.DataFrame(
+            [(t.num_doc, t.nombres, ("x" if i == 0 else "") + f"{t.num_doc}@correo.pe")
+             for i, t in enumerate(db.query(Trabajador).filter_by(empresa_id=empresa_id).order_by(Trabajador.id))],
+            columns=['Num. Doc.', 'Nombres y Apellidos', 'correo_electronico'],
+        )
+    finally:
+        db.close()
+
+    with presupuesto_sql(12, max_repeticiones=3):
+        exitos, errores = emision.enviar_boletas_periodo(
+            empresa_id, "EMPRESA", {}, PERIODO, "MAYO 2026", None, None, None, {}, con_correo)
+    assert (exitos, errores) == (n - 1, 1)
+
+    db = SessionLocal()
+    try:
+        logs = {correo: (estado, error) for correo, estado, error in db.query(
+            LogEnvioBoleta.correo_destino, LogEnvioBoleta.estado, LogEnvioBoleta.mensaje_error,
+        ).filter_by(empresa_id=empresa_id)}
+    finally:
+        db.close()
+    fallido = con_correo['correo_electronico'].iloc[0]
+    assert logs.pop(fallido) == ("ERROR", "SMTP caído")
+    assert len(logs) == n - 1 and set(logs.values()) == {("ENVIADO", None)}
+
+
+def test_envios_interrumpidos_pasan_a_error(sembrar_periodo):
+    from datetime import datetime, timedelta
+    from infrastructure.database.models import LogEnvioBoleta, Trabajador
+    from infrastructure.repositories.repo_planilla import MINUTOS_ENVIO_VENCIDO, cerrar_envios_interrumpidos
+
+    empresa_id = sembrar_periodo(2)
+    db = SessionLocal()
+    try:
+        t_id = db.query(Trabajador.id).filter_by(empresa_id=empresa_id).first()[0]
+        hace = datetime.now() - timedelta(minutes=MINUTOS_ENVIO_VENCIDO + 1)
+        colgado = LogEnvioBoleta(empresa_id=empresa_id, trabajador_id=t_id, periodo_key=PERIODO,
+                                 correo_destino="a@b.pe", estado="ENVIANDO", fecha_envio=hace)
+        en_curso = LogEnvioBoleta(empresa_id=empresa_id, trabajador_id=t_id, periodo_key=PERIODO,
+                                  correo_destino="a@b.pe", estado="ENVIANDO")
+        db.add_all([colgado, en_curso])
+        db.commit()
+
+        assert cerrar_envios_interrumpidos(db, empresa_id) == 1
+        db.commit()
+        db.refresh(colgado)
+        db.refresh(en_curso)
+        assert (colgado.estado, en_curso.estado) == ("ERROR", "ENVIANDO")
+    finally:
+        db.close()
+
+
+def test_sentencia_fallida_no_deja_inicio_pendiente(registro_sql):
+    from sqlalchemy import create_engine, text
+
+    motor = create_engine("sqlite://")
+    with motor.connect() as conn:
+        with pytest.raises(Exception):
+            conn.execute(text("SELECT * FROM no_existe"))
+        assert not conn.info.get("_t_sql")
+        conn.execute(text("SELECT 1"))
+    assert registro_sql.sentencias == 2
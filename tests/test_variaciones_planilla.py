@@ -0,0 +1,94 @@
+import io
+
+import pandas as pd
+
+from core.use_cases.variaciones_planilla import comparar_planillas, periodo_anterior
+from infrastructure.database.connection import SessionLocal
+from infrastructure.repositories.repo_planilla import cargar_planilla_guardada
+
+
+def _sabana(filas):
+    """filas: [(DNI, nombre, neto, quinta)] + fila TOTALES, como la arma el motor."""
+    df = pd.DataFrame(
+        [{"N°": i + 1, "DNI": d, "Apellidos y Nombres": n, "Sueldo Base": 2000.0,
+          "Ret. 5ta Cat.": q, "NETO A PAGAR": neto} for i, (d, n, neto, q) in enumerate(filas)]
+    )
+    totales = {"N°": "", "DNI": "", "Apellidos y Nombres": "TOTALES", "Sueldo Base": df["Sueldo Base"].sum(),
+               "Ret. 5ta Cat.": df["Ret. 5ta Cat."].sum(), "NETO A PAGAR": df["NETO A PAGAR"].sum()}
+    return pd.concat([df, pd.DataFrame([totales])], ignore_index=True)
+
+
+def _alertas(res) -> set:
+    return set(zip(res["alertas"]["DNI"], res["alertas"]["Alerta"]))
+
+
+def test_periodo_anterior():
+    assert periodo_anterior("01-2026") == "12-2025"
+    assert periodo_anterior("10-2026") == "09-2026"
+
+
+def test_dni_con_cero_inicial_leido_desde_json():
+    actual = _sabana([("07123456", "ANA", 1800.0, 0.0), ("40123456", "LUIS", 2500.0, 0.0)])
+    # Snapshot sin fila TOTALES leído con read_json sin dtype → DNI enteros (se pierde el 0 inicial)
+    anterior = pd.read_json(io.StringIO(actual.iloc[:-1].to_json(orient="records")), orient="records")
+    assert anterior["DNI"].iloc[0] == 7123456
+
+    res = comparar_planillas(actual, anterior)
+    assert res["alertas"].empty
+    assert res["deltas"].empty
+
+
+def test_nuevos_ausentes_y_saltos():
+    anterior = _sabana([
+        ("07000001", "ANA", 1800.0, 0.0), ("07000002", "LUIS", 2000.0, 50.0),
+        ("07000003", "CESADO", 1500.0, 0.0), ("07000004", "ESTABLE", 3000.0, 0.0),
+    ])
+    actual = _sabana([
+        ("07000001", "ANA", 2400.0, 0.0),        # +33% y +600 → NETO
+        ("07000002", "LUIS", 2050.0, 180.0),     # +130 de 5ta → 5TA
+        ("07000004", "ESTABLE", 3100.0, 0.0),    # +3%: sin alerta
+        ("07000005", "NUEVA", 1700.0, 0.0),
+    ])
+    res = comparar_planillas(actual, anterior)
+
+    assert _alertas(res) == {
+        ("07000001", "NETO"), ("07000002", "5TA"), ("07000003", "AUSENTE"), ("07000005", "NUEVO"),
+    }
+    fila_neto = res["alertas"].set_index("DNI").loc["07000001"]
+    assert fila_neto["Detalle"] == "Neto +33.3%" and fila_neto["Delta"] == 600.0
+    assert res["alertas"].set_index("DNI").loc["07000003", "Trabajador"] == "CESADO"
+
+
+def test_umbrales_editables():
+    anterior = _sabana([("07000001", "ANA", 1000.0, 0.0)])
+    actual = _sabana([("07000001", "ANA", 1250.0, 0.0)])   # +25% pero solo +250
+    assert comparar_planillas(actual, anterior)["alertas"].empty
+    assert _alertas(comparar_planillas(actual, anterior, {"neto_abs": 200.0})) == {("07000001", "NETO")}
+
+
+def test_deltas_y_totales_sin_fila_totales():
+    anterior = _sabana([("07000001", "ANA", 1000.0, 0.0), ("07000002", "LUIS", 2000.0, 0.0)])
+    actual = _sabana([("07000001", "ANA", 1100.0, 0.0), ("07000002", "LUIS", 2000.0, 0.0)])
+    res = comparar_planillas(actual, anterior)
+
+    assert res["deltas"][["DNI", "Concepto", "Delta"]].values.tolist() == [["07000001", "NETO A PAGAR", 100.0]]
+    totales = res["totales"].set_index("Concepto")
+    assert "TOTALES" not in set(res["deltas"]["Trabajador"])
+    assert totales.loc["NETO A PAGAR", "Anterior"] == 3000.0 and totales.loc["NETO A PAGAR", "Delta %"] == 3.3
+    assert totales.loc["Sueldo Base", "Delta"] == 0.0
+
+
+def test_sin_periodo_anterior_todos_nuevos():
+    actual = _sabana([("07000001", "ANA", 1000.0, 0.0), ("40000002", "LUIS", 2000.0, 0.0)])
+    res = comparar_planillas(actual, None)
+    assert res["alertas"]["Alerta"].tolist() == ["NUEVO", "NUEVO"]
+
+
+def test_planilla_guardada_conserva_dni_texto(sembrar_periodo):
+    empresa_id = sembrar_periodo(3)
+    db = SessionLocal()
+    try:
+        df, _ = cargar_planilla_guardada(db, empresa_id, "05-2026")
+    finally:
+        db.close()
+    assert df["DNI"].tolist()[:3] == ["07000000", "40000001", "40000002"]